@@ -55,9 +55,26 @@ def main() -> None:
         default=None,
         help="Path to parsed data directory",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse raw data in batches into a newline-delimited json file",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=64, help="Number of documents per parsing batch"
+    )
+    parser.add_argument(
+        "--num-workers", type=int, default=1, help="Number of parsing processes (with --stream)"
+    )
     args = parser.parse_args()
 
-    train = TrainSentiment(parse=not args.parsed_data, rerank_model=args.rerank_model)
+    train = TrainSentiment(
+        parse=not args.parsed_data,
+        rerank_model=args.rerank_model,
+        streaming=args.stream,
+        batch_size=args.batch_size,
+        num_workers=args.num_workers,
+    )
     opinion_lex, aspect_lex = train.run(data=args.data, parsed_data=args.parsed_data)
 
     print("Aspect Lexicon: {}\n".format(aspect_lex) + "=" * 40 + "\n")
@@ -17,7 +17,7 @@ import argparse
 import logging
 
 from nlp_architect.models.np2vec import NP2vec
-from nlp_architect.utils.io import validate_existing_filepath, check_size
+from nlp_architect.utils.io import validate_existing_path, check_size
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +26,9 @@ if __name__ == "__main__":
     arg_parser.add_argument(
         "--np2vec_model_file",
         default="conll2000.train.model",
-        help="path to the file with the np2vec model to load.",
-        type=validate_existing_filepath,
+        help="path to the file with the np2vec model to load (or the directory of a model in "
+        "the serving format).",
+        type=validate_existing_path,
     )
     arg_parser.add_argument(
         "--binary",
@@ -0,0 +1,56 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+"""
+Convert a np2vec model saved in word2vec format to the memory-mapped serving format.
+"""
+
+import argparse
+import logging
+
+from nlp_architect.models.np2vec import NP2vec, save_normalized_vectors
+from nlp_architect.utils.io import validate_existing_filepath
+
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(__doc__)
+    arg_parser.add_argument(
+        "--np2vec_model_file",
+        required=True,
+        help="path to the file with the np2vec model to convert.",
+        type=validate_existing_filepath,
+    )
+    arg_parser.add_argument(
+        "--binary",
+        help="boolean indicating whether the model to convert has been stored in binary format.",
+        action="store_true",
+    )
+    arg_parser.add_argument(
+        "--model_dir", required=True, help="directory of the model in the serving format."
+    )
+    arg_parser.add_argument(
+        "--dtype",
+        default="float32",
+        choices=["float32", "float16"],
+        help="dtype of the vectors in the serving format.",
+    )
+    args = arg_parser.parse_args()
+
+    np2vec_model = NP2vec.load(args.np2vec_model_file, binary=args.binary)
+    save_normalized_vectors(
+        np2vec_model.index2word, np2vec_model.vectors, args.model_dir, dtype=args.dtype
+    )
+    logger.info("saved %d vectors to %s", len(np2vec_model.index2word), args.model_dir)
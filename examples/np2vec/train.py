@@ -194,6 +194,18 @@ if __name__ == "__main__":
         help="fasttext training hyperparameter. If 1, uses enrich word vectors with subword ("
         "ngrams) information. If 0, this is equivalent to word2vec training.",
     )
+    arg_parser.add_argument(
+        "--serving_format",
+        action="store_true",
+        help="save the normalized NP vectors in the memory-mapped serving format, "
+        "np2vec_model_file is then a directory.",
+    )
+    arg_parser.add_argument(
+        "--dtype",
+        default="float32",
+        choices=["float32", "float16"],
+        help="dtype of the vectors in the serving format.",
+    )
 
     args = arg_parser.parse_args()
 
@@ -222,4 +234,9 @@ if __name__ == "__main__":
         args.word_ngrams,
     )
 
-    np2vec.save(args.np2vec_model_file, args.binary)
+    np2vec.save(
+        args.np2vec_model_file,
+        args.binary,
+        serving_format=args.serving_format,
+        dtype=args.dtype,
+    )
@@ -43,3 +43,15 @@ class BistParserApi(AbstractApi):
             CoreNLPDoc: the parser's response hosted in CoreNLPDoc object
         """
         return self.model.parse(doc)
+
+    def batch_inference(self, docs):
+        """
+        Parse a batch of documents according to SpacyBISTParser's model
+
+        Args:
+            docs (list of str): the doc strs
+
+        Returns:
+            list of CoreNLPDoc: the parser's responses hosted in CoreNLPDoc objects
+        """
+        return self.model.parse_batch(docs)
@@ -20,7 +20,7 @@ from os import makedirs, path, sys
 from nlp_architect.api.abstract_api import AbstractApi
 from nlp_architect.models.intent_extraction import MultiTaskIntentModel, Seq2SeqIntentModel
 from nlp_architect import LIBRARY_OUT
-from nlp_architect.utils.generic import pad_sentences
+from nlp_architect.utils.generic import pad_sentences, words_to_char_ids
 from nlp_architect.utils.io import download_unlicensed_file
 from nlp_architect.utils.text import SpacyInstance, bio_to_spans
 
@@ -136,6 +136,49 @@ class IntentExtractionApi(AbstractApi):
             print("{}\t{}\t".format(t, n))
         return self.display_results(text_arr, tag_str, intent_type)
 
+    def batch_inference(self, docs, batch_size=64):
+        """
+        Run inference on a batch of documents. Documents are tokenized with spacy's
+        `pipe` and documents of the same length are vectorized and predicted together
+        in a single model call (LSTM outputs depend on padding, so documents are not
+        padded to a common length).
+
+        Args:
+            docs (list of str): input documents
+            batch_size (int, optional): spacy pipe and model prediction batch size
+
+        Returns:
+            list: per-document results, identical to `inference` of each document
+        """
+        texts = (" ".join(doc.strip().split()) for doc in docs)
+        tokenized = [
+            [t.text for t in doc] for doc in self.nlp.parser.pipe(texts, batch_size=batch_size)
+        ]
+        by_length = {}
+        for i, text_arr in enumerate(tokenized):
+            by_length.setdefault(len(text_arr), []).append(i)
+
+        results = [None] * len(tokenized)
+        for length, indices in by_length.items():
+            words = [w for i in indices for w in tokenized[i]]
+            word_ids = np.asarray(
+                [self.word_vocab[w] if w in self.word_vocab else 1 for w in map(str.lower, words)],
+                dtype=np.int64,
+            ).reshape(len(indices), length)
+            intent_types = [None] * len(indices)
+            if self.model_type == "mtl":
+                char_ids = words_to_char_ids(
+                    words, self.char_vocab, self.model.word_length
+                ).reshape(len(indices), length, self.model.word_length)
+                intents, tags = self.model.predict([word_ids, char_ids], batch_size=batch_size)
+                intent_types = [self.intent_vocab.get(int(n), None) for n in intents.argmax(1)]
+            else:
+                tags = self.model.predict(word_ids, batch_size=batch_size)
+            for i, doc_tags, intent_type in zip(indices, tags.argmax(2), intent_types):
+                tag_str = [self.tags_vocab.get(n, None) for n in doc_tags]
+                results[i] = self.display_results(tokenized[i], tag_str, intent_type)
+        return results
+
     def load_model(self):
         with open(IntentExtractionApi.pretrained_model_info, "rb") as fp:
             model_info = pickle.load(fp)
@@ -21,7 +21,7 @@ import numpy as np
 from nlp_architect.api.abstract_api import AbstractApi
 from nlp_architect.models.ner_crf import NERCRF
 from nlp_architect import LIBRARY_OUT
-from nlp_architect.utils.generic import pad_sentences
+from nlp_architect.utils.generic import pad_sentences, words_to_char_ids
 from nlp_architect.utils.io import download_unlicensed_file
 from nlp_architect.utils.text import SpacyInstance, bio_to_spans
 
@@ -140,3 +140,44 @@ class NerApi(AbstractApi):
         doc_ner = self.model.predict(inputs, batch_size=1).argmax(2).flatten()
         tags = [self.y_vocab.get(n, None) for n in doc_ner]
         return self.pretty_print(text_arr, tags)
+
+    def batch_inference(self, docs, batch_size=64):
+        """
+        Run inference on a batch of documents. Documents are tokenized with spacy's
+        `pipe` and documents of the same length are vectorized and predicted together
+        in a single model call (bi-LSTM outputs depend on padding, so documents are not
+        padded to a common length).
+
+        Args:
+            docs (list of str): input documents
+            batch_size (int, optional): spacy pipe and model prediction batch size
+
+        Returns:
+            list: per-document results, identical to `inference` of each document
+        """
+        texts = (" ".join(doc.strip().split()) for doc in docs)
+        tokenized = [
+            [t.text for t in doc] for doc in self.nlp.parser.pipe(texts, batch_size=batch_size)
+        ]
+        by_length = {}
+        for i, text_arr in enumerate(tokenized):
+            by_length.setdefault(len(text_arr), []).append(i)
+
+        results = [None] * len(tokenized)
+        for length, indices in by_length.items():
+            words = [w for i in indices for w in tokenized[i]]
+            word_ids = np.asarray(
+                [self.word_vocab[w] if w in self.word_vocab else 1 for w in map(str.lower, words)],
+                dtype=np.int64,
+            ).reshape(len(indices), length)
+            char_ids = words_to_char_ids(words, self.char_vocab, self.model.word_length).reshape(
+                len(indices), length, self.model.word_length
+            )
+            seq_len = np.full((len(indices), 1), length)
+            # pylint: disable=no-member
+            doc_ner = self.model.predict([word_ids, char_ids, seq_len], batch_size=batch_size)
+            doc_ner = doc_ner.argmax(2)
+            for i, doc_tags in zip(indices, doc_ner):
+                tags = [self.y_vocab.get(n, None) for n in doc_tags]
+                results[i] = self.pretty_print(tokenized[i], tags)
+        return results
@@ -0,0 +1,390 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+"""Columnar on-disk storage of parsed (CoreNLPDoc) corpora"""
+
+import json
+from array import array
+from collections.abc import Mapping
+from os import PathLike, listdir
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+from nlp_architect.common.core_nlp_doc import CoreNLPDoc
+
+CORPUS_META_FILE = "corpus.json"
+CORPUS_FORMAT = "core_nlp_corpus"
+CORPUS_VERSION = 1
+
+# token fields stored as integer columns, other fields are strings stored as ids of a
+# string table (-1 for tokens without the field)
+INT_FIELDS = {"start": "int64", "len": "int32", "gov": "int32"}
+STR_FIELDS = ("text", "lemma", "pos", "ner", "rel")
+_ARRAY_TYPECODES = {"int64": "q", "int32": "i"}
+_FLUSH_SIZE = 1 << 20
+
+
+class _Column(object):
+    """Append-only binary column file, buffered in memory"""
+
+    def __init__(self, path: Path, dtype: str):
+        self.file = open(path, "wb")
+        self.dtype = dtype
+        self.buffer = array(_ARRAY_TYPECODES[dtype])
+        self.size = 0
+
+    def append(self, value: int):
+        self.buffer.append(value)
+        self.size += 1
+        if len(self.buffer) >= _FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.file.write(np.asarray(self.buffer, dtype=self.dtype).tobytes())
+        del self.buffer[:]
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class _StringColumn(object):
+    """Append-only column of strings: a utf-8 blob file and an offsets column"""
+
+    def __init__(self, directory: Path, name: str):
+        self.file = open(directory / (name + ".bin"), "wb")
+        self.offsets = _Column(directory / (name + "_offsets.bin"), "int64")
+        self.offset = 0
+        self.offsets.append(0)
+
+    def append(self, value: str):
+        data = value.encode("utf-8")
+        self.file.write(data)
+        self.offset += len(data)
+        self.offsets.append(self.offset)
+
+    def close(self):
+        self.file.close()
+        self.offsets.close()
+
+
+def _memmap(path: Path, dtype: str, size: int) -> np.ndarray:
+    if size == 0:
+        return np.zeros(0, dtype=dtype)
+    # a plain ndarray view of the memory map, slicing np.memmap objects is slow
+    return np.memmap(path, dtype=dtype, mode="r", shape=(size,)).view(np.ndarray)
+
+
+class _StringReader(object):
+    """Random access to a memory-mapped string column"""
+
+    def __init__(self, directory: Path, name: str, size: int):
+        blob_path = directory / (name + ".bin")
+        blob_size = blob_path.stat().st_size
+        self.blob = _memmap(blob_path, "uint8", blob_size)
+        self.offsets = _memmap(directory / (name + "_offsets.bin"), "int64", size + 1)
+        self.size = size
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i] : self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __len__(self):
+        return self.size
+
+    def all(self) -> list:
+        data = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        return [data[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(self.size)]
+
+
+class CoreNLPCorpusWriter(object):
+    """Writes parsed documents to a columnar corpus directory (see `CoreNLPCorpus`), one
+    document at a time.
+
+    Args:
+        path (str or PathLike): the corpus directory (created if needed).
+    """
+
+    def __init__(self, path: Union[str, PathLike]):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.doc_sents = _Column(self.path / "doc_offsets.bin", "int64")
+        self.sent_toks = _Column(self.path / "sent_offsets.bin", "int64")
+        self.doc_sents.append(0)
+        self.sent_toks.append(0)
+        self.doc_ids = _StringColumn(self.path, "doc_ids")
+        self.doc_texts = _StringColumn(self.path, "doc_texts")
+        self.columns = {}
+        self.fields = []
+        # fields missing in some tokens
+        self.optional_fields = set()
+        self.strings = {}
+        self.num_sents = 0
+        self.num_toks = 0
+        self.closed = False
+
+    def _column(self, field: str) -> _Column:
+        column = self.columns.get(field)
+        if column is None:
+            if field not in INT_FIELDS and field not in STR_FIELDS:
+                raise ValueError("unsupported token field {}".format(field))
+            if self.num_toks > 0 and field in INT_FIELDS:
+                raise ValueError("token field {} missing in previous tokens".format(field))
+            column = _Column(self.path / (field + ".bin"), INT_FIELDS.get(field, "int32"))
+            # tokens written so far do not have the field
+            for _ in range(self.num_toks):
+                column.append(-1)
+            if self.num_toks > 0:
+                self.optional_fields.add(field)
+            self.columns[field] = column
+            self.fields.append(field)
+        return column
+
+    def _string_id(self, value: str) -> int:
+        string_id = self.strings.get(value)
+        if string_id is None:
+            string_id = self.strings[value] = len(self.strings)
+        return string_id
+
+    def add(self, doc_id: str, doc: CoreNLPDoc):
+        """Write a document.
+
+        Args:
+            doc_id (str): document id, unique in the corpus.
+            doc (CoreNLPDoc): the parsed document.
+        """
+        self.doc_ids.append(str(doc_id))
+        self.doc_texts.append(doc.doc_text or "")
+        for sentence in doc.sentences:
+            for tok in sentence:
+                for field in tok:
+                    self._column(field)
+                for field, column in self.columns.items():
+                    value = tok.get(field)
+                    if field in INT_FIELDS:
+                        if value is None:
+                            raise ValueError("token field {} missing".format(field))
+                        column.append(int(value))
+                    elif value is None:
+                        column.append(-1)
+                        self.optional_fields.add(field)
+                    else:
+                        column.append(self._string_id(value))
+                self.num_toks += 1
+            self.num_sents += 1
+            self.sent_toks.append(self.num_toks)
+        self.doc_sents.append(self.num_sents)
+
+    def close(self):
+        """Write the string table and the corpus metadata."""
+        if self.closed:
+            return
+        self.closed = True
+        strings = _StringColumn(self.path, "strings")
+        for value in self.strings:
+            strings.append(value)
+        strings.close()
+        for column in (self.doc_sents, self.sent_toks, self.doc_ids, self.doc_texts):
+            column.close()
+        for column in self.columns.values():
+            column.close()
+        meta = {
+            "format": CORPUS_FORMAT,
+            "version": CORPUS_VERSION,
+            "num_docs": self.doc_sents.size - 1,
+            "num_sentences": self.num_sents,
+            "num_tokens": self.num_toks,
+            "num_strings": len(self.strings),
+            "fields": self.fields,
+            "optional_fields": sorted(self.optional_fields),
+        }
+        with open(self.path / CORPUS_META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=4)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CoreNLPCorpus(Mapping):
+    """Memory-mapped columnar corpus of parsed documents.
+
+    The corpus directory holds a column per token field (start, len and gov as integers,
+    text, lemma, pos, ner and rel as ids of a string table), sentence offsets into the token
+    columns and document offsets into the sentence offsets, and the document ids and
+    texts. Columns are memory-mapped, documents are decoded on access into `CoreNLPDoc`
+    objects equal to the documents written.
+
+    The corpus is a mapping from document id to document, iterating ids in the order the
+    documents were written.
+
+    Args:
+        path (str or PathLike): the corpus directory.
+    """
+
+    def __init__(self, path: Union[str, PathLike]):
+        self.path = Path(path)
+        with open(self.path / CORPUS_META_FILE, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != CORPUS_FORMAT or meta.get("version") != CORPUS_VERSION:
+            raise ValueError("{} is not a version {} corpus".format(path, CORPUS_VERSION))
+        self.num_docs = meta["num_docs"]
+        self.num_sentences = meta["num_sentences"]
+        self.num_tokens = meta["num_tokens"]
+        self.fields = meta["fields"]
+        self.optional_fields = set(meta["optional_fields"])
+        self.doc_offsets = _memmap(self.path / "doc_offsets.bin", "int64", self.num_docs + 1)
+        self.sent_offsets = _memmap(self.path / "sent_offsets.bin", "int64", self.num_sentences + 1)
+        self.columns = {
+            field: _memmap(
+                self.path / (field + ".bin"), INT_FIELDS.get(field, "int32"), self.num_tokens
+            )
+            for field in self.fields
+        }
+        self.doc_texts = _StringReader(self.path, "doc_texts", self.num_docs)
+        self.ids = _StringReader(self.path, "doc_ids", self.num_docs).all()
+        self._id_index = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._strings = _StringReader(self.path, "strings", meta["num_strings"])
+        self._string_values = None
+
+    @staticmethod
+    def is_corpus(path: Union[str, PathLike]) -> bool:
+        """Whether path is a corpus directory."""
+        return (Path(path) / CORPUS_META_FILE).is_file()
+
+    @property
+    def strings(self) -> list:
+        """The string table, decoded on first use."""
+        if self._string_values is None:
+            self._string_values = self._strings.all()
+        return self._string_values
+
+    def __getitem__(self, doc_id: str) -> CoreNLPDoc:
+        return self.doc(self._id_index[doc_id])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._id_index
+
+    def doc(self, index: int) -> CoreNLPDoc:
+        """Decode the document at an index.
+
+        Args:
+            index (int): document index, in the order documents were written.
+
+        Returns:
+            CoreNLPDoc: the document.
+        """
+        first_sent, last_sent = self.doc_offsets[index], self.doc_offsets[index + 1]
+        sent_offsets = self.sent_offsets[first_sent : last_sent + 1].tolist()
+        first_tok, last_tok = sent_offsets[0], sent_offsets[-1]
+        strings = self.strings
+        columns = []
+        for field in self.fields:
+            column = self.columns[field][first_tok:last_tok].tolist()
+            if field not in INT_FIELDS:
+                column = [strings[i] if i >= 0 else None for i in column]
+            columns.append(column)
+        tokens = [dict(zip(self.fields, values)) for values in zip(*columns)]
+        if self.optional_fields:
+            tokens = [{k: v for k, v in tok.items() if v is not None} for tok in tokens]
+        sentences = [
+            tokens[sent_start - first_tok : sent_end - first_tok]
+            for sent_start, sent_end in zip(sent_offsets, sent_offsets[1:])
+        ]
+        return CoreNLPDoc(self.doc_texts[index], sentences)
+
+    def docs(self) -> Iterator[Tuple[str, CoreNLPDoc]]:
+        """Lazily iterate (document id, document) pairs."""
+        for i, doc_id in enumerate(self.ids):
+            yield doc_id, self.doc(i)
+
+    @staticmethod
+    def write(path: Union[str, PathLike], docs: Iterable[Tuple[str, CoreNLPDoc]]):
+        """Write documents to a corpus directory.
+
+        Args:
+            path (str or PathLike): the corpus directory.
+            docs (iterable of (str, CoreNLPDoc)): document ids and documents.
+
+        Returns:
+            CoreNLPCorpus: the written corpus.
+        """
+        with CoreNLPCorpusWriter(path) as writer:
+            for doc_id, doc in docs:
+                writer.add(doc_id, doc)
+        return CoreNLPCorpus(path)
+
+    @staticmethod
+    def from_json_dir(json_dir: Union[str, PathLike], path: Union[str, PathLike]):
+        """Convert a directory of parsed documents json files (`CoreNLPDoc.pretty_json`,
+        document id is the file name) and ndjson files (a {"id": ..., "doc": ...} record
+        per line) to a corpus.
+
+        Args:
+            json_dir (str or PathLike): the parsed documents directory.
+            path (str or PathLike): the corpus directory.
+
+        Returns:
+            CoreNLPCorpus: the written corpus.
+        """
+        return CoreNLPCorpus.write(path, iter_json_dir(json_dir))
+
+    def to_json_dir(self, json_dir: Union[str, PathLike]):
+        """Write the documents as json files (`CoreNLPDoc.pretty_json`) named by their ids, with
+        a .json suffix added to ids without a .json or .txt suffix (e.g. ndjson document ids) so
+        the files are read back as parsed documents.
+
+        Args:
+            json_dir (str or PathLike): output directory.
+        """
+        json_dir = Path(json_dir)
+        json_dir.mkdir(parents=True, exist_ok=True)
+        for doc_id, doc in self.docs():
+            if not (doc_id.endswith(".json") or doc_id.endswith(".txt")):
+                doc_id += ".json"
+            with open(json_dir / doc_id, "w", encoding="utf-8") as f:
+                f.write(doc.pretty_json())
+
+
+def iter_json_dir(json_dir: Union[str, PathLike]) -> Iterator[Tuple[str, CoreNLPDoc]]:
+    """Lazily iterate the parsed documents of a directory of json and ndjson files.
+
+    Args:
+        json_dir (str or PathLike): the parsed documents directory.
+
+    Yields:
+        (str, CoreNLPDoc): document id and document.
+    """
+    json_dir = Path(json_dir)
+    for file_name in sorted(listdir(json_dir)):
+        if file_name.endswith(".ndjson"):
+            with open(json_dir / file_name, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line, object_hook=CoreNLPDoc.decoder)
+                        yield record["id"], record["doc"]
+        elif file_name.endswith(".txt") or file_name.endswith(".json"):
+            with open(json_dir / file_name, encoding="utf-8") as f:
+                yield file_name, json.loads(f.read(), object_hook=CoreNLPDoc.decoder)
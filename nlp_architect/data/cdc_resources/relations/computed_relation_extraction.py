@@ -16,7 +16,7 @@
 import difflib
 import logging
 import sys
-from typing import List, Set
+from typing import List, Optional, Set, Tuple
 
 from nlp_architect.common.cdc.mention_data import MentionDataLight
 from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
@@ -110,6 +110,45 @@ class ComputedRelationExtraction(RelationExtraction):
 
         return RelationType.NO_RELATION_FOUND
 
+    def get_blocking_keys(
+        self, mention: MentionDataLight, relation: RelationType
+    ) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys of a mention (see `RelationExtraction.get_blocking_keys`): the lower
+        cased string for EXACT_STRING, the head lemma for SAME_HEAD_LEMMA and the head
+        (probe) and tokens (keys) for FUZZY_HEAD_FIT. FUZZY_FIT cannot be blocked.
+
+        Args:
+            mention: MentionDataLight
+            relation: RelationType
+
+        Returns:
+            Tuple[Set, Set]: keys and probes of the mention, or None
+        """
+        if relation == RelationType.FUZZY_FIT:
+            return None
+        mention_str = mention.tokens_str
+        if StringUtils.is_pronoun(mention_str.lower()):
+            return set(), set()
+
+        if relation == RelationType.EXACT_STRING:
+            if StringUtils.is_preposition(mention_str.lower()):
+                return set(), set()
+            keys = {mention_str.lower()}
+            return keys, keys
+        if relation == RelationType.SAME_HEAD_LEMMA:
+            head_lemma = mention.mention_head_lemma
+            if StringUtils.is_preposition(head_lemma) or StringUtils.is_determiner(head_lemma):
+                return set(), set()
+            keys = {head_lemma}
+            return keys, keys
+        if relation == RelationType.FUZZY_HEAD_FIT:
+            if StringUtils.is_preposition(mention.mention_head_lemma.lower()):
+                return set(), set()
+            return set(mention_str.split()), {mention.mention_head}
+
+        return set(), set()
+
     @staticmethod
     def extract_same_head_lemma(
         mention_x: MentionDataLight, mention_y: MentionDataLight
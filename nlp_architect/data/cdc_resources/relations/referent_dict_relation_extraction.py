@@ -16,10 +16,13 @@
 
 import logging
 import os
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from nlp_architect.common.cdc.mention_data import MentionDataLight
-from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
+from nlp_architect.data.cdc_resources.relations.relation_extraction import (
+    RelationExtraction,
+    resource_fingerprint,
+)
 from nlp_architect.data.cdc_resources.relations.relation_types_enums import (
     OnlineOROfflineMethod,
     RelationType,
@@ -52,6 +55,7 @@ class ReferentDictRelationExtraction(RelationExtraction):
         else:
             raise FileNotFoundError("Referent Dict file not found or not in path:" + ref_dict)
 
+        self.cache_config = {"method": method, "ref_dict": resource_fingerprint(ref_dict)}
         super(ReferentDictRelationExtraction, self).__init__()
 
     def extract_all_relations(
@@ -91,6 +95,31 @@ class ReferentDictRelationExtraction(RelationExtraction):
 
         return RelationType.NO_RELATION_FOUND
 
+    def get_blocking_keys(
+        self, mention: MentionDataLight, relation: RelationType
+    ) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys of a mention (see `RelationExtraction.get_blocking_keys`): the head
+        and head lemma (keys) and their referent dictionary entries (probes)
+
+        Args:
+            mention: MentionDataLight
+            relation: RelationType
+
+        Returns:
+            Tuple[Set, Set]: keys and probes of the mention
+        """
+        if relation is not RelationType.REFERENT_DICT or StringUtils.is_pronoun(
+            mention.tokens_str.lower()
+        ):
+            return set(), set()
+        keys = {mention.mention_head, mention.mention_head_lemma}
+        probes = set()
+        for key in keys:
+            if key in self.ref_dict:
+                probes.update(self.ref_dict[key])
+        return keys, probes
+
     def is_referent_dict(self, mention_x: MentionDataLight, mention_y: MentionDataLight) -> bool:
         """
         Check if input mentions has referent dictionary relation between them
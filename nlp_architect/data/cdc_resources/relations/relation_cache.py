@@ -0,0 +1,179 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from nlp_architect.data.cdc_resources.relations.relation_types_enums import RelationType
+from nlp_architect.utils.io import load_json_file
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str, str]
+
+
+class RelationCache(object):
+    def __init__(self, max_size: int = 1000000, cache_file: str = None):
+        """
+        Bounded (least recently used entries are evicted) cache of mention pair relation
+        extraction results, shared by relation extractors (see
+        `RelationExtraction.extract_relation`) and sieves.
+
+        Entries are keyed by the extractor name, the relation and the cache keys of the
+        two mentions (see `RelationExtraction.get_mention_cache_key`). Extractors register
+        the fingerprint of their resources and configuration (see
+        `RelationExtraction.get_cache_fingerprint`), which is saved with the entries. Loaded
+        entries of an extractor registered with a different fingerprint are discarded.
+
+        Args:
+            max_size: maximal number of cached relations
+            cache_file (optional): json file to load the cache from (if exists) and save it to
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.cache_file = cache_file
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+        self._fingerprints = {}
+        if cache_file is not None and os.path.isfile(cache_file):
+            self.load(cache_file)
+
+    def register(self, extractor_name: str, fingerprint: str) -> None:
+        """
+        Set the fingerprint of an extractor, its cached entries are discarded (with a
+        warning) if they were cached with another (or no) fingerprint
+
+        Args:
+            extractor_name: the extractor name (first element of the cache keys)
+            fingerprint: the extractor resources and configuration fingerprint
+        """
+        if self._fingerprints.get(extractor_name) != fingerprint:
+            stale = [key for key in self._cache if key[0] == extractor_name]
+            if stale:
+                logger.warning(
+                    "discarding %d cached relations of %s, cached with different resources "
+                    "or configuration",
+                    len(stale),
+                    extractor_name,
+                )
+                for key in stale:
+                    del self._cache[key]
+        self._fingerprints[extractor_name] = fingerprint
+
+    def get(self, key: CacheKey) -> Optional[RelationType]:
+        """
+        Args:
+            key: (extractor name, relation name, mention x key, mention y key)
+
+        Returns:
+            RelationType: the cached relation, or None if not cached
+        """
+        relation = self._cache.get(key)
+        if relation is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return relation
+
+    def put(self, key: CacheKey, relation: RelationType) -> None:
+        """
+        Args:
+            key: (extractor name, relation name, mention x key, mention y key)
+            relation: the extracted relation
+        """
+        self._cache[key] = relation
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: number of hits, misses and evictions, hit rate and cache size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._cache),
+        }
+
+    def save(self, cache_file: str = None) -> None:
+        """
+        Save the cache entries and the extractor fingerprints to a json file
+
+        Args:
+            cache_file (optional): the file, default to the cache_file given at init
+        """
+        cache_file = cache_file or self.cache_file
+        if cache_file is None:
+            raise ValueError("no cache file given")
+        entries = [list(key) + [relation.name] for key, relation in self._cache.items()]
+        with open(cache_file, "w") as out:
+            json.dump({"fingerprints": self._fingerprints, "entries": entries}, out)
+        logger.info("saved %d cached relations to %s", len(entries), cache_file)
+
+    def load(self, cache_file: str) -> None:
+        """
+        Load cache entries from a json file (saved with `save`), entries beyond max_size
+        are evicted. Entries of extractors already registered with a different fingerprint
+        are discarded.
+
+        Args:
+            cache_file: the file
+        """
+        data = load_json_file(cache_file)
+        if not isinstance(data, dict) or "fingerprints" not in data:
+            logger.warning("discarding relation cache file without fingerprints: %s", cache_file)
+            return
+        file_fingerprints = data["fingerprints"]
+        stale = {
+            name
+            for name, fingerprint in self._fingerprints.items()
+            if file_fingerprints.get(name) != fingerprint
+        }
+        for name, fingerprint in file_fingerprints.items():
+            self._fingerprints.setdefault(name, fingerprint)
+        num_stale = 0
+        for entry in data["entries"]:
+            if entry[0] in stale:
+                num_stale += 1
+            else:
+                self.put(tuple(entry[:4]), RelationType[entry[4]])
+        if num_stale:
+            logger.warning(
+                "discarded %d relations of %s from %s, cached with different resources or "
+                "configuration",
+                num_stale,
+                ", ".join(sorted(stale)),
+                cache_file,
+            )
+        logger.info("loaded %d cached relations from %s", len(self._cache), cache_file)
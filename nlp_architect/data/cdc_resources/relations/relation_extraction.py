@@ -13,21 +13,81 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ******************************************************************************
-from typing import List
+import hashlib
+import json
+import os
+from typing import List, Optional, Set, Tuple
 
 from nlp_architect.common.cdc.mention_data import MentionDataLight
 from nlp_architect.data.cdc_resources.relations.relation_types_enums import RelationType
 
 
+def resource_fingerprint(resource_path: str) -> Optional[dict]:
+    """
+    Identify a resource file or directory by its path, size and modification time (of each
+    file of a directory), without reading it
+
+    Args:
+        resource_path: the file or directory, may be None
+
+    Returns:
+        dict: the resource path and file stats, or None if no path was given
+    """
+    if resource_path is None:
+        return None
+    resource_path = os.path.abspath(resource_path)
+    if os.path.isdir(resource_path):
+        paths = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(resource_path) for name in names
+        )
+    else:
+        paths = [resource_path] if os.path.exists(resource_path) else []
+    files = []
+    for file_path in paths:
+        stat = os.stat(file_path)
+        files.append([os.path.relpath(file_path, resource_path), stat.st_size, stat.st_mtime])
+    return {"path": resource_path, "files": files}
+
+
 class RelationExtraction(object):
+    # optional RelationCache of extract_relation results (see set_relation_cache)
+    relation_cache = None
+    # the resources and parameters the extracted relations depend on, set by extractors
+    # (see get_cache_fingerprint)
+    cache_config = None
+
     def __init__(self):
         pass
 
+    def set_relation_cache(self, relation_cache) -> None:
+        """
+        Cache the relations extracted by `extract_relation`
+
+        Args:
+            relation_cache: RelationCache (can be shared by several extractors) or None
+        """
+        self.relation_cache = relation_cache
+        if relation_cache is not None:
+            relation_cache.register(type(self).__name__, self.get_cache_fingerprint())
+
+    def get_cache_fingerprint(self) -> str:
+        """
+        Fingerprint of the extractor resources and configuration (cache_config), relations
+        cached with a different fingerprint are not used
+
+        Returns:
+            str: the fingerprint
+        """
+        config = {"extractor": type(self).__name__, "config": self.cache_config}
+        config_json = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha1(config_json.encode("utf-8")).hexdigest()
+
     def extract_relation(
         self, mention_x: MentionDataLight, mention_y: MentionDataLight, relation: RelationType
     ) -> RelationType:
         """
-        Base Class Check if Sub class support given relation before executing the sub class
+        Base Class Check if Sub class support given relation before executing the sub class,
+        results are cached in relation_cache (if set) by the mentions cache keys
 
         Args:
             mention_x: MentionDataLight
@@ -40,14 +100,68 @@ class RelationExtraction(object):
         """
         ret_relation = RelationType.NO_RELATION_FOUND
         if relation in self.get_supported_relations():
-            ret_relation = self.extract_sub_relations(mention_x, mention_y, relation)
+            if self.relation_cache is None:
+                return self.extract_sub_relations(mention_x, mention_y, relation)
+            key = (
+                type(self).__name__,
+                relation.name,
+                self.get_mention_cache_key(mention_x),
+                self.get_mention_cache_key(mention_y),
+            )
+            ret_relation = self.relation_cache.get(key)
+            if ret_relation is None:
+                ret_relation = self.extract_sub_relations(mention_x, mention_y, relation)
+                self.relation_cache.put(key, ret_relation)
         return ret_relation
 
+    def get_mention_cache_key(self, mention: MentionDataLight) -> str:
+        """
+        Key of a mention in the relation cache, mentions with the same key must have the
+        same relations. The default key is made of the mention string, head, head lemma and
+        NER, extractors using other mention attributes override it.
+
+        Args:
+            mention: MentionDataLight
+
+        Returns:
+            str: the mention cache key
+        """
+        return "\t".join(
+            str(attr) if attr is not None else ""
+            for attr in (
+                mention.tokens_str,
+                mention.mention_head,
+                mention.mention_head_lemma,
+                mention.mention_ner,
+            )
+        )
+
     def extract_sub_relations(
         self, mention_x: MentionDataLight, mention_y: MentionDataLight, relation: RelationType
     ) -> RelationType:
         raise NotImplementedError
 
+    def get_blocking_keys(
+        self, mention: MentionDataLight, relation: RelationType
+    ) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys of a mention, used to find the mentions that can possibly have the
+        given relation with it without running the relation extraction on every pair.
+
+        Two mentions x, y can have the relation only if the probes of one of them
+        intersect the keys of the other (probes(x) & keys(y) or probes(y) & keys(x)),
+        mentions with empty keys and probes cannot have the relation with any mention.
+
+        Args:
+            mention: MentionDataLight
+            relation: RelationType
+
+        Returns:
+            Tuple[Set, Set]: keys and probes of the mention, or None if the relation cannot
+                be blocked (the mention may have the relation with any other mention)
+        """
+        return None
+
     @staticmethod
     def get_supported_relations() -> List[RelationType]:
         raise NotImplementedError
@@ -16,10 +16,13 @@
 
 import logging
 import os
-from typing import Dict, Set
+from typing import Dict, Optional, Set, Tuple
 
 from nlp_architect.common.cdc.mention_data import MentionDataLight
-from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
+from nlp_architect.data.cdc_resources.relations.relation_extraction import (
+    RelationExtraction,
+    resource_fingerprint,
+)
 from nlp_architect.data.cdc_resources.relations.relation_types_enums import (
     RelationType,
     OnlineOROfflineMethod,
@@ -51,6 +54,7 @@ class VerboceanRelationExtraction(RelationExtraction):
             logger.info("Verb Ocean module lead successfully")
         else:
             raise FileNotFoundError("VerbOcean file not found or not in path..")
+        self.cache_config = {"method": method, "vo_file": resource_fingerprint(vo_file)}
         super(VerboceanRelationExtraction, self).__init__()
 
     def extract_all_relations(
@@ -90,6 +94,32 @@ class VerboceanRelationExtraction(RelationExtraction):
 
         return RelationType.NO_RELATION_FOUND
 
+    def get_blocking_keys(
+        self, mention: MentionDataLight, relation: RelationType
+    ) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys of a mention (see `RelationExtraction.get_blocking_keys`): the
+        head (key) and the heads it has a VerbOcean relation with (probes)
+
+        Args:
+            mention: MentionDataLight
+            relation: RelationType
+
+        Returns:
+            Tuple[Set, Set]: keys and probes of the mention
+        """
+        if relation is not RelationType.VERBOCEAN_MATCH or StringUtils.is_pronoun(
+            mention.tokens_str.lower()
+        ):
+            return set(), set()
+        head = mention.mention_head
+        probes = {
+            other
+            for other, rel in self.vo.get(head, {}).items()
+            if rel not in ("[unk]", "[low-vol]")
+        }
+        return {head}, probes
+
     def is_verbocean_relation(
         self, mention_x: MentionDataLight, mention_y: MentionDataLight
     ) -> bool:
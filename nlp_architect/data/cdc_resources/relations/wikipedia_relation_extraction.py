@@ -18,11 +18,14 @@ from __future__ import division
 
 import logging
 import os
-from typing import Set, List
+from typing import List, Optional, Set, Tuple
 
 from nlp_architect.common.cdc.mention_data import MentionDataLight
 from nlp_architect.data.cdc_resources.data_types.wiki.wikipedia_pages import WikipediaPages
-from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
+from nlp_architect.data.cdc_resources.relations.relation_extraction import (
+    RelationExtraction,
+    resource_fingerprint,
+)
 from nlp_architect.data.cdc_resources.relations.relation_types_enums import (
     RelationType,
     WikipediaSearchMethod,
@@ -75,6 +78,13 @@ class WikipediaRelationExtraction(RelationExtraction):
             self.pywiki_impl = WikiElastic(host, port, index)
 
         logger.info("Wikipedia module lead successfully")
+        self.cache_config = {
+            "method": method,
+            "wiki_file": resource_fingerprint(wiki_file),
+            "elastic": [host, port, index],
+            "filter_pronouns": filter_pronouns,
+            "filter_time_data": filter_time_data,
+        }
         super(WikipediaRelationExtraction, self).__init__()
 
     def get_phrase_related_pages(self, mention_str: str) -> WikipediaPages:
@@ -227,6 +237,56 @@ class WikipediaRelationExtraction(RelationExtraction):
 
         return RelationType.NO_RELATION_FOUND
 
+    def get_blocking_keys(
+        self, mention: MentionDataLight, relation: RelationType
+    ) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys of a mention (see `RelationExtraction.get_blocking_keys`): the ids of
+        its pages for WIKIPEDIA_REDIRECT_LINK; for the other relations the page titles and
+        mention string (keys), and the relation's page links (aliases, disambiguation
+        links, categories, title parenthesis or be-comp relations) with the mention strings
+        they imply for links of the form "<mention> <other mention>" (probes)
+
+        Args:
+            mention: MentionDataLight
+            relation: RelationType
+
+        Returns:
+            Tuple[Set, Set]: keys and probes of the mention
+        """
+        relation_links = {
+            RelationType.WIKIPEDIA_ALIASES: WikipediaPages.get_and_set_all_aliases,
+            RelationType.WIKIPEDIA_DISAMBIGUATION: WikipediaPages.get_and_set_all_disambiguation,
+            RelationType.WIKIPEDIA_CATEGORY: WikipediaPages.get_and_set_all_categories,
+            RelationType.WIKIPEDIA_TITLE_PARENTHESIS: WikipediaPages.get_and_set_parenthesis,
+            RelationType.WIKIPEDIA_BE_COMP: WikipediaPages.get_and_set_be_comp,
+        }
+        if relation != RelationType.WIKIPEDIA_REDIRECT_LINK and relation not in relation_links:
+            return set(), set()
+
+        mention_str = mention.tokens_str.strip()
+        pages = self.get_phrase_related_pages(mention_str)
+        if pages.is_empty_norm_phrase:
+            return set(), set()
+
+        if relation == RelationType.WIKIPEDIA_REDIRECT_LINK:
+            keys = {page.pageid for page in pages.get_pages() if page.pageid > 0}
+            return keys, keys
+
+        keys = pages.get_and_set_titles()
+        keys.add(("mention", mention_str))
+        probes = relation_links[relation](pages)
+        prefix = mention_str + " "
+        suffix = " " + mention_str
+        for link in list(probes):
+            if not isinstance(link, str):
+                continue
+            if link.startswith(prefix):
+                probes.add(("mention", link[len(prefix) :]))
+            if link.endswith(suffix):
+                probes.add(("mention", link[: -len(suffix)]))
+        return keys, probes
+
     @staticmethod
     def extract_be_comp(
         pages1: WikipediaPages, pages2: WikipediaPages, titles1: Set[str], titles2: Set[str]
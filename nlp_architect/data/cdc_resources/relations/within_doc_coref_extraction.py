@@ -15,10 +15,13 @@
 # ******************************************************************************
 import logging
 import os
-from typing import List, Set
+from typing import List, Optional, Set, Tuple
 
 from nlp_architect.common.cdc.mention_data import MentionData
-from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
+from nlp_architect.data.cdc_resources.relations.relation_extraction import (
+    RelationExtraction,
+    resource_fingerprint,
+)
 from nlp_architect.data.cdc_resources.relations.relation_types_enums import RelationType
 from nlp_architect.utils.io import load_json_file
 
@@ -39,6 +42,7 @@ class WithinDocCoref(RelationExtraction):
             self.within_doc_coref_chain = self.arrange_resource(wd_mentions_json)
         else:
             raise FileNotFoundError("Within-doc resource file not found or not in path")
+        self.cache_config = {"wd_file": resource_fingerprint(wd_file)}
         super(WithinDocCoref, self).__init__()
 
     @staticmethod
@@ -96,6 +100,43 @@ class WithinDocCoref(RelationExtraction):
 
         return RelationType.NO_RELATION_FOUND
 
+    def get_blocking_keys(
+        self, mention: MentionData, relation: RelationType
+    ) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys of a mention (see `RelationExtraction.get_blocking_keys`): the
+        document id and within document coref chains of the mention
+
+        Args:
+            mention: MentionData
+            relation: RelationType
+
+        Returns:
+            Tuple[Set, Set]: keys and probes of the mention
+        """
+        if relation is not RelationType.WITHIN_DOC_COREF:
+            return set(), set()
+        coref_chain = self.extract_within_coref(mention)
+        if not coref_chain or "-" in coref_chain:
+            return set(), set()
+        keys = {(mention.doc_id, frozenset(coref_chain))}
+        return keys, keys
+
+    def get_mention_cache_key(self, mention: MentionData) -> str:
+        """
+        Key of a mention in the relation cache: its document, sentence and tokens
+
+        Args:
+            mention: MentionData
+
+        Returns:
+            str: the mention cache key
+        """
+        return "_".join(
+            [str(mention.doc_id), str(mention.sent_id)]
+            + [str(token_id) for token_id in mention.tokens_number or []]
+        )
+
     def extract_within_coref(self, mention: MentionData) -> List[str]:
         tokens = mention.tokens_number
         within_coref_token = []
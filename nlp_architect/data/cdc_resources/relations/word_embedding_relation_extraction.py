@@ -16,7 +16,7 @@
 
 import logging
 import math
-from typing import List, Set
+from typing import List, Optional, Set, Tuple
 
 from scipy.spatial.distance import cosine as cos
 
@@ -29,7 +29,10 @@ from nlp_architect.data.cdc_resources.embedding.embed_glove import (
     GloveEmbedding,
     GloveEmbeddingOffline,
 )
-from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
+from nlp_architect.data.cdc_resources.relations.relation_extraction import (
+    RelationExtraction,
+    resource_fingerprint,
+)
 from nlp_architect.data.cdc_resources.relations.relation_types_enums import (
     EmbeddingMethod,
     RelationType,
@@ -70,6 +73,12 @@ class WordEmbeddingRelationExtraction(RelationExtraction):
             self.contextual = True
 
         self.accepted_dist = cos_accepted_dist
+        self.cache_config = {
+            "method": method,
+            "glove_file": resource_fingerprint(glove_file),
+            "elmo_file": resource_fingerprint(elmo_file),
+            "cos_accepted_dist": cos_accepted_dist,
+        }
         super(WordEmbeddingRelationExtraction, self).__init__()
 
     def extract_all_relations(
@@ -115,6 +124,48 @@ class WordEmbeddingRelationExtraction(RelationExtraction):
 
         return RelationType.NO_RELATION_FOUND
 
+    def get_blocking_keys(
+        self, mention: MentionDataLight, relation: RelationType
+    ) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys of a mention (see `RelationExtraction.get_blocking_keys`).
+        Embedding similarity cannot be blocked exactly, only mentions that cannot match
+        any mention (filtered pronouns and mentions without an embedding) are blocked.
+
+        Args:
+            mention: MentionDataLight
+            relation: RelationType
+
+        Returns:
+            Tuple[Set, Set]: empty keys and probes if the mention cannot match, else None
+        """
+        if relation is not RelationType.WORD_EMBEDDING_MATCH:
+            return set(), set()
+        if StringUtils.is_pronoun(mention.tokens_str.lower()) and (
+            not self.contextual or mention.mention_context is None
+        ):
+            return set(), set()
+        if self.embedding.get_head_feature_vector(mention) is None:
+            return set(), set()
+        return None
+
+    def get_mention_cache_key(self, mention: MentionDataLight) -> str:
+        """
+        Key of a mention in the relation cache, contextual embeddings also depend on the
+        mention context and tokens
+
+        Args:
+            mention: MentionDataLight
+
+        Returns:
+            str: the mention cache key
+        """
+        key = super(WordEmbeddingRelationExtraction, self).get_mention_cache_key(mention)
+        if self.contextual and mention.mention_context:
+            tokens_number = getattr(mention, "tokens_number", None)
+            key = "\t".join([key, " ".join(mention.mention_context), str(tokens_number)])
+        return key
+
     def is_word_embed_match(self, mention_x: MentionDataLight, mention_y: MentionDataLight):
         """
         Check if input mentions Word Embedding cosine distance below above 0.65
@@ -16,11 +16,14 @@
 
 import logging
 import os
-from typing import Set, List
+from typing import List, Optional, Set, Tuple
 
 from nlp_architect.common.cdc.mention_data import MentionDataLight
 from nlp_architect.data.cdc_resources.data_types.wn.wordnet_page import WordnetPage
-from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
+from nlp_architect.data.cdc_resources.relations.relation_extraction import (
+    RelationExtraction,
+    resource_fingerprint,
+)
 from nlp_architect.data.cdc_resources.relations.relation_types_enums import (
     RelationType,
     OnlineOROfflineMethod,
@@ -55,6 +58,7 @@ class WordnetRelationExtraction(RelationExtraction):
                 raise FileNotFoundError("WordNet resource directory not found or not in path")
 
         logger.info("Wordnet module lead successfully")
+        self.cache_config = {"method": method, "wn_file": resource_fingerprint(wn_file)}
         super(WordnetRelationExtraction, self).__init__()
 
     def extract_all_relations(
@@ -135,6 +139,44 @@ class WordnetRelationExtraction(RelationExtraction):
 
         return RelationType.NO_RELATION_FOUND
 
+    def get_blocking_keys(
+        self, mention: MentionDataLight, relation: RelationType
+    ) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys of a mention (see `RelationExtraction.get_blocking_keys`): the head
+        synonyms for WORDNET_SAME_SYNSET, the phrase synonyms of one word mentions for
+        WORDNET_PARTIAL_SYNSET_MATCH, and the derivationally related forms (probes) and
+        head, head lemma and derivationally related forms (keys) for
+        WORDNET_DERIVATIONALLY
+
+        Args:
+            mention: MentionDataLight
+            relation: RelationType
+
+        Returns:
+            Tuple[Set, Set]: keys and probes of the mention
+        """
+        if StringUtils.is_pronoun(mention.tokens_str.lower()):
+            return set(), set()
+        page = self.wordnet_impl.get_pages(mention)
+        if not page:
+            return set(), set()
+
+        if relation == RelationType.WORDNET_SAME_SYNSET:
+            keys = set(page.head_synonyms)
+            return keys, keys
+        if relation == RelationType.WORDNET_PARTIAL_SYNSET_MATCH:
+            synonyms = page.all_clean_words_synonyms
+            if len(page.clean_phrase.split()) == 0 or len(synonyms) != 1:
+                return set(), set()
+            keys = set(synonyms[0])
+            return keys, keys
+        if relation == RelationType.WORDNET_DERIVATIONALLY:
+            derivations = set(page.head_derivationally) | set(page.head_lemma_derivationally)
+            return derivations | {page.head, page.head_lemma}, derivations
+
+        return set(), set()
+
     @staticmethod
     def extract_derivation(page_x: WordnetPage, page_y: WordnetPage) -> RelationType:
         """
@@ -0,0 +1,211 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+"""
+Batched conversion of token classification examples into padded model input arrays.
+
+Word pieces are computed once per distinct word (per chunk of examples), sentences are
+assembled from the word piece ids using word offsets, and all outputs are written
+directly into preallocated NumPy arrays. Chunks of examples can be converted in a
+process pool.
+"""
+
+import logging
+from multiprocessing import Pool
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_worker_args = None
+
+
+def _init_worker(tokenizer, max_seq_length, label_map, kwargs):
+    global _worker_args
+    _worker_args = (tokenizer, max_seq_length, label_map, kwargs)
+
+
+def _convert_chunk_worker(chunk):
+    tokenizer, max_seq_length, label_map, kwargs = _worker_args
+    return _convert_chunk(chunk, tokenizer, max_seq_length, label_map, **kwargs)
+
+
+def _convert_chunk(
+    chunk: List[Tuple[List[str], List[str]]],
+    tokenizer,
+    max_seq_length: int,
+    label_map: Dict[str, int] = None,
+    cls_token_at_end=False,
+    pad_on_left=False,
+    cls_token="[CLS]",
+    sep_token="[SEP]",
+    pad_token=0,
+    sequence_segment_id=0,
+    sep_token_extra=False,
+    cls_token_segment_id=1,
+    pad_token_segment_id=0,
+    mask_padding_with_zero=True,
+):
+    num_examples = len(chunk)
+    include_labels = label_map is not None
+
+    # word piece ids of every distinct word in the chunk, concatenated
+    word_ids = {}
+    piece_offsets = [0]
+    pieces = []
+    words = []
+    labels = []
+    sent_num_words = np.zeros(num_examples, dtype=np.int64)
+    for i, (tokens, tags) in enumerate(chunk):
+        sent_num_words[i] = len(tokens)
+        for token in tokens:
+            w_id = word_ids.get(token)
+            if w_id is None:
+                w_id = word_ids[token] = len(word_ids)
+                pieces.extend(tokenizer.convert_tokens_to_ids(tokenizer.tokenize(token)))
+                piece_offsets.append(len(pieces))
+            words.append(w_id)
+        if include_labels:
+            if len(tags) != len(tokens):
+                raise ValueError(
+                    "example with {} tokens and {} labels: {}".format(
+                        len(tokens), len(tags), " ".join(tokens)
+                    )
+                )
+            labels.extend(label_map[t] for t in tags)
+    pieces = np.asarray(pieces, dtype=np.int64)
+    piece_offsets = np.asarray(piece_offsets, dtype=np.int64)
+    piece_lens = np.diff(piece_offsets)
+    if np.any(piece_lens == 0):
+        empty = [w for w, i in word_ids.items() if piece_lens[i] == 0]
+        raise ValueError("words tokenized into no word pieces: {}".format(empty))
+
+    # word -> token offsets
+    words = np.asarray(words, dtype=np.int64)
+    word_lens = piece_lens[words]
+    word_sent = np.repeat(np.arange(num_examples), sent_num_words)
+    word_tok_start = np.cumsum(word_lens) - word_lens
+    sent_tok_count = np.bincount(word_sent, weights=word_lens, minlength=num_examples).astype(
+        np.int64
+    )
+    sent_tok_start = np.cumsum(sent_tok_count) - sent_tok_count
+
+    # token level arrays
+    num_tokens = int(word_lens.sum())
+    tok_word = np.repeat(np.arange(len(words)), word_lens)
+    tok_in_word = np.arange(num_tokens) - word_tok_start[tok_word]
+    tok_ids = pieces[piece_offsets[words[tok_word]] + tok_in_word]
+    tok_sent = word_sent[tok_word]
+    tok_pos = np.arange(num_tokens) - sent_tok_start[tok_sent]
+
+    # truncate, and layout of [CLS] A [SEP] ([SEP]) or A [SEP] ([SEP]) [CLS]
+    num_sep = 2 if sep_token_extra else 1
+    max_body = max_seq_length - (num_sep + 1)
+    body_len = np.minimum(sent_tok_count, max_body)
+    content_len = body_len + num_sep + 1
+    start = (max_seq_length - content_len) if pad_on_left else np.zeros_like(content_len)
+    body_start = start if cls_token_at_end else start + 1
+    cls_col = start + body_len + num_sep if cls_token_at_end else start
+    keep = tok_pos < max_body
+    rows = tok_sent[keep]
+    cols = body_start[rows] + tok_pos[keep]
+    is_first = tok_in_word[keep] == 0
+
+    sep_id, cls_id = tokenizer.convert_tokens_to_ids([sep_token, cls_token])
+    sent_idx = np.arange(num_examples)
+    positions = np.arange(max_seq_length)[None, :]
+    in_content = (positions >= start[:, None]) & (positions < (start + content_len)[:, None])
+
+    input_ids = np.full((num_examples, max_seq_length), pad_token, dtype=np.int64)
+    input_ids[rows, cols] = tok_ids[keep]
+    for s in range(num_sep):
+        input_ids[sent_idx, body_start + body_len + s] = sep_id
+    input_ids[sent_idx, cls_col] = cls_id
+
+    if mask_padding_with_zero:
+        input_mask = in_content.astype(np.int64)
+    else:
+        input_mask = (~in_content).astype(np.int64)
+
+    segment_ids = np.where(in_content, sequence_segment_id, pad_token_segment_id).astype(np.int64)
+    segment_ids[sent_idx, cls_col] = cls_token_segment_id
+
+    valid_ids = np.zeros((num_examples, max_seq_length), dtype=np.int64)
+    valid_ids[rows[is_first], cols[is_first]] = 1
+
+    label_ids = None
+    if include_labels:
+        label_ids = np.zeros((num_examples, max_seq_length), dtype=np.int64)
+        word_labels = np.asarray(labels, dtype=np.int64)
+        label_ids[rows[is_first], cols[is_first]] = word_labels[tok_word[keep][is_first]]
+    return input_ids, input_mask, segment_ids, valid_ids, label_ids
+
+
+def convert_token_cls_examples(
+    examples,
+    tokenizer,
+    max_seq_length: int,
+    label_map: Dict[str, int] = None,
+    num_workers: int = 1,
+    chunk_size: int = 10000,
+    **kwargs,
+):
+    """
+    Convert token classification examples into padded transformer input arrays.
+    Word pieces of a word are masked out in valid_ids except for the first, which carries
+    the word label.
+
+    Args:
+        examples (List[TokenClsInputExample]): examples
+        tokenizer: transformers tokenizer
+        max_seq_length (int): max sequence length
+        label_map (Dict[str, int], optional): label to id map, labels are not converted
+            if None. Defaults to None.
+        num_workers (int, optional): number of worker processes. Defaults to 1.
+        chunk_size (int, optional): number of examples converted at once. Defaults to 10000.
+        kwargs: special tokens and padding arguments (cls_token_at_end, pad_on_left,
+            cls_token, sep_token, pad_token, sequence_segment_id, sep_token_extra,
+            cls_token_segment_id, pad_token_segment_id, mask_padding_with_zero)
+
+    Returns:
+        tuple: input_ids, input_mask, segment_ids, valid_ids, label_ids (None if no
+        label_map was given) arrays of shape (len(examples), max_seq_length)
+
+    Raises:
+        ValueError: if an example has a different number of labels and tokens
+    """
+    data = [
+        (example.tokens, example.label if label_map is not None else None) for example in examples
+    ]
+    chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+    if num_workers > 1 and len(chunks) > 1:
+        with Pool(
+            num_workers,
+            initializer=_init_worker,
+            initargs=(tokenizer, max_seq_length, label_map, kwargs),
+        ) as pool:
+            results = pool.map(_convert_chunk_worker, chunks)
+    else:
+        results = []
+        for i, chunk in enumerate(chunks):
+            logger.info("Processing example %d of %d", i * chunk_size, len(data))
+            results.append(_convert_chunk(chunk, tokenizer, max_seq_length, label_map, **kwargs))
+    if len(results) == 0:
+        results = [_convert_chunk([], tokenizer, max_seq_length, label_map, **kwargs)]
+    outputs = []
+    for arrays in zip(*results):
+        outputs.append(None if arrays[0] is None else np.concatenate(arrays))
+    return tuple(outputs)
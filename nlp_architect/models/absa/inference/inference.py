@@ -13,10 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ******************************************************************************
-import math
 from os import PathLike
 from pathlib import Path
-from typing import Union
+from typing import Dict, List, Union
 
 from nlp_architect.common.core_nlp_doc import CoreNLPDoc
 from nlp_architect.models.absa import INFERENCE_OUT
@@ -60,6 +59,7 @@ class SentimentInference(object):
             opinion_lex if type(opinion_lex) is dict else load_opinion_lex(Path(opinion_lex))
         )
         self.aspect_lex = _load_aspect_lexicon(Path(aspect_lex))
+        self.aspect_matcher = AspectMatcher(self.aspect_lex)
         self.intensifier_lex = _read_lexicon_from_csv("IntensifiersLex.csv")
         self.negation_lex = _read_lexicon_from_csv("NegationSentLex.csv")
 
@@ -85,8 +85,11 @@ class SentimentInference(object):
         for sentence in parsed_doc.sentences:
             events = []
             scores = []
-            for aspect_row in self.aspect_lex:
-                _, asp_events = self._extract_event(aspect_row, sentence)
+            sent_index = self._index_sentence(sentence)
+            for row_i, aspect_indices in self.aspect_matcher.match(sentence):
+                _, asp_events = self._extract_event(
+                    self.aspect_lex[row_i], sentence, aspect_indices, sent_index
+                )
                 for asp_event in asp_events:
                     events.append(asp_event)
                     scores += [term.score for term in asp_event if term.type == TermType.ASPECT]
@@ -103,12 +106,14 @@ class SentimentInference(object):
                 )
         return sentiment_doc
 
-    def _extract_intensifier_terms(self, toks, sentiment_index, polarity, sentence):
+    def _extract_intensifier_terms(self, sent_index, sentiment_index, polarity):
         """Extract intensifier events from sentence."""
         count = 0
         terms = []
-        for intens_i, intens in [(i, x) for i, x in enumerate(toks) if x in self.intensifier_lex]:
-            if math.fabs(sentiment_index - intens_i) == 1:
+        sentence = sent_index.sentence
+        for intens_i in (sentiment_index - 1, sentiment_index + 1):
+            if intens_i in sent_index.intensifier_indices:
+                intens = sent_index.text[intens_i]
                 score = self.intensifier_lex[intens].score
                 terms.append(
                     Term(
@@ -123,56 +128,79 @@ class SentimentInference(object):
                 count += abs(score + float(INTENSIFIER_FACTOR))
         return count if count != 0 else 1, terms
 
-    def _extract_neg_terms(self, toks: list, op_i: int, sentence: list) -> tuple:
+    def _extract_neg_terms(self, sent_index, op_i: int) -> tuple:
         """Extract negation terms from sentence.
 
         Args:
-            toks: Sentence text broken down to tokens (words).
+            sent_index (_SentenceIndex): Index of the parsed sentence.
             op_i: Index of opinion term in sentence.
-            sentence: parsed sentence
 
         Returns:
             List of negation terms and its aggregated sign (positive or negative).
         """
         sign = 1
         terms = []
+        sentence = sent_index.sentence
         gov_op_i = sentence[op_i]["gov"]
-        dep_op_indices = [sentence.index(x) for x in sentence if x["gov"] == op_i]
-        for neg_i, negation in [(i, x) for i, x in enumerate(toks) if x in self.negation_lex]:
+        dep_op_indices = sent_index.children.get(op_i, ())
+        for neg_i in sent_index.negation_indices:
+            negation = sent_index.text[neg_i]
             position = self.negation_lex[negation].position
             dist = op_i - neg_i
             before = position == "before" and (dist == 1 or neg_i in dep_op_indices)
             after = position == "after" and (dist == -1 or neg_i == gov_op_i)
             both = position == "both" and dist in (1, -1)
             if before or after or both:
+                first_i = sent_index.first_index[negation]
                 terms.append(
                     Term(
                         negation,
                         TermType.NEGATION,
                         Polarity.NEG,
                         self.negation_lex[negation].score,
-                        sentence[toks.index(negation)]["start"],
-                        sentence[toks.index(negation)]["len"],
+                        sentence[first_i]["start"],
+                        sentence[first_i]["len"],
                     )
                 )
                 sign *= self.negation_lex[negation].score
         return terms, sign
 
-    def _extract_event(self, aspect_row: LexiconElement, parsed_sentence: list) -> tuple:
-        """Extract opinion and aspect terms from sentence."""
+    def _extract_event(
+        self,
+        aspect_row: LexiconElement,
+        parsed_sentence: list,
+        aspect_indices: list = None,
+        sent_index=None,
+    ) -> tuple:
+        """Extract opinion and aspect terms from sentence.
+
+        Args:
+            aspect_indices: consolidated indices of the aspect terms in sentence, found with
+                _consolidate_aspects if not given.
+            sent_index (_SentenceIndex): index of the sentence, built if not given.
+        """
         event = []
         sent_aspect_pair = None
-        real_aspect_indices = _consolidate_aspects(aspect_row.term, parsed_sentence)
+        if aspect_indices is None:
+            aspect_indices = _consolidate_aspects(aspect_row.term, parsed_sentence)
+        if aspect_indices and sent_index is None:
+            sent_index = self._index_sentence(parsed_sentence)
         aspect_key = aspect_row.term[0]
-        for aspect_index_range in real_aspect_indices:
+        for aspect_index_range in aspect_indices:
             for word_index in aspect_index_range:
                 sent_aspect_pair, event = self._detect_opinion_aspect_events(
-                    word_index, parsed_sentence, aspect_key, aspect_index_range
+                    word_index, sent_index, aspect_key, aspect_index_range
                 )
                 if sent_aspect_pair:
                     break
         return sent_aspect_pair, event
 
+    def _index_sentence(self, parsed_sentence: list):
+        """Build the index of a sentence used by the opinion and negation rules."""
+        return _SentenceIndex(
+            parsed_sentence, self.opinion_lex, self.negation_lex, self.intensifier_lex
+        )
+
     @staticmethod
     def _modify_for_multiple_word(cur_tkn, parsed_sentence, index_range):
         """Modify multiple-word aspect tkn length and start index.
@@ -189,12 +217,15 @@ class SentimentInference(object):
                 cur_tkn["len"] = int(cur_tkn["len"]) + len(parsed_sentence[i]["text"]) + 1
         return cur_tkn
 
-    def _detect_opinion_aspect_events(self, aspect_index, parsed_sent, aspect_key, index_range):
+    def _detect_opinion_aspect_events(self, aspect_index, sent_index, aspect_key, index_range):
         """Extract opinion-aspect events from sentence.
 
+        Only the aspect token and its dependents can take part in an aspect-opinion pair,
+        they are checked in sentence order.
+
         Args:
             aspect_index: index of aspect in sentence.
-            parsed_sent: current sentence parse tree.
+            sent_index (_SentenceIndex): index of the current sentence parse tree.
             aspect_key: main aspect term serves as key in aspect dict.
             index_range: The index range of the multi word aspect.
 
@@ -202,54 +233,62 @@ class SentimentInference(object):
             List of aspect sentiment pair, and list of events extracted.
         """
         all_pairs, events = [], []
-        sentence_text_list = [x["text"] for x in parsed_sent]
-        sentence_text = " ".join(sentence_text_list)
-        for tok_i, tok in enumerate(parsed_sent):
+        parsed_sent = sent_index.sentence
+        opinion_indices = sent_index.opinion_indices
+        children = sent_index.children
+        for tok_i in sorted({aspect_index, *children.get(aspect_index, ())}):
+            tok = parsed_sent[tok_i]
+            # pairs of (aspect token, opinion token index)
             aspect_op_pair = []
             terms = []
             gov_i = tok["gov"]
-            gov = parsed_sent[gov_i]
-            gov_text = gov["text"]
-            tok_text = tok["text"]
 
             # 1st order rules
             # Is cur_tkn an aspect and gov an opinion?
             if tok_i == aspect_index:
-                if gov_text.lower() in self.opinion_lex:
+                if sent_index.position(gov_i) in opinion_indices:
                     aspect_op_pair.append(
-                        (self._modify_for_multiple_word(tok, parsed_sent, index_range), gov)
+                        (
+                            self._modify_for_multiple_word(tok, parsed_sent, index_range),
+                            sent_index.position(gov_i),
+                        )
                     )
 
             # Is gov an aspect and cur_tkn an opinion?
-            if gov_i == aspect_index and tok_text.lower() in self.opinion_lex:
+            if gov_i == aspect_index and tok_i in opinion_indices:
                 aspect_op_pair.append(
-                    (self._modify_for_multiple_word(gov, parsed_sent, index_range), tok)
+                    (
+                        self._modify_for_multiple_word(
+                            parsed_sent[gov_i], parsed_sent, index_range
+                        ),
+                        tok_i,
+                    )
                 )
 
             # If not found, try 2nd order rules
             if not aspect_op_pair and tok_i == aspect_index:
                 # 2nd order rule #1
-                for op_t in parsed_sent:
-                    if op_t["gov"] == gov_i and op_t["text"].lower() in self.opinion_lex:
+                for op_i in children.get(gov_i, ()):
+                    if op_i in opinion_indices:
                         aspect_op_pair.append(
-                            (self._modify_for_multiple_word(tok, parsed_sent, index_range), op_t)
+                            (self._modify_for_multiple_word(tok, parsed_sent, index_range), op_i)
                         )
 
                 # 2nd order rule #2
-                gov_gov = parsed_sent[parsed_sent[gov_i]["gov"]]
-                if gov_gov["text"].lower() in self.opinion_lex:
+                gov_gov_i = sent_index.position(parsed_sent[gov_i]["gov"])
+                if gov_gov_i in opinion_indices:
                     aspect_op_pair.append(
-                        (self._modify_for_multiple_word(tok, parsed_sent, index_range), gov_gov)
+                        (self._modify_for_multiple_word(tok, parsed_sent, index_range), gov_gov_i)
                     )
 
             # if aspect_tok found
-            for aspect, opinion in aspect_op_pair:
-                op_tok_i = parsed_sent.index(opinion)
-                score = self.opinion_lex[opinion["text"].lower()].score
-                neg_terms, sign = self._extract_neg_terms(sentence_text_list, op_tok_i, parsed_sent)
+            for aspect, op_tok_i in aspect_op_pair:
+                opinion = parsed_sent[op_tok_i]
+                score = self.opinion_lex[sent_index.text_lower[op_tok_i]].score
+                neg_terms, sign = self._extract_neg_terms(sent_index, op_tok_i)
                 polarity = Polarity.POS if score * sign > 0 else Polarity.NEG
                 intensifier_score, intensifier_terms = self._extract_intensifier_terms(
-                    sentence_text_list, op_tok_i, polarity, parsed_sent
+                    sent_index, op_tok_i, polarity
                 )
                 over_all_score = score * sign * intensifier_score
                 terms.append(
@@ -277,12 +316,52 @@ class SentimentInference(object):
                 if len(intensifier_terms) > 0:
                     terms = terms + intensifier_terms
                 all_pairs.append(
-                    [aspect_key, opinion["text"], over_all_score, polarity, sentence_text]
+                    [aspect_key, opinion["text"], over_all_score, polarity, sent_index.text_joined]
                 )
                 events.append(terms)
         return all_pairs, events
 
 
+class _SentenceIndex(object):
+    """Per-sentence structures shared by the opinion, negation and intensifier rules of all
+    the aspects of a sentence.
+
+    Attributes:
+        sentence: the parsed sentence.
+        text: token texts.
+        text_lower: lowercased token texts.
+        text_joined: the token texts joined by spaces.
+        children: token indices by governor index (as found in the parse, -1 for the root).
+        first_index: index of the first token of each text.
+        opinion_indices: indices of the tokens in the opinion lexicon.
+        negation_indices: indices of the tokens in the negation lexicon, in sentence order.
+        intensifier_indices: indices of the tokens in the intensifier lexicon.
+    """
+
+    def __init__(
+        self, sentence: list, opinion_lex: dict, negation_lex: dict, intensifier_lex: dict
+    ):
+        self.sentence = sentence
+        self.text = [tok["text"] for tok in sentence]
+        self.text_lower = [text.lower() for text in self.text]
+        self.text_joined = " ".join(self.text)
+        self.children = {}
+        self.first_index = {}
+        for tok_i, tok in enumerate(sentence):
+            self.children.setdefault(tok["gov"], []).append(tok_i)
+            self.first_index.setdefault(tok["text"], tok_i)
+        self.opinion_indices = {i for i, text in enumerate(self.text_lower) if text in opinion_lex}
+        self.negation_indices = [i for i, text in enumerate(self.text) if text in negation_lex]
+        self.intensifier_indices = {
+            i for i, text in enumerate(self.text) if text in intensifier_lex
+        }
+
+    def position(self, gov_i: int) -> int:
+        """Sentence position of the token at a governor index (the root's governor -1 is
+        the last token)."""
+        return range(len(self.sentence))[gov_i]
+
+
 def _sentence_contains_after(sentence, index, phrase):
     """Returns sentence contains phrase after given index."""
     for i in range(len(phrase)):
@@ -312,3 +391,73 @@ def _consolidate_aspects(aspect_row, sentence):
                     appeared |= set(span)
                     indices.append(list(span))
     return indices
+
+
+class _TrieNode(object):
+    __slots__ = ["children", "rows"]
+
+    def __init__(self):
+        self.children = {}
+        self.rows = []
+
+
+class AspectMatcher(object):
+    """Token trie of the aspect lexicon phrases, finds the aspect terms of all lexicon rows
+    in a sentence with a single scan.
+
+    Phrase tokens are matched case insensitively against the text or lemma of sentence
+    tokens, as in _consolidate_aspects.
+
+    Args:
+        aspect_lex: Aspect lexicon rows.
+    """
+
+    def __init__(self, aspect_lex: List[LexiconElement]):
+        self.root = _TrieNode()
+        for row_i, aspect_row in enumerate(aspect_lex):
+            for phrase in aspect_row.term:
+                node = self.root
+                for token in phrase.split(" "):
+                    node = node.children.setdefault(token.lower(), _TrieNode())
+                if not node.rows or node.rows[-1] != row_i:
+                    node.rows.append(row_i)
+
+    def match(self, sentence: list) -> List[tuple]:
+        """Find the aspect terms of every lexicon row in sentence.
+
+        Args:
+            sentence: parsed sentence
+
+        Returns:
+            List of (lexicon row index, consolidated aspect indices) of the rows having aspect
+            terms in sentence, ordered by row index. Aspect indices are the same as
+            _consolidate_aspects returns for the row.
+        """
+        forms = [{tok["text"].lower(), tok["lemma"].lower()} for tok in sentence]
+        # longest phrase of each row starting at each token
+        longest: Dict[int, Dict[int, int]] = {}
+        for start in range(len(sentence)):
+            nodes = [self.root]
+            length = 0
+            while nodes and start + length < len(sentence):
+                tok_forms = forms[start + length]
+                nodes = [
+                    node.children[form]
+                    for node in nodes
+                    for form in tok_forms
+                    if form in node.children
+                ]
+                length += 1
+                for node in nodes:
+                    for row_i in node.rows:
+                        longest.setdefault(row_i, {})[start] = length
+        matches = []
+        for row_i in sorted(longest):
+            indices = []
+            end = -1
+            for start, length in sorted(longest[row_i].items()):
+                if start > end:
+                    indices.append(list(range(start, start + length)))
+                    end = start + length - 1
+            matches.append((row_i, indices))
+        return matches
@@ -21,7 +21,9 @@ from nlp_architect.models.absa import TRAIN_OUT, LEXICONS_OUT
 from nlp_architect.models.absa.train.acquire_terms import AcquireTerms
 from nlp_architect.models.absa.train.rerank_terms import RerankTerms
 from nlp_architect.models.absa.utils import (
+    iter_raw_docs,
     parse_docs,
+    run_pipeline_ndjson,
     _download_pretrained_rerank_model,
     _write_aspect_lex,
     _write_opinion_lex,
@@ -41,13 +43,30 @@ class TrainSentiment:
         asp_thresh: int = 3,
         op_thresh: int = 2,
         max_iter: int = 3,
+        streaming: bool = False,
+        batch_size: int = 64,
+        num_workers: int = 1,
     ):
+        """
+        Args:
+            streaming (bool, optional): parse raw data in batches, sharded across num_workers
+                processes, into a newline-delimited json file (see `run_pipeline_ndjson`)
+                instead of a json file per document.
+            batch_size (int, optional): number of documents per batch when streaming.
+            num_workers (int, optional): number of parsing processes when streaming, and of
+                processes collecting the lexicons' example sentences.
+        """
         self.acquire_lexicon = AcquireTerms(asp_thresh, op_thresh, max_iter)
-        if parse:
+        self.parse = parse
+        self.streaming = streaming
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        if parse and not (streaming and num_workers > 1):
             from nlp_architect.pipelines.spacy_bist import SpacyBISTParser
 
             self.parser = SpacyBISTParser()
         else:
+            # worker processes load their own parsers
             self.parser = None
 
         if not rerank_model:
@@ -67,23 +86,34 @@ class TrainSentiment:
     ):
 
         if not parsed_data:
-            if not self.parser:
+            if not self.parse:
                 raise RuntimeError("Parser not initialized (try parse=True at init)")
             parsed_dir = Path(out_dir) / "parsed" / Path(data).stem
             parsed_data = self.parse_data(data, parsed_dir)
 
         generated_aspect_lex = self.acquire_lexicon.acquire_lexicons(parsed_data)
-        _write_aspect_lex(parsed_data, generated_aspect_lex, LEXICONS_OUT)
+        _write_aspect_lex(parsed_data, generated_aspect_lex, LEXICONS_OUT, self.num_workers)
 
         generated_opinion_lex_reranked = self.rerank.predict(
             AcquireTerms.acquired_opinion_terms_path, AcquireTerms.generic_opinion_lex_path
         )
-        _write_opinion_lex(parsed_data, generated_opinion_lex_reranked, LEXICONS_OUT)
+        _write_opinion_lex(
+            parsed_data, generated_opinion_lex_reranked, LEXICONS_OUT, self.num_workers
+        )
 
         return generated_opinion_lex_reranked, generated_aspect_lex
 
     def parse_data(self, data: PathLike or PosixPath, parsed_dir: PathLike or PosixPath):
-        _, data_size = parse_docs(self.parser, data, out_dir=parsed_dir)
+        if self.streaming:
+            _, data_size = run_pipeline_ndjson(
+                iter_raw_docs(data),
+                Path(parsed_dir) / "parsed_docs.ndjson",
+                batch_size=self.batch_size,
+                num_workers=self.num_workers,
+                parser=self.parser,
+            )
+        else:
+            _, data_size = parse_docs(self.parser, data, out_dir=parsed_dir)
         if data_size < 1000:
             raise ValueError(
                 "The data contains only {0} sentences. A minimum of 1000 "
@@ -15,17 +15,25 @@
 # ******************************************************************************
 import csv
 import json
+import multiprocessing
+import re
 import sys
+from collections import deque
 from os import walk, path, makedirs, PathLike, listdir
 from os.path import join, isfile, isdir
 from pathlib import Path
-from typing import Union
+from typing import Iterable, Iterator, Tuple, Union
 from tqdm import tqdm
 import numpy as np
 
+from nlp_architect.common.core_nlp_corpus import CoreNLPCorpus
 from nlp_architect.common.core_nlp_doc import CoreNLPDoc
 from nlp_architect.models.absa import INFERENCE_LEXICONS
-from nlp_architect.models.absa.inference.data_types import LexiconElement, Polarity
+from nlp_architect.models.absa.inference.data_types import (
+    LexiconElement,
+    Polarity,
+    SentimentDocEncoder,
+)
 from nlp_architect.models.absa.train.data_types import OpinionTerm
 from nlp_architect.pipelines.spacy_bist import SpacyBISTParser
 from nlp_architect.utils.io import download_unlicensed_file, line_count
@@ -115,6 +123,243 @@ def parse_txt(
             yield parsed_doc
 
 
+def iter_raw_docs(docs: Union[str, PathLike]) -> Iterator[Tuple[str, str]]:
+    """Lazily iterate raw documents in the form of text files in a directory or lines in a
+    text file.
+
+    Args:
+        docs (str or PathLike)
+
+    Yields:
+        (str, str): document id (file name, or line number for a text file) and text.
+    """
+    if isdir(docs):
+        yield from _walk_directory(docs)
+    else:
+        with open(docs, encoding="utf-8") as f:
+            for i, doc_text in enumerate(f):
+                yield str(i + 1), doc_text.rstrip("\n")
+
+
+def iter_parsed_docs(docs: Union[str, PathLike]) -> Iterator[Tuple[str, str]]:
+    """Lazily iterate parsed documents json in the form of files in a directory, each line of
+    an ndjson file (see `run_pipeline_ndjson`) holding a document, or lines in a file.
+
+    Args:
+        docs (str or PathLike)
+
+    Yields:
+        (str, str): document id and json text (see `decode_parsed_doc`).
+    """
+    if not isdir(docs):
+        yield from iter_raw_docs(docs)
+        return
+    for dir_path, _, filenames in walk(docs):
+        for filename in filenames:
+            file_path = join(dir_path, filename)
+            if not isfile(file_path) or filename.startswith("."):
+                continue
+            with open(file_path, encoding="utf-8") as f:
+                if filename.endswith(".ndjson"):
+                    for i, line in enumerate(f):
+                        if line.strip():
+                            yield "{}:{}".format(filename, i + 1), line
+                else:
+                    yield filename, f.read()
+
+
+class _PipelineWorker(object):
+    """Parses documents and runs sentiment inference on them, one instance per process."""
+
+    def __init__(
+        self,
+        parse: bool,
+        parser_args: dict,
+        aspect_lex,
+        opinion_lex,
+        show_tok: bool,
+        show_doc: bool,
+        parser=None,
+    ):
+        self.parser = None
+        if parse:
+            self.parser = parser if parser else SpacyBISTParser(**parser_args)
+        self.inference = None
+        if aspect_lex is not None:
+            from nlp_architect.models.absa.inference.inference import SentimentInference
+
+            self.inference = SentimentInference(aspect_lex, opinion_lex, parse=False)
+        self.show_tok = show_tok
+        self.show_doc = show_doc
+
+    def process(self, batch: list) -> Tuple[list, int]:
+        """Process a batch of (document id, text) pairs, the text is raw if parsing, otherwise
+        a parsed document json.
+
+        Returns:
+            The compact json lines of the batch and the number of parsed sentences.
+        """
+        ids = [doc_id for doc_id, _ in batch]
+        if self.parser:
+            parsed_docs = self.parser.parse_batch(
+                [text for _, text in batch], self.show_tok, self.show_doc, batch_size=len(batch)
+            )
+        else:
+            parsed_docs = []
+            for i, (doc_id, text) in enumerate(batch):
+                ids[i], parsed_doc = decode_parsed_doc(doc_id, text)
+                parsed_docs.append(parsed_doc)
+
+        lines = []
+        for doc_id, parsed_doc in zip(ids, parsed_docs):
+            if self.inference:
+                sentiment_doc = self.inference.run(parsed_doc=parsed_doc)
+                if not sentiment_doc:
+                    continue
+                record = {"id": doc_id, "sentiment": sentiment_doc}
+            else:
+                record = {"id": doc_id, "doc": vars(parsed_doc)}
+            lines.append(json.dumps(record, cls=SentimentDocEncoder, separators=(",", ":")))
+        return lines, sum(len(parsed_doc) for parsed_doc in parsed_docs)
+
+
+_worker = None
+
+
+def _init_pipeline_worker(worker_cls, *args):
+    global _worker
+    _worker = worker_cls(*args)
+
+
+def _process_pipeline_batch(batch):
+    return _worker.process(batch)
+
+
+def _batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_pipeline_ndjson(
+    docs: Iterable[Tuple[str, str]],
+    out_file: Union[str, PathLike],
+    parse: bool = True,
+    parser_args: dict = None,
+    aspect_lex=None,
+    opinion_lex=None,
+    batch_size: int = 64,
+    num_workers: int = 1,
+    show_tok=True,
+    show_doc=True,
+    parser: SpacyBISTParser = None,
+) -> Tuple[int, int]:
+    """Streaming batch ABSA pipeline: documents are parsed in batches (spacy `pipe` and a
+    single BIST call per batch) and optionally run through SentimentInference, batches are
+    sharded across a process pool. Results are written in input order as newline-delimited
+    compact json, {"id": ..., "doc": parsed document} lines, or {"id": ...,
+    "sentiment": sentiment document} lines (for documents with events) if lexicons are
+    given. Documents are read lazily and a bounded number of batches is in flight, so memory
+    does not grow with the corpus size.
+
+    Args:
+        docs (iterable of (str, str)): document ids and texts, raw (see `iter_raw_docs`) or
+            parsed documents json if parse is False.
+        out_file (str or PathLike): output ndjson file.
+        parse (bool, optional): parse raw documents.
+        parser_args (dict, optional): SpacyBISTParser arguments of the workers' parsers.
+        aspect_lex (str or PathLike, optional): aspect lexicon, runs sentiment inference.
+        opinion_lex (str or PathLike or dict, optional): opinion lexicon.
+        batch_size (int, optional): number of documents per batch.
+        num_workers (int, optional): number of worker processes, 1 processes in this process.
+        show_tok (bool, optional): Specifies whether to include token text in output.
+        show_doc (bool, optional): Specifies whether to include document text in output.
+        parser (SpacyBISTParser, optional): parser used when num_workers is 1.
+
+    Returns:
+        (int, int): number of documents and number of parsed sentences.
+    """
+    worker_args = (parse, parser_args or {}, aspect_lex, opinion_lex, show_tok, show_doc)
+    num_docs = num_sents = 0
+    Path(out_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(out_file, "w", encoding="utf-8") as out:
+        batches = _batches(docs, batch_size)
+        if num_workers <= 1:
+            worker = _PipelineWorker(*worker_args, parser=parser)
+            results = ((len(batch), worker.process(batch)) for batch in batches)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(
+                num_workers, _init_pipeline_worker, (_PipelineWorker,) + worker_args
+            )
+            results = _ordered_results(pool, batches, max_pending=2 * num_workers)
+        try:
+            for batch_len, (lines, batch_sents) in tqdm(results, file=sys.stdout, unit="batch"):
+                for line in lines:
+                    out.write(line + "\n")
+                num_docs += batch_len
+                num_sents += batch_sents
+        finally:
+            if pool:
+                pool.terminate()
+    return num_docs, num_sents
+
+
+def _ordered_results(pool, batches: Iterator[list], max_pending: int) -> Iterator[tuple]:
+    """Process batches in a pool, with at most max_pending batches in flight.
+
+    Yields:
+        (int, result): batch length and result of each batch, in input order.
+    """
+    pending = deque()
+    for batch in batches:
+        pending.append((len(batch), pool.apply_async(_process_pipeline_batch, (batch,))))
+        while pending and (len(pending) >= max_pending or pending[0][1].ready()):
+            batch_len, result = pending.popleft()
+            yield batch_len, result.get()
+    while pending:
+        batch_len, result = pending.popleft()
+        yield batch_len, result.get()
+
+
+def decode_parsed_doc(doc_id: str, text: str) -> Tuple[str, CoreNLPDoc]:
+    """Decode a parsed document json, or a {"id": ..., "doc": ...} line of a parsed documents
+    ndjson file (see `run_pipeline_ndjson`).
+
+    Args:
+        doc_id (str): document id, replaced by the id of an ndjson line.
+        text (str): the json text.
+
+    Returns:
+        (str, CoreNLPDoc): document id and document.
+    """
+    parsed_doc = json.loads(text, object_hook=CoreNLPDoc.decoder)
+    if isinstance(parsed_doc, CoreNLPDoc):
+        return doc_id, parsed_doc
+    return parsed_doc["id"], parsed_doc["doc"]
+
+
+def iter_ndjson(file_path: Union[str, PathLike], object_hook=None) -> Iterator[dict]:
+    """Lazily read a newline-delimited json file written by `run_pipeline_ndjson`.
+
+    Args:
+        file_path (str or PathLike)
+        object_hook (callable, optional): json object hook, e.g. CoreNLPDoc.decoder.
+
+    Yields:
+        dict: the record of each line.
+    """
+    with open(file_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line, object_hook=object_hook)
+
+
 def parse_dir(
     parser,
     input_dir: Union[str, PathLike],
@@ -206,14 +451,21 @@ def _load_aspect_lexicon(file_name: Union[str, PathLike]):
 
 
 def _load_parsed_docs_from_dir(directory: Union[str, PathLike]):
-    """Read all file in directory.
+    """Read all file in directory, ndjson files (see `run_pipeline_ndjson`) hold a parsed
+    document per line. A columnar corpus directory (see `CoreNLPCorpus`) is opened as a
+    mapping of lazily decoded documents.
 
     Args:
         directory (PathLike): path
     """
+    if CoreNLPCorpus.is_corpus(directory):
+        return CoreNLPCorpus(directory)
     res = {}
     for file_name in listdir(directory):
-        if file_name.endswith(".txt") or file_name.endswith(".json"):
+        if file_name.endswith(".ndjson"):
+            for record in iter_ndjson(Path(directory) / file_name, CoreNLPDoc.decoder):
+                res[record["id"]] = record["doc"]
+        elif file_name.endswith(".txt") or file_name.endswith(".json"):
             with open(Path(directory) / file_name, encoding="utf-8") as f:
                 content = f.read()
                 res[file_name] = json.loads(content, object_hook=CoreNLPDoc.decoder)
@@ -333,23 +585,173 @@ def _read_generic_lex_for_similarity(file_name: Union[str, PathLike]):
     return dict_list
 
 
-def _write_aspect_lex(parsed_data: Union[str, PathLike], generated_aspect_lex: dict, out_dir: Path):
-    parsed_docs = _load_parsed_docs_from_dir(parsed_data)
-    aspect_dict = {}
+def _sentence_texts(parsed_data: Union[str, PathLike]) -> Iterator[list]:
+    """Yields the sentence texts of each parsed document."""
+    for doc in _load_parsed_docs_from_dir(parsed_data).values():
+        yield [sent_text for sent_text, _ in doc.sent_iter()]
+
+
+class _TermMatcher(object):
+    """Multi-pattern whole word matcher: the word tokens of all terms are compiled into a
+    single trie which is walked from each token of a (lowercased) text, so each text is
+    scanned once for all terms instead of once per term."""
+
+    WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self, terms: list):
+        self.terms = terms
+        self.root = {}
+        for term_id, term in enumerate(terms):
+            words = self.WORD_RE.findall(term)
+            if not words:
+                continue
+            node = self.root
+            for word in words:
+                node = node.setdefault(word, {})
+            # None keys the ids of the terms ending at a node
+            node.setdefault(None, []).append(term_id)
+
+    def find(self, text: str) -> dict:
+        """Find the first whole word occurrence of each term in text.
+
+        Returns:
+            dict: term id to (start, end) character offsets.
+        """
+        tokens = [(m.group(), m.start(), m.end()) for m in self.WORD_RE.finditer(text)]
+        found = {}
+        for i, (word, start, _) in enumerate(tokens):
+            node = self.root.get(word)
+            j = i
+            while node is not None:
+                end = tokens[j][2]
+                for term_id in node.get(None, ()):
+                    # token matches may differ in spacing from the term
+                    if term_id not in found and text[start:end] == self.terms[term_id]:
+                        found[term_id] = start, end
+                j += 1
+                if j == len(tokens):
+                    break
+                node = node.get(tokens[j][0])
+        return found
+
+
+def _mark_term(sent_text: str, start: int, end: int, label: str) -> str:
+    return "".join(
+        (
+            sent_text[:start],
+            '<span class="',
+            label,
+            '">',
+            sent_text[start:end],
+            "</span>",
+            sent_text[end:],
+        )
+    )
+
+
+class _TermExamplesWorker(object):
+    """Collects example sentences of lexicon terms, one instance per process."""
+
+    def __init__(self, terms: list, label: str, max_examples: int):
+        self.matcher = _TermMatcher(terms)
+        self.label = label
+        self.max_examples = max_examples
+
+    def process(self, batch: list) -> Tuple[dict, int]:
+        """Process a batch of documents' sentence texts.
+
+        Returns:
+            Term id to list of (sentence index in the batch, html example), at most
+            max_examples per term, and the number of sentences in the batch.
+        """
+        examples = {}
+        sent_i = 0
+        for doc_sents in batch:
+            for sent_text in doc_sents:
+                for term_id, (start, end) in self.matcher.find(sent_text.lower()).items():
+                    term_examples = examples.setdefault(term_id, [])
+                    if len(term_examples) < self.max_examples:
+                        html = _mark_term(sent_text, start, end, self.label)
+                        term_examples.append((sent_i, html))
+                sent_i += 1
+        return examples, sent_i
+
+
+def _collect_term_examples(
+    parsed_data: Union[str, PathLike],
+    terms: list,
+    label: str,
+    max_examples: int,
+    num_workers: int = 1,
+    batch_size: int = 256,
+) -> Tuple[dict, int]:
+    """Collect the first max_examples sentences (in corpus order) with a whole word
+    occurrence of each term, documents are processed in batches across worker processes and
+    collection stops once all terms have max_examples.
+
+    Returns:
+        Term id to list of (sentence index in the corpus, html example) and the number of
+        sentences read.
+    """
+    examples = {}
+    num_sents = 0
+    worker_args = (terms, label, max_examples)
+    batches = _batches(_sentence_texts(parsed_data), batch_size)
+    if num_workers <= 1:
+        worker = _TermExamplesWorker(*worker_args)
+        results = ((len(batch), worker.process(batch)) for batch in batches)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(
+            num_workers, _init_pipeline_worker, (_TermExamplesWorker,) + worker_args
+        )
+        results = _ordered_results(pool, batches, max_pending=2 * num_workers)
+    num_full = 0
+    try:
+        for _, (batch_examples, batch_sents) in results:
+            for term_id, new_examples in batch_examples.items():
+                term_examples = examples.setdefault(term_id, [])
+                if len(term_examples) == max_examples:
+                    continue
+                for sent_i, html in new_examples[: max_examples - len(term_examples)]:
+                    term_examples.append((num_sents + sent_i, html))
+                if len(term_examples) == max_examples:
+                    num_full += 1
+            num_sents += batch_sents
+            if num_full == len(terms) and num_sents > 0:
+                break
+    finally:
+        if pool:
+            pool.terminate()
+    return examples, num_sents
+
+
+def _write_aspect_lex(
+    parsed_data: Union[str, PathLike],
+    generated_aspect_lex: dict,
+    out_dir: Path,
+    num_workers: int = 1,
+):
     max_examples = 20
-    label = "AS"
-    for doc in parsed_docs.values():
-        for sent_text, _ in doc.sent_iter():
-
-            for term, lemma in generated_aspect_lex.items():
-                if term in sent_text.lower():
-                    _find_aspect_in_sentence(
-                        term, lemma, sent_text, aspect_dict, label, max_examples, False
-                    )
-                if lemma != "" and lemma in sent_text.lower():
-                    _find_aspect_in_sentence(
-                        term, lemma, sent_text, aspect_dict, label, max_examples, True
-                    )
+    entries = list(generated_aspect_lex.items())
+    # the term and (if given) the lemma of each entry are searched for
+    terms, term_entries = [], []
+    for entry_i, (term, lemma) in enumerate(entries):
+        for search_term in (term, lemma):
+            if search_term != "":
+                terms.append(search_term)
+                term_entries.append(entry_i)
+    examples, _ = _collect_term_examples(parsed_data, terms, "AS", max_examples, num_workers)
+
+    entry_examples = {}
+    for term_id, term_examples in sorted(examples.items()):
+        entry_examples.setdefault(term_entries[term_id], []).extend(
+            (sent_i, term_id, html) for sent_i, html in term_examples
+        )
+    aspect_dict = {}
+    # entries in order of their first example
+    for entry_i, found in sorted(entry_examples.items(), key=lambda e: (min(e[1]), e[0])):
+        aspect_dict[entries[entry_i]] = [html for _, _, html in sorted(found)[:max_examples]]
 
     # write aspect lex to file
     header_row = ["Term", "Alias1", "Alias2", "Alias3"]
@@ -369,54 +771,26 @@ def _write_aspect_lex(parsed_data: Union[str, PathLike], generated_aspect_lex: d
     print("Aspect lexicon written to {}".format(out_file_path))
 
 
-def _find_aspect_in_sentence(term, lemma, sent_text, aspect_dict, label, max_examples, found_lemma):
-    search_term = term
-    if found_lemma:
-        search_term = lemma
-
-    start_idx = sent_text.lower().find(search_term)
-    end_idx = start_idx + len(search_term)
-    if (start_idx - 1 > 0 and sent_text[start_idx - 1] == " ") and (
-        end_idx < len(sent_text) and sent_text[end_idx] == " "
-    ):
-
-        sent_text_html = "".join(
-            (
-                sent_text[:start_idx],
-                '<span class="',
-                label,
-                '">',
-                sent_text[start_idx:end_idx],
-                "</span>",
-                sent_text[end_idx:],
-            )
-        )
-
-        if (term, lemma) in aspect_dict:
-            if len(aspect_dict[term, lemma]) < max_examples:
-                aspect_dict[term, lemma].append(str(sent_text_html))
-        else:
-            aspect_dict[term, lemma] = [sent_text_html]
-
-
-def _write_opinion_lex(parsed_data, generated_opinion_lex_reranked, out_dir):
-
-    parsed_docs = _load_parsed_docs_from_dir(parsed_data)
-    opinion_dict = {}
+def _write_opinion_lex(parsed_data, generated_opinion_lex_reranked, out_dir, num_workers=1):
     max_examples = 20
-    label = "OP"
-    for doc in parsed_docs.values():
-        for sent_text, _ in doc.sent_iter():
-
-            for term, terms_params in generated_opinion_lex_reranked.items():
-                is_acquired = terms_params[2]
-                if is_acquired == "Y":
-                    if term in sent_text.lower():
-                        _find_opinion_in_sentence(
-                            term, terms_params, sent_text, opinion_dict, label, max_examples
-                        )
-                else:
-                    opinion_dict[term] = list(terms_params)
+    entries = list(generated_opinion_lex_reranked.items())
+    # only acquired terms are searched for
+    acquired = [entry_i for entry_i, (_, params) in enumerate(entries) if params[2] == "Y"]
+    examples, num_sents = _collect_term_examples(
+        parsed_data, [entries[i][0] for i in acquired], "OP", max_examples, num_workers
+    )
+
+    first_found = {acquired[term_id]: found[0][0] for term_id, found in examples.items()}
+    if num_sents > 0:
+        for entry_i, (_, terms_params) in enumerate(entries):
+            if terms_params[2] != "Y":
+                first_found[entry_i] = 0
+    opinion_dict = {}
+    for entry_i in sorted(first_found, key=lambda i: (first_found[i], i)):
+        term, terms_params = entries[entry_i]
+        opinion_dict[term] = list(terms_params)
+    for term_id, found in examples.items():
+        opinion_dict[entries[acquired[term_id]][0]].extend(html for _, html in found)
 
     # write opinion lex to file
     header_row = ["Term", "Score", "Polarity", "isAcquired"]
@@ -434,33 +808,3 @@ def _write_opinion_lex(parsed_data, generated_opinion_lex_reranked, out_dir):
     out_file_path = out_dir / "generated_opinion_lex_reranked.csv"
     _write_table(opinion_table, out_file_path)
     print("Reranked opinion lexicon written to {}".format(out_file_path))
-
-
-def _find_opinion_in_sentence(term, terms_params, sent_text, opinion_dict, label, max_examples):
-
-    start_idx = sent_text.lower().find(term)
-    end_idx = start_idx + len(term)
-
-    if (start_idx - 1 > 0 and sent_text[start_idx - 1] == " ") and (
-        end_idx < len(sent_text) and sent_text[end_idx] == " "
-    ):
-
-        sent_text_html = "".join(
-            (
-                sent_text[:start_idx],
-                '<span class="',
-                label,
-                '">',
-                sent_text[start_idx:end_idx],
-                "</span>",
-                sent_text[end_idx:],
-            )
-        )
-
-        if term in opinion_dict:
-            if len(opinion_dict[term]) < max_examples:
-                opinion_dict[term].append(str(sent_text_html))
-        else:
-            vals = list(terms_params)
-            vals.append(str(sent_text_html))
-            opinion_dict[term] = vals
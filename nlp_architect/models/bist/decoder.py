@@ -16,10 +16,10 @@
 # pylint: disable=invalid-name
 import numpy as np
 
-
 # Things that were changed from the original:
 # - Reformatted code and variable names to conform with PEP8
 # - Added legal header
+# - Vectorized the CKY loops over span start positions and sentences (parse_proj_batch)
 
 
 # This file contains routines from Lisbon Machine Learning summer school.
@@ -27,67 +27,107 @@ import numpy as np
 
 
 def parse_proj(scores, gold=None):
-    # pylint: disable=too-many-locals
     """
     Parse using Eisner's algorithm.
     """
-    nr, nc = np.shape(scores)
-    if nr != nc:
-        raise ValueError("scores must be a squared matrix with nw+1 rows")
-
-    N = nr - 1  # Number of words (excluding root).
-
-    # Initialize CKY table.
-    complete = np.zeros([N + 1, N + 1, 2])  # s, t, direction (right=1).
-    incomplete = np.zeros([N + 1, N + 1, 2])  # s, t, direction (right=1).
-    complete_backtrack = -np.ones([N + 1, N + 1, 2], dtype=int)  # s, t, direction (right=1).
-    incomplete_backtrack = -np.ones([N + 1, N + 1, 2], dtype=int)  # s, t, direction (right=1).
-
-    incomplete[0, :, 0] -= np.inf
-
-    # Loop from smaller items to larger items.
-    for k in range(1, N + 1):
-        for s in range(N - k + 1):
-            t = s + k
-
-            # First, create incomplete items.
-            # left tree
-            incomplete_vals0 = (
-                complete[s, s:t, 1]
-                + complete[(s + 1) : (t + 1), t, 0]
-                + scores[t, s]
-                + (0.0 if gold is not None and gold[s] == t else 1.0)
-            )
-            incomplete[s, t, 0] = np.max(incomplete_vals0)
-            incomplete_backtrack[s, t, 0] = s + np.argmax(incomplete_vals0)
-            # right tree
-            incomplete_vals1 = (
-                complete[s, s:t, 1]
-                + complete[(s + 1) : (t + 1), t, 0]
-                + scores[s, t]
-                + (0.0 if gold is not None and gold[t] == s else 1.0)
-            )
-            incomplete[s, t, 1] = np.max(incomplete_vals1)
-            incomplete_backtrack[s, t, 1] = s + np.argmax(incomplete_vals1)
-
-            # Second, create complete items.
-            # left tree
-            complete_vals0 = complete[s, s:t, 0] + incomplete[s:t, t, 0]
-            complete[s, t, 0] = np.max(complete_vals0)
-            complete_backtrack[s, t, 0] = s + np.argmax(complete_vals0)
-            # right tree
-            complete_vals1 = incomplete[s, (s + 1) : (t + 1), 1] + complete[(s + 1) : (t + 1), t, 1]
-            complete[s, t, 1] = np.max(complete_vals1)
-            complete_backtrack[s, t, 1] = s + 1 + np.argmax(complete_vals1)
-
-    # value = complete[0][N][1]
-    heads = [-1 for _ in range(N + 1)]  # -np.ones(N+1, dtype=int)
-    _backtrack_eisner(incomplete_backtrack, complete_backtrack, 0, N, 1, 1, heads)
-    value_proj = 0.0
-    for m in range(1, N + 1):
-        h = heads[m]
-        value_proj += scores[h, m]
-    return heads
+    return parse_proj_batch([scores], None if gold is None else [gold])[0]
+
+
+def parse_proj_batch(scores_list, golds=None):
+    # pylint: disable=too-many-locals
+    """
+    Parse several sentences using Eisner's algorithm, vectorized over the span start
+    positions of each span width and over the sentences (score matrices are zero padded to
+    the longest sentence, spans of a sentence never reach its padding).
+
+    Args:
+        scores_list (list of numpy.ndarray): (nw+1)x(nw+1) arc score matrix of each sentence,
+            scores[h, m] scores the arc h -> m.
+        golds (list of list of int, optional): gold heads of each sentence, for cost
+            augmented decoding.
+
+    Returns:
+        list of list of int: the heads of each sentence, as returned by `parse_proj`.
+    """
+    lengths = []
+    for scores in scores_list:
+        nr, nc = np.shape(scores)
+        if nr != nc:
+            raise ValueError("scores must be a squared matrix with nw+1 rows")
+        lengths.append(nr)
+    B = len(scores_list)
+    if B == 0:
+        return []
+    n = max(lengths)
+
+    all_scores = np.zeros([B, n, n])
+    cost = np.ones([B, n, n])
+    for b, scores in enumerate(scores_list):
+        all_scores[b, : lengths[b], : lengths[b]] = scores
+        if golds is not None:
+            for m, h in enumerate(golds[b]):
+                if 0 <= h < lengths[b]:
+                    cost[b, h, m] = 0.0
+
+    # CKY tables of (sentence, span start, span width) and (sentence, span end, span width),
+    # so that the sub-spans of all spans of a width are slices.
+    complete0_s = np.zeros([B, n, n])
+    complete0_e = np.zeros([B, n, n])
+    complete1_s = np.zeros([B, n, n])
+    complete1_e = np.zeros([B, n, n])
+    incomplete0_s = np.zeros([B, n, n])
+    incomplete0_e = np.zeros([B, n, n])
+    incomplete1_s = np.zeros([B, n, n])
+    incomplete1_e = np.zeros([B, n, n])
+    complete_backtrack = -np.ones([B, n, n, 2], dtype=int)  # s, t, direction (right=1).
+    incomplete_backtrack = -np.ones([B, n, n, 2], dtype=int)  # s, t, direction (right=1).
+
+    incomplete0_s[:, 0, :] -= np.inf
+    incomplete0_e[:, np.arange(n), np.arange(n)] -= np.inf
+
+    # Loop from smaller items to larger items, all spans s, t = s + k of a width k at once.
+    for k in range(1, n):
+        m = n - k
+        s = np.arange(m)
+        t = s + k
+
+        # First, create incomplete items.
+        # complete[s, r, 1] + complete[r + 1, t, 0] of r in s..t-1
+        split_vals = complete1_s[:, :m, :k] + complete0_e[:, k:, k - 1 :: -1]
+        # left tree
+        incomplete_vals0 = (
+            split_vals
+            + np.diagonal(all_scores, -k, 1, 2)[:, :, None]
+            + np.diagonal(cost, -k, 1, 2)[:, :, None]
+        )
+        incomplete0_s[:, :m, k] = incomplete0_e[:, k:, k] = np.max(incomplete_vals0, axis=2)
+        incomplete_backtrack[:, s, t, 0] = s + np.argmax(incomplete_vals0, axis=2)
+        # right tree
+        incomplete_vals1 = (
+            split_vals
+            + np.diagonal(all_scores, k, 1, 2)[:, :, None]
+            + np.diagonal(cost, k, 1, 2)[:, :, None]
+        )
+        incomplete1_s[:, :m, k] = incomplete1_e[:, k:, k] = np.max(incomplete_vals1, axis=2)
+        incomplete_backtrack[:, s, t, 1] = s + np.argmax(incomplete_vals1, axis=2)
+
+        # Second, create complete items.
+        # left tree: complete[s, r, 0] + incomplete[r, t, 0] of r in s..t-1
+        complete_vals0 = complete0_s[:, :m, :k] + incomplete0_e[:, k:, k:0:-1]
+        complete0_s[:, :m, k] = complete0_e[:, k:, k] = np.max(complete_vals0, axis=2)
+        complete_backtrack[:, s, t, 0] = s + np.argmax(complete_vals0, axis=2)
+        # right tree: incomplete[s, r, 1] + complete[r, t, 1] of r in s+1..t
+        complete_vals1 = incomplete1_s[:, :m, 1 : k + 1] + complete1_e[:, k:, k - 1 :: -1]
+        complete1_s[:, :m, k] = complete1_e[:, k:, k] = np.max(complete_vals1, axis=2)
+        complete_backtrack[:, s, t, 1] = s + 1 + np.argmax(complete_vals1, axis=2)
+
+    all_heads = []
+    for b, length in enumerate(lengths):
+        N = length - 1  # Number of words (excluding root).
+        heads = [-1 for _ in range(N + 1)]
+        _backtrack_eisner(incomplete_backtrack[b], complete_backtrack[b], 0, N, 1, 1, heads)
+        all_heads.append(heads)
+    return all_heads
 
 
 # pylint: disable=too-many-arguments
@@ -35,7 +35,11 @@ from dynet import (
     cmult,
     SimpleRNNBuilder,
     concatenate,
-    np,
+    concatenate_cols,
+    colwise_add,
+    pick,
+    reshape,
+    select_cols,
     renew_cg,
     esum,
 )
@@ -44,7 +48,6 @@ from nlp_architect.data.conll import ConllEntry
 from nlp_architect.models.bist import decoder
 from nlp_architect.models.bist.utils import read_conll
 
-
 # Things that were changed from the original:
 # - Added input validation
 # - Updated function and object names to dyNet 2.0.2 and Python 3
@@ -149,137 +152,166 @@ class MSTParserLSTM(object):
             )
             self.rout_bias = self.model.add_parameters((len(self.irels)))
 
-    def _get_expr(self, sentence, i, j):
-        # pylint: disable=missing-docstring
-        if sentence[i].headfov is None:
-            sentence[i].headfov = self.hid_layer_foh.expr() * concatenate(
-                [sentence[i].lstms[0], sentence[i].lstms[1]]
-            )
-        if sentence[j].modfov is None:
-            sentence[j].modfov = self.hid_layer_fom.expr() * concatenate(
-                [sentence[j].lstms[0], sentence[j].lstms[1]]
-            )
-
+    @staticmethod
+    def _lstm_matrix(sentence):
+        """Returns the BiLSTM vectors of the sentence entries as the columns of a matrix."""
+        return concatenate_cols([concatenate(entry.lstms) for entry in sentence])
+
+    def _evaluate(self, lstms, num_entries):
+        """Scores all (head, modifier) arcs of a sentence: head and modifier projections are
+        computed once as matrices, tiled to all num_entries^2 pairs and passed through the
+        MLP as a single matrix.
+
+        Args:
+            lstms: the sentence's BiLSTM vectors matrix (see `_lstm_matrix`).
+            num_entries (int): the number of sentence entries.
+
+        Returns:
+            Expression: the arc scores vector, element head * num_entries + modifier scores
+            the arc head -> modifier.
+        """
+        heads = colwise_add(self.hid_layer_foh.expr() * lstms, self.hid_bias.expr())
+        mods = self.hid_layer_fom.expr() * lstms
+        # column head * num_entries + modifier of both matrices belongs to the pair
+        pairs = reshape(
+            concatenate([heads] * num_entries), (self.hidden_units, num_entries * num_entries)
+        ) + concatenate_cols([mods] * num_entries)
+        hidden = self.activation(pairs)
         if self.hidden2_units > 0:
-            output = self.out_layer.expr() * self.activation(
-                self.hid2_bias.expr()
-                + self.hid2_layer.expr()
-                * self.activation(sentence[i].headfov + sentence[j].modfov + self.hid_bias.expr())
-            )  # + self.outBias
-        else:
-            output = self.out_layer.expr() * self.activation(
-                sentence[i].headfov + sentence[j].modfov + self.hid_bias.expr()
-            )  # + self.outBias
-        return output
-
-    def _evaluate(self, sentence):
-        # pylint: disable=missing-docstring
-        exprs = [
-            [self._get_expr(sentence, i, j) for j in range(len(sentence))]
-            for i in range(len(sentence))
-        ]
-        scores = np.array([[output.scalar_value() for output in exprsRow] for exprsRow in exprs])
-        return scores, exprs
-
-    def _evaluate_label(self, sentence, i, j):
-        # pylint: disable=missing-docstring
-        if sentence[i].rheadfov is None:
-            sentence[i].rheadfov = self.rhid_layer_foh.expr() * concatenate(
-                [sentence[i].lstms[0], sentence[i].lstms[1]]
-            )
-        if sentence[j].rmodfov is None:
-            sentence[j].rmodfov = self.rhid_layer_fom.expr() * concatenate(
-                [sentence[j].lstms[0], sentence[j].lstms[1]]
+            hidden = self.activation(
+                colwise_add(self.hid2_layer.expr() * hidden, self.hid2_bias.expr())
             )
-
+        return reshape(self.out_layer.expr() * hidden, (num_entries * num_entries,))
+
+    def _evaluate_labels(self, lstms, heads):
+        """Scores all labels of the arcs heads[modifier] -> modifier of all modifiers except
+        the root in a single MLP pass.
+
+        Args:
+            lstms: the sentence's BiLSTM vectors matrix (see `_lstm_matrix`).
+            heads (list of int): the head of each sentence entry.
+
+        Returns:
+            Expression: the label scores matrix, column modifier - 1 scores the labels of the
+            arc of modifier.
+        """
+        arcs = colwise_add(
+            select_cols(self.rhid_layer_foh.expr() * lstms, [int(head) for head in heads[1:]])
+            + select_cols(self.rhid_layer_fom.expr() * lstms, list(range(1, len(heads)))),
+            self.rhid_bias.expr(),
+        )
+        hidden = self.activation(arcs)
         if self.hidden2_units > 0:
-            output = (
-                self.rout_layer.expr()
-                * self.activation(
-                    self.rhid2_bias.expr()
-                    + self.rhid2_layer.expr()
-                    * self.activation(
-                        sentence[i].rheadfov + sentence[j].rmodfov + self.rhid_bias.expr()
-                    )
-                )
-                + self.rout_bias.expr()
+            hidden = self.activation(
+                colwise_add(self.rhid2_layer.expr() * hidden, self.rhid2_bias.expr())
             )
-        else:
-            output = (
-                self.rout_layer.expr()
-                * self.activation(
-                    sentence[i].rheadfov + sentence[j].rmodfov + self.rhid_bias.expr()
-                )
-                + self.rout_bias.expr()
-            )
-        return output.value(), output
+        return colwise_add(self.rout_layer.expr() * hidden, self.rout_bias.expr())
 
-    def predict(self, conll_path=None, conll=None):
+    def _encode(self, conll_sentence):
         # pylint: disable=missing-docstring
-        if conll is None:
-            conll = read_conll(conll_path)
+        for entry in conll_sentence:
+            entry.lstms = [entry.vec, entry.vec]
 
-        for sentence in conll:
-            conll_sentence = [entry for entry in sentence if isinstance(entry, ConllEntry)]
+        if self.blstm_flag:
+            lstm_forward = self.builders[0].initial_state()
+            lstm_backward = self.builders[1].initial_state()
 
-            for entry in conll_sentence:
-                wordvec = (
-                    self.wlookup[int(self.vocab.get(entry.norm, 0))] if self.wdims > 0 else None
-                )
-                posvec = self.plookup[int(self.pos[entry.pos])] if self.pdims > 0 else None
-                entry.vec = concatenate([_f for _f in [wordvec, posvec, None] if _f])
+            for entry, rentry in zip(conll_sentence, reversed(conll_sentence)):
+                lstm_forward = lstm_forward.add_input(entry.vec)
+                lstm_backward = lstm_backward.add_input(rentry.vec)
 
-                entry.lstms = [entry.vec, entry.vec]
-                entry.headfov = None
-                entry.modfov = None
+                entry.lstms[1] = lstm_forward.output()
+                rentry.lstms[0] = lstm_backward.output()
 
-                entry.rheadfov = None
-                entry.rmodfov = None
+            if self.bibi_flag:
+                for entry in conll_sentence:
+                    entry.vec = concatenate(entry.lstms)
 
-            if self.blstm_flag:
-                lstm_forward = self.builders[0].initial_state()
-                lstm_backward = self.builders[1].initial_state()
+                blstm_forward = self.bbuilders[0].initial_state()
+                blstm_backward = self.bbuilders[1].initial_state()
 
                 for entry, rentry in zip(conll_sentence, reversed(conll_sentence)):
-                    lstm_forward = lstm_forward.add_input(entry.vec)
-                    lstm_backward = lstm_backward.add_input(rentry.vec)
+                    blstm_forward = blstm_forward.add_input(entry.vec)
+                    blstm_backward = blstm_backward.add_input(rentry.vec)
 
-                    entry.lstms[1] = lstm_forward.output()
-                    rentry.lstms[0] = lstm_backward.output()
+                    entry.lstms[1] = blstm_forward.output()
+                    rentry.lstms[0] = blstm_backward.output()
+        return self._lstm_matrix(conll_sentence)
 
-                if self.bibi_flag:
-                    for entry in conll_sentence:
-                        entry.vec = concatenate(entry.lstms)
+    def predict(self, conll_path=None, conll=None, batch_size=32):
+        """Parse sentences, batch_size sentences share a computation graph and their arc
+        and label scores are each computed in a single forward pass.
 
-                    blstm_forward = self.bbuilders[0].initial_state()
-                    blstm_backward = self.bbuilders[1].initial_state()
+        Args:
+            conll_path (str, optional): CoNLL file of the sentences.
+            conll (iterable of list of ConllEntry, optional): the sentences.
+            batch_size (int, optional): number of sentences per computation graph.
 
-                    for entry, rentry in zip(conll_sentence, reversed(conll_sentence)):
-                        blstm_forward = blstm_forward.add_input(entry.vec)
-                        blstm_backward = blstm_backward.add_input(rentry.vec)
+        Yields:
+            list of ConllEntry: each sentence with predicted heads and relations.
+        """
+        if conll is None:
+            conll = read_conll(conll_path)
 
-                        entry.lstms[1] = blstm_forward.output()
-                        rentry.lstms[0] = blstm_backward.output()
+        batch = []
+        for sentence in conll:
+            batch.append(sentence)
+            if len(batch) == batch_size:
+                yield from self._predict_batch(batch)
+                batch = []
+        if batch:
+            yield from self._predict_batch(batch)
+
+    def _predict_batch(self, batch):
+        # pylint: disable=missing-docstring
+        renew_cg()
+        conll_sentences = []
+        lstms = []
+        for sentence in batch:
+            conll_sentence = [entry for entry in sentence if isinstance(entry, ConllEntry)]
 
-            scores, _ = self._evaluate(conll_sentence)
-            heads = decoder.parse_proj(scores)
+            for entry in conll_sentence:
+                wordvec = (
+                    self.wlookup[int(self.vocab.get(entry.norm, 0))] if self.wdims > 0 else None
+                )
+                posvec = self.plookup[int(self.pos[entry.pos])] if self.pdims > 0 else None
+                entry.vec = concatenate([_f for _f in [wordvec, posvec, None] if _f])
 
+            conll_sentences.append(conll_sentence)
+            lstms.append(self._encode(conll_sentence))
+
+        # a single forward pass for the arc scores of all sentences
+        sizes = [len(conll_sentence) for conll_sentence in conll_sentences]
+        arc_scores = concatenate(
+            [self._evaluate(sent_lstms, size) for sent_lstms, size in zip(lstms, sizes)]
+        ).npvalue()
+        all_scores = []
+        offset = 0
+        for size in sizes:
+            all_scores.append(arc_scores[offset : offset + size * size].reshape(size, size))
+            offset += size * size
+        all_heads = decoder.parse_proj_batch(all_scores)
+
+        for conll_sentence, heads in zip(conll_sentences, all_heads):
             for entry, head in zip(conll_sentence, heads):
                 entry.pred_parent_id = head
                 entry.pred_relation = "_"
 
-            dump = False
-
-            if self.labels_flag:
-                for modifier, head in enumerate(heads[1:]):
-                    scores, _ = self._evaluate_label(conll_sentence, head, modifier + 1)
-                    conll_sentence[modifier + 1].pred_relation = self.irels[
-                        max(enumerate(scores), key=itemgetter(1))[0]
-                    ]
-
-            renew_cg()
-            if not dump:
-                yield sentence
+        if self.labels_flag:
+            labeled = [i for i, size in enumerate(sizes) if size > 1]
+            if labeled:
+                label_scores = concatenate_cols(
+                    [self._evaluate_labels(lstms[i], all_heads[i]) for i in labeled]
+                ).npvalue()
+                label_scores = label_scores.reshape(len(self.irels), -1).argmax(axis=0)
+                offset = 0
+                for i in labeled:
+                    for entry in conll_sentences[i][1:]:
+                        entry.pred_relation = self.irels[label_scores[offset]]
+                        offset += 1
+
+        renew_cg()
+        return batch
 
     def train(self, conll_path):
         # pylint: disable=invalid-name
@@ -327,46 +359,20 @@ class MSTParserLSTM(object):
 
                 entry.vec = concatenate([_f for _f in [wordvec, posvec, None] if _f])
 
-                entry.lstms = [entry.vec, entry.vec]
-                entry.headfov = None
-                entry.modfov = None
-
-                entry.rheadfov = None
-                entry.rmodfov = None
-
-            if self.blstm_flag:
-                lstm_forward = self.builders[0].initial_state()
-                lstm_backward = self.builders[1].initial_state()
-
-                for entry, rentry in zip(conll_sentence, reversed(conll_sentence)):
-                    lstm_forward = lstm_forward.add_input(entry.vec)
-                    lstm_backward = lstm_backward.add_input(rentry.vec)
-
-                    entry.lstms[1] = lstm_forward.output()
-                    rentry.lstms[0] = lstm_backward.output()
-
-                if self.bibi_flag:
-                    for entry in conll_sentence:
-                        entry.vec = concatenate(entry.lstms)
-
-                    blstm_forward = self.bbuilders[0].initial_state()
-                    blstm_backward = self.bbuilders[1].initial_state()
-
-                    for entry, rentry in zip(conll_sentence, reversed(conll_sentence)):
-                        blstm_forward = blstm_forward.add_input(entry.vec)
-                        blstm_backward = blstm_backward.add_input(rentry.vec)
-
-                        entry.lstms[1] = blstm_forward.output()
-                        rentry.lstms[0] = blstm_backward.output()
-
-            scores, exprs = self._evaluate(conll_sentence)
+            lstms = self._encode(conll_sentence)
+            size = len(conll_sentence)
+            arc_exprs = self._evaluate(lstms, size)
+            scores = arc_exprs.npvalue().reshape(size, size)
             gold = [entry.parent_id for entry in conll_sentence]
             heads = decoder.parse_proj(scores, gold if self.costaug_flag else None)
 
-            if self.labels_flag:
-                for modifier, head in enumerate(gold[1:]):
-                    rscores, rexprs = self._evaluate_label(conll_sentence, head, modifier + 1)
-                    gold_label_ind = self.rels[conll_sentence[modifier + 1].relation]
+            if self.labels_flag and size > 1:
+                label_exprs = self._evaluate_labels(lstms, gold)
+                label_scores = label_exprs.npvalue().reshape(len(self.irels), -1)
+                for modifier in range(1, size):
+                    rscores = label_scores[:, modifier - 1]
+                    rexprs = pick(label_exprs, modifier - 1, dim=1)
+                    gold_label_ind = self.rels[conll_sentence[modifier].relation]
                     wrong_label_ind = max(
                         (
                             (label, scr)
@@ -376,13 +382,13 @@ class MSTParserLSTM(object):
                         key=itemgetter(1),
                     )[0]
                     if rscores[gold_label_ind] < rscores[wrong_label_ind] + 1:
-                        lerrs.append(rexprs[wrong_label_ind] - rexprs[gold_label_ind])
+                        lerrs.append(pick(rexprs, wrong_label_ind) - pick(rexprs, gold_label_ind))
 
             e = sum([1 for h, g in zip(heads[1:], gold[1:]) if h != g])
             eerrors += e
             if e > 0:
                 loss = [
-                    (exprs[h][i] - exprs[g][i])
+                    (pick(arc_exprs, h * size + i) - pick(arc_exprs, g * size + i))
                     for i, (h, g) in enumerate(zip(heads, gold))
                     if h != g
                 ]  # * (1.0/float(e))
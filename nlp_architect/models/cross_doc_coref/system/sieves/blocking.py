@@ -0,0 +1,116 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+from collections import defaultdict
+from typing import Iterable, List, Set
+
+from nlp_architect.common.cdc.cluster import Cluster
+from nlp_architect.models.cross_doc_coref.system.sieves.sieves import SieveClusterMerger
+
+
+class UnionFind(object):
+    def __init__(self, size: int):
+        """
+        Disjoint sets of cluster indices, a merged cluster is represented by the index
+        of the cluster it was merged into
+
+        Args:
+            size: number of elements
+        """
+        self.parent = list(range(size))
+
+    def find(self, index: int) -> int:
+        root = index
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[index] != root:
+            self.parent[index], index = root, self.parent[index]
+        return root
+
+    def is_root(self, index: int) -> bool:
+        return self.parent[index] == index
+
+    def union(self, root: int, other: int) -> None:
+        """
+        Args:
+            root: index of the set to merge into (remains the set representative)
+            other: index of the set to merge
+        """
+        self.parent[self.find(other)] = self.find(root)
+
+    def roots(self) -> List[int]:
+        return [i for i in range(len(self.parent)) if self.parent[i] == i]
+
+
+class ClusterBlockingIndex(object):
+    def __init__(self, sieve: SieveClusterMerger, clusters: List[Cluster], indices: Iterable[int]):
+        """
+        Inverted index from the blocking keys and probes of a sieve's relation (see
+        `RelationExtraction.get_blocking_keys`) to the clusters having mentions with
+        them, used to find the clusters that can possibly be merged with a cluster.
+
+        Args:
+            sieve: the sieve
+            clusters: the clusters
+            indices: indices of the clusters to index
+        """
+        self.sieve = sieve
+        self.key_index = defaultdict(set)
+        self.probe_index = defaultdict(set)
+        # clusters with mentions that cannot be blocked
+        self.unblocked = set()
+        for index in indices:
+            self.add(index, clusters[index].mentions)
+
+    def add(self, index: int, mentions: List) -> None:
+        """
+        Index mentions as belonging to a cluster (called when a cluster is merged into it)
+
+        Args:
+            index: the cluster index
+            mentions: the mentions
+        """
+        for mention in mentions:
+            keys = self.sieve.get_blocking_keys(mention)
+            if keys is None:
+                self.unblocked.add(index)
+                continue
+            for key in keys[0]:
+                self.key_index[key].add(index)
+            for probe in keys[1]:
+                self.probe_index[probe].add(index)
+
+    def candidates(self, index: int, mentions: List) -> Set[int]:
+        """
+        Indices of the clusters that can have a mention pair with the sieve's relation with
+        the given mentions of a cluster
+
+        Args:
+            index: the cluster index
+            mentions: the mentions
+
+        Returns:
+            Set[int]: cluster indices, or None if every cluster is a candidate
+        """
+        if index in self.unblocked:
+            return None
+        candidates = set(self.unblocked)
+        for mention in mentions:
+            keys, probes = self.sieve.get_blocking_keys(mention)
+            for probe in probes:
+                candidates.update(self.key_index.get(probe, ()))
+            for key in keys:
+                candidates.update(self.probe_index.get(key, ()))
+        return candidates
@@ -14,11 +14,16 @@
 # limitations under the License.
 # ******************************************************************************
 
+import heapq
 import logging
 import time
 
 from nlp_architect.common.cdc.cluster import Clusters
 from nlp_architect.common.cdc.topics import Topic
+from nlp_architect.models.cross_doc_coref.system.sieves.blocking import (
+    ClusterBlockingIndex,
+    UnionFind,
+)
 from nlp_architect.models.cross_doc_coref.system.sieves.sieves import SieveClusterMerger
 from nlp_architect.models.cross_doc_coref.system.sieves_container_init import (
     SievesContainerInitialization,
@@ -43,46 +48,91 @@ class RunSystemsSuper(object):
         return sieves
 
     def run_deterministic(self):
-        # pylint: disable=too-many-nested-blocks
+        """
+        Run the sieves by order, each sieve merges cluster pairs until no more clusters can
+        be merged. Clusters are compared in their list order, a cluster is compared with
+        every following cluster and absorbs the clusters it matches.
+
+        Only candidate cluster pairs, found by indexing the sieve's blocking keys (see
+        `ClusterBlockingIndex`), are compared; pairs that are not candidates cannot match,
+        so the resulting clusters are the same as comparing every pair.
+
+        Returns:
+            Clusters: the merged clusters
+        """
+        clusters = self.clusters.clusters_list
+        clusters_size = len(clusters)
+        merges = UnionFind(clusters_size)
         for sieve in self.sieves:
             start = time.time()
+            index = ClusterBlockingIndex(sieve, clusters, merges.roots())
+            # number of merges into each cluster, a pair that did not match is compared
+            # again only if one of its clusters changed since
+            versions = [0] * clusters_size
+            not_matched = {}
             clusters_changed = True
             merge_count = 0
+            compared = 0
             while clusters_changed:
                 clusters_changed = False
-                clusters_size = len(self.clusters.clusters_list)
                 for i in range(0, clusters_size):
-                    cluster_i = self.clusters.clusters_list[i]
-                    if cluster_i.merged:
+                    if not merges.is_root(i):
                         continue
-
-                    for j in range(i + 1, clusters_size):
-                        cluster_j = self.clusters.clusters_list[j]
-                        if cluster_j.merged:
+                    cluster_i = clusters[i]
+
+                    # candidates are compared by index order, candidates found when
+                    # cluster_i absorbs a cluster are compared if they follow that cluster
+                    candidates = self._following(
+                        index.candidates(i, cluster_i.mentions), i, clusters_size
+                    )
+                    heapq.heapify(candidates)
+                    queued = set(candidates)
+                    while candidates:
+                        j = heapq.heappop(candidates)
+                        if not merges.is_root(j):
                             continue
 
-                        if cluster_i is not cluster_j:
-                            criterion = sieve.run_sieve(cluster_i, cluster_j)
-                            if criterion:
-                                merge_count += 1
-                                clusters_changed = True
-                                cluster_i.merge_clusters(cluster_j)
-                                cluster_j.merged = True
-
-                if clusters_changed:
-                    self.clusters.clean_clusters()
+                        cluster_j = clusters[j]
+                        if not_matched.get((i, j)) == (versions[i], versions[j]):
+                            continue
+                        compared += 1
+                        if not sieve.run_sieve(cluster_i, cluster_j):
+                            not_matched[(i, j)] = (versions[i], versions[j])
+                        else:
+                            merge_count += 1
+                            clusters_changed = True
+                            cluster_i.merge_clusters(cluster_j)
+                            cluster_j.merged = True
+                            merges.union(i, j)
+                            versions[i] += 1
+                            index.add(i, cluster_j.mentions)
+                            for new_j in self._following(
+                                index.candidates(i, cluster_j.mentions), j, clusters_size
+                            ):
+                                if new_j not in queued:
+                                    queued.add(new_j)
+                                    heapq.heappush(candidates, new_j)
 
             end = time.time()
             took = end - start
             logger.info(
-                "Total of %d clusters merged using method: %s, took: %.4f sec",
+                "Total of %d clusters merged using method: %s, took: %.4f sec "
+                "(%d cluster pairs compared)",
                 merge_count,
                 str(sieve.excepted_relation),
                 took,
+                compared,
             )
 
+        self.clusters.clusters_list = [clusters[i] for i in merges.roots()]
         return self.clusters
 
+    @staticmethod
+    def _following(candidates, index, size):
+        if candidates is None:
+            return list(range(index + 1, size))
+        return [j for j in candidates if j > index]
+
     def get_results(self):
         return self.results_ordered
 
@@ -14,7 +14,7 @@
 # limitations under the License.
 # ******************************************************************************
 import logging
-from typing import Tuple
+from typing import Optional, Set, Tuple
 
 from nlp_architect.common.cdc.cluster import Cluster
 from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
@@ -36,6 +36,7 @@ class SieveClusterMerger(object):
         self.excepted_relation = excepted_relation[0]
         self.threshold = excepted_relation[1]
         self.relation_extractor = relation_extractor
+        self._blocking_keys = {}
 
         logger.info(
             "init Sieve, for relation-%s with threshold=%.1f",
@@ -43,8 +44,50 @@ class SieveClusterMerger(object):
             self.threshold,
         )
 
+    def get_blocking_keys(self, mention) -> Optional[Tuple[Set, Set]]:
+        """
+        Blocking keys and probes of a mention for this sieve's relation (see
+        `RelationExtraction.get_blocking_keys`), cached per mention
+
+        Args:
+            mention: MentionDataLight
+
+        Returns:
+            Tuple[Set, Set]: keys and probes, or None if the mention cannot be blocked
+        """
+        cached = self._blocking_keys.get(id(mention))
+        if cached is None or cached[0] is not mention:
+            if self.threshold <= 0:
+                # every cluster pair is merged, nothing can be blocked
+                keys = None
+            else:
+                keys = self.relation_extractor.get_blocking_keys(mention, self.excepted_relation)
+            cached = self._blocking_keys[id(mention)] = (mention, keys)
+        return cached[1]
+
+    def may_match(self, mention_i, mention_j) -> bool:
+        """
+        Args:
+            mention_i:
+            mention_j:
+
+        Returns:
+            bool -> False if the mentions cannot have the sieve's relation (according to
+            their blocking keys)
+        """
+        keys_i = self.get_blocking_keys(mention_i)
+        keys_j = self.get_blocking_keys(mention_j)
+        if keys_i is None or keys_j is None:
+            return True
+        return not keys_i[1].isdisjoint(keys_j[0]) or not keys_j[1].isdisjoint(keys_i[0])
+
     def run_sieve(self, cluster_i: Cluster, cluster_j: Cluster) -> bool:
         """
+        Relation extraction is skipped for mention pairs that cannot match according to
+        their blocking keys, and the mention pairs loop stops as soon as the result is
+        known. Extracted relations are cached in the relation extractor's relation cache
+        (if set), so pairs compared again on following iterations are not recomputed.
+
         Args:
             cluster_i:
             cluster_j:
@@ -53,15 +96,24 @@ class SieveClusterMerger(object):
             bool -> indicating whether to merge clusters (True) or not (False)
         """
         matches = 0
+        possible_pairs_len = float(len(cluster_i.mentions) * len(cluster_j.mentions))
+        remaining = len(cluster_i.mentions) * len(cluster_j.mentions)
+        if matches / possible_pairs_len >= self.threshold:
+            return True
         for mention_i in cluster_i.mentions:
             for mention_j in cluster_j.mentions:
-                match_result = self.relation_extractor.extract_sub_relations(
-                    mention_i, mention_j, self.excepted_relation
-                )
-                if match_result == self.excepted_relation:
-                    matches += 1
+                remaining -= 1
+                if self.may_match(mention_i, mention_j):
+                    match_result = self.relation_extractor.extract_relation(
+                        mention_i, mention_j, self.excepted_relation
+                    )
+                    if match_result == self.excepted_relation:
+                        matches += 1
+                        if matches / possible_pairs_len >= self.threshold:
+                            return True
+                if (matches + remaining) / possible_pairs_len < self.threshold:
+                    return False
 
-        possible_pairs_len = float(len(cluster_i.mentions) * len(cluster_j.mentions))
         matches_rate = matches / possible_pairs_len
 
         result = False
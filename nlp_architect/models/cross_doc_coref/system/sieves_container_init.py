@@ -17,6 +17,7 @@
 import logging
 from typing import List
 
+from nlp_architect.data.cdc_resources.relations.relation_cache import RelationCache
 from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
 from nlp_architect.models.cross_doc_coref.sieves_config import (
     EventSievesConfiguration,
@@ -32,10 +33,23 @@ class SievesContainerInitialization(object):
         event_coref_config: EventSievesConfiguration,
         entity_coref_config: EntitySievesConfiguration,
         sieves_model_list: List[RelationExtraction],
+        relation_cache: RelationCache = None,
     ):
+        """
+        Args:
+            event_coref_config: event sieves configuration
+            entity_coref_config: entity sieves configuration
+            sieves_model_list: the relation extractors used by the sieves
+            relation_cache (optional): cache of the relations extracted by the sieves,
+                shared by all extractors, topics and sieves
+        """
         self.sieves_model_list = sieves_model_list
         self.event_config = event_coref_config
         self.entity_config = entity_coref_config
+        self.relation_cache = relation_cache
+        if relation_cache is not None:
+            for model in sieves_model_list:
+                model.set_relation_cache(relation_cache)
 
     def get_module_from_relation(self, relation_type):
         for model in self.sieves_model_list:
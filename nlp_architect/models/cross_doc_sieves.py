@@ -72,4 +72,10 @@ def _run_coref(
         clusters.set_coref_chain_to_mentions()
         clusters_list.append(clusters)
 
+    relation_cache = resources.relation_cache
+    if relation_cache is not None:
+        logger.info("%s relation cache: %s", eval_type, relation_cache.stats())
+        if relation_cache.cache_file is not None:
+            relation_cache.save()
+
     return clusters_list
@@ -17,8 +17,11 @@
 import json
 import logging
 import sys
+from os import makedirs, path
 
+import numpy as np
 from gensim.models import FastText, Word2Vec, KeyedVectors
+from gensim.models.keyedvectors import Vocab
 from gensim.models.word2vec import LineSentence
 from gensim import utils
 import nltk
@@ -28,6 +31,122 @@ from smart_open import open as smart_open
 
 logger = logging.getLogger(__name__)
 
+SERVING_VECTORS = "vectors.npy"
+SERVING_NORMS = "norms.npy"
+SERVING_VOCAB = "vocab.txt"
+SERVING_META = "meta.json"
+
+
+def save_normalized_vectors(words, vectors, model_dir, dtype="float32"):
+    """
+    Save word vectors in the np2vec serving format: a directory with the L2-normalized vectors
+    as one contiguous matrix (vectors.npy), the L2 norms of the vectors (norms.npy), the words
+    in row order, one per line (vocab.txt), and the matrix description (meta.json).
+
+    Args:
+        words (list of str): the words, most frequent first
+        vectors (numpy.ndarray): the vectors of the words, one row per word
+        model_dir (str): the model directory
+        dtype (str {float32,float16}): the dtype of the stored vectors
+    """
+    if dtype not in ("float32", "float16"):
+        raise ValueError("dtype should be float32 or float16, got {}".format(dtype))
+    if not path.exists(model_dir):
+        makedirs(model_dir)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.save(path.join(model_dir, SERVING_NORMS), norms.reshape(-1))
+    norms[norms == 0] = 1.0
+    np.save(path.join(model_dir, SERVING_VECTORS), (vectors / norms).astype(dtype))
+    with open(path.join(model_dir, SERVING_VOCAB), "w", encoding="utf8") as vocab_file:
+        vocab_file.write("\n".join(words))
+    with open(path.join(model_dir, SERVING_META), "w", encoding="utf8") as meta_file:
+        json.dump(
+            {"num_words": len(words), "vector_size": vectors.shape[1], "dtype": dtype}, meta_file
+        )
+
+
+def load_normalized_vectors(model_dir, mmap=True):
+    """
+    Load word vectors saved with save_normalized_vectors.
+
+    Args:
+        model_dir (str): the model directory
+        mmap (bool): memory-map the vectors (read only, shared by all the processes serving
+            the model) instead of reading them
+
+    Returns:
+        (list of str, numpy.ndarray): the words and their normalized vectors
+    """
+    with open(path.join(model_dir, SERVING_META), encoding="utf8") as meta_file:
+        meta = json.load(meta_file)
+    with open(path.join(model_dir, SERVING_VOCAB), encoding="utf8") as vocab_file:
+        words = vocab_file.read().split("\n") if meta["num_words"] > 0 else []
+    vectors = np.load(path.join(model_dir, SERVING_VECTORS), mmap_mode="r" if mmap else None)
+    if len(words) != meta["num_words"] or vectors.shape != (
+        meta["num_words"],
+        meta["vector_size"],
+    ):
+        raise ValueError("corrupted np2vec model directory: {}".format(model_dir))
+    # a plain ndarray view of the memory map, operations on np.memmap objects are slower
+    return words, vectors.view(np.ndarray)
+
+
+def load_vector_norms(model_dir):
+    """
+    Load the L2 norms of word vectors saved with save_normalized_vectors.
+
+    Args:
+        model_dir (str): the model directory
+
+    Returns:
+        numpy.ndarray: the float32 norms of the vectors, or None if the model was saved without
+        them
+    """
+    norms_file = path.join(model_dir, SERVING_NORMS)
+    if not path.isfile(norms_file):
+        return None
+    with open(path.join(model_dir, SERVING_META), encoding="utf8") as meta_file:
+        meta = json.load(meta_file)
+    norms = np.load(norms_file)
+    if norms.shape != (meta["num_words"],):
+        raise ValueError("corrupted np2vec model directory: {}".format(model_dir))
+    return norms
+
+
+class ServingKeyedVectors(KeyedVectors):
+    """
+    KeyedVectors over the normalized vectors of a model saved in the serving format. The
+    normalized vectors are used as both the vectors and normalized vectors (no init_sims copy),
+    the raw vectors of words (e.g. averaged by n_similarity) are rebuilt from their norms.
+
+    Args:
+        vector_size (int): the dimension of the vectors
+        norms (numpy.ndarray, optional): the L2 norms of the vectors, the normalized vectors are
+            the raw vectors if None
+    """
+
+    def __init__(self, vector_size, norms=None):
+        super(ServingKeyedVectors, self).__init__(vector_size)
+        self.norms = norms
+
+    def word_vec(self, word, use_norm=False):
+        result = super(ServingKeyedVectors, self).word_vec(word, use_norm=True)
+        if not use_norm and self.norms is not None:
+            result = result * self.norms[self.vocab[word].index]
+            result.setflags(write=False)
+        return result
+
+
+def is_serving_format(np2vec_model_file):
+    """
+    Check whether a model path is a model saved in the serving format.
+
+    Args:
+        np2vec_model_file (str): path to the model
+    """
+    return path.isfile(path.join(np2vec_model_file, SERVING_META))
+
 
 # pylint: disable-msg=too-many-instance-attributes
 class NP2vec:
@@ -224,7 +343,24 @@ class NP2vec:
             logger.error("invalid word embedding type: %s", self.word_embedding_type)
             sys.exit(0)
 
-    def save(self, np2vec_model_file="np2vec.model", binary=False, word2vec_format=True):
+    def _np_vocab(self):
+        """The NP terms of the model (discarding empty marked NP's), most frequent first"""
+        return [
+            (word, vocab)
+            for word, vocab in sorted(
+                iteritems(self.model.wv.vocab), key=lambda item: -item[1].count
+            )
+            if self.is_marked(word) and len(word) > 1
+        ]
+
+    def save(
+        self,
+        np2vec_model_file="np2vec.model",
+        binary=False,
+        word2vec_format=True,
+        serving_format=False,
+        dtype="float32",
+    ):
         """
         Save the np2vec model.
 
@@ -233,7 +369,31 @@ class NP2vec:
             binary (bool): boolean indicating whether the np2vec model to load is in binary format
             word2vec_format(bool): boolean indicating whether to save the model in original
             word2vec format.
+            serving_format (bool): save the (pruned) normalized vectors in the serving format,
+            np2vec_model_file is then a directory (see save_normalized_vectors).
+            dtype (str {float32,float16}): the dtype of the vectors in the serving format.
         """
+        if serving_format:
+            if self.word_embedding_type == "fasttext" and self.word_ngrams == 1:
+                raise ValueError("subword fasttext models cannot be saved in the serving format")
+            if self.prune_non_np:
+                np_vocab = self._np_vocab()
+            else:
+                np_vocab = sorted(iteritems(self.model.wv.vocab), key=lambda item: -item[1].count)
+            indices = np.asarray([vocab.index for _, vocab in np_vocab], dtype=np.int64)
+            logger.info(
+                "storing %sx%s normalized vectors into %s",
+                len(indices),
+                self.model.vector_size,
+                np2vec_model_file,
+            )
+            save_normalized_vectors(
+                [word for word, _ in np_vocab],
+                self.model.wv.syn0[indices].reshape(len(indices), self.model.vector_size),
+                np2vec_model_file,
+                dtype=dtype,
+            )
+            return
         if self.word_embedding_type == "fasttext" and self.word_ngrams == 1:
             if not binary:
                 logger.error(
@@ -247,11 +407,9 @@ class NP2vec:
             # prune non NP terms
             if self.prune_non_np:
                 logger.info("pruning np2vec model")
-                total_vec = 0
+                np_vocab = self._np_vocab()
+                total_vec = len(np_vocab)
                 vector_size = self.model.vector_size
-                for word in self.model.wv.vocab.keys():
-                    if self.is_marked(word) and len(word) > 1:
-                        total_vec += 1
                 logger.info(
                     "storing %sx%s projection weights for NP's into %s",
                     total_vec,
@@ -261,20 +419,17 @@ class NP2vec:
                 with smart_open(np2vec_model_file, "wb") as fout:
                     fout.write(utils.to_utf8("%s %s\n" % (total_vec, vector_size)))
                     # store NP vectors in sorted order: most frequent NP's at the top
-                    for word, vocab in sorted(
-                        iteritems(self.model.wv.vocab), key=lambda item: -item[1].count
-                    ):
-                        if self.is_marked(word) and len(word) > 1:  # discard empty marked np's
-                            embedding_vec = self.model.wv.syn0[vocab.index]
-                            if binary:
-                                fout.write(utils.to_utf8(word) + b" " + embedding_vec.tostring())
-                            else:
-                                fout.write(
-                                    utils.to_utf8(
-                                        "%s %s\n"
-                                        % (word, " ".join("%f" % val for val in embedding_vec))
-                                    )
+                    for word, vocab in np_vocab:
+                        embedding_vec = self.model.wv.syn0[vocab.index]
+                        if binary:
+                            fout.write(utils.to_utf8(word) + b" " + embedding_vec.tostring())
+                        else:
+                            fout.write(
+                                utils.to_utf8(
+                                    "%s %s\n"
+                                    % (word, " ".join("%f" % val for val in embedding_vec))
                                 )
+                            )
                 if not word2vec_format:
                     # pylint: disable=attribute-defined-outside-init
                     self.model = KeyedVectors.load_word2vec_format(np2vec_model_file, binary=binary)
@@ -282,21 +437,25 @@ class NP2vec:
                 self.model.save(np2vec_model_file)
 
     @classmethod
-    def load(cls, np2vec_model_file, binary=False, word_ngrams=0, word2vec_format=True):
+    def load(cls, np2vec_model_file, binary=False, word_ngrams=0, word2vec_format=True, mmap=True):
         """
         Load the np2vec model.
 
         Args:
-            np2vec_model_file (str): the file containing the np2vec model to load
+            np2vec_model_file (str): the file containing the np2vec model to load, or the
+            directory of a model saved in the serving format
             binary (bool): boolean indicating whether the np2vec model to load is in binary format
             word_ngrams (int {1,0}): If 1, np2vec model to load uses word vectors with subword (
             ngrams) information.
             word2vec_format(bool): boolean indicating whether the model to load has been stored in
             original word2vec format.
+            mmap (bool): memory-map the vectors of a model saved in the serving format
 
         Returns:
             np2vec model to load
         """
+        if is_serving_format(np2vec_model_file):
+            return cls._load_serving_format(np2vec_model_file, mmap)
         if word_ngrams == 0:
             if word2vec_format:
                 return KeyedVectors.load_word2vec_format(np2vec_model_file, binary=binary)
@@ -305,3 +464,23 @@ class NP2vec:
             return FastText.load(np2vec_model_file)
         logger.error("invalid value for 'word_ngrams'")
         return None
+
+    @staticmethod
+    def _load_serving_format(model_dir, mmap=True):
+        """ServingKeyedVectors of a model saved in the serving format"""
+        words, vectors = load_normalized_vectors(model_dir, mmap)
+        norms = load_vector_norms(model_dir)
+        if norms is None:
+            logger.warning(
+                "%s was saved without vector norms, raw vectors are the normalized vectors",
+                model_dir,
+            )
+        model = ServingKeyedVectors(vectors.shape[1], norms)
+        model.index2word = words
+        # counts as in load_word2vec_format: by rank
+        model.vocab = {
+            word: Vocab(index=index, count=len(words) - index) for index, word in enumerate(words)
+        }
+        model.vectors = vectors
+        model.vectors_norm = vectors
+        return model
@@ -29,6 +29,7 @@ from tqdm import tqdm, trange
 from nlp_architect.data.sequential_tagging import TokenClsInputExample
 from nlp_architect.models import TrainableModel
 from nlp_architect.nn.torch.layers import CRF
+from nlp_architect.nn.torch.data.buffers import collect_outputs
 from nlp_architect.nn.torch.distillation import TeacherStudentDistill
 from nlp_architect.nn.torch.modules.embedders import IDCNN
 from nlp_architect.utils.metrics import tagging
@@ -406,20 +407,18 @@ class NeuralTagger(TrainableModel):
         self.device = device
         self.n_gpus = n_gpus
 
-    def evaluate(self, data_set: DataLoader):
+    def evaluate_batches(self, data_set: DataLoader):
         """
-        Run evaluation on given dataloader
+        Run evaluation on given dataloader and yield the outputs of every batch
 
         Args:
             data_set (DataLoader): a data loader to run evaluation on
 
-        Returns:
-            logits, labels (if labels are given)
+        Yields:
+            tuple: logits, label ids (None if the data set has no labels) of a batch
         """
         logger.info("***** Running inference *****")
         logger.info(" Batch size: {}".format(data_set.batch_size))
-        preds = None
-        out_label_ids = None
         for batch in tqdm(data_set, desc="Inference iteration"):
             self.model.eval()
             batch = tuple(t.to(self.device) for t in batch)
@@ -428,16 +427,23 @@ class NeuralTagger(TrainableModel):
                 logits = self.model(**inputs)
             model_output = logits.detach().cpu()
             model_out_label_ids = inputs["labels"].detach().cpu() if "labels" in inputs else None
-            if preds is None:
-                preds = model_output
-                out_label_ids = model_out_label_ids
-            else:
-                preds = torch.cat((preds, model_output), dim=0)
-                out_label_ids = (
-                    torch.cat((out_label_ids, model_out_label_ids), dim=0)
-                    if out_label_ids is not None
-                    else None
-                )
+            yield model_output, model_out_label_ids
+
+    def evaluate(self, data_set: DataLoader, output_files: List[str] = None):
+        """
+        Run evaluation on given dataloader
+
+        Args:
+            data_set (DataLoader): a data loader to run evaluation on
+            output_files (List[str], optional): paths of memory-mapped files to store
+                the logits and label ids in (instead of RAM). Defaults to None.
+
+        Returns:
+            logits, labels (if labels are given)
+        """
+        preds, out_label_ids = collect_outputs(
+            self.evaluate_batches(data_set), len(data_set.sampler), filenames=output_files
+        )
         output = (preds,)
         if out_label_ids is not None:
             output = output + (out_label_ids,)
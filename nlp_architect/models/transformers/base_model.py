@@ -16,10 +16,11 @@
 import io
 import logging
 import os
-from typing import List, Union
+import tempfile
+from typing import Callable, List, Union
 
 import torch
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, RandomSampler, SequentialSampler, TensorDataset
 from tqdm import tqdm, trange
 from transformers import (
     AdamW,
@@ -36,6 +37,9 @@ from transformers import (
 
 from nlp_architect.models import TrainableModel
 from nlp_architect.models.transformers.quantized_bert import QuantizedBertConfig
+from nlp_architect.nn.torch.data.bucketing import LengthBucketSampler, bucketed_data_loader
+from nlp_architect.nn.torch.data.buffers import collect_outputs
+from nlp_architect.nn.torch.data.feature_cache import FeatureCache, hash_files
 
 logger = logging.getLogger(__name__)
 
@@ -196,6 +200,64 @@ class TransformerBase(TrainableModel):
         )
         return tokenizer
 
+    def _tokenizer_hash(self):
+        with tempfile.TemporaryDirectory() as vocab_dir:
+            vocab_files = self.tokenizer.save_vocabulary(vocab_dir)
+            return hash_files(sorted(vocab_files))
+
+    def _feature_cache_key(self, data_files, **kwargs):
+        return FeatureCache.key(
+            data=hash_files(data_files),
+            tokenizer=self._tokenizer_hash(),
+            tokenizer_class=self.tokenizer_class.__name__,
+            do_lower_case=self.do_lower_case,
+            model_class=self.__class__.__name__,
+            model_type=self.model_type,
+            labels=self.labels,
+            **kwargs,
+        )
+
+    def convert_to_tensors_cached(
+        self,
+        examples: Union[List, Callable[[], List]],
+        data_files: Union[str, List[str]],
+        cache_dir: str,
+        overwrite_cache: bool = False,
+        key_info: dict = None,
+        **kwargs,
+    ) -> TensorDataset:
+        """
+        Convert examples to tensor dataset, reusing features cached on disk.
+        The cache key is the content of the data files, tokenizer vocabulary, model
+        type/class, labels and the conversion arguments (e.g., max_seq_length).
+
+        Args:
+            examples (Union[List, Callable[[], List]]): examples, or a function returning
+            the examples (called only when the features are not cached)
+            data_files (Union[str, List[str]]): files (or directories) the examples are
+            read from
+            cache_dir (str): features cache directory
+            overwrite_cache (bool, optional): recreate cached features. Defaults to False.
+            key_info (dict, optional): additional cache key components (e.g., data set name,
+            preprocessing options). Defaults to None.
+            kwargs: `convert_to_tensors` arguments
+
+        Returns:
+            TensorDataset:
+        """
+        cache = FeatureCache(cache_dir)
+        key_info = key_info or {}
+        key = self._feature_cache_key(data_files, key_info=key_info, **kwargs)
+        if not overwrite_cache:
+            data_set = cache.load(key)
+            if data_set is not None:
+                return data_set
+        if callable(examples):
+            examples = examples()
+        data_set = self.convert_to_tensors(examples, **kwargs)
+        cache.save(key, data_set, model_type=self.model_type, **key_info, **kwargs)
+        return data_set
+
     def save_model(self, output_dir: str, save_checkpoint: bool = False, args=None):
         """
         Save model/tokenizer/arguments to given output directory
@@ -265,6 +327,33 @@ class TransformerBase(TrainableModel):
             t_total = num_samples // gradient_accumulation_steps * num_train_epochs
         return t_total, num_train_epochs
 
+    def get_data_loader(
+        self,
+        data_set: TensorDataset,
+        batch_size: int,
+        shuffle: bool = False,
+        dynamic_padding: bool = False,
+    ) -> DataLoader:
+        """
+        Create a data loader for a data set created by `convert_to_tensors`
+
+        Args:
+            data_set (TensorDataset): data set
+            batch_size (int): batch size
+            shuffle (bool, optional): shuffle examples (for training). Defaults to False.
+            dynamic_padding (bool, optional): batch examples of similar length together and
+                pad each batch only to its longest sequence. Defaults to False.
+
+        Returns:
+            DataLoader: data loader
+        """
+        if dynamic_padding:
+            return bucketed_data_loader(
+                data_set, batch_size, shuffle=shuffle, pad_on_left=self.model_type in ["xlnet"]
+            )
+        sampler = RandomSampler(data_set) if shuffle else SequentialSampler(data_set)
+        return DataLoader(data_set, sampler=sampler, batch_size=batch_size)
+
     def get_logits(self, batch):
         self.model.eval()
         inputs = self._batch_mapper(batch)
@@ -422,13 +511,18 @@ class TransformerBase(TrainableModel):
         logger.info("\n\nBest dev=%s. test=%s\n", str(new_best_dev), str(new_test_dev))
         return new_best_dev, new_test_dev
 
-    def _evaluate(self, data_set: DataLoader):
+    def _evaluate_batches(self, data_set: DataLoader):
+        """
+        Run inference on given dataloader and yield the outputs of every batch
+
+        Args:
+            data_set (DataLoader): a data loader to run inference on
+
+        Yields:
+            tuple: logits, label ids (None if the data set has no labels) of a batch
+        """
         logger.info("***** Running inference *****")
         logger.info(" Batch size: {}".format(data_set.batch_size))
-        eval_loss = 0.0
-        nb_eval_steps = 0
-        preds = None
-        out_label_ids = None
         for batch in tqdm(data_set, desc="Inference iteration"):
             self.model.eval()
             batch = tuple(t.to(self.device) for t in batch)
@@ -436,24 +530,35 @@ class TransformerBase(TrainableModel):
             with torch.no_grad():
                 inputs = self._batch_mapper(batch)
                 outputs = self.model(**inputs)
-                if "labels" in inputs:
-                    tmp_eval_loss, logits = outputs[:2]
-                    eval_loss += tmp_eval_loss.mean().item()
-                else:
-                    logits = outputs[0]
-            nb_eval_steps += 1
+                logits = outputs[1] if "labels" in inputs else outputs[0]
             model_output = logits.detach().cpu()
             model_out_label_ids = inputs["labels"].detach().cpu() if "labels" in inputs else None
-            if preds is None:
-                preds = model_output
-                out_label_ids = model_out_label_ids
-            else:
-                preds = torch.cat((preds, model_output), dim=0)
-                out_label_ids = (
-                    torch.cat((out_label_ids, model_out_label_ids), dim=0)
-                    if out_label_ids is not None
-                    else None
-                )
+            yield model_output, model_out_label_ids
+
+    def _evaluate(self, data_set: DataLoader, output_files: List[str] = None):
+        """
+        Run inference on given dataloader, collecting the outputs of all batches into
+        preallocated buffers
+
+        Args:
+            data_set (DataLoader): a data loader to run inference on
+            output_files (List[str], optional): paths of memory-mapped files to store
+                the logits and label ids in (instead of RAM). Defaults to None.
+
+        Returns:
+            logits, labels (if labels are given)
+        """
+        indices = None
+        batch_sampler = data_set.batch_sampler
+        if isinstance(batch_sampler, LengthBucketSampler) and not batch_sampler.shuffle:
+            # length-bucketed batches are reordered; write outputs back in input order
+            indices = iter(batch_sampler)
+        preds, out_label_ids = collect_outputs(
+            self._evaluate_batches(data_set),
+            len(data_set.sampler),
+            filenames=output_files,
+            indices=indices,
+        )
         if out_label_ids is None:
             return preds
         return preds, out_label_ids
@@ -49,6 +49,7 @@ from nlp_architect.nn.torch.quantization import (
     QuantizedEmbedding,
     QuantizedLayer,
     QuantizedLinear,
+    convert_to_int8,
 )
 
 logger = logging.getLogger(__name__)
@@ -323,6 +324,10 @@ class QuantizedBertPreTrainedModel(BertPreTrainedModel):
         torch.save(model_to_save.state_dict(), output_model_file)
         model_to_save.toggle_8bit(False)
 
+    def to_int8(self):
+        """convert the quantized linear layers for int8 execution (CPU inference only)"""
+        return convert_to_int8(self)
+
     def toggle_8bit(self, mode: bool):
         def _toggle_8bit(module):
             if isinstance(module, QuantizedLayer):
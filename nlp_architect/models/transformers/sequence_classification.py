@@ -20,7 +20,7 @@ from typing import List, Union
 
 import numpy as np
 import torch
-from torch.utils.data import DataLoader, SequentialSampler, TensorDataset
+from torch.utils.data import DataLoader, TensorDataset
 from transformers import (
     BertForSequenceClassification,
     RobertaForSequenceClassification,
@@ -156,6 +156,9 @@ class TransformerSequenceClassifier(TransformerBase):
                 logger.info("  %s = %s", key, str(result[key]))
                 writer.write("%s = %s\n" % (key, str(result[key])))
 
+    def _feature_cache_key(self, data_files, **kwargs):
+        return super()._feature_cache_key(data_files, task_type=self.task_type, **kwargs)
+
     def convert_to_tensors(
         self,
         examples: List[SequenceClsInputExample],
@@ -201,6 +204,7 @@ class TransformerSequenceClassifier(TransformerBase):
         max_seq_length: int,
         batch_size: int = 64,
         evaluate=False,
+        dynamic_padding: bool = False,
     ):
         """
         Run inference on given examples
@@ -208,6 +212,8 @@ class TransformerSequenceClassifier(TransformerBase):
         Args:
             examples (List[SequenceClsInputExample]): examples
             batch_size (int, optional): batch size. Defaults to 64.
+            dynamic_padding (bool, optional): batch examples of similar length together and
+                pad each batch only to its longest sequence. Defaults to False.
 
         Returns:
             logits
@@ -215,8 +221,9 @@ class TransformerSequenceClassifier(TransformerBase):
         data_set = self.convert_to_tensors(
             examples, max_seq_length=max_seq_length, include_labels=evaluate
         )
-        inf_sampler = SequentialSampler(data_set)
-        inf_dataloader = DataLoader(data_set, sampler=inf_sampler, batch_size=batch_size)
+        inf_dataloader = self.get_data_loader(
+            data_set, batch_size, dynamic_padding=dynamic_padding
+        )
         logits = self._evaluate(inf_dataloader)
         if not evaluate:
             preds = self._postprocess_logits(logits)
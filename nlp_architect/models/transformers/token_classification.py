@@ -19,7 +19,7 @@ from typing import List, Union
 import torch
 from torch.nn import CrossEntropyLoss, Dropout, Linear
 from torch.nn import functional as F
-from torch.utils.data import DataLoader, SequentialSampler, TensorDataset
+from torch.utils.data import DataLoader, TensorDataset
 from transformers import (
     ROBERTA_PRETRAINED_MODEL_ARCHIVE_MAP,
     BertForTokenClassification,
@@ -31,8 +31,10 @@ from transformers import (
 )
 
 from nlp_architect.data.sequential_tagging import TokenClsInputExample
-from nlp_architect.models.transformers.base_model import InputFeatures, TransformerBase
+from nlp_architect.data.token_cls_features import convert_token_cls_examples
+from nlp_architect.models.transformers.base_model import TransformerBase
 from nlp_architect.models.transformers.quantized_bert import QuantizedBertForTokenClassification
+from nlp_architect.nn.torch.data.bucketing import DynamicPaddingCollator
 from nlp_architect.utils.metrics import tagging
 
 logger = logging.getLogger()
@@ -70,11 +72,11 @@ def _bert_token_tagging_head_fw(
 
 class BertTokenClassificationHead(BertForTokenClassification):
     """BERT token classification head with linear classifier.
-       This head's forward ignores word piece tokens in its linear layer.
+    This head's forward ignores word piece tokens in its linear layer.
 
-       The forward requires an additional 'valid_ids' map that maps the tensors
-       for valid tokens (e.g., ignores additional word piece tokens generated by
-       the tokenizer, as in NER task the 'X' label).
+    The forward requires an additional 'valid_ids' map that maps the tensors
+    for valid tokens (e.g., ignores additional word piece tokens generated by
+    the tokenizer, as in NER task the 'X' label).
     """
 
     def forward(
@@ -100,11 +102,11 @@ class BertTokenClassificationHead(BertForTokenClassification):
 
 class QuantizedBertForTokenClassificationHead(QuantizedBertForTokenClassification):
     """Quantized BERT token classification head with linear classifier.
-       This head's forward ignores word piece tokens in its linear layer.
+    This head's forward ignores word piece tokens in its linear layer.
 
-       The forward requires an additional 'valid_ids' map that maps the tensors
-       for valid tokens (e.g., ignores additional word piece tokens generated by
-       the tokenizer, as in NER task the 'X' label).
+    The forward requires an additional 'valid_ids' map that maps the tensors
+    for valid tokens (e.g., ignores additional word piece tokens generated by
+    the tokenizer, as in NER task the 'X' label).
     """
 
     def forward(
@@ -130,11 +132,11 @@ class QuantizedBertForTokenClassificationHead(QuantizedBertForTokenClassificatio
 
 class XLNetTokenClassificationHead(XLNetPreTrainedModel):
     """XLNet token classification head with linear classifier.
-       This head's forward ignores word piece tokens in its linear layer.
+    This head's forward ignores word piece tokens in its linear layer.
 
-       The forward requires an additional 'valid_ids' map that maps the tensors
-       for valid tokens (e.g., ignores additional word piece tokens generated by
-       the tokenizer, as in NER task the 'X' label).
+    The forward requires an additional 'valid_ids' map that maps the tensors
+    for valid tokens (e.g., ignores additional word piece tokens generated by
+    the tokenizer, as in NER task the 'X' label).
     """
 
     def __init__(self, config):
@@ -189,11 +191,11 @@ class XLNetTokenClassificationHead(XLNetPreTrainedModel):
 
 class RobertaForTokenClassificationHead(BertPreTrainedModel):
     """RoBERTa token classification head with linear classifier.
-       This head's forward ignores word piece tokens in its linear layer.
+    This head's forward ignores word piece tokens in its linear layer.
 
-       The forward requires an additional 'valid_ids' map that maps the tensors
-       for valid tokens (e.g., ignores additional word piece tokens generated by
-       the tokenizer, as in NER task the 'X' label).
+    The forward requires an additional 'valid_ids' map that maps the tensors
+    for valid tokens (e.g., ignores additional word piece tokens generated by
+    the tokenizer, as in NER task the 'X' label).
     """
 
     config_class = RobertaConfig
@@ -391,6 +393,7 @@ class TransformerTokenClassifier(TransformerBase):
         examples: List[TokenClsInputExample],
         max_seq_length: int = 128,
         include_labels: bool = True,
+        num_workers: int = 1,
     ) -> TensorDataset:
         """
         Convert examples to tensor dataset
@@ -399,15 +402,21 @@ class TransformerTokenClassifier(TransformerBase):
             examples (List[SequenceClsInputExample]): examples
             max_seq_length (int, optional): max sequence length. Defaults to 128.
             include_labels (bool, optional): include labels. Defaults to True.
+            num_workers (int, optional): number of processes used for converting the
+            examples. Defaults to 1.
 
         Returns:
             TensorDataset:
         """
-        features = self._convert_examples_to_features(
+        label_map = None
+        if include_labels:
+            label_map = {v: k for k, v in self.labels_id_map.items()}
+        input_ids, input_mask, segment_ids, valid_ids, label_ids = convert_token_cls_examples(
             examples,
-            max_seq_length,
             self.tokenizer,
-            include_labels,
+            max_seq_length,
+            label_map,
+            num_workers=num_workers,
             # xlnet has a cls token at the end
             cls_token_at_end=bool(self.model_type in ["xlnet"]),
             cls_token=self.tokenizer.cls_token,
@@ -420,13 +429,13 @@ class TransformerTokenClassifier(TransformerBase):
             pad_token_segment_id=4 if self.model_type in ["xlnet"] else 0,
         )
         # Convert to Tensors and build dataset
-        all_input_ids = torch.tensor([f.input_ids for f in features], dtype=torch.long)
-        all_input_mask = torch.tensor([f.input_mask for f in features], dtype=torch.long)
-        all_segment_ids = torch.tensor([f.segment_ids for f in features], dtype=torch.long)
-        all_valid_ids = torch.tensor([f.valid_ids for f in features], dtype=torch.long)
+        all_input_ids = torch.from_numpy(input_ids)
+        all_input_mask = torch.from_numpy(input_mask)
+        all_segment_ids = torch.from_numpy(segment_ids)
+        all_valid_ids = torch.from_numpy(valid_ids)
 
         if include_labels:
-            all_label_ids = torch.tensor([f.label_id for f in features], dtype=torch.long)
+            all_label_ids = torch.from_numpy(label_ids)
             dataset = TensorDataset(
                 all_input_ids, all_input_mask, all_segment_ids, all_valid_ids, all_label_ids
             )
@@ -434,126 +443,22 @@ class TransformerTokenClassifier(TransformerBase):
             dataset = TensorDataset(all_input_ids, all_input_mask, all_segment_ids, all_valid_ids)
         return dataset
 
-    def _convert_examples_to_features(
-        self,
-        examples: List[TokenClsInputExample],
-        max_seq_length,
-        tokenizer,
-        include_labels=True,
-        cls_token_at_end=False,
-        pad_on_left=False,
-        cls_token="[CLS]",
-        sep_token="[SEP]",
-        pad_token=0,
-        sequence_segment_id=0,
-        sep_token_extra=0,
-        cls_token_segment_id=1,
-        pad_token_segment_id=0,
-        mask_padding_with_zero=True,
-    ):
-        """ Loads a data file into a list of `InputBatch`s
-            `cls_token_at_end` define the location of the CLS token:
-                - False (Default, BERT/XLM pattern): [CLS] + A + [SEP] + B + [SEP]
-                - True (XLNet/GPT pattern): A + [SEP] + B + [SEP] + [CLS]
-            `cls_token_segment_id` define the segment id associated to the CLS token
-            (0 for BERT, 2 for XLNet)
-        """
-
-        if include_labels:
-            label_map = {v: k for k, v in self.labels_id_map.items()}
-            label_pad = 0
-
-        features = []
-        for (ex_index, example) in enumerate(examples):
-            if ex_index % 10000 == 0:
-                logger.info("Processing example %d of %d", ex_index, len(examples))
-
-            tokens = []
-            labels = []
-            valid_tokens = []
-            for i, token in enumerate(example.tokens):
-                new_tokens = tokenizer.tokenize(token)
-                tokens.extend(new_tokens)
-                v_tok = [0] * (len(new_tokens))
-                v_tok[0] = 1
-                valid_tokens.extend(v_tok)
-                if include_labels:
-                    v_lbl = [label_pad] * (len(new_tokens))
-                    v_lbl[0] = label_map.get(example.label[i])
-                    labels.extend(v_lbl)
-
-            # truncate by max_seq_length
-            special_tokens_count = 3 if sep_token_extra else 2
-            tokens = tokens[: (max_seq_length - special_tokens_count)]
-            valid_tokens = valid_tokens[: (max_seq_length - special_tokens_count)]
-            if include_labels:
-                labels = labels[: (max_seq_length - special_tokens_count)]
-
-            tokens += [sep_token]
-            if include_labels:
-                labels += [label_pad]
-            valid_tokens += [0]
-            if sep_token_extra:  # roberta special case
-                tokens += [sep_token]
-                valid_tokens += [0]
-                if include_labels:
-                    labels += [label_pad]
-            segment_ids = [sequence_segment_id] * len(tokens)
-
-            if cls_token_at_end:
-                tokens = tokens + [cls_token]
-                segment_ids = segment_ids + [cls_token_segment_id]
-                if include_labels:
-                    labels = labels + [label_pad]
-                valid_tokens = valid_tokens + [0]
-            else:
-                tokens = [cls_token] + tokens
-                segment_ids = [cls_token_segment_id] + segment_ids
-                if include_labels:
-                    labels = [label_pad] + labels
-                valid_tokens = [0] + valid_tokens
-
-            input_ids = tokenizer.convert_tokens_to_ids(tokens)
-
-            input_mask = [1 if mask_padding_with_zero else 0] * len(input_ids)
-
-            # Zero-pad up to the sequence length.
-            padding_length = max_seq_length - len(input_ids)
-            if pad_on_left:
-                input_ids = ([pad_token] * padding_length) + input_ids
-                input_mask = ([0 if mask_padding_with_zero else 1] * padding_length) + input_mask
-                segment_ids = ([pad_token_segment_id] * padding_length) + segment_ids
-                if include_labels:
-                    labels = ([label_pad] * padding_length) + labels
-                valid_tokens = ([0] * padding_length) + valid_tokens
-            else:
-                input_ids = input_ids + ([pad_token] * padding_length)
-                input_mask = input_mask + ([0 if mask_padding_with_zero else 1] * padding_length)
-                segment_ids = segment_ids + ([pad_token_segment_id] * padding_length)
-                if include_labels:
-                    labels = labels + ([label_pad] * padding_length)
-                valid_tokens = valid_tokens + ([0] * padding_length)
-
-            assert len(input_ids) == max_seq_length
-            assert len(input_mask) == max_seq_length
-            assert len(segment_ids) == max_seq_length
-            assert len(valid_tokens) == max_seq_length
-            if include_labels:
-                assert len(labels) == max_seq_length
-
-            features.append(
-                InputFeatures(
-                    input_ids=input_ids,
-                    input_mask=input_mask,
-                    segment_ids=segment_ids,
-                    label_id=labels,
-                    valid_ids=valid_tokens,
-                )
-            )
-        return features
+    def _evaluate_batches(self, data_set: DataLoader):
+        collate_fn = data_set.collate_fn
+        for logits, label_ids in super()._evaluate_batches(data_set):
+            if isinstance(collate_fn, DynamicPaddingCollator):
+                # pad token outputs of trimmed batches back to max_seq_length
+                logits = collate_fn.restore_length(logits)
+                if label_ids is not None:
+                    label_ids = collate_fn.restore_length(label_ids)
+            yield logits, label_ids
 
     def inference(
-        self, examples: List[TokenClsInputExample], max_seq_length: int, batch_size: int = 64
+        self,
+        examples: List[TokenClsInputExample],
+        max_seq_length: int,
+        batch_size: int = 64,
+        dynamic_padding: bool = False,
     ):
         """
         Run inference on given examples
@@ -561,6 +466,8 @@ class TransformerTokenClassifier(TransformerBase):
         Args:
             examples (List[SequenceClsInputExample]): examples
             batch_size (int, optional): batch size. Defaults to 64.
+            dynamic_padding (bool, optional): batch examples of similar length together and
+                pad each batch only to its longest sequence. Defaults to False.
 
         Returns:
             logits
@@ -568,8 +475,7 @@ class TransformerTokenClassifier(TransformerBase):
         data_set = self.convert_to_tensors(
             examples, max_seq_length=max_seq_length, include_labels=False
         )
-        inf_sampler = SequentialSampler(data_set)
-        inf_dataloader = DataLoader(data_set, sampler=inf_sampler, batch_size=batch_size)
+        inf_dataloader = self.get_data_loader(data_set, batch_size, dynamic_padding=dynamic_padding)
         logits = self._evaluate(inf_dataloader)
         active_positions = data_set.tensors[-1].view(len(data_set), -1) != 0.0
         logits = torch.argmax(F.log_softmax(logits, dim=2), dim=2)
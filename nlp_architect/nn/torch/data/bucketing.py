@@ -0,0 +1,159 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import random
+from typing import List, Sequence
+
+import torch
+from torch.nn import functional as F
+from torch.utils.data import DataLoader, Sampler, TensorDataset
+
+
+class LengthBucketSampler(Sampler):
+    r"""Batch sampler that groups examples of similar length into the same batch.
+
+    Without shuffling, examples are sorted by decreasing length and batched in that
+    order (the iteration order is deterministic, so outputs can be scattered back to
+    the input order, see `TransformerBase._evaluate`).
+    With shuffling, the examples are shuffled, split into buckets of
+    `batch_size * bucket_size_multiplier` examples that are sorted by length and
+    batched, and the resulting batches are shuffled.
+
+    Arguments:
+        lengths (Sequence[int]): length of every example in the data set
+        batch_size (int): batch size
+        shuffle (bool, optional): shuffle examples and batches. Defaults to False.
+        bucket_size_multiplier (int, optional): number of batches in a bucket when
+            shuffling. Defaults to 100.
+        drop_last (bool, optional): drop last batch of each bucket if smaller than
+            batch_size. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        lengths: Sequence[int],
+        batch_size: int,
+        shuffle: bool = False,
+        bucket_size_multiplier: int = 100,
+        drop_last: bool = False,
+    ):
+        self.lengths = [int(length) for length in lengths]
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_size = batch_size * bucket_size_multiplier
+        self.drop_last = drop_last
+
+    def _batches(self, indices: List[int]) -> List[List[int]]:
+        indices = sorted(indices, key=lambda i: -self.lengths[i])
+        batches = [
+            indices[i : i + self.batch_size] for i in range(0, len(indices), self.batch_size)
+        ]
+        if self.drop_last and len(batches) > 0 and len(batches[-1]) < self.batch_size:
+            batches = batches[:-1]
+        return batches
+
+    def __iter__(self):
+        indices = list(range(len(self.lengths)))
+        if not self.shuffle:
+            return iter(self._batches(indices))
+        random.shuffle(indices)
+        batches = []
+        for i in range(0, len(indices), self.bucket_size):
+            batches.extend(self._batches(indices[i : i + self.bucket_size]))
+        random.shuffle(batches)
+        return iter(batches)
+
+    def __len__(self):
+        if not self.drop_last:
+            return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+        num_batches = 0
+        for i in range(0, len(self.lengths), self.bucket_size):
+            num_batches += min(self.bucket_size, len(self.lengths) - i) // self.batch_size
+        return num_batches
+
+
+class DynamicPaddingCollator(object):
+    r"""Collate function that pads a batch only up to its longest sequence.
+
+    Examples are expected to be padded to `max_seq_length` already (as produced by
+    `convert_to_tensors`); per-example tensors of 1 or more dimensions (input ids,
+    masks, segment ids, valid ids, token labels) are trimmed to the longest sequence
+    in the batch according to the attention mask, scalar tensors (sequence labels)
+    are stacked as is.
+
+    Arguments:
+        max_seq_length (int): length the examples are padded to
+        mask_index (int, optional): index of the attention mask tensor in each
+            example. Defaults to 1.
+        pad_on_left (bool, optional): examples are padded on the left. Defaults to False.
+    """
+
+    def __init__(self, max_seq_length: int, mask_index: int = 1, pad_on_left: bool = False):
+        self.max_seq_length = max_seq_length
+        self.mask_index = mask_index
+        self.pad_on_left = pad_on_left
+
+    def __call__(self, examples):
+        tensors = [torch.stack(t) for t in zip(*examples)]
+        length = int(tensors[self.mask_index].ne(0).sum(1).max())
+        trim = slice(self.max_seq_length - length, None) if self.pad_on_left else slice(0, length)
+        return [t[:, trim] if t.dim() > 1 else t for t in tensors]
+
+    def restore_length(self, tensor: torch.Tensor) -> torch.Tensor:
+        """
+        Pad a batch tensor trimmed by this collator (e.g., token logits) back to
+        max_seq_length along its sequence dimension (dim 1)
+
+        Args:
+            tensor (torch.Tensor): batch tensor
+
+        Returns:
+            torch.Tensor: padded tensor
+        """
+        padding_length = self.max_seq_length - tensor.size(1)
+        if padding_length == 0:
+            return tensor
+        pad = [0, 0] * (tensor.dim() - 2)
+        pad += [padding_length, 0] if self.pad_on_left else [0, padding_length]
+        return F.pad(tensor, pad)
+
+
+def bucketed_data_loader(
+    data_set: TensorDataset,
+    batch_size: int,
+    shuffle: bool = False,
+    mask_index: int = 1,
+    pad_on_left: bool = False,
+    **kwargs
+) -> DataLoader:
+    """
+    Create a data loader with length bucketing and dynamic padding over a
+    TensorDataset of padded examples
+
+    Args:
+        data_set (TensorDataset): data set
+        batch_size (int): batch size
+        shuffle (bool, optional): shuffle examples (for training). Defaults to False.
+        mask_index (int, optional): index of the attention mask tensor. Defaults to 1.
+        pad_on_left (bool, optional): examples are padded on the left. Defaults to False.
+        kwargs: additional `LengthBucketSampler` arguments
+
+    Returns:
+        DataLoader: data loader
+    """
+    mask = data_set.tensors[mask_index]
+    sampler = LengthBucketSampler(mask.ne(0).sum(1).tolist(), batch_size, shuffle, **kwargs)
+    collator = DynamicPaddingCollator(mask.size(1), mask_index=mask_index, pad_on_left=pad_on_left)
+    return DataLoader(data_set, batch_sampler=sampler, collate_fn=collator)
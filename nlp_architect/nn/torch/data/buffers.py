@@ -0,0 +1,177 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+from typing import Iterable, Sequence
+
+import numpy as np
+import torch
+
+_TORCH_TO_NUMPY_DTYPE = {
+    torch.float16: np.float16,
+    torch.float32: np.float32,
+    torch.float64: np.float64,
+    torch.int32: np.int32,
+    torch.int64: np.int64,
+    torch.uint8: np.uint8,
+    torch.bool: np.bool_,
+}
+
+
+class OutputBuffer(object):
+    """Preallocated buffer for collecting per-batch model outputs.
+
+    The buffer is allocated on the first write using the number of items and the
+    per-item shape/dtype of the first batch (unless given explicitly), so collecting
+    the outputs of a whole data set costs a single allocation and one copy per batch,
+    instead of re-concatenating all previous batches on every step.
+    Batches with trailing dimensions smaller than the buffer (e.g., shorter padded
+    sequences) are written into the leading part of each row, the rest stays zero.
+
+    Arguments:
+        num_items (int): number of items (rows) the buffer holds
+        item_shape (Sequence[int], optional): shape of a single item. Defaults to the
+            shape of the first written batch.
+        dtype (torch.dtype, optional): buffer type. Defaults to the first batch type.
+        filename (str, optional): back the buffer with a numpy memory-mapped file
+            instead of RAM. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        num_items: int,
+        item_shape: Sequence[int] = None,
+        dtype: torch.dtype = None,
+        filename: str = None,
+    ):
+        self.num_items = num_items
+        self.item_shape = tuple(item_shape) if item_shape is not None else None
+        self.dtype = dtype
+        self.filename = filename
+        self._buffer = None
+        self._mmap = None
+        self._written = 0
+        self._scattered = False
+
+    def _allocate(self, batch: torch.Tensor):
+        if self.item_shape is None:
+            self.item_shape = tuple(batch.shape[1:])
+        if self.dtype is None:
+            self.dtype = batch.dtype
+        shape = (self.num_items,) + self.item_shape
+        if self.filename is not None:
+            self._mmap = np.memmap(
+                self.filename, dtype=_TORCH_TO_NUMPY_DTYPE[self.dtype], mode="w+", shape=shape
+            )
+            self._buffer = torch.from_numpy(self._mmap)
+        else:
+            self._buffer = torch.zeros(shape, dtype=self.dtype)
+
+    def _rows_view(self, batch: torch.Tensor, rows):
+        if len(batch.shape[1:]) != len(self.item_shape) or any(
+            b > s for b, s in zip(batch.shape[1:], self.item_shape)
+        ):
+            raise ValueError(
+                "batch item shape {} does not fit buffer item shape {}".format(
+                    tuple(batch.shape[1:]), self.item_shape
+                )
+            )
+        return (rows,) + tuple(slice(0, d) for d in batch.shape[1:])
+
+    def append(self, batch: torch.Tensor):
+        """
+        Write a batch into the next free rows of the buffer
+
+        Args:
+            batch (torch.Tensor): batch of items (first dimension is the batch)
+        """
+        if self._buffer is None:
+            self._allocate(batch)
+        end = self._written + batch.shape[0]
+        if end > self.num_items:
+            raise ValueError("buffer overflow: {} > {} items".format(end, self.num_items))
+        self._buffer[self._rows_view(batch, slice(self._written, end))] = batch.detach().cpu()
+        self._written = end
+
+    def put(self, indices: torch.Tensor, batch: torch.Tensor):
+        """
+        Write a batch into the given rows of the buffer (scatter)
+
+        Args:
+            indices (torch.Tensor): 1d tensor of row indices, one per batch item
+            batch (torch.Tensor): batch of items
+        """
+        if self._buffer is None:
+            self._allocate(batch)
+        indices = torch.as_tensor(indices, dtype=torch.long)
+        self._buffer[self._rows_view(batch, indices)] = batch.detach().cpu()
+        self._scattered = True
+
+    @property
+    def tensor(self) -> torch.Tensor:
+        """The collected items (rows filled by `append`, or the whole buffer if `put`
+        was used)"""
+        if self._buffer is None:
+            return None
+        if not self._scattered and self._written < self.num_items:
+            return self._buffer[: self._written]
+        return self._buffer
+
+    def flush(self):
+        """Flush a memory-mapped buffer to disk"""
+        if self._mmap is not None:
+            self._mmap.flush()
+
+
+def collect_outputs(
+    batches,
+    num_items: int,
+    num_outputs: int = 2,
+    filenames: Sequence[str] = None,
+    indices: Iterable[Sequence[int]] = None,
+):
+    """
+    Collect a stream of per-batch output tuples into preallocated buffers
+
+    Args:
+        batches (Iterable[tuple]): iterable of tuples of tensors (or None) per batch
+        num_items (int): total number of items in the stream
+        num_outputs (int, optional): number of elements in each tuple. Defaults to 2.
+        filenames (Sequence[str], optional): memory-mapped file per tuple element.
+            Defaults to None (in-memory buffers).
+        indices (Iterable[Sequence[int]], optional): output row indices of the items of
+            every batch (e.g., the batches of a batch sampler), for writing outputs
+            back in input order. Defaults to None (rows are filled in stream order).
+
+    Returns:
+        tuple: a tensor per tuple element (None where batch elements were None)
+    """
+    buffers = [
+        OutputBuffer(num_items, filename=filenames[i] if filenames else None)
+        for i in range(num_outputs)
+    ]
+    if indices is not None:
+        indices = iter(indices)
+    for outputs in batches:
+        rows = next(indices) if indices is not None else None
+        for buf, o in zip(buffers, outputs):
+            if o is None:
+                continue
+            if rows is None:
+                buf.append(o)
+            else:
+                buf.put(rows, o)
+    for buf in buffers:
+        buf.flush()
+    return tuple(buf.tensor for buf in buffers)
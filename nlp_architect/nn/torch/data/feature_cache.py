@@ -0,0 +1,138 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import json
+import logging
+import os
+import shutil
+import tempfile
+from hashlib import sha256
+from typing import List, Union
+
+import numpy as np
+import torch
+from torch.utils.data import TensorDataset
+
+logger = logging.getLogger(__name__)
+
+
+def hash_files(paths: Union[str, List[str]]) -> str:
+    """
+    Hash the content of the given files. Directories are expanded to the regular files
+    they contain (not recursive).
+
+    Args:
+        paths (Union[str, List[str]]): file or directory paths
+
+    Returns:
+        str: sha256 hex digest
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, f)
+                for f in sorted(os.listdir(path))
+                if os.path.isfile(os.path.join(path, f))
+            )
+        else:
+            files.append(path)
+    digest = sha256()
+    for file in files:
+        digest.update(os.path.basename(file).encode("utf-8"))
+        with open(file, "rb") as fp:
+            for block in iter(lambda: fp.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class FeatureCache(object):
+    """Content addressed on-disk cache of TensorDatasets.
+
+    Every entry is a directory named by the hash of the key components, holding one
+    `.npy` file per tensor. Entries are loaded memory-mapped (copy-on-write), so
+    loading a cached data set does not read the tensors into memory up front.
+
+    Args:
+        cache_dir (str): cache directory (created if missing)
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(**components) -> str:
+        """
+        Create a cache key from the given (json serializable) components
+
+        Returns:
+            str: cache key
+        """
+        return sha256(json.dumps(components, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self._entry_path(key), "meta.json"))
+
+    def load(self, key: str) -> TensorDataset:
+        """
+        Load a cached data set
+
+        Args:
+            key (str): cache key
+
+        Returns:
+            TensorDataset: the cached data set or None if not in cache
+        """
+        if key not in self:
+            return None
+        path = self._entry_path(key)
+        with open(os.path.join(path, "meta.json")) as fp:
+            meta = json.load(fp)
+        tensors = [
+            torch.from_numpy(np.load(os.path.join(path, "{}.npy".format(i)), mmap_mode="c"))
+            for i in range(meta["num_tensors"])
+        ]
+        logger.info("Loaded cached features from %s", path)
+        return TensorDataset(*tensors)
+
+    def save(self, key: str, data_set: TensorDataset, **info):
+        """
+        Save a data set to the cache
+
+        Args:
+            key (str): cache key
+            data_set (TensorDataset): data set
+            info: additional (json serializable) information to save with the entry
+        """
+        path = self._entry_path(key)
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            for i, tensor in enumerate(data_set.tensors):
+                np.save(os.path.join(tmp_path, "{}.npy".format(i)), tensor.numpy())
+            with open(os.path.join(tmp_path, "meta.json"), "w") as fp:
+                json.dump(dict(info, num_tensors=len(data_set.tensors)), fp)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.rename(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                shutil.rmtree(tmp_path)
+        logger.info("Saved features to cache %s", path)
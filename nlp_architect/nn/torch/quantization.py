@@ -268,7 +268,7 @@ class QuantizedLinear(QuantizedLayer, nn.Linear):
         self.bias_scale = self.weight_scale * input_scale
         quantized_input = quantize(input, input_scale, self.activation_bits)
         out = F.linear(quantized_input, self.quantized_weight, self.quantized_bias)
-        # TODO(ofir) fuse the operation of requantization with dequantiz
+        # requantization is fused with dequantization in Int8Linear (see convert_to_int8)
         out = dequantize(out, self.bias_scale)
         if self.requantize_output:
             output_scale = self._get_output_scale(out)
@@ -371,6 +371,116 @@ class QuantizedEmbedding(QuantizedLayer, nn.Embedding):
         return dequantize(q_embeddings, self.weight_scale)
 
 
+class Int8Linear(nn.Module):
+    """Linear layer for inference with int8 weights and activations and int32 accumulation,
+    executed with PyTorch quantized CPU kernels (fbgemm/qnnpack).
+    Created from a trained QuantizedLinear layer (see `convert_to_int8`), the weight is
+    stored as a packed int8 tensor and the output requantization is fused into the
+    integer matrix multiplication when the output range is known (EMA mode).
+    When the input or output ranges are dynamic (DYNAMIC mode, or EMA mode without output
+    requantization) the input is quantized on the fly and the output is kept in FP32."""
+
+    def __init__(
+        self,
+        quantized_weight,
+        weight_scale,
+        bias=None,
+        input_scale=None,
+        output_scale=None,
+        requantize_output=True,
+        activation_bits=8,
+    ):
+        super().__init__()
+        self.out_features, self.in_features = quantized_weight.shape
+        weight = torch.quantize_per_tensor(
+            quantized_weight.float().div(weight_scale), float(1.0 / weight_scale), 0, torch.qint8
+        )
+        self._packed_params = torch.ops.quantized.linear_prepack(
+            weight, bias.float() if bias is not None else None
+        )
+        self.input_scale = float(input_scale) if input_scale is not None else None
+        self.output_scale = float(output_scale) if output_scale is not None else None
+        self.requantize_output = requantize_output
+        self.activation_bits = activation_bits
+
+    @classmethod
+    def from_quantized_linear(cls, layer: QuantizedLinear):
+        """Create an int8 layer from a QuantizedLinear layer in evaluation mode"""
+        if layer.training:
+            raise RuntimeError("QuantizedLinear layer must be in evaluation mode")
+        if layer.mode == QuantizationMode.NONE:
+            raise ValueError("QuantizedLinear layer is not quantized (mode=none)")
+        if layer.weight_bits > 8 or layer.activation_bits != 8:
+            raise ValueError(
+                "int8 execution requires weight_bits <= 8 and activation_bits == 8, "
+                f"got weight_bits={layer.weight_bits} activation_bits={layer.activation_bits}"
+            )
+        input_scale = output_scale = None
+        bias = None
+        if layer.mode == QuantizationMode.EMA:
+            input_scale = layer._get_input_scale()
+            if layer.requantize_output:
+                output_scale = layer._get_output_scale()
+            if layer.bias is not None:
+                bias = dequantize(layer.quantized_bias.float(), input_scale * layer.weight_scale)
+        elif layer.bias is not None:
+            bias = layer.bias.detach()
+        return cls(
+            layer.quantized_weight,
+            layer.weight_scale,
+            bias=bias,
+            input_scale=input_scale,
+            output_scale=output_scale,
+            requantize_output=layer.requantize_output,
+            activation_bits=layer.activation_bits,
+        )
+
+    def forward(self, input):
+        input = input.float().contiguous()
+        zero_point = 2 ** (self.activation_bits - 1)
+        if self.input_scale is not None and self.output_scale is not None:
+            q_input = torch.quantize_per_tensor(
+                input, 1.0 / self.input_scale, zero_point, torch.quint8
+            )
+            out = torch.ops.quantized.linear(
+                q_input, self._packed_params, 1.0 / self.output_scale, zero_point
+            )
+            return out.dequantize()
+        out = torch.ops.quantized.linear_dynamic(input, self._packed_params)
+        if self.requantize_output:
+            output_scale = get_dynamic_scale(out, self.activation_bits)
+            out = dequantize(quantize(out, output_scale, self.activation_bits), output_scale)
+        return out
+
+    def extra_repr(self):
+        return "in_features={}, out_features={}, requantize_output={}".format(
+            self.in_features, self.out_features, self.requantize_output
+        )
+
+
+def convert_to_int8(module: nn.Module) -> nn.Module:
+    """Replace (in place) the quantized linear layers of a trained model with Int8Linear
+    layers for int8 inference on CPU. The model is put in evaluation mode and can't be
+    trained afterwards.
+
+    Args:
+        module (nn.Module): model with QuantizedLinear layers
+
+    Returns:
+        nn.Module: the converted model
+    """
+    module.eval()
+    for name, child in module.named_children():
+        if isinstance(child, QuantizedLinear) and child.mode != QuantizationMode.NONE:
+            try:
+                setattr(module, name, Int8Linear.from_quantized_linear(child))
+            except ValueError as e:
+                logger.warning("Layer %s not converted to int8: %s", name, e)
+        else:
+            convert_to_int8(child)
+    return module
+
+
 class QuantizationConfig(Config):
     """Quantization Configuration Object"""
 
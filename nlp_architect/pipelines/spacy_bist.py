@@ -61,7 +61,10 @@ class SpacyBISTParser(object):
             list of ConllEntry: The next sentence in the document in CoNLL format.
         """
         validate((doc_text, str))
-        for sentence in self.spacy_parser(doc_text).sents:
+        return self._doc_to_conll(self.spacy_parser(doc_text))
+
+    def _doc_to_conll(self, spacy_doc):
+        for sentence in spacy_doc.sents:
             sentence_conll = [
                 ConllEntry(
                     0, "*root*", "*root*", "ROOT-POS", "ROOT-CPOS", "_", -1, "rroot", "_", "_"
@@ -118,42 +121,84 @@ class SpacyBISTParser(object):
             parsed_doc.doc_text = doc_text
 
         for sent_conll in self.bist_parser.predict_conll(doc_conll):
-            parsed_sent = []
-            conj_governors = {"and": set(), "or": set()}
-
-            for tok in sent_conll:
-                gov_id = int(tok.pred_parent_id)
-                rel = tok.pred_relation
-
-                if tok.form != "*root*":
-                    if tok.form.lower() == "and":
-                        conj_governors["and"].add(gov_id)
-                    if tok.form.lower() == "or":
-                        conj_governors["or"].add(gov_id)
-
-                    if rel == "conj":
-                        if gov_id in conj_governors["and"]:
-                            rel += "_and"
-                        if gov_id in conj_governors["or"]:
-                            rel += "_or"
-
-                    parsed_tok = {
-                        "start": tok.misc,
-                        "len": len(tok.form),
-                        "pos": tok.pos,
-                        "ner": tok.feats,
-                        "lemma": tok.lemma,
-                        "gov": gov_id - 1,
-                        "rel": rel,
-                    }
-
-                    if show_tok:
-                        parsed_tok["text"] = tok.form
-                    parsed_sent.append(parsed_tok)
+            parsed_sent = self._parsed_sentence(sent_conll, show_tok)
             if parsed_sent:
                 parsed_doc.sentences.append(parsed_sent)
         return parsed_doc
 
+    def parse_batch(self, docs, show_tok=True, show_doc=True, batch_size=64):
+        """Parse a batch of raw text documents. Documents are tokenized and tagged with
+        spacy's `pipe` and the sentences of all documents are parsed in a single call to
+        the BIST model.
+
+        Args:
+            docs (list of str): raw text documents.
+            show_tok (bool, optional): Specifies whether to include token text in output.
+            show_doc (bool, optional): Specifies whether to include document text in output.
+            batch_size (int, optional): spacy pipe batch size.
+
+        Returns:
+            list of CoreNLPDoc: The annotated documents, identical to `parse` of each document.
+        """
+        validate((show_tok, bool), (show_doc, bool))
+        for doc_text in docs:
+            validate((doc_text, str))
+        doc_sents = []
+        sentences = []
+        for spacy_doc in self.spacy_parser.pipe(docs, batch_size=batch_size):
+            doc_conll = list(self._doc_to_conll(spacy_doc))
+            doc_sents.append(len(doc_conll))
+            sentences.extend(doc_conll)
+        parsed_sents = iter(self.bist_parser.predict_conll(sentences))
+
+        parsed_docs = []
+        for doc_text, num_sents in zip(docs, doc_sents):
+            parsed_doc = CoreNLPDoc()
+            if show_doc:
+                parsed_doc.doc_text = doc_text
+            for _ in range(num_sents):
+                parsed_sent = self._parsed_sentence(next(parsed_sents), show_tok)
+                if parsed_sent:
+                    parsed_doc.sentences.append(parsed_sent)
+            parsed_docs.append(parsed_doc)
+        return parsed_docs
+
+    @staticmethod
+    def _parsed_sentence(sent_conll, show_tok):
+        parsed_sent = []
+        conj_governors = {"and": set(), "or": set()}
+
+        for tok in sent_conll:
+            gov_id = int(tok.pred_parent_id)
+            rel = tok.pred_relation
+
+            if tok.form != "*root*":
+                if tok.form.lower() == "and":
+                    conj_governors["and"].add(gov_id)
+                if tok.form.lower() == "or":
+                    conj_governors["or"].add(gov_id)
+
+                if rel == "conj":
+                    if gov_id in conj_governors["and"]:
+                        rel += "_and"
+                    if gov_id in conj_governors["or"]:
+                        rel += "_or"
+
+                parsed_tok = {
+                    "start": tok.misc,
+                    "len": len(tok.form),
+                    "pos": tok.pos,
+                    "ner": tok.feats,
+                    "lemma": tok.lemma,
+                    "gov": gov_id - 1,
+                    "rel": rel,
+                }
+
+                if show_tok:
+                    parsed_tok["text"] = tok.form
+                parsed_sent.append(parsed_tok)
+        return parsed_sent
+
 
 def _download_pretrained_model():
     """Downloads the pre-trained BIST model if non-existent."""
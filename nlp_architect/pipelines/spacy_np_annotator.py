@@ -14,12 +14,14 @@
 # limitations under the License.
 # ******************************************************************************
 import pickle
+from collections import defaultdict
 from os import path
 
 import numpy as np
 import spacy
 from spacy.tokens import Doc
 from spacy.tokens import Span
+from spacy.util import minibatch
 
 from nlp_architect.models.chunker import SequenceChunker
 from nlp_architect.utils.generic import pad_sentences
@@ -78,15 +80,6 @@ class NPAnnotator(object):
             char_vocab = model_params.get("char_vocab", None)
         return cls(model, word_vocab, char_vocab, chunk_vocab, batch_size)
 
-    def _infer_chunks(self, input_vec, doc_lengths):
-        tagged_sents = self.model.predict(input_vec, batch_size=self.bs).argmax(2)
-        sentence = []
-        for c, l in zip(tagged_sents, doc_lengths):
-            sentence.append(c[-l:])
-        doc = np.concatenate(sentence)
-        chunk_tags = [self.chunk_vocab.id_to_word(w) for w in doc]
-        return extract_nps(chunk_tags)
-
     def _feature_extractor(self, doc):
         features = np.asarray(
             [self.word_vocab[w] if self.word_vocab[w] is not None else 1 for w in doc]
@@ -103,42 +96,76 @@ class NPAnnotator(object):
             features = (features, sentence_chars)
         return features
 
+    def _inputs(self, features, max_len):
+        """Pad the features of sentences to max_len words, as the model input"""
+        word_vecs = [f[0] for f in features] if self.char_vocab else features
+        inputs = np.zeros((len(word_vecs), max_len), dtype=np.int32)
+        for idx, vec in enumerate(word_vecs):
+            inputs[idx, : len(vec)] = vec
+        if self.char_vocab:
+            padded_chars = np.zeros((len(features), max_len, self.model.max_word_len))
+            for idx, (_, chars) in enumerate(features):
+                padded_chars[idx, -chars.shape[0] :] = chars
+            inputs = [inputs, padded_chars]
+        return inputs
+
+    def _annotate(self, docs):
+        """
+        Annotate documents with noun phrase spans, predicting the sentences of all documents
+        together.
+
+        The sentences of a document are padded to its longest sentence, so the sentences
+        are grouped by that length and each group is predicted in one call, giving the same
+        model inputs (and tags) as predicting each document separately.
+        """
+        groups = defaultdict(list)
+        sentence_tags = []
+        for doc_idx, doc in enumerate(docs):
+            if len(doc) < 1:
+                sentence_tags.append(None)
+                continue
+            features = [self._feature_extractor([t.text for t in s]) for s in doc.sents]
+            lengths = [len(f[0]) if isinstance(f, tuple) else len(f) for f in features]
+            for sent_idx, (f, length) in enumerate(zip(features, lengths)):
+                groups[max(lengths)].append((doc_idx, sent_idx, length, f))
+            sentence_tags.append([None] * len(features))
+
+        for max_len, sentences in groups.items():
+            inputs = self._inputs([f for _, _, _, f in sentences], max_len)
+            tagged_sents = self.model.predict(inputs, batch_size=self.bs).argmax(2)
+            for (doc_idx, sent_idx, length, _), tags in zip(sentences, tagged_sents):
+                sentence_tags[doc_idx][sent_idx] = tags[-length:]
+
+        for doc, tags in zip(docs, sentence_tags):
+            if tags is None:
+                continue
+            chunk_tags = [self.chunk_vocab.id_to_word(w) for w in np.concatenate(tags)]
+            spans = [Span(doc, s, e) for s, e in extract_nps(chunk_tags)]
+            set_noun_phrases(doc, _NPPostprocessor.process(spans))
+
     def __call__(self, doc: Doc) -> Doc:
         """
         Annotate the document with noun phrase spans
         """
-        spans = []
-        doc_vecs = []
-        doc_chars = []
-        doc_lens = []
-        if len(doc) < 1:
-            return doc
-        for sentence in doc.sents:
-            features = self._feature_extractor([t.text for t in sentence])
-            if isinstance(features, tuple):
-                doc_vec = features[0]
-                doc_chars.append(features[1])
-            else:
-                doc_vec = features
-            doc_vecs.append(doc_vec)
-            doc_lens.append(len(doc_vec))
-        doc_vectors = pad_sentences(np.asarray(doc_vecs))
-        inputs = doc_vectors
-        if self.char_vocab:
-            max_len = doc_vectors.shape[1]
-            padded_chars = np.zeros((len(doc_chars), max_len, self.model.max_word_len))
-            for idx, d in enumerate(doc_chars):
-                d = d[:max_len]
-                padded_chars[idx, -d.shape[0] :] = d
-            inputs = [inputs, padded_chars]
-        np_indexes = self._infer_chunks(inputs, doc_lens)
-        for s, e in np_indexes:
-            np_span = Span(doc, s, e)
-            spans.append(np_span)
-        spans = _NPPostprocessor.process(spans)
-        set_noun_phrases(doc, spans)
+        self._annotate([doc])
         return doc
 
+    def pipe(self, docs, batch_size: int = 128):
+        """
+        Annotate a stream of documents with noun phrase spans (spaCy's pipe protocol, used by
+        nlp.pipe), the sentences of batch_size documents are predicted together.
+
+        Args:
+            docs (iterable of Doc): the documents
+            batch_size (int, optional): number of documents predicted together
+
+        Yields:
+            Doc: the annotated documents, in order
+        """
+        for batch in minibatch(docs, size=batch_size):
+            self._annotate(batch)
+            yield from batch
+
 
 def get_noun_phrases(doc: Doc) -> [Span]:
     """
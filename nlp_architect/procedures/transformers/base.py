@@ -71,6 +71,12 @@ def create_base_args(parser: argparse.ArgumentParser, model_types=None):
         type=int,
         help="Batch size per GPU/CPU for evaluation.",
     )
+    parser.add_argument(
+        "--dynamic_padding",
+        action="store_true",
+        help="Batch examples of similar length together and pad each batch only to its "
+        "longest sequence (instead of max_seq_length)",
+    )
     parser.add_argument("--no_cuda", action="store_true", help="Avoid using CUDA when available")
     parser.add_argument(
         "--overwrite_output_dir",
@@ -97,6 +103,11 @@ def inference_args(parser: argparse.ArgumentParser):
                         'quant_pytorch_model.bin' file must exist in directory and model\
                              type must be 'quant_<model>'",
     )
+    parser.add_argument(
+        "--int8_inference",
+        action="store_true",
+        help="Run the quantized layers of a 'quant_<model>' model with int8 CPU kernels",
+    )
 
 
 def train_args(parser: argparse.ArgumentParser, models_family=None):
@@ -169,3 +180,10 @@ def train_args(parser: argparse.ArgumentParser, models_family=None):
         + "model_name ending and ending with step number",
     )
     parser.add_argument("--seed", type=int, default=42, help="random seed for initialization")
+    parser.add_argument(
+        "--feature_cache_dir",
+        default=None,
+        type=str,
+        help="Directory for caching converted dataset features (keyed on the data files, "
+        "tokenizer, model type and max_seq_length). Disabled if not set.",
+    )
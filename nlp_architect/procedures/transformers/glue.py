@@ -18,8 +18,6 @@ import io
 import logging
 import os
 
-from torch.utils.data import DataLoader, RandomSampler, SequentialSampler
-
 from nlp_architect.data.glue_tasks import get_glue_task, get_metric_fn, processors
 from nlp_architect.models.transformers import TransformerSequenceClassifier
 from nlp_architect.nn.torch import set_seed, setup_backend
@@ -110,14 +108,32 @@ def do_training(args):
 
     train_batch_size = args.per_gpu_train_batch_size * max(1, n_gpus)
 
-    train_ex = task.get_train_examples()
-    dev_ex = task.get_dev_examples()
-    train_dataset = classifier.convert_to_tensors(train_ex, args.max_seq_length)
-    dev_dataset = classifier.convert_to_tensors(dev_ex, args.max_seq_length)
-    train_sampler = RandomSampler(train_dataset)
-    dev_sampler = SequentialSampler(dev_dataset)
-    train_dl = DataLoader(train_dataset, sampler=train_sampler, batch_size=train_batch_size)
-    dev_dl = DataLoader(dev_dataset, sampler=dev_sampler, batch_size=args.per_gpu_eval_batch_size)
+    if args.feature_cache_dir is None:
+        train_dataset = classifier.convert_to_tensors(
+            task.get_train_examples(), args.max_seq_length
+        )
+        dev_dataset = classifier.convert_to_tensors(task.get_dev_examples(), args.max_seq_length)
+    else:
+        train_dataset, dev_dataset = [
+            classifier.convert_to_tensors_cached(
+                get_examples,
+                task.data_dir,
+                args.feature_cache_dir,
+                overwrite_cache=args.overwrite_cache,
+                key_info={"task_name": task.name, "set_type": set_type},
+                max_seq_length=args.max_seq_length,
+            )
+            for get_examples, set_type in (
+                (task.get_train_examples, "train"),
+                (task.get_dev_examples, "dev"),
+            )
+        ]
+    train_dl = classifier.get_data_loader(
+        train_dataset, train_batch_size, shuffle=True, dynamic_padding=args.dynamic_padding
+    )
+    dev_dl = classifier.get_data_loader(
+        dev_dataset, args.per_gpu_eval_batch_size, dynamic_padding=args.dynamic_padding
+    )
 
     total_steps, _ = classifier.get_train_steps_epochs(
         args.max_steps, args.num_train_epochs, args.per_gpu_train_batch_size, len(train_dataset)
@@ -146,7 +162,10 @@ def do_training(args):
 
 def do_inference(args):
     prepare_output_path(args.output_dir, args.overwrite_output_dir)
-    device, n_gpus = setup_backend(args.no_cuda)
+    if args.int8_inference and args.model_type != "quant_bert":
+        raise ValueError("int8 inference is supported only for quant_bert models")
+    # the int8 kernels run on the CPU only
+    device, n_gpus = setup_backend(args.no_cuda or args.int8_inference)
     args.task_name = args.task_name.lower()
     task = get_glue_task(args.task_name, data_dir=args.data_dir)
     args.batch_size = args.per_gpu_eval_batch_size * max(1, n_gpus)
@@ -158,10 +177,17 @@ def do_inference(args):
         do_lower_case=args.do_lower_case,
         load_quantized=args.load_quantized_model,
     )
+    if args.int8_inference:
+        # convert before the model is moved (and possibly wrapped in DataParallel)
+        classifier.model.to_int8()
     classifier.to(device, n_gpus)
     examples = task.get_dev_examples() if args.evaluate else task.get_test_examples()
     preds = classifier.inference(
-        examples, args.max_seq_length, args.batch_size, evaluate=args.evaluate
+        examples,
+        args.max_seq_length,
+        args.batch_size,
+        evaluate=args.evaluate,
+        dynamic_padding=args.dynamic_padding,
     )
     with io.open(os.path.join(args.output_dir, "output.txt"), "w", encoding="utf-8") as fw:
         for p in preds:
@@ -18,8 +18,6 @@ import io
 import logging
 import os
 
-from torch.utils.data import DataLoader, RandomSampler, SequentialSampler
-
 from nlp_architect.data.sequential_tagging import TokenClsInputExample, TokenClsProcessor
 from nlp_architect.data.utils import write_column_tagged_file
 from nlp_architect.models.transformers import TransformerTokenClassifier
@@ -115,31 +113,33 @@ def do_training(args):
         training_args=args,
     )
 
-    train_ex = processor.get_train_examples(filename=args.train_file_name)
-    if train_ex is None:
+    train_dataset = load_data_set(
+        classifier,
+        args,
+        lambda: processor.get_train_examples(filename=args.train_file_name),
+        args.train_file_name,
+        "train",
+    )
+    if train_dataset is None:
         raise Exception("No train examples found, quitting.")
-    dev_ex = processor.get_dev_examples()
-    test_ex = processor.get_test_examples()
+    dev_dataset = load_data_set(classifier, args, processor.get_dev_examples, "dev.txt", "dev")
+    test_dataset = load_data_set(classifier, args, processor.get_test_examples, "test.txt", "test")
 
     train_batch_size = args.per_gpu_train_batch_size * max(1, n_gpus)
 
-    train_dataset = classifier.convert_to_tensors(train_ex, max_seq_length=args.max_seq_length)
-    train_sampler = RandomSampler(train_dataset)
-    train_dl = DataLoader(train_dataset, sampler=train_sampler, batch_size=train_batch_size)
+    train_dl = classifier.get_data_loader(
+        train_dataset, train_batch_size, shuffle=True, dynamic_padding=args.dynamic_padding
+    )
     dev_dl = None
     test_dl = None
-    if dev_ex is not None:
-        dev_dataset = classifier.convert_to_tensors(dev_ex, max_seq_length=args.max_seq_length)
-        dev_sampler = SequentialSampler(dev_dataset)
-        dev_dl = DataLoader(
-            dev_dataset, sampler=dev_sampler, batch_size=args.per_gpu_eval_batch_size
+    if dev_dataset is not None:
+        dev_dl = classifier.get_data_loader(
+            dev_dataset, args.per_gpu_eval_batch_size, dynamic_padding=args.dynamic_padding
         )
 
-    if test_ex is not None:
-        test_dataset = classifier.convert_to_tensors(test_ex, max_seq_length=args.max_seq_length)
-        test_sampler = SequentialSampler(test_dataset)
-        test_dl = DataLoader(
-            test_dataset, sampler=test_sampler, batch_size=args.per_gpu_eval_batch_size
+    if test_dataset is not None:
+        test_dl = classifier.get_data_loader(
+            test_dataset, args.per_gpu_eval_batch_size, dynamic_padding=args.dynamic_padding
         )
 
     total_steps, _ = classifier.get_train_steps_epochs(
@@ -169,9 +169,33 @@ def do_training(args):
     classifier.save_model(args.output_dir, args=args)
 
 
+def load_data_set(classifier, args, get_examples, file_name, set_type):
+    """Convert the examples of a data file to a tensor dataset (using the features cache if
+    enabled), returns None if the data file doesn't exist"""
+    if args.feature_cache_dir is None:
+        examples = get_examples()
+        if examples is None:
+            return None
+        return classifier.convert_to_tensors(examples, max_seq_length=args.max_seq_length)
+    data_file = os.path.join(args.data_dir, file_name)
+    if not os.path.exists(data_file):
+        return None
+    return classifier.convert_to_tensors_cached(
+        get_examples,
+        data_file,
+        args.feature_cache_dir,
+        overwrite_cache=args.overwrite_cache,
+        key_info={"set_type": set_type, "ignore_token": args.ignore_token},
+        max_seq_length=args.max_seq_length,
+    )
+
+
 def do_inference(args):
     prepare_output_path(args.output_dir, args.overwrite_output_dir)
-    device, n_gpus = setup_backend(args.no_cuda)
+    if args.int8_inference and args.model_type != "quant_bert":
+        raise ValueError("int8 inference is supported only for quant_bert models")
+    # the int8 kernels run on the CPU only
+    device, n_gpus = setup_backend(args.no_cuda or args.int8_inference)
     args.batch_size = args.per_gpu_eval_batch_size * max(1, n_gpus)
     inference_examples = process_inference_input(args.data_file)
     classifier = TransformerTokenClassifier.load_model(
@@ -180,8 +204,16 @@ def do_inference(args):
         do_lower_case=args.do_lower_case,
         load_quantized=args.load_quantized_model,
     )
+    if args.int8_inference:
+        # convert before the model is moved (and possibly wrapped in DataParallel)
+        classifier.model.to_int8()
     classifier.to(device, n_gpus)
-    output = classifier.inference(inference_examples, args.max_seq_length, args.batch_size)
+    output = classifier.inference(
+        inference_examples,
+        args.max_seq_length,
+        args.batch_size,
+        dynamic_padding=args.dynamic_padding,
+    )
     write_column_tagged_file(args.output_dir + os.sep + "output.txt", output)
 
 
@@ -63,6 +63,33 @@ def pad_sentences(
     return padded_sequences.astype(dtype=np.int32)
 
 
+def words_to_char_ids(words, char_vocab: dict, word_length: int, unk_id: int = 1) -> np.ndarray:
+    """
+    Convert words into a padded matrix of character ids. Equivalent to `pad_sentences`
+    of the words' character ids with max_length=word_length (longer words keep their
+    last word_length characters), the ids of distinct words are computed once.
+
+    Args:
+        words (list of str): words
+        char_vocab (dict): character to id map
+        word_length (int): max word length in characters
+        unk_id (int, optional): id of characters missing from char_vocab
+
+    Returns:
+        numpy.ndarray: int32 matrix of shape (len(words), word_length)
+    """
+    char_ids = np.zeros((len(words), word_length), dtype=np.int32)
+    rows = {}
+    for i, w in enumerate(words):
+        row = rows.get(w)
+        if row is None:
+            ids = [char_vocab.get(c, unk_id) for c in w][-word_length:]
+            row = rows[w] = np.zeros(word_length, dtype=np.int32)
+            row[: len(ids)] = ids
+        char_ids[i] = row
+    return char_ids
+
+
 def one_hot(mat: np.ndarray, num_classes: int) -> np.ndarray:
     """
     Convert a 1D matrix of ints into one-hot encoded vectors.
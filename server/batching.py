@@ -0,0 +1,189 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+""" Micro-batching of inference requests """
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher(object):
+    """
+    Groups documents submitted by concurrent callers into batches that are processed
+    by a single call to a batch inference function in a background worker thread.
+
+    A batch is closed when it holds max_batch_size documents, or when max_wait seconds
+    passed since its first document was taken from the queue.
+
+    Args:
+        batch_fn (callable): function mapping a list of documents to a list of results
+        max_batch_size (int): maximal number of documents in a batch
+        max_wait (float): maximal time (seconds) to wait for more documents before
+            processing a batch
+        name (str): name used for the worker thread and logging
+    """
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait=0.005, name='batcher'):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be positive')
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._num_batches = 0
+        self._num_docs = 0
+        self._max_batch = 0
+        self._batch_sizes = {}
+        self._inference_time = 0.0
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, docs):
+        """
+        Submit documents for inference and wait for the results
+
+        Args:
+            docs (list): input documents
+
+        Returns:
+            list: the inference results, in the order of docs
+        """
+        futures = []
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('{} is closed'.format(self.name))
+            for doc in docs:
+                future = Future()
+                self._queue.put((doc, future))
+                futures.append(future)
+        return [f.result() for f in futures]
+
+    def close(self):
+        """
+        Stop accepting documents. Documents already submitted are processed before the
+        worker thread exits.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+
+    @property
+    def closed(self):
+        """bool: the batcher was closed"""
+        return self._closed
+
+    def _next_batch(self, batch):
+        """
+        Fill batch with the next (doc, future) items
+
+        Returns:
+            bool: whether the batcher was closed
+        """
+        deadline = None
+        while len(batch) < self.max_batch_size:
+            try:
+                if deadline is None:
+                    item = self._queue.get()
+                    deadline = time.time() + self.max_wait
+                else:
+                    timeout = deadline - time.time()
+                    if timeout > 0:
+                        item = self._queue.get(timeout=timeout)
+                    else:
+                        # take what is already queued without waiting
+                        item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _run(self):
+        closed = False
+        while not closed:
+            batch = []
+            try:
+                closed = self._next_batch(batch)
+            except Exception as e:  # pylint: disable=broad-except
+                # the worker keeps running, the documents taken so far fail
+                logger.exception('%s: failed to collect a batch', self.name)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            if not batch:
+                continue
+            docs = [doc for doc, _ in batch]
+            start = time.time()
+            try:
+                results = self.batch_fn(docs)
+                if len(results) != len(docs):
+                    raise RuntimeError('{}: got {} results for {} documents'.format(
+                        self.name, len(results), len(docs)))
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception('%s: batch inference failed', self.name)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                self._record(len(docs), time.time() - start)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _record(self, batch_size, elapsed):
+        with self._lock:
+            self._num_batches += 1
+            self._num_docs += batch_size
+            self._max_batch = max(self._max_batch, batch_size)
+            self._batch_sizes[batch_size] = self._batch_sizes.get(batch_size, 0) + 1
+            self._inference_time += elapsed
+        logger.debug('%s: processed batch of %d documents in %.4fs', self.name, batch_size,
+                     elapsed)
+
+    @property
+    def queue_depth(self):
+        """int: number of documents waiting to be batched"""
+        return self._queue.qsize()
+
+    def metrics(self):
+        """
+        Queue and batching metrics
+
+        Returns:
+            dict: queue depth, number of batches and documents processed, mean and max
+            batch size, batch size histogram and mean inference time per batch
+        """
+        with self._lock:
+            num_batches = self._num_batches
+            return {
+                'queue_depth': self.queue_depth,
+                'max_batch_size': self.max_batch_size,
+                'max_wait': self.max_wait,
+                'batches': num_batches,
+                'documents': self._num_docs,
+                'mean_batch_size': self._num_docs / num_batches if num_batches else 0.0,
+                'largest_batch': self._max_batch,
+                'batch_size_histogram': dict(self._batch_sizes),
+                'mean_batch_time': self._inference_time / num_batches if num_batches else 0.0,
+            }
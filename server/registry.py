@@ -0,0 +1,241 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+""" Registry of lazily loaded models with LRU residency """
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def resident_memory_mb():
+    """
+    Resident memory of the current process
+
+    Returns:
+        float: resident memory in MB, or None if not available on this platform
+    """
+    try:
+        with open('/proc/self/statm') as fp:
+            resident_pages = int(fp.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _ModelInfo(object):
+    def __init__(self):
+        self.loading = False
+        self.loads = 0
+        self.load_time = None
+        self.memory_mb = None
+        self.last_used = None
+        self.error = None
+
+
+class ModelRegistry(object):
+    """
+    Loads models on first use and keeps the least recently used models resident
+    within a memory budget.
+
+    The memory of a model is taken from memory_mb if configured, otherwise it is
+    measured as the growth of the process' resident memory while loading it (loads
+    are serialized so that measurements do not overlap). When a load brings the
+    resident models over the budget, least recently used models are evicted: their
+    service is closed (pending documents are still processed) and dropped.
+
+    Args:
+        factory (callable): function loading a model by name and returning its service
+        names (list of str, optional): names of the available models (reported by
+            `health` even if never loaded), other names are rejected. If None any name
+            is passed to the factory.
+        memory_budget_mb (float, optional): memory budget of the resident models in MB,
+            unlimited if None
+        memory_mb (dict, optional): configured memory (MB) of models by name
+    """
+
+    def __init__(self, factory, names=None, memory_budget_mb=None, memory_mb=None):
+        self.factory = factory
+        self.memory_budget_mb = memory_budget_mb
+        self.memory_mb = memory_mb or {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._resident = OrderedDict()
+        self._names = set(names) if names is not None else None
+        self._info = OrderedDict((name, _ModelInfo()) for name in names or [])
+
+    def get(self, name):
+        """
+        Get the service of a model, loading it if not resident
+
+        Args:
+            name (str): model name
+
+        Returns:
+            the model's service
+
+        Raises:
+            ValueError: if the name is not one of the available models' names
+        """
+        if self._names is not None and name not in self._names:
+            raise ValueError("'{}' is not an existing model".format(name))
+        with self._lock:
+            service = self._touch(name)
+        if service is not None:
+            return service
+        with self._load_lock:
+            with self._lock:
+                service = self._touch(name)
+                if service is not None:
+                    return service
+                info = self._info.setdefault(name, _ModelInfo())
+                info.loading = True
+            try:
+                service = self._load(name, info)
+            except Exception:
+                if self._names is None and info.loads == 0:
+                    # do not report names that were never loaded
+                    with self._lock:
+                        del self._info[name]
+                raise
+            finally:
+                info.loading = False
+        return service
+
+    def _touch(self, name):
+        service = self._resident.get(name)
+        if service is not None:
+            self._resident.move_to_end(name)
+            self._info[name].last_used = time.time()
+        return service
+
+    def _load(self, name, info):
+        logger.info('loading model %s', name)
+        memory_before = resident_memory_mb()
+        start = time.time()
+        try:
+            service = self.factory(name)
+        except Exception as e:
+            info.error = str(e)
+            raise
+        load_time = time.time() - start
+        memory_after = resident_memory_mb()
+        memory = self.memory_mb.get(name)
+        if memory is None and memory_before is not None and memory_after is not None:
+            memory = max(memory_after - memory_before, 0.0)
+        logger.info('loaded model %s in %.2fs (%s MB)', name, load_time, memory)
+        with self._lock:
+            info.loads += 1
+            info.load_time = load_time
+            info.memory_mb = memory
+            info.last_used = time.time()
+            info.error = None
+            self._resident[name] = service
+            evicted = self._evict_over_budget(name)
+        for evicted_name, evicted_service in evicted:
+            self._close(evicted_name, evicted_service)
+        return service
+
+    def _resident_memory(self):
+        return sum(self._info[name].memory_mb or 0.0 for name in self._resident)
+
+    def _evict_over_budget(self, keep):
+        evicted = []
+        if self.memory_budget_mb is None:
+            return evicted
+        for name in list(self._resident):
+            if self._resident_memory() <= self.memory_budget_mb:
+                break
+            if name != keep:
+                evicted.append((name, self._resident.pop(name)))
+        return evicted
+
+    @staticmethod
+    def _close(name, service):
+        logger.info('evicting model %s', name)
+        if hasattr(service, 'close'):
+            service.close()
+
+    def evict(self, name):
+        """
+        Evict a model if resident
+
+        Args:
+            name (str): model name
+        """
+        with self._lock:
+            service = self._resident.pop(name) if name in self._resident else None
+        if service is not None:
+            self._close(name, service)
+
+    def warm_up(self, names):
+        """
+        Load models on a background thread
+
+        Args:
+            names (list of str): names of the models to load
+
+        Returns:
+            threading.Thread: the loading thread
+        """
+        def load():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception('failed to warm up model %s', name)
+
+        thread = threading.Thread(target=load, name='warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def resident(self):
+        """
+        Returns:
+            dict: services of the resident models by name, least recently used first
+        """
+        with self._lock:
+            return OrderedDict(self._resident)
+
+    def health(self):
+        """
+        Model residency report
+
+        Returns:
+            dict: for every known model whether it is resident or loading, its last load
+            time (seconds), number of loads, memory (MB), last use time and last load
+            error; and the resident memory and memory budget
+        """
+        with self._lock:
+            models = OrderedDict()
+            for name, info in self._info.items():
+                models[name] = {
+                    'resident': name in self._resident,
+                    'loading': info.loading,
+                    'load_time': info.load_time,
+                    'loads': info.loads,
+                    'memory_mb': info.memory_mb,
+                    'last_used': info.last_used,
+                    'error': info.error,
+                }
+            return {
+                'status': 'ok',
+                'models': models,
+                'resident_memory_mb': self._resident_memory(),
+                'memory_budget_mb': self.memory_budget_mb,
+            }
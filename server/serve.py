@@ -17,30 +17,79 @@
 """ REST Server to respond to different API requests """
 import gzip
 import json
+import os
 from os import path
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, make_server
 
 import hug
 from falcon import status_codes
 
-from service import Service, parse_headers, format_response
+from registry import ModelRegistry
+from service import Service, load_properties, parse_headers, format_response
 
-services = {}
+# micro-batching configuration: max documents per model call and max time (ms) to wait
+# for documents of concurrent requests to fill a batch
+MAX_BATCH_SIZE = int(os.environ.get('NLP_ARCHITECT_MAX_BATCH_SIZE', 32))
+MAX_WAIT_MS = float(os.environ.get('NLP_ARCHITECT_MAX_WAIT_MS', 5))
+# memory budget (MB) of the resident models, least recently used models are evicted when
+# it is exceeded (unlimited if not set)
+MODEL_MEMORY_MB = os.environ.get('NLP_ARCHITECT_MODEL_MEMORY_MB')
+# models loaded on a background thread at startup (comma separated, empty for none)
+WARM_UP_MODELS = os.environ.get('NLP_ARCHITECT_WARM_UP', 'bist,ner,intent_extraction')
+
+properties = load_properties()
+service_names = [name for name in properties if name != 'api_folders_path']
+
+
+def load_service(model_name):
+    return Service(model_name, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT_MS / 1000,
+                   properties=properties)
+
+
+registry = ModelRegistry(
+    load_service,
+    names=service_names,
+    memory_budget_mb=float(MODEL_MEMORY_MB) if MODEL_MEMORY_MB else None,
+    memory_mb={name: properties[name]['memory_mb'] for name in service_names
+               if 'memory_mb' in properties[name]})
 
 api = hug.API(__name__)
 api.http.add_middleware(hug.middleware.CORSMiddleware(api, max_age=10))
 
 
+def get_service_inference(model_name, input_docs, headers):
+    """Run inference with a model, loading it if not resident"""
+    while True:
+        service = registry.get(model_name)
+        try:
+            return service.get_service_inference(input_docs, headers)
+        except RuntimeError:
+            # the model was evicted between lookup and submission, reload it
+            if not service.closed:
+                raise
+
+
 def prefetch_models():
-    models = ['bist', 'ner', 'intent_extraction']
-    for model in models:
-        services[model] = Service(model)
+    models = [m.strip() for m in WARM_UP_MODELS.split(',') if m.strip()]
+    return registry.warm_up(models)
+
+
+@hug.get('/health')
+def health():
+    """Resident models, their load times and memory"""
+    return registry.health()
+
+
+@hug.get('/metrics')
+def metrics():
+    """Queue depth and batch size metrics of every resident model"""
+    return {name: service.metrics() for name, service in registry.resident().items()}
 
 
 @hug.get('/comprehension_paragraphs')
 def get_paragraphs():
-    if not services['machine_comprehension']:
-        services['machine_comprehension'] = Service('machine_comprehension')
-    return services['machine_comprehension'].get_paragraphs()
+    return registry.get('machine_comprehension').get_paragraphs()
 
 
 # pylint: disable=inconsistent-return-statements
@@ -67,14 +116,11 @@ def inference(request, body, response):
     if not model_name:
         response.status = status_codes.HTTP_400
         return {'status': 'model_name is required'}
-    # If we've already initialized it, no use in reinitializing
-    if not services.get(model_name):
-        services[model_name] = Service(model_name)
     if not isinstance(input_docs, list):  # check if it's an array instead
         response.status = status_codes.HTTP_400
         return {'status': 'request not in proper format '}
     headers = parse_headers(request.headers)
-    parsed_doc = services[model_name].get_service_inference(input_docs, headers)
+    parsed_doc = get_service_inference(model_name, input_docs, headers)
     resp_format = request.headers["RESPONSE-FORMAT"]
     ret = format_response(resp_format, parsed_doc)
     if request.headers.get('CONTENT-TYPE') == 'application/gzip':
@@ -100,4 +146,14 @@ def get_index():
     return index
 
 
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGI server handling each request in a thread, so that documents of concurrent
+    requests can be batched together"""
+    daemon_threads = True
+
+
 prefetch_models()
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 8080))
+    make_server('', port, api.http.server(), server_class=ThreadingWSGIServer).serve_forever()
@@ -19,6 +19,7 @@ import logging
 import os.path
 from importlib import import_module
 
+from batching import MicroBatcher
 from nlp_architect.utils.io import gzip_str
 
 logger = logging.getLogger(__name__)
@@ -109,12 +110,62 @@ def extract_module_name(model_path):
     return class_name
 
 
+def load_properties():
+    """
+    Load the services properties file "services.json"
+
+    Returns:
+        dict: the services properties
+    """
+    with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), "services.json")) \
+            as prop_file:
+        return json.load(prop_file)
+
+
 class Service(object):
-    """Handles loading and inference using specific models"""
-    def __init__(self, service_name):
+    """
+    Handles loading and inference using specific models
+
+    Documents are run through a MicroBatcher: the documents of a request, and of
+    concurrent requests arriving within max_wait seconds, are grouped into batches
+    of up to max_batch_size documents that are processed by a single call to the
+    model API's batch_inference (if implemented, otherwise documents are inferred
+    one by one).
+
+    Args:
+        service_name (str): the name of the service in services.json
+        max_batch_size (int): maximal number of documents in a model call
+        max_wait (float): maximal time (seconds) to wait for more documents
+        properties (dict, optional): the loaded services.json properties, read from
+            services.json if not given
+    """
+    def __init__(self, service_name, max_batch_size=32, max_wait=0.005, properties=None):
         self.service_type = None
         self.is_spacy = False
-        self.service = self.load_service(service_name)
+        self.service = self.load_service(service_name, properties)
+        self.batcher = MicroBatcher(self._batch_inference, max_batch_size=max_batch_size,
+                                    max_wait=max_wait, name=service_name)
+
+    def _batch_inference(self, docs):
+        if hasattr(self.service, 'batch_inference'):
+            return self.service.batch_inference(docs)
+        return [self.service.inference(doc) for doc in docs]
+
+    def metrics(self):
+        """
+        Returns:
+            dict: queue depth and batch size metrics of the service
+        """
+        return self.batcher.metrics()
+
+    def close(self):
+        """Stop serving: documents already submitted are still processed"""
+        self.batcher.close()
+
+    @property
+    def closed(self):
+        """bool: the service was closed"""
+        return self.batcher.closed
 
     def get_paragraphs(self):
         return self.service.get_paragraphs()
@@ -133,8 +184,8 @@ class Service(object):
         """
         logger.info('sending documents to parser')
         response_data = []
-        for i, doc in enumerate(docs):
-            inference_doc = self.service.inference(doc["doc"])
+        inference_docs = self.batcher.submit([doc["doc"] for doc in docs])
+        for i, (doc, inference_doc) in enumerate(zip(docs, inference_docs)):
             if self.is_spacy is True:
                 parsed_doc = inference_doc.displacy_doc()
                 doc_dic = {"id": doc["id"], "doc": parsed_doc}
@@ -148,20 +199,21 @@ class Service(object):
                 response_data.append(inference_doc)
         return response_data
 
-    def load_service(self, name):
+    def load_service(self, name, properties=None):
         """
         Initialize and load service from input given name, using "services.json" properties file
 
         Args:
             name (str):
                 The name of service to upload using server
+            properties (dict, optional):
+                The loaded "services.json" properties
 
         Returns:
             The loaded service
         """
-        with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), "services.json")) \
-                as prop_file:
-            properties = json.load(prop_file)
+        if properties is None:
+            properties = load_properties()
         folder_path = properties["api_folders_path"]
         service_name_error = "'{0}' is not an existing service - " \
                              "please try using another service.".format(name)
@@ -27,7 +27,6 @@ import re
 from abc import abstractmethod
 
 from nlp_architect import LIBRARY_OUT
-from nlp_architect.common.core_nlp_doc import CoreNLPDoc
 from nlp_architect.models.absa.inference.data_types import (
     TermType,
     SentimentDocEncoder,
@@ -35,7 +34,13 @@ from nlp_architect.models.absa.inference.data_types import (
     SentimentSentence,
 )
 from nlp_architect.models.absa.inference.inference import SentimentInference
-from nlp_architect.models.absa.utils import load_opinion_lex
+from nlp_architect.models.absa.utils import (
+    decode_parsed_doc,
+    iter_ndjson,
+    iter_parsed_docs,
+    load_opinion_lex,
+    run_pipeline_ndjson,
+)
 from nlp_architect.utils.io import (
     walk_directory,
     validate_existing_filepath,
@@ -106,11 +111,26 @@ class SentimentSolution(object):
     Args:
         anonymiser (Anonymiser, optional): Method to anonymise events' text.
         max_events (int, optional): Maximum number of events to show for each aspect-polarity pair.
+        streaming (bool, optional): Parse and run inference on documents in batches, sharded
+            across num_workers processes, writing results to a newline-delimited json file
+            (see `run_pipeline_ndjson`) instead of keeping them in memory.
+        batch_size (int, optional): Number of documents per batch when streaming.
+        num_workers (int, optional): Number of processes when streaming.
     """
 
-    def __init__(self, anonymiser: Anonymiser = None, max_events: int = 400):
+    def __init__(
+        self,
+        anonymiser: Anonymiser = None,
+        max_events: int = 400,
+        streaming: bool = False,
+        batch_size: int = 64,
+        num_workers: int = 1,
+    ):
         self.anonymiser = anonymiser
         self.max_events = max_events
+        self.streaming = streaming
+        self.batch_size = batch_size
+        self.num_workers = num_workers
         SENTIMENT_OUT.mkdir(parents=True, exist_ok=True)
 
     def run(
@@ -128,9 +148,26 @@ class SentimentSolution(object):
         aspects = pd.read_csv(aspect_lex, header=None, encoding="utf-8")[0]
         if aspects.empty:
             raise ValueError("Empty aspect lexicon!")
-        if inference_results:
+        if inference_results and str(inference_results).endswith(".ndjson"):
+            results = self._read_ndjson_results(inference_results)
+        elif inference_results:
             with open(inference_results, encoding="utf-8") as f:
-                results = json.loads(f.read(), object_hook=SentimentDoc.decoder)
+                results = json.loads(f.read(), object_hook=SentimentDoc.decoder).values()
+        elif (data or parsed_data) and self.streaming:
+            print("Running inference on data files... (Streaming data files)")
+            results_file = SENTIMENT_OUT / "inference_results.ndjson"
+            run_pipeline_ndjson(
+                self._iterate_docs(
+                    parsed_data if parsed_data else data, lazy=True, parsed=bool(parsed_data)
+                ),
+                results_file,
+                parse=not parsed_data,
+                aspect_lex=aspect_lex,
+                opinion_lex=opinions,
+                batch_size=self.batch_size,
+                num_workers=self.num_workers,
+            )
+            results = self._read_ndjson_results(results_file)
         elif data or parsed_data:
             inference = SentimentInference(aspect_lex, opinions, parse=False)
             parse = None
@@ -142,15 +179,17 @@ class SentimentSolution(object):
             results = {}
             print("Running inference on data files... (Iterating data files)")
             data_source = parsed_data if parsed_data else data
-            for file, doc in self._iterate_docs(data_source):
-                parsed_doc = (
-                    parse(doc) if parse else json.loads(doc, object_hook=CoreNLPDoc.decoder)
-                )
+            for file, doc in self._iterate_docs(data_source, parsed=bool(parsed_data)):
+                if parse:
+                    parsed_doc = parse(doc)
+                else:
+                    file, parsed_doc = decode_parsed_doc(file, doc)
                 sentiment_doc = inference.run(parsed_doc=parsed_doc)
                 if sentiment_doc:
                     results[file] = sentiment_doc
             with open(SENTIMENT_OUT / "inference_results.json", "w", encoding="utf-8") as f:
                 json.dump(results, f, cls=SentimentDocEncoder, indent=4, sort_keys=True)
+            results = results.values()
         else:
             print(
                 "No input given. Please supply one of: "
@@ -164,16 +203,27 @@ class SentimentSolution(object):
         return stats
 
     @staticmethod
-    def _iterate_docs(data: PathLike) -> tuple:
+    def _iterate_docs(data: PathLike, lazy: bool = False, parsed: bool = False) -> tuple:
+        """Iterate (file, document) pairs, lazy iteration does not read the whole directory
+        ahead and does not display progress. Each line of the ndjson files of a parsed data
+        directory is a document (see `iter_parsed_docs`)."""
         if isdir(data):
-            for file, doc_text in tqdm(list(walk_directory(data))):
+            docs = iter_parsed_docs(data) if parsed else walk_directory(data)
+            for file, doc_text in docs if lazy else tqdm(list(docs)):
                 yield file, doc_text
         else:
             with open(data, encoding="utf-8") as f:
-                for i, doc_text in tqdm(enumerate(f), total=line_count(data)):
+                lines = enumerate(f) if lazy else tqdm(enumerate(f), total=line_count(data))
+                for i, doc_text in lines:
                     yield str(i + 1), doc_text
 
-    def _compute_stats(self, results: dict, aspects: list, opinion_lex: dict) -> pd.DataFrame:
+    @staticmethod
+    def _read_ndjson_results(results_file: PathLike):
+        """Lazily read the sentiment documents of an inference results ndjson file."""
+        for record in iter_ndjson(results_file, SentimentDoc.decoder):
+            yield record["sentiment"]
+
+    def _compute_stats(self, results, aspects: list, opinion_lex: dict) -> pd.DataFrame:
         """Aggregates counts for each aspect-polarity pairs, with separate counts for in-domain
          only events.
         """
@@ -185,7 +235,7 @@ class SentimentSolution(object):
         stats = stats.sort_index()
         scores = stats.copy()
 
-        for doc in tqdm(results.values()):
+        for doc in tqdm(results):
             for sent in doc.sentences:
                 for event in sent.events:
                     aspect = [t for t in event if t.type == TermType.ASPECT][0]
@@ -243,9 +293,18 @@ def main() -> None:
     )
     parser.add_argument("--parsed", type=validate_existing_directory, help="Path to parsed data")
     parser.add_argument("--res", type=validate_existing_filepath, help="Path to inference results")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Run parsing and inference in batches, writing results as newline-delimited json",
+    )
+    parser.add_argument("--batch_size", type=int, default=64, help="Documents per batch")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes")
     args = parser.parse_args()
 
-    solution = SentimentSolution()
+    solution = SentimentSolution(
+        streaming=args.stream, batch_size=args.batch_size, num_workers=args.workers
+    )
     solution.run(
         data=args.data,
         parsed_data=args.parsed,
@@ -20,6 +20,7 @@ import numpy as np
 import pandas as pd
 
 from nlp_architect import LIBRARY_ROOT
+from nlp_architect.models.absa.utils import run_pipeline_ndjson
 from nlp_architect.utils.io import download_unzip
 from .sentiment_solution import SentimentSolution, SENTIMENT_OUT
 
@@ -51,3 +52,26 @@ def test_solution(generate_new=False):
     else:
         with open(expected_dir / "expected.csv", encoding="utf-8") as expected_fp:
             assert predicted_trimmed.to_csv() == expected_fp.read()
+
+
+def test_streaming_train_parsed_data(tmpdir):
+    lexicons_dir = Path(LIBRARY_ROOT) / "examples" / "absa"
+    data_dir = Path(LIBRARY_ROOT) / "tests" / "fixtures" / "data" / "absa"
+    json_dir = Path(str(tmpdir)) / "json"
+    json_dir.mkdir()
+    parsed_docs = []
+    for i in range(1, 4):
+        text = (data_dir / "core_nlp_doc_{}.json".format(i)).read_text()
+        (json_dir / "{}.json".format(i)).write_text(text)
+        parsed_docs.append((str(i), text))
+    # the parsed data layout written by TrainSentiment(streaming=True)
+    ndjson_dir = Path(str(tmpdir)) / "parsed" / "data"
+    run_pipeline_ndjson(iter(parsed_docs), ndjson_dir / "parsed_docs.ndjson", parse=False)
+
+    lexicons = dict(
+        aspect_lex=lexicons_dir / "aspects.csv", opinion_lex=lexicons_dir / "opinions.csv"
+    )
+    expected = SentimentSolution().run(parsed_data=json_dir, **lexicons)
+    for streaming in (False, True):
+        solution = SentimentSolution(streaming=streaming, batch_size=2)
+        assert solution.run(parsed_data=ndjson_dir, **lexicons).equals(expected)
@@ -0,0 +1,213 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import json
+import logging
+from argparse import ArgumentParser
+from os import makedirs, path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".ivf"
+
+
+def default_index_dir(np2vec_model_file):
+    """The directory of the index of a model, next to the model file."""
+    return np2vec_model_file + INDEX_SUFFIX
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class IVFIndex(object):
+    """
+    Inverted file index for approximate cosine similarity search over L2-normalized vectors.
+
+    The vectors are clustered with spherical k-means, a query scores only the vectors of the
+    nprobe clusters whose centroids are the most similar to it. The vectors are stored
+    grouped by cluster, so each probed cluster is scanned as one contiguous (memory-mapped)
+    block.
+
+    Args:
+        centroids (numpy.ndarray): nlist x dim normalized cluster centroids
+        offsets (numpy.ndarray): nlist + 1 start offsets of the clusters in ids and vectors
+        ids (numpy.ndarray): the vector indices (vocabulary indices), grouped by cluster
+        vectors (numpy.ndarray): the normalized vectors, in ids order
+    """
+
+    def __init__(self, centroids, offsets, ids, vectors):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, vectors, nlist=None, num_iter=10, sample_size=200000, seed=0, chunk=65536):
+        """
+        Build an index.
+
+        Args:
+            vectors (numpy.ndarray): num vectors x dim L2-normalized vectors
+            nlist (int, optional): number of clusters, default 4 * sqrt(num vectors)
+            num_iter (int): k-means iterations
+            sample_size (int): number of vectors k-means is trained on
+            seed (int): random seed
+            chunk (int): number of vectors assigned to clusters at once
+
+        Returns:
+            IVFIndex: the index
+        """
+        num_vectors = len(vectors)
+        if nlist is None:
+            nlist = max(1, int(4 * np.sqrt(num_vectors)))
+        nlist = min(nlist, num_vectors)
+        rng = np.random.RandomState(seed)
+        sample = vectors[np.sort(rng.choice(num_vectors, min(sample_size, num_vectors), False))]
+        sample = np.asarray(sample, dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(num_iter):
+            assignment = _assign(sample, centroids, chunk)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            # re-seed empty clusters with random sample vectors
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = _normalize(sums).astype(np.float32)
+
+        assignment = _assign(vectors, centroids, chunk)
+        ids = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=offsets[1:])
+        index_vectors = np.asarray(vectors[ids], dtype=np.float32)
+        return cls(centroids, offsets, ids.astype(np.int64), index_vectors)
+
+    def search(self, query, topn=10, nprobe=16, exclude=None):
+        """
+        Approximate most similar vectors of a query.
+
+        Args:
+            query (numpy.ndarray): L2-normalized query vector
+            topn (int): number of results
+            nprobe (int): number of clusters to scan, more is slower and more accurate
+            exclude (set of int, optional): vector indices to exclude from the results
+
+        Returns:
+            list of (int, float): the indices and cosine similarities of the most similar
+            vectors, most similar first
+        """
+        exclude = exclude or set()
+        nprobe = min(nprobe, self.nlist)
+        centroid_scores = self.centroids.dot(query)
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        ranges = [(self.offsets[c], self.offsets[c + 1]) for c in probe]
+        scores = np.concatenate([self.vectors[start:end].dot(query) for start, end in ranges])
+        candidates = np.concatenate([np.arange(start, end) for start, end in ranges])
+        k = min(topn + len(exclude), len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        results = []
+        for i in best:
+            vector_id = int(self.ids[candidates[i]])
+            if vector_id not in exclude:
+                results.append((vector_id, float(scores[i])))
+        return results[:topn]
+
+    def save(self, index_dir):
+        """
+        Save the index to a directory.
+
+        Args:
+            index_dir (str): the directory
+        """
+        if not path.exists(index_dir):
+            makedirs(index_dir)
+        for name in ("centroids", "offsets", "ids", "vectors"):
+            np.save(path.join(index_dir, name + ".npy"), getattr(self, name))
+        with open(path.join(index_dir, "index.json"), "w") as f:
+            json.dump(
+                {"nlist": self.nlist, "num_vectors": len(self), "dim": self.vectors.shape[1]}, f
+            )
+
+    @classmethod
+    def load(cls, index_dir, mmap=True):
+        """
+        Load an index saved with `save`.
+
+        Args:
+            index_dir (str): the directory
+            mmap (bool): memory-map the index vectors instead of reading them
+
+        Returns:
+            IVFIndex: the index
+        """
+        arrays = {
+            name: np.load(path.join(index_dir, name + ".npy"), mmap_mode="r" if mmap else None)
+            for name in ("centroids", "offsets", "ids", "vectors")
+        }
+        arrays["centroids"] = np.asarray(arrays["centroids"])
+        arrays["offsets"] = np.asarray(arrays["offsets"])
+        return cls(**arrays)
+
+
+def _assign(vectors, centroids, chunk):
+    """The most similar centroid of each vector."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start : start + chunk], dtype=np.float32)
+        assignment[start : start + chunk] = np.argmax(block.dot(centroids.T), axis=1)
+    return assignment
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(description="build the ANN index of a np2vec model")
+    arg_parser.add_argument(
+        "--np2vec_model_file", required=True, help="path to the file with the np2vec model."
+    )
+    arg_parser.add_argument(
+        "--binary",
+        help="boolean indicating whether the model has been stored in binary format.",
+        action="store_true",
+    )
+    arg_parser.add_argument("--nlist", type=int, help="number of clusters (4*sqrt(vocab))")
+    arg_parser.add_argument(
+        "--index_dir", help="index directory, default: the model file path + '.ivf'"
+    )
+    args = arg_parser.parse_args()
+
+    from nlp_architect.models.np2vec import NP2vec
+
+    model = NP2vec.load(args.np2vec_model_file, binary=args.binary)
+    model.init_sims()
+    index = IVFIndex.build(model.vectors_norm, nlist=args.nlist)
+    index_dir = args.index_dir or default_index_dir(args.np2vec_model_file)
+    index.save(index_dir)
+    logger.info(
+        "saved index of %d vectors in %d clusters to %s", len(index), index.nlist, index_dir
+    )
@@ -0,0 +1,121 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+"""
+Wire protocol of the set expansion server.
+
+Each message is a 4 bytes big-endian length prefix followed by a UTF-8 json body. Requests
+are json objects with a "type" field (the request name) and the request parameters,
+responses are {"status": "ok", "result": ..., "time_ms": ...} or {"status": "error",
+"error": ...}. A connection may carry any number of request/response pairs.
+"""
+
+import json
+import socket
+import struct
+
+HEADER = struct.Struct("!I")
+MAX_MESSAGE_SIZE = 512 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Malformed or truncated message."""
+
+
+class ExpandServerError(Exception):
+    """Error response of the server."""
+
+
+def _json_default(obj):
+    # numpy scalars and arrays
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError("{} is not json serializable".format(type(obj).__name__))
+
+
+def _recv_exactly(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), 1 << 20))
+        if not chunk:
+            if not buf:
+                return None
+            raise ProtocolError("connection closed in the middle of a message")
+        buf += chunk
+    return bytes(buf)
+
+
+def send_message(sock, message):
+    """
+    Send a json serializable message.
+
+    Args:
+        sock (socket.socket): connected socket
+        message: the message
+    """
+    body = json.dumps(message, default=_json_default).encode("utf-8")
+    if len(body) > MAX_MESSAGE_SIZE:
+        raise ProtocolError("message of {} bytes is too large".format(len(body)))
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def recv_message(sock):
+    """
+    Receive a message.
+
+    Args:
+        sock (socket.socket): connected socket
+
+    Returns:
+        the message, or None if the connection was closed before a new message
+    """
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ProtocolError("message of {} bytes is too large".format(size))
+    body = _recv_exactly(sock, size) if size else b""
+    if body is None:
+        raise ProtocolError("connection closed in the middle of a message")
+    try:
+        return json.loads(body.decode("utf-8"))
+    except ValueError as e:
+        raise ProtocolError("invalid message: {}".format(e))
+
+
+def request(host, port, request_type, timeout=None, **params):
+    """
+    Send a single request to the server.
+
+    Args:
+        host (str): server host
+        port (int): server port
+        request_type (str): request name, e.g. 'expand'
+        timeout (float, optional): socket timeout in seconds
+        **params: the request parameters
+
+    Returns:
+        the request result
+    """
+    message = dict(params, type=request_type)
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        send_message(sock, message)
+        response = recv_message(sock)
+    if response is None:
+        raise ProtocolError("connection closed without a response")
+    if response.get("status") != "ok":
+        raise ExpandServerError(response.get("error"))
+    return response["result"]
@@ -14,69 +14,200 @@
 # limitations under the License.
 # ******************************************************************************
 
-import socketserver
 import argparse
-import pickle
+import bisect
 import logging
 import re
+import socketserver
+import threading
+import time
 
-from nlp_architect.utils.io import validate_existing_filepath, check_size
-from prepare_data import extract_noun_phrases, load_parser
-from set_expand import SetExpand
+from nlp_architect.utils.io import validate_existing_path, check_size
+from expand_protocol import ProtocolError, recv_message, send_message
 
 logger = logging.getLogger(__name__)
 
 
-class MyTCPHandler(socketserver.BaseRequestHandler):
+class VocabIndex(object):
     """
-    A simple server to load the w2v model and handle expand requests from the
-    ui
+    The model vocabulary in model order, with a sorted lowercased index for (case
+    insensitive) prefix search.
     """
 
-    def handle(self):
-        logger.info("handling expand request")
-        res = ""
-        self.data = pickle.loads(self.request.recv(10240))
-        logger.info("request data: %s", self.data)
-        req = self.data[0]
-        if req == "get_vocab":
-            logger.info("getting vocabulary")
-            res = se.get_vocab()
-        elif req == "in_vocab":
-            term = self.data[1]
-            res = se.in_vocab(term)
-        elif req == "get_group":
-            term = self.data[1]
-            res = se.get_group(term)
-        elif req == "annotate":
-            seed = self.data[1]
-            text = self.data[2]
-            res = self.annotate(text, seed)
-            logger.info("res:%s", str(res))
-        elif req == "expand":
-            logger.info("expanding")
-            data = [x.strip() for x in self.data[1].split(",")]
-            res = se.expand(data)
-        logger.info("compressing response")
-        packet = pickle.dumps(res)
-        logger.info("response length= %s", str(len(packet)))
-        logger.info("sending response")
-        self.request.sendall(packet)
-        logger.info("done")
-
-    @staticmethod
-    def annotate(text, seed):
+    def __init__(self, terms):
+        self.terms = list(terms)
+        self._order = sorted(range(len(self.terms)), key=lambda i: (self.terms[i].lower(), i))
+        self._keys = [self.terms[i].lower() for i in self._order]
+
+    def __len__(self):
+        return len(self.terms)
+
+    def page(self, offset=0, limit=None, prefix=None):
+        """
+        Return a page of the vocabulary.
+
+        Args:
+            offset (int): index of the first term to return
+            limit (int, optional): maximal number of terms to return, all if None
+            prefix (str, optional): return only the terms starting with prefix (case
+                insensitive), in lowercase order
+
+        Returns:
+            dict: the terms of the page and the total number of (matching) terms
+        """
+        if prefix:
+            prefix = prefix.lower()
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_right(self._keys, prefix + chr(0x10FFFF), lo=start)
+            matches = [self.terms[i] for i in self._order[start:end]]
+        else:
+            matches = self.terms
+        end = None if limit is None else offset + limit
+        return {"terms": matches[offset:end], "total": len(matches)}
+
+
+class RequestMetrics(object):
+    """Thread safe count, error count and latency of the requests of each type."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def add(self, request_type, seconds, error=False):
+        with self._lock:
+            metrics = self._metrics.setdefault(
+                request_type, {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            metrics["count"] += 1
+            metrics["errors"] += int(error)
+            metrics["total_seconds"] += seconds
+            metrics["max_seconds"] = max(metrics["max_seconds"], seconds)
+
+    def summary(self):
+        """
+        Returns:
+            dict: per request type, the number of requests and errors and the mean and maximal
+            request time in milliseconds
+        """
+        with self._lock:
+            return {
+                request_type: {
+                    "count": metrics["count"],
+                    "errors": metrics["errors"],
+                    "mean_ms": 1000 * metrics["total_seconds"] / metrics["count"],
+                    "max_ms": 1000 * metrics["max_seconds"],
+                }
+                for request_type, metrics in self._metrics.items()
+            }
+
+
+class ExpandService(object):
+    """
+    Set expansion requests of a loaded model, shared by the server's connection threads.
+
+    Args:
+        se (SetExpand): the set expansion model
+        nlp: spacy parser for noun phrase extraction (annotation requests)
+        chunker (str): 'spacy' or 'nlp_arch' chunker
+        similarity (float): annotation similarity threshold
+    """
+
+    def __init__(self, se, nlp=None, chunker=None, similarity=0.5):
+        self.se = se
+        self.nlp = nlp
+        self.chunker = chunker
+        self.similarity = similarity
+        logger.info("indexing vocabulary")
+        self.vocab = VocabIndex(se.get_vocab())
+        self.metrics = RequestMetrics()
+        # the spacy parser is not thread safe
+        self._nlp_lock = threading.Lock()
+        self.handlers = {
+            "get_vocab": self.vocab.page,
+            "in_vocab": self.se.in_vocab,
+            "get_group": self.se.get_group,
+            "annotate": self.annotate,
+            "expand": self.expand,
+            "stats": self.metrics.summary,
+        }
+
+    def handle(self, message):
+        """
+        Handle a request message.
+
+        Args:
+            message (dict): request type and parameters
+
+        Returns:
+            dict: the response message
+        """
+        start = time.time()
+        request_type = message.get("type") if isinstance(message, dict) else None
+        try:
+            if request_type not in self.handlers:
+                raise ValueError("unknown request type: {}".format(request_type))
+            params = {k: v for k, v in message.items() if k != "type"}
+            response = {"status": "ok", "result": self.handlers[request_type](**params)}
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("%s request failed", request_type)
+            response = {"status": "error", "error": "{}: {}".format(type(e).__name__, e)}
+        seconds = time.time() - start
+        self.metrics.add(str(request_type), seconds, error=response["status"] != "ok")
+        response["time_ms"] = 1000 * seconds
+        logger.info("%s request handled in %.1f ms", request_type, 1000 * seconds)
+        return response
+
+    def expand(self, seed, topn=500):
+        data = [x.strip() for x in seed.split(",")]
+        return self.se.expand(data, topn=topn)
+
+    def annotate(self, seed, text):
+        from prepare_data import extract_noun_phrases
+
         # remove extra spaces from text
         text = re.sub(r"\s\s+", " ", text)
         np_list = []
         docs = [text]
-        spans = extract_noun_phrases(docs, nlp, args.chunker)
+        with self._nlp_lock:
+            spans = extract_noun_phrases(docs, self.nlp, self.chunker)
         for x in spans:
             np = x.text
             if np not in np_list:
                 np_list.append(np)
         logger.info("np_list=%s", str(np_list))
-        return se.similarity(np_list, seed, args.similarity)
+        return self.se.similarity(np_list, seed, self.similarity)
+
+
+class ExpandRequestHandler(socketserver.BaseRequestHandler):
+    """
+    Handles the length prefixed json requests of a connection (see expand_protocol) until
+    the client closes it.
+    """
+
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except ProtocolError as e:
+                logger.warning("closing connection from %s: %s", self.client_address, e)
+                return
+            if message is None:
+                return
+            send_message(self.request, self.server.service.handle(message))
+
+
+class ExpandServer(socketserver.ThreadingTCPServer):
+    """
+    Set expansion server, each connection is handled in its own thread against the single
+    loaded model.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address, service):
+        self.service = service
+        super(ExpandServer, self).__init__(server_address, ExpandRequestHandler)
 
 
 if __name__ == "__main__":
@@ -84,8 +215,8 @@ if __name__ == "__main__":
     parser.add_argument(
         "model_path",
         metavar="model_path",
-        type=validate_existing_filepath,
-        help="a path to the w2v model file",
+        type=validate_existing_path,
+        help="a path to the w2v model file (or the directory of a model in the serving format)",
     )
     parser.add_argument(
         "--host",
@@ -117,14 +248,15 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
-    port = args.port
-    model_path = args.model_path
+    from prepare_data import load_parser
+    from set_expand import SetExpand
+
     logger.info("loading model")
-    se = SetExpand(model_path, grouping=args.grouping)
+    se = SetExpand(args.model_path, grouping=args.grouping)
     logger.info("loading chunker")
     nlp = load_parser(args.chunker)
     logger.info("loading server")
-    HOST, PORT = args.host, port
-    server = socketserver.TCPServer((HOST, PORT), MyTCPHandler)
+    service = ExpandService(se, nlp, args.chunker, args.similarity)
+    server = ExpandServer((args.host, args.port), service)
     logger.info("server loaded")
     server.serve_forever()
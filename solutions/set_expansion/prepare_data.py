@@ -18,16 +18,18 @@
 Script that prepares the input corpus for np2vec training: it runs NP extractor on the corpus and
 marks extracted NP's.
 """
+
 import gzip
 import json
 import logging
+import multiprocessing
+import shutil
 from argparse import ArgumentParser
-from os import path, makedirs
+from os import path, makedirs, remove
 
 from tqdm import tqdm
 
 from nlp_architect import LIBRARY_OUT
-from nlp_architect.pipelines.spacy_np_annotator import NPAnnotator, get_noun_phrases
 from nlp_architect.utils.io import check_size, download_unlicensed_file, validate_parent_exists
 from nlp_architect.utils.text import spacy_normalizer, SpacyInstance
 
@@ -43,17 +45,18 @@ chunker_model_dat_file = "model_info.dat.params"
 chunker_model_file = "model.h5"
 
 
-def get_group_norm(spacy_span):
+def get_group_norm(spacy_span, mark_char="_"):
     """
     Give a span, determine the its group and return the normalized text representing the group
 
     Args:
             spacy_span (spacy.tokens.Span)
+            mark_char (str): the NP marking character of the corpus
     """
     np = spacy_span.text
     norm = spacy_normalizer(np, spacy_span.lemma_)
-    if args.mark_char in norm:
-        norm = norm.replace(args.mark_char, " ")
+    if mark_char in norm:
+        norm = norm.replace(mark_char, " ")
     if np not in np2count:  # new np
         np2count[np] = 1
         np2id[np] = norm
@@ -79,6 +82,8 @@ def load_parser(chunker):
     # load spacy parser
     logger.info("loading spacy. chunker=%s", chunker)
     if "nlp_arch" in chunker:
+        from nlp_architect.pipelines.spacy_np_annotator import NPAnnotator
+
         parser = SpacyInstance(model="en_core_web_sm", disable=["textcat", "ner", "parser"]).parser
         parser.add_pipe(parser.create_pipe("sentencizer"), first=True)
         _path_to_model = path.join(chunker_path, chunker_model_file)
@@ -101,6 +106,8 @@ def load_parser(chunker):
 
 
 def extract_noun_phrases(docs, nlp_parser, chunker):
+    from nlp_architect.pipelines.spacy_np_annotator import get_noun_phrases
+
     logger.info("extract nps from: %s", docs)
     spans = []
     for doc in nlp_parser.pipe(docs, n_threads=-1):
@@ -115,10 +122,19 @@ def extract_noun_phrases(docs, nlp_parser, chunker):
 
 # pylint: disable-msg=too-many-nested-blocks,too-many-branches
 def mark_noun_phrases(
-    corpus_file, marked_corpus_file, nlp_parser, lines_count, chunker, mark_char="_", grouping=False
+    corpus_file,
+    marked_corpus_file,
+    nlp_parser,
+    lines_count,
+    chunker,
+    mark_char="_",
+    grouping=False,
+    show_progress=True,
 ):
+    from nlp_architect.pipelines.spacy_np_annotator import get_noun_phrases
+
     i = 0
-    with tqdm(total=lines_count) as pbar:
+    with tqdm(total=lines_count, disable=not show_progress) as pbar:
         for doc in nlp_parser.pipe(corpus_file, n_threads=-1):
             if "nlp_arch" in chunker:
                 spans = get_noun_phrases(doc)
@@ -144,7 +160,7 @@ def mark_noun_phrases(
                             # mark NP's
                             if len(span.text) > 1 and span.lemma_ != "-PRON-":
                                 if grouping:
-                                    text = get_group_norm(span)
+                                    text = get_group_norm(span, mark_char)
                                 else:
                                     text = span.text
                                 # mark NP's
@@ -178,6 +194,205 @@ def merge_groups(np, old_id, diff_id):
     return old_id
 
 
+def shard_ranges(size, num_shards):
+    """
+    Split a file into byte ranges.
+
+    Args:
+        size (int): the file size
+        num_shards (int): number of ranges
+
+    Returns:
+        list of (int, int): the [start, end) byte ranges
+    """
+    return [(size * i // num_shards, size * (i + 1) // num_shards) for i in range(num_shards)]
+
+
+def read_shard(corpus_path, start, end):
+    """
+    Read the lines of an uncompressed corpus that start in a byte range, so consecutive
+    ranges read every line exactly once.
+
+    Args:
+        corpus_path (str): path to the corpus
+        start (int): the range start
+        end (int): the range end (exclusive)
+
+    Yields:
+        str: the lines, with their end of line
+    """
+    with open(corpus_path, "rb") as corpus_file:
+        if start > 0:
+            # skip the line started in the previous range
+            corpus_file.seek(start - 1)
+            corpus_file.readline()
+        while corpus_file.tell() < end:
+            line = corpus_file.readline()
+            if not line:
+                break
+            yield line.decode("utf8", errors="ignore")
+
+
+_parser = None
+
+
+def _init_shard_worker(chunker):
+    global _parser
+    _parser = load_parser(chunker)
+
+
+def _mark_shard(task):
+    """Mark the NPs of a corpus shard, returns the shard index and its grouping maps"""
+    shard_idx, corpus_path, start, end, shard_path, chunker, mark_char, grouping = task
+    for shard_map in (np2id, id2group, id2rep, np2count):
+        shard_map.clear()
+    with open(shard_path, "w", encoding="utf8") as shard_file:
+        mark_noun_phrases(
+            read_shard(corpus_path, start, end),
+            shard_file,
+            _parser,
+            None,
+            chunker,
+            mark_char=mark_char,
+            grouping=grouping,
+            show_progress=False,
+        )
+    return shard_idx, (dict(np2id), dict(id2group), dict(np2count))
+
+
+def merge_group_maps(shard_maps):
+    """
+    Merge the grouping maps of corpus shards, in corpus order.
+
+    Groups of different shards sharing a noun phrase are merged into the group created first
+    (as merge_groups does within a shard), the representative of a group is its most frequent
+    noun phrase over the whole corpus (the first one on ties). The result depends only on the
+    maps and their order.
+
+    Args:
+        shard_maps (list of (dict, dict, dict)): np2id, id2group and np2count of each shard
+
+    Returns:
+        (dict, dict, dict, dict): merged np2id, id2group, id2rep and np2count
+    """
+    merged_np2id = {}
+    merged_id2group = {}
+    merged_np2count = {}
+    creation_order = {}
+    for _, shard_id2group, shard_np2count in shard_maps:
+        for group_id, members in shard_id2group.items():
+            # the existing groups of the shard group, in creation order
+            targets = {group_id} if group_id in merged_id2group else set()
+            targets.update(merged_np2id[np] for np in members if np in merged_np2id)
+            targets = sorted(targets, key=creation_order.get)
+            if targets:
+                target = targets[0]
+                for other in targets[1:]:
+                    for np in merged_id2group.pop(other):
+                        merged_np2id[np] = target
+                        merged_id2group[target].append(np)
+            else:
+                target = group_id
+                merged_id2group[target] = []
+                creation_order[target] = len(creation_order)
+            for np in members:
+                if np not in merged_np2id:
+                    merged_id2group[target].append(np)
+                merged_np2id[np] = target
+                merged_np2count[np] = merged_np2count.get(np, 0) + shard_np2count[np]
+    merged_id2rep = {
+        group_id: max(members, key=lambda np: merged_np2count[np])
+        for group_id, members in merged_id2group.items()
+    }
+    return merged_np2id, merged_id2group, merged_id2rep, merged_np2count
+
+
+def mark_noun_phrases_sharded(
+    corpus_path,
+    marked_corpus_path,
+    chunker,
+    mark_char="_",
+    grouping=False,
+    num_workers=2,
+    num_shards=None,
+):
+    """
+    Mark the NPs of a corpus in worker processes, each with its own parser.
+
+    The corpus is split into byte ranges (a compressed corpus is decompressed first), the
+    shards are marked into separate files that are concatenated in order into the marked
+    corpus, and the grouping maps of the shards are merged with merge_group_maps.
+
+    Args:
+        corpus_path (str): path to the corpus, may be gzip compressed
+        marked_corpus_path (str): path to the marked corpus
+        chunker (str): the chunker, 'spacy' or 'nlp_arch'
+        mark_char (str): NP marking character
+        grouping (bool): perform noun-phrase grouping
+        num_workers (int): number of worker processes
+        num_shards (int, optional): number of shards, default 4 shards per worker
+
+    Returns:
+        (dict, dict, dict): merged np2id, id2group and id2rep, empty when not grouping
+    """
+    num_shards = num_shards or 4 * num_workers
+    tmp_corpus_path = None
+    if corpus_path.endswith("gz"):
+        tmp_corpus_path = marked_corpus_path + ".corpus.tmp"
+        logger.info("decompressing %s", corpus_path)
+        with gzip.open(corpus_path, "rb") as src, open(tmp_corpus_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 24)
+        corpus_path = tmp_corpus_path
+    size = path.getsize(corpus_path)
+    tasks = [
+        (
+            i,
+            corpus_path,
+            start,
+            end,
+            "{}.shard-{:05d}".format(marked_corpus_path, i),
+            chunker,
+            mark_char,
+            grouping,
+        )
+        for i, (start, end) in enumerate(shard_ranges(size, num_shards))
+    ]
+    logger.info("marking %d bytes in %d shards with %d workers", size, num_shards, num_workers)
+    shard_maps = [None] * num_shards
+    pool = multiprocessing.Pool(num_workers, _init_shard_worker, (chunker,))
+    try:
+        with tqdm(total=size, unit="B", unit_scale=True) as pbar:
+            for i, maps in pool.imap_unordered(_mark_shard, tasks):
+                shard_maps[i] = maps
+                pbar.update(tasks[i][3] - tasks[i][2])
+    finally:
+        pool.terminate()
+        if tmp_corpus_path is not None:
+            remove(tmp_corpus_path)
+
+    with open(marked_corpus_path, "wb") as marked_corpus_file:
+        for task in tasks:
+            with open(task[4], "rb") as shard_file:
+                shutil.copyfileobj(shard_file, marked_corpus_file, 1 << 24)
+            remove(task[4])
+    if not grouping:
+        return {}, {}, {}
+    merged_np2id, merged_id2group, merged_id2rep, _ = merge_group_maps(shard_maps)
+    return merged_np2id, merged_id2group, merged_id2rep
+
+
+def write_group_maps(corpus_dir, np2id_map, id2group_map, id2rep_map):
+    """Write the grouping maps (loaded by SetExpand with grouping_map_dir)"""
+    with open(path.join(corpus_dir, "id2group"), "w", encoding="utf8") as id2group_file:
+        id2group_file.write(json.dumps(id2group_map))
+
+    with open(path.join(corpus_dir, "id2rep"), "w", encoding="utf8") as id2rep_file:
+        id2rep_file.write(json.dumps(id2rep_map))
+
+    with open(path.join(corpus_dir, "np2id"), "w", encoding="utf8") as np2id_file:
+        np2id_file.write(json.dumps(np2id_map))
+
+
 if __name__ == "__main__":
     arg_parser = ArgumentParser(__doc__)
     arg_parser.add_argument(
@@ -213,39 +428,53 @@ if __name__ == "__main__":
         help="chunker to use for detecting noun phrases. 'spacy' for using spacy built-in "
         "chunker or 'nlp_arch' for NLP Architect NP Extractor",
     )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes, more than 1 marks the corpus in shards in parallel",
+    )
+    arg_parser.add_argument(
+        "--shards", type=int, help="number of corpus shards (default: 4 shards per worker)"
+    )
 
     args = arg_parser.parse_args()
-    if args.corpus.endswith("gz"):
-        open_func = gzip.open
-        mode = "rt"
-    else:
-        open_func = open
-        mode = "r"
-
-    with open_func(args.corpus, mode, encoding="utf8", errors="ignore") as my_corpus_file:
-        with open(args.marked_corpus, "w", encoding="utf8") as my_marked_corpus_file:
-            nlp = load_parser(args.chunker)
-            num_lines = sum(1 for line in my_corpus_file)
-            my_corpus_file.seek(0)
-            logger.info("%i lines in corpus", num_lines)
-            mark_noun_phrases(
-                my_corpus_file,
-                my_marked_corpus_file,
-                nlp,
-                num_lines,
-                mark_char=args.mark_char,
-                grouping=args.grouping,
-                chunker=args.chunker,
-            )
-
-        # write grouping data :
+    if args.workers > 1:
+        maps = mark_noun_phrases_sharded(
+            args.corpus,
+            args.marked_corpus,
+            args.chunker,
+            mark_char=args.mark_char,
+            grouping=args.grouping,
+            num_workers=args.workers,
+            num_shards=args.shards,
+        )
         if args.grouping:
-            corpus_dir = path.dirname(args.marked_corpus)
-            with open(path.join(corpus_dir, "id2group"), "w", encoding="utf8") as id2group_file:
-                id2group_file.write(json.dumps(id2group))
+            write_group_maps(path.dirname(args.marked_corpus), *maps)
+    else:
+        if args.corpus.endswith("gz"):
+            open_func = gzip.open
+            mode = "rt"
+        else:
+            open_func = open
+            mode = "r"
 
-            with open(path.join(corpus_dir, "id2rep"), "w", encoding="utf8") as id2rep_file:
-                id2rep_file.write(json.dumps(id2rep))
+        with open_func(args.corpus, mode, encoding="utf8", errors="ignore") as my_corpus_file:
+            with open(args.marked_corpus, "w", encoding="utf8") as my_marked_corpus_file:
+                nlp = load_parser(args.chunker)
+                num_lines = sum(1 for line in my_corpus_file)
+                my_corpus_file.seek(0)
+                logger.info("%i lines in corpus", num_lines)
+                mark_noun_phrases(
+                    my_corpus_file,
+                    my_marked_corpus_file,
+                    nlp,
+                    num_lines,
+                    mark_char=args.mark_char,
+                    grouping=args.grouping,
+                    chunker=args.chunker,
+                )
 
-            with open(path.join(corpus_dir, "np2id"), "w", encoding="utf8") as np2id_file:
-                np2id_file.write(json.dumps(np2id))
+            # write grouping data :
+            if args.grouping:
+                write_group_maps(path.dirname(args.marked_corpus), np2id, id2group, id2rep)
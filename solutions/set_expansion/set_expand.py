@@ -18,15 +18,18 @@ import sys
 from argparse import ArgumentParser
 from os import path
 
+from gensim import matutils
+
+from ann_index import IVFIndex, default_index_dir
 from nlp_architect.models.np2vec import NP2vec
-from nlp_architect.utils.io import validate_existing_filepath, check_size, load_json_file
+from nlp_architect.utils.io import validate_existing_path, check_size, load_json_file
 
 logger = logging.getLogger(__name__)
 
 
 class SetExpand(object):
     """
-        Set expansion module, given a trained np2vec model.
+    Set expansion module, given a trained np2vec model.
     """
 
     def __init__(
@@ -37,6 +40,9 @@ class SetExpand(object):
         grouping=False,
         light_grouping=False,
         grouping_map_dir=None,
+        ann_index_dir=None,
+        exact_max_vocab=100000,
+        nprobe=32,
     ):
         """
         Load the np2vec model for set expansion.
@@ -48,6 +54,11 @@ class SetExpand(object):
             ngrams) information.
             light_grouping (bool): boolean indicating whether to load all maps for grouping.
             grouping_map_dir (str): path to the directory containing maps for grouping.
+            ann_index_dir (str): path to the approximate nearest neighbour index of the model
+                (see ann_index.py), default: the model file path + '.ivf' if exists.
+            exact_max_vocab (int): vocabularies up to this size are searched exactly even if an
+                index exists.
+            nprobe (int): number of index clusters searched per expansion.
         Returns:
             np2vec model to load
         """
@@ -69,8 +80,37 @@ class SetExpand(object):
         self.mark_char = first_term[-1]
         # Precompute L2-normalized vectors.
         self.np2vec_model.init_sims()
+        self.ann_index = None
+        self.nprobe = nprobe
+        if ann_index_dir is None and path.isdir(default_index_dir(np2vec_model_file)):
+            ann_index_dir = default_index_dir(np2vec_model_file)
+        if ann_index_dir is not None:
+            vocab_size = len(self._vectors().vocab)
+            if vocab_size <= exact_max_vocab:
+                logger.info("vocabulary of %d terms, using exact search", vocab_size)
+            else:
+                logger.info("loading ANN index")
+                self.ann_index = IVFIndex.load(ann_index_dir)
+                if len(self.ann_index) != vocab_size:
+                    logger.warning("ANN index does not match the model, using exact search")
+                    self.ann_index = None
         logger.info("done init")
 
+    def _vectors(self):
+        # the KeyedVectors of full (e.g. FastText) models
+        return getattr(self.np2vec_model, "wv", self.np2vec_model)
+
+    def _most_similar(self, seed_ids, topn):
+        """The most similar terms of seed_ids (as np2vec_model.most_similar), searched in
+        the ANN index if loaded"""
+        if self.ann_index is None:
+            return self.np2vec_model.most_similar(seed_ids, topn=topn)
+        vectors = self._vectors()
+        seed_indices = [vectors.vocab[id].index for id in seed_ids]
+        query = matutils.unitvec(vectors.vectors_norm[seed_indices].mean(axis=0))
+        results = self.ann_index.search(query, topn, self.nprobe, exclude=set(seed_indices))
+        return [(vectors.index2word[i], score) for i, score in results]
+
     def term2id(self, term, suffix=True):
         """
         Given an term, return its id.
@@ -139,17 +179,31 @@ class SetExpand(object):
         return group
 
     def similarity(self, terms, seed, threshold):
+        """
+        Return the terms similar to a seed.
+
+        Args:
+            terms: candidate terms
+            seed: seed terms
+            threshold: minimal similarity (exclusive) of a returned term
 
-        similar = []
+        Returns:
+            the in-vocabulary terms whose similarity to the seed is above threshold, in order
+        """
         seed_id = self.get_seed_id(seed)
+        in_vocab_terms = []
+        term_ids = []
         for term in terms:
             term_id = self.term2id(term)
             if term_id is not None:
-                if self.seed2term_similarity(seed_id, [term_id]) > threshold:
-                    similar.append(term)
+                in_vocab_terms.append(term)
+                term_ids.append(term_id)
             else:
                 logger.info("term: %s is not in vocab", term)
-        return similar
+        if not seed_id or not term_ids:
+            return []
+        scores = self.seed2terms_similarity(seed_id, term_ids)
+        return [term for term, score in zip(in_vocab_terms, scores) if score > threshold]
 
     # pylint: disable-msg=too-many-branches
     def expand(self, seed, topn=500):
@@ -181,9 +235,9 @@ class SetExpand(object):
                 logger.warning("The term: '%s' is out-of-vocabulary.", np)
         if len(seed_ids) > 0:
             if not self.grouping and (upper or lower):
-                res_id = self.np2vec_model.most_similar(seed_ids, topn=2 * topn)
+                res_id = self._most_similar(seed_ids, topn=2 * topn)
             else:
-                res_id = self.np2vec_model.most_similar(seed_ids, topn=topn)
+                res_id = self._most_similar(seed_ids, topn=topn)
             res = list()
             for r in res_id:
                 if len(res) == topn:
@@ -215,6 +269,25 @@ class SetExpand(object):
                 logger.warning("The term: '%s' is out-of-vocabulary.", np)
         return seed_ids
 
+    def seed2terms_similarity(self, seed_id, term_ids):
+        """
+        Compute cosine similarity between a seed terms and each of several terms: the
+        normalized seed centroid is computed once and all terms are scored with a single
+        matrix-vector product against the precomputed L2-normalized vectors.
+
+        Args:
+            seed_id: seed term id's
+            term_ids: the term id's to score
+
+        Returns:
+            numpy.ndarray: similarity between the seed terms and each term, in term_ids order
+        """
+        vectors = self._vectors()
+        # raw vectors of the seed terms, averaged as in n_similarity
+        centroid = matutils.unitvec(vectors[list(seed_id)].mean(axis=0))
+        term_indices = [vectors.vocab[id].index for id in term_ids]
+        return vectors.vectors_norm[term_indices].dot(centroid)
+
     def term2term_similarity(self, term_id_1, term_id_2):
         """
         Compute cosine similarity between two term id's.
@@ -252,8 +325,9 @@ if __name__ == "__main__":
     arg_parser = ArgumentParser(__doc__)
     arg_parser.add_argument(
         "--np2vec_model_file",
-        help="path to the file with the np2vec model to load.",
-        type=validate_existing_filepath,
+        help="path to the file with the np2vec model to load (or the directory of a model in "
+        "the serving format).",
+        type=validate_existing_path,
     )
     arg_parser.add_argument(
         "--binary",
@@ -277,6 +351,20 @@ if __name__ == "__main__":
         help="maximal number of expanded terms to return",
     )
     arg_parser.add_argument("--grouping", action="store_true", default=False, help="grouping mode")
+    arg_parser.add_argument(
+        "--ann_index_dir",
+        help="approximate nearest neighbour index of the model (see ann_index.py), default: "
+        "the model file path + '.ivf' if exists.",
+    )
+    arg_parser.add_argument(
+        "--exact_max_vocab",
+        default=100000,
+        type=int,
+        help="search vocabularies up to this size exactly, even if an index exists",
+    )
+    arg_parser.add_argument(
+        "--nprobe", default=32, type=int, help="number of index clusters searched per expansion"
+    )
 
     args = arg_parser.parse_args()
 
@@ -285,6 +373,9 @@ if __name__ == "__main__":
         binary=args.binary,
         word_ngrams=args.word_ngrams,
         grouping=args.grouping,
+        ann_index_dir=args.ann_index_dir,
+        exact_max_vocab=args.exact_max_vocab,
+        nprobe=args.nprobe,
     )
     enter_seed_str = "Enter the seed (comma-separated seed terms):"
     logger.info(enter_seed_str)
@@ -14,11 +14,10 @@
 # limitations under the License.
 # ******************************************************************************
 
-import socket
-import pickle
 import logging
 import re
-from os.path import dirname, join
+import sys
+from os.path import abspath, dirname, join
 
 from bokeh.layouts import column, layout
 from bokeh.models import ColumnDataSource, Div, Row, CustomJS
@@ -28,15 +27,18 @@ from bokeh.io import curdoc
 
 from settings import grouping, expand_host, expand_port
 
+# the expand server's protocol module
+sys.path.append(dirname(dirname(abspath(__file__))))
+from expand_protocol import request  # noqa: E402
+
 # pylint: skip-file
 logger = logging.getLogger(__name__)
 
-vocab = None
-vocab_dict = {}
+vocab_size = None
 cut_vocab_dict = {}
 max_visible_phrases = 5000
 working_text = "please wait..."
-fetching_text = "Fetching vocabulary from server (one time only), this can take few minutes..."
+fetching_text = "Fetching vocabulary from server..."
 seed_check_text = ""
 all_selected_phrases = []
 search_flag = False
@@ -122,50 +124,38 @@ grid = layout(
 # define callbacks
 
 
-def get_vocab():
+def get_vocab(prefix=None):
     """
-    Get vocabulary of the np2vec model from the server
+    Get the first max_visible_phrases terms of the np2vec model vocabulary (starting with
+    prefix) from the server, and show their cut representations in the phrases list
     """
-    global vocab
+    global vocab_size
     logger.info("sending get_vocab request to server...")
-    received = send_request_to_server(["get_vocab"])
-    vocab = received
-    for p in vocab:
-        if len(p) < max_phrase_length:
-            vocab_dict[p] = p
-            cut_vocab_dict[p] = p
-        else:
-            vocab_dict[p] = p[: max_phrase_length - 1] + "..."
-            cut_vocab_dict[p[: max_phrase_length - 1] + "..."] = p
+    received = send_request_to_server("get_vocab", limit=max_visible_phrases, prefix=prefix)
+    if received is None:
+        return
+    if not prefix:
+        vocab_size = received["total"]
+    options = []
+    for p in received["terms"]:
+        cut_vocab_dict[cut_phrase(p)] = p
+        options.append(cut_phrase(p))
+    phrases_list.options = list(dict.fromkeys(options))
+
 
+def cut_phrase(p):
+    if len(p) < max_phrase_length:
+        return p
+    return p[: max_phrase_length - 1] + "..."
 
-def send_request_to_server(request):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+def send_request_to_server(request_type, **params):
     try:
-        # Connect to server and send data
-        sock.connect((expand_host, expand_port))
-        logger.info("sending request")
-        req_packet = pickle.dumps(request)
-        # sock.sendall(bytes(request + "\n", "utf-8"))
-        sock.sendall(req_packet)
-        # Receive data from the server and shut down
-        data = b""
-        ctr = 0
-        while True:
-            packet = sock.recv(134217728)
-            logger.info("%s. received: %s", str(ctr), str(len(packet)))
-            ctr += 1
-            if not packet:
-                break
-            data += packet
-            logger.info("got response, uncompressing")
-        received = pickle.loads(data)
-        # logger.info("Received: {}".format(received))
-        return received
-    except EOFError:
-        logger.info("No data received")
-    finally:
-        sock.close()
+        logger.info("sending %s request", request_type)
+        return request(expand_host, expand_port, request_type, **params)
+    except Exception as e:
+        logger.error("%s request failed: %s", request_type, e)
+        return None
 
 
 def row_selected_callback(indices, old, new):
@@ -181,18 +171,20 @@ def row_selected_callback(indices, old, new):
         )
         # phrase was de-selected from expand list:
         for o in old_phrases:
-            if o not in new_phrases and (vocab is not None and vocab_dict[o] in phrases_list.value):
+            if o not in new_phrases and (
+                vocab_size is not None and cut_phrase(o) in phrases_list.value
+            ):
                 logger.info("removing %s from vocab selected", o)
-                phrases_list.value.remove(vocab_dict[o])
+                phrases_list.value.remove(cut_phrase(o))
                 break
         # new phrase was selected from expand list:
         for n in new_phrases:
             if n not in old_phrases and (
-                vocab is not None
-                and vocab_dict[n] in phrases_list.options
-                and vocab_dict[n] not in phrases_list.value
+                vocab_size is not None
+                and cut_phrase(n) in phrases_list.options
+                and cut_phrase(n) not in phrases_list.value
             ):
-                phrases_list.value.append(vocab_dict[n])
+                phrases_list.value.append(cut_phrase(n))
                 break
         update_all_selected_phrases()
         seed_input_box.value = get_selected_phrases_for_seed()
@@ -217,9 +209,9 @@ def update_all_selected_phrases():
     for x in all_selected_phrases:
         logger.info("x= %s", x)
         if (x in expand_table_source.data["res"] and x not in selected_expand) or (
-            vocab is not None
-            and (vocab_dict[x] in phrases_list.options)
-            and (vocab_dict[x] not in selected_vocab)
+            vocab_size is not None
+            and (cut_phrase(x) in phrases_list.options)
+            and (cut_phrase(x) not in selected_vocab)
         ):
             logger.info("removing %s", x)
             updated_selected_phrases.remove(x)
@@ -245,14 +237,9 @@ def checkbox_callback(checked_value):
         annotation_layout.children = []
         annotation_output.text = ""
     if 1 in checked_value:
-        if vocab is None:
+        if vocab_size is None or not phrases_list.options:
             working_label.text = fetching_text
-            get_vocab()
-        if not phrases_list.options:
-            working_label.text = working_text
-            phrases_list.options = list(cut_vocab_dict.keys())[
-                0:max_visible_phrases
-            ]  # show the cut representation
+            get_vocab()  # show the cut representation
         # search_box_area.children = [search_input_box]
         phrases_area.children = [search_input_box, search_working_label, phrases_list]
         working_label.text = ""
@@ -281,7 +268,7 @@ def get_expand_results_callback():
         seed_words = [x.strip() for x in seed.split(",")]
         bad_words = ""
         for w in seed_words:
-            res = send_request_to_server(["in_vocab", w])
+            res = send_request_to_server("in_vocab", term=w)
             if res is False:
                 bad_words += "'" + w + "',"
         if bad_words != "":
@@ -293,7 +280,7 @@ def get_expand_results_callback():
             logger.info("setting table area")
             table_area.children = [seed_check_label, table_layout]
         logger.info("sending expand request to server with seed= %s", seed)
-        received = send_request_to_server(["expand", seed])
+        received = send_request_to_server("expand", seed=seed)
         if received is not None:
             res = [x[0] for x in received]
             scores = ["{0:.5f}".format(y[1]) for y in received]
@@ -311,21 +298,15 @@ def search_callback(value, old, new):
     group_info_box.text = ""
     search_working_label.text = working_text
     logger.info("search vocab")
-    global vocab, phrases_list, all_selected_phrases, search_flag
+    global phrases_list, all_selected_phrases, search_flag
     search_flag = True
     phrases_list.value = []
-    if new == "":
-        new_phrases = list(cut_vocab_dict.keys())
-    else:
-        new_phrases = []
-        for x in vocab:
-            if x.lower().startswith(new.lower()) and vocab_dict[x] not in new_phrases:
-                new_phrases.append(vocab_dict[x])
-    phrases_list.options = new_phrases[0:max_visible_phrases]
+    # prefix search on the server
+    get_vocab(prefix=new)
     if new != "":
         phrases_list.options.sort()
     phrases_list.value = [
-        vocab_dict[x] for x in all_selected_phrases if vocab_dict[x] in phrases_list.options
+        cut_phrase(x) for x in all_selected_phrases if cut_phrase(x) in phrases_list.options
     ]
     logger.info("selected vocab after search= %s", str(phrases_list.value))
     search_working_label.text = ""
@@ -337,7 +318,7 @@ def vocab_phrase_selected_callback(attr, old_selected, new_selected):
     if grouping:
         # show group info
         if len(new_selected) == 1:
-            res = send_request_to_server(["get_group", new_selected[0]])
+            res = send_request_to_server("get_group", term=cut_vocab_dict[new_selected[0]])
             if res is not None:
                 group_info_box.text = str(res)
     global clear_flag
@@ -401,7 +382,7 @@ def clear_seed_callback():
 
 def get_selected_phrases_for_seed():
     """
-     create the seed string to send to the server
+    create the seed string to send to the server
     """
     global all_selected_phrases
     phrases = ""
@@ -430,7 +411,7 @@ def annotate_callback():
         else:
             out_text = user_text
             seed = [x.strip() for x in seed_input_box.value.split(",")]
-            res = send_request_to_server(["annotate", seed, user_text])
+            res = send_request_to_server("annotate", seed=seed, text=user_text)
             logger.info("res:%s", str(res))
             if len(res) == 0:
                 out_text = "No results found"
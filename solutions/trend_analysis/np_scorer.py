@@ -22,7 +22,7 @@ from nlp_architect import LIBRARY_OUT
 from nlp_architect.pipelines.spacy_np_annotator import NPAnnotator, get_noun_phrases
 from nlp_architect.utils.io import download_unlicensed_file
 from nlp_architect.utils.text import SpacyInstance
-from .scoring_utils import TextSpanScoring
+from .scoring_utils import CorpusIndex, TextSpanScoring
 
 nlp_chunker_url = "https://s3-us-west-2.amazonaws.com/nlp-architect-data/models/chunker/"
 chunker_model_dat_file = "model_info.dat.params"
@@ -53,27 +53,61 @@ class NPScorer(object):
             download_unlicensed_file(nlp_chunker_url, chunker_model_dat_file, _path_to_params)
         self.nlp.add_pipe(NPAnnotator.load(_path_to_model, _path_to_params), last=True)
 
-    def score_documents(self, texts: list, limit=-1, return_all=False, min_tf=5):
+    def score_documents(
+        self, texts: list, limit=-1, return_all=False, min_tf=5, index_dir=None, doc_ids=None
+    ):
+        """
+        Extract and score the noun phrases of documents.
+
+        Args:
+            texts (list): the documents
+            limit (int, optional): score only the top limit phrases by TF-IDF
+            return_all (bool, optional): return the TF-IDF, C-value and frequency scores of each
+                phrase group instead of their combined score
+            min_tf (int, optional): minimal TF of scored phrases
+            index_dir (str, optional): directory of the CorpusIndex of previously scored
+                documents, the phrases are scored over the indexed and new documents and the
+                updated index is saved back
+            doc_ids (list, optional): unique keys of the documents (e.g. file names), documents
+                already in the index are skipped
+
+        Returns:
+            list of phrase groups and their scores
+        """
         documents = []
         assert len(texts) > 0, "texts should contain at least 1 document"
         assert min_tf > 0, "min_tf should be at least 1"
+        if doc_ids is None:
+            doc_ids = [None] * len(texts)
+        assert len(doc_ids) == len(texts), "doc_ids and texts should be of the same length"
         with tqdm(total=len(texts), desc="documents scoring progress", unit="docs") as pbar:
-            for doc in self.nlp.pipe(texts, n_threads=-1):
+            for doc, doc_id in zip(self.nlp.pipe(texts, n_threads=-1), doc_ids):
                 if len(doc) > 0:
-                    documents.append(doc)
+                    documents.append((doc, doc_id))
                 pbar.update(1)
 
         corpus = []
-        for doc in documents:
+        for doc, doc_id in documents:
             spans = get_noun_phrases(doc)
             if len(spans) > 0:
-                corpus.append((doc, spans))
+                corpus.append((doc, spans, doc_id))
 
-        if len(corpus) < 1:
+        index = None
+        if index_dir is not None and path.exists(path.join(index_dir, CorpusIndex.META_FILE)):
+            index = CorpusIndex.load(index_dir)
+        if len(corpus) < 1 and index is None:
             return []
 
-        documents, doc_phrases = list(zip(*corpus))
-        scorer = TextSpanScoring(documents=documents, spans=doc_phrases, min_tf=min_tf)
+        documents, doc_phrases, doc_keys = list(zip(*corpus)) if corpus else ((), (), ())
+        scorer = TextSpanScoring(
+            documents=documents,
+            spans=doc_phrases,
+            min_tf=min_tf,
+            index=index,
+            doc_ids=None if None in doc_keys else doc_keys,
+        )
+        if index_dir is not None:
+            scorer.index.save(index_dir)
         tfidf_scored_list = scorer.get_tfidf_scores()
         if len(tfidf_scored_list) < 1:
             return []
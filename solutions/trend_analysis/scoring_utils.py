@@ -15,11 +15,11 @@
 # ******************************************************************************
 # pylint: disable=no-name-in-module
 import itertools
-import math
+import json
+from os import makedirs, path
 
 import numpy as np
 import logging
-from spacy.tokens.doc import Doc
 from spacy.tokens.span import Span
 from spacy.tokens.token import Token
 
@@ -45,18 +45,26 @@ class TextSpanScoring:
     Contains misc scoring algorithms for scoring text fragments extracted
     from a corpus.
 
+    The spans are scored over all the documents of the index, an existing (loaded) index is
+    updated with the given documents, so only new documents are processed.
+
     Arguments:
         documents(list): List of spaCy documents.
         spans(list[list]): List of spaCy spans representing noun phrases of documents
             document.
+        min_tf(int): Minimal TF of scored spans.
+        index(CorpusIndex, optional): Index of previously processed documents to update.
+        doc_ids(list, optional): Unique keys of the documents in the index.
     """
 
-    def __init__(self, documents, spans, min_tf=1):
+    def __init__(self, documents, spans, min_tf=1, index=None, doc_ids=None):
         assert len(documents) == len(spans)
         self._documents = documents
         self._doc_text_spans = spans
-        self.index = CorpusIndex(documents, spans)
+        self.index = index if index is not None else CorpusIndex()
+        self.index.add_documents(documents, spans, doc_ids)
         assert min_tf > 0, "min_tf must be > 0"
+        self.min_tf = 1
         if min_tf > 1:
             self.re_index_min_tf(min_tf)
 
@@ -66,7 +74,8 @@ class TextSpanScoring:
             filtered_doc_phrases = [p for p in d if self.index.tf(p) >= tf]
             filtered_doc_text_spans.append(filtered_doc_phrases)
         self._doc_text_spans = filtered_doc_text_spans
-        self.index = CorpusIndex(self.documents, self.doc_text_spans)
+        # phrases under min_tf are filtered out when scoring, the index is kept as is
+        self.min_tf = tf
 
     @property
     def documents(self):
@@ -76,23 +85,28 @@ class TextSpanScoring:
     def doc_text_spans(self):
         return self._doc_text_spans
 
+    def _active_phrases(self):
+        """mask of the phrase ids with TF of at least min_tf"""
+        return self.index.tf_counts >= self.min_tf
+
+    def _active_forms(self):
+        """surface form ids of the phrases with TF of at least min_tf"""
+        return np.flatnonzero(self._active_phrases()[self.index.form_pids])
+
     def get_tfidf_scores(self, group_similar_spans=True):
         """
         Get TF-IDF scores of spans
         return a list of spans sorted by desc order of importance
         span score = TF (global) * (1 + log_n(DF/N))
         """
-        phrases_and_scores = {}
-        num_of_docs = len(self.documents)
-        for _, noun_phrases in zip(self.documents, self.doc_text_spans):
-            for p in noun_phrases:
-                if p not in phrases_and_scores:
-                    tf = self.index.tf(p)
-                    df = self.index.df(p)
-                    phrases_and_scores[p] = (tf + 1) * math.log(1 + num_of_docs / df)
-        if len(phrases_and_scores) > 0:
-            return self._maybe_group_and_sort(group_similar_spans, phrases_and_scores)
-        return []
+        fids = self._active_forms()
+        if len(fids) == 0:
+            return []
+        pids = self.index.form_pids[fids]
+        tf = self.index.tf_counts[pids].astype(np.float64)
+        df = self.index.df_counts[pids]
+        scores = (tf + 1) * np.log(1 + self.index.num_documents / df)
+        return self._maybe_group_and_sort(group_similar_spans, fids, scores)
 
     def get_freq_scores(self, group_similar_spans=True):
         try:
@@ -107,55 +121,88 @@ class TextSpanScoring:
             _has_wordfreq = False
 
         if _has_wordfreq:
-            phrases_and_scores = {}
-            for _, noun_phrases in zip(self.documents, self.doc_text_spans):
-                for p in noun_phrases:
-                    if p not in phrases_and_scores:
-                        phrases_and_scores[p] = zipf_frequency(p.text, "en")
-            return self._maybe_group_and_sort(group_similar_spans, phrases_and_scores)
+            fids = self._active_forms()
+            # a group is scored by its first form, only these are looked up
+            scored_fids = self._first_forms(fids) if group_similar_spans else fids
+            scores = np.zeros(self.index.num_forms)
+            scores[scored_fids] = [
+                zipf_frequency(self.index.form_texts[f], "en") for f in scored_fids
+            ]
+            if group_similar_spans:
+                form_pids = self.index.form_pids
+                pid_scores = np.zeros(self.index.num_phrases)
+                pid_scores[form_pids[scored_fids]] = scores[scored_fids]
+                scores[fids] = pid_scores[form_pids[fids]]
+            return self._maybe_group_and_sort(group_similar_spans, fids, scores[fids])
         return None
 
-    def group_spans(self, phrases):
-        pid_phrase_scores = [{"k": self.index.get_pid(p), "v": (p, s)} for p, s in phrases.items()]
-        phrase_groups = []
-        for _, group in itertools.groupby(
-            sorted(pid_phrase_scores, key=lambda x: x["k"]), lambda x: x["k"]
-        ):
-            _group = list(group)
-            phrases = {g["v"][0].text for g in _group}
-            score = _group[0]["v"][1]
-            phrase_groups.append((sorted(phrases), score))
-        return phrase_groups
-
-    def _maybe_group_and_sort(self, is_group, phrases_dict):
-        phrase_groups = phrases_dict.items()
+    def _first_forms(self, fids):
+        """the first surface form id of each phrase id of the given forms"""
+        _, first = np.unique(self.index.form_pids[fids], return_index=True)
+        return fids[np.sort(first)]
+
+    def group_spans(self, fids, scores):
+        """
+        Group scored surface forms by phrase id, a group is scored by the score of its first
+        form
+
+        Arguments:
+            fids(numpy.ndarray): surface form ids, ascending
+            scores(numpy.ndarray): the scores of the forms
+
+        Returns:
+            list of (sorted surface texts, score), ordered by phrase id
+        """
+        pids = self.index.form_pids[fids]
+        order = np.argsort(pids, kind="stable")
+        pids = pids[order]
+        starts = np.flatnonzero(np.r_[True, pids[1:] != pids[:-1]])
+        texts = [self.index.form_texts[f] for f in fids[order].tolist()]
+        ends = np.r_[starts[1:], len(texts)].tolist()
+        return [
+            ([texts[start]] if end - start == 1 else sorted(set(texts[start:end])), score)
+            for start, end, score in zip(starts.tolist(), ends, scores[order][starts].tolist())
+        ]
+
+    def _maybe_group_and_sort(self, is_group, fids, scores):
         if is_group:
-            phrase_groups = self.group_spans(phrases_dict)
-        return sorted(phrase_groups, key=lambda x: x[1], reverse=True)
+            phrase_groups = self.group_spans(fids, scores)
+        else:
+            texts = self.index.form_texts
+            phrase_groups = list(zip([texts[f] for f in fids], scores.tolist()))
+        return _sort_by_score(phrase_groups, [s for _, s in phrase_groups])
 
     @staticmethod
     def normalize_minmax(phrases_list, invert=False):
-        _, scores = list(zip(*phrases_list))
-        max_score = max(scores)
-        min_score = min(scores)
-        norm_list = []
-        for p, s in phrases_list:
-            if max_score - min_score > 0:
-                new_score = (s - min_score) / (max_score - min_score)
-            else:
-                new_score = 0
-            norm_list.append([p, new_score])
+        phrases = [p for p, _ in phrases_list]
+        scores = np.array([s for _, s in phrases_list], dtype=np.float64)
+        score_range = scores.max() - scores.min()
+        if score_range > 0:
+            scores = (scores - scores.min()) / score_range
+        else:
+            scores = np.zeros_like(scores)
         if invert:
-            for e in norm_list:
-                e[1] = 1.0 - e[1]
-        return norm_list
+            scores = 1.0 - scores
+        return [[p, s] for p, s in zip(phrases, scores.tolist())]
 
     @staticmethod
     def normalize_l2(phrases_list):
-        phrases, scores = list(zip(*phrases_list))
+        phrases = [p for p, _ in phrases_list]
+        scores = np.array([s for _, s in phrases_list], dtype=np.float64)
         scores = scores / np.linalg.norm(scores)
         return list(zip(phrases, scores.tolist()))
 
+    @staticmethod
+    def _align_scores(phrase_lists):
+        """The phrases of the first list (as tuples) and a phrases x lists scores matrix"""
+        phrase_list_dicts = [{tuple(k): i for i, (k, _) in enumerate(lst)} for lst in phrase_lists]
+        phrases = list(phrase_list_dicts[0])
+        scores = np.empty((len(phrases), len(phrase_lists)), dtype=np.float64)
+        for j, (lst, ref) in enumerate(zip(phrase_lists, phrase_list_dicts)):
+            list_scores = np.array([s for _, s in lst], dtype=np.float64)
+            scores[:, j] = list_scores[[ref[p] for p in phrases]]
+        return phrases, scores
+
     @staticmethod
     def interpolate_scores(phrase_lists, weights=None):
         if weights is None:
@@ -167,149 +214,411 @@ class TextSpanScoring:
         for lsize in list_sizes:
             assert len(phrase_lists[0]) == lsize, "list sizes not equal"
 
-        phrase_list_dicts = []
-        for lst in phrase_lists:
-            phrase_list_dicts.append({tuple(k): v for k, v in lst})
-
-        phrases = phrase_list_dicts[0].keys()
-        interp_scores = {}
-        for p in phrases:
-            interp_scores[p] = 0.0
-            for ref, w in zip(phrase_list_dicts, weights):
-                interp_scores[p] += ref[p] * w
-        return sorted(interp_scores.items(), key=lambda x: x[1], reverse=True)
+        phrases, scores = TextSpanScoring._align_scores(phrase_lists)
+        # accumulated list by list as in scalar arithmetic, only as many lists as weights
+        interp_scores = np.zeros(len(phrases))
+        for list_scores, w in zip(scores.T, weights):
+            interp_scores += list_scores * w
+        return _sort_by_score(list(zip(phrases, interp_scores.tolist())), interp_scores)
 
     def get_cvalue_scores(self, group_similar_spans=True):
-        phrases_text = [p for ps in self.index.pid_to_spans.values() for p in ps]
-        phrase_scores = {}
-        for phrase in phrases_text:
-            sub_phrase_pids = None
-            for w in phrase:
-                sub_pids = self.index.get_subphrases_of_word(w)
-                if sub_phrase_pids is None:
-                    sub_phrase_pids = sub_pids
-                else:
-                    sub_phrase_pids = sub_phrase_pids.intersection(sub_pids)
-            sub_phrase_pids.discard(self.index.get_pid(phrase))
-
-            if len(sub_phrase_pids) > 0:
-                score = math.log2(1 + len(phrase)) * (
-                    self.index.tf(phrase)
-                    - 1.0
-                    / len(sub_phrase_pids)
-                    * sum(
-                        [self.index.tf(list(self.index.get_phrase(p))[0]) for p in sub_phrase_pids]
-                    )
+        fids = self._active_forms()
+        if len(fids) == 0:
+            return []
+        index = self.index
+        form_pids = index.form_pids[fids]
+        num_words = np.array([len(index.form_words(f)) for f in fids], dtype=np.float64)
+        num_sub, sum_sub_tf = self._subphrase_stats(fids)
+        tf = index.tf_counts[form_pids].astype(np.float64)
+        has_sub = num_sub > 0
+        tf[has_sub] -= 1.0 / num_sub[has_sub] * sum_sub_tf[has_sub]
+        form_scores = np.log2(1 + num_words) * tf
+        # a phrase is scored by the mean score of its occurrences
+        counts = index.form_counts[fids].astype(np.float64)
+        totals = np.bincount(form_pids, weights=form_scores * counts, minlength=index.num_phrases)
+        occurrences = np.bincount(form_pids, weights=counts, minlength=index.num_phrases)
+        scores = totals[form_pids] / occurrences[form_pids]
+        return self._maybe_group_and_sort(group_similar_spans, fids, scores)
+
+    def _subphrase_stats(self, fids, chunk_size=1 << 22):
+        """
+        Count the other active phrases containing all the words of each surface form and sum
+        their TF.
+
+        The candidate phrases of a form are the postings of its rarest word, a candidate is
+        kept if the other words of the form are all found in the phrase x word incidence
+        (sorted pid * num words + wid codes). Forms are processed in chunks of about
+        chunk_size candidates.
+
+        Arguments:
+            fids(numpy.ndarray): surface form ids
+            chunk_size(int): number of candidate phrases checked at once
+
+        Returns:
+            tuple of numpy.ndarray: number of containing phrases and their TF sum, per form
+        """
+        index = self.index
+        active = self._active_phrases()
+        tf_counts = index.tf_counts.astype(np.float64)
+        offsets, posting_pids = index.postings_csr()
+        doc_freqs = np.diff(offsets)
+        num_words = max(len(index.words), 1)
+        word_pids = np.repeat(np.arange(len(doc_freqs)), doc_freqs)
+        incidence = np.sort(posting_pids * num_words + word_pids)
+        phrase_lengths = np.bincount(posting_pids, minlength=index.num_phrases)
+
+        # the distinct words of each form, rarest first
+        word_lists = [sorted(set(index.form_words(f)), key=doc_freqs.__getitem__) for f in fids]
+        lengths = np.array([len(words) for words in word_lists], dtype=np.int64)
+        form_words = np.fromiter(
+            itertools.chain.from_iterable(word_lists), dtype=np.int64, count=int(lengths.sum())
+        )
+        word_starts = np.cumsum(lengths) - lengths
+        rarest = form_words[word_starts]
+        num_candidates = doc_freqs[rarest]
+        form_pids = index.form_pids[fids]
+
+        num_sub = np.zeros(len(fids))
+        sum_sub_tf = np.zeros(len(fids))
+        cost = np.cumsum(num_candidates)
+        bounds = np.searchsorted(cost, np.arange(chunk_size, cost[-1], chunk_size), side="right")
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(fids)]):
+            if start == end:
+                continue
+            pair_forms = np.repeat(np.arange(start, end), num_candidates[start:end])
+            pair_pids = posting_pids[
+                _concat_ranges(offsets[rarest[start:end]], num_candidates[start:end])
+            ]
+            keep = active[pair_pids] & (pair_pids != form_pids[pair_forms])
+            keep &= phrase_lengths[pair_pids] >= lengths[pair_forms]
+            pair_forms, pair_pids = pair_forms[keep], pair_pids[keep]
+            # look up the other words of the form in the candidate phrases, one word at a
+            # time so that each lookup is done for the candidates left by the rarer words
+            for k in range(1, int(lengths[start:end].max())):
+                check = lengths[pair_forms] > k
+                codes = (
+                    pair_pids[check] * num_words + form_words[word_starts[pair_forms[check]] + k]
                 )
-            else:
-                score = math.log2(1 + len(phrase)) * self.index.tf(phrase)
-            phrase_scores[phrase] = score
-        for phrase in phrase_scores:
-            score = [phrase_scores[p] for p in self.index.get_phrase(self.index.get_pid(phrase))]
-            phrase_scores[phrase] = sum(score) / len(score)
-        return self._maybe_group_and_sort(group_similar_spans, phrase_scores)
+                found = incidence[np.minimum(np.searchsorted(incidence, codes), len(incidence) - 1)]
+                check[check] = found == codes
+                keep = check | (lengths[pair_forms] <= k)
+                pair_forms, pair_pids = pair_forms[keep], pair_pids[keep]
+            num_sub += np.bincount(pair_forms, minlength=len(fids))
+            sum_sub_tf += np.bincount(pair_forms, weights=tf_counts[pair_pids], minlength=len(fids))
+        return num_sub, sum_sub_tf
 
     @staticmethod
     def multiply_scores(phrase_lists):
-        phrase_list_dicts = []
-        for lst in phrase_lists:
-            phrase_list_dicts.append({tuple(k): v for k, v in lst})
-        phrases = phrase_list_dicts[0].keys()
-        interp_scores = {}
-        for p in phrases:
-            interp_scores[p] = 1.0
-            for ref in phrase_list_dicts:
-                interp_scores[p] *= ref[p]
-        return sorted(interp_scores.items(), key=lambda x: x[1], reverse=True)
-
-
-class CorpusIndex:
+        phrases, scores = TextSpanScoring._align_scores(phrase_lists)
+        product = np.ones(len(phrases))
+        for list_scores in scores.T:
+            product *= list_scores
+        return _sort_by_score(list(zip(phrases, product.tolist())), product)
+
+
+class CorpusIndex(object):
     """
     Text span index class.
     Holds TF and DF values per span. Text spans are normalized and similar
     spans are mapped to the same TF DF values.
+
+    Phrases (normalized by lemma), words and documents get integer ids in order of appearance,
+    which are stable across processes and runs, and the counters are numpy arrays indexed by
+    phrase id. The surface forms of each phrase are kept with their counts and word ids, so the
+    index holds everything needed for scoring and can be updated with new documents, saved and
+    loaded between runs.
+
+    Arguments:
+        documents(list, optional): List of spaCy documents to index.
+        spans(list[list], optional): List of spaCy spans representing noun phrases of documents.
+        doc_ids(list, optional): Unique keys (str or int) of the documents, documents already in
+            the index are skipped. By default documents are numbered in order of addition.
     """
 
-    def __init__(self, documents: list, spans: list):
-        self.df_index = {}  # span to DF
-        self.tf_index = {}  # span, doc to TF
-        self.pid_to_spans = {}  # id to spans (normalized types)
-        self.word_to_phrase_index = {}
-        self.documents = set()
-        for d, phrases in zip(documents, spans):
-            doc_id = CorpusIndex.get_docid(d)
-            self.documents.add(doc_id)
-            for phrase in phrases:
-                pid = CorpusIndex.get_pid(phrase)
-                # add to norm phrases dict
-                if pid not in self.pid_to_spans:
-                    self.pid_to_spans[pid] = set()
-                self.pid_to_spans[pid].add(phrase)
-
-                # add to df index
-                if self.df_index.get(pid, None) is None:
-                    self.df_index[pid] = {doc_id}
-                else:
-                    self.df_index[pid].add(doc_id)
-
-                # add to tf index
-                if self.tf_index.get(pid, None) is None:
-                    self.tf_index[pid] = 1
-                else:
-                    self.tf_index[pid] += 1
-
-                for word in phrase:
-                    wid = self.get_wid(word)
-                    if wid not in self.word_to_phrase_index:
-                        self.word_to_phrase_index[wid] = set()
-                    self.word_to_phrase_index[wid].add(pid)
+    META_FILE = "index.json"
+    ARRAYS_FILE = "counts.npz"
+
+    def __init__(self, documents=None, spans=None, doc_ids=None):
+        self._phrase_ids = {}  # normalized phrase (lemma) to pid
+        self._word_ids = {}  # word to wid
+        self._doc_ids = {}  # document key to document id
+        self._form_ids = {}  # (pid, surface text) to form id
+        self.phrases = []
+        self.words = []
+        self.form_texts = []
+        self._form_pids = np.zeros(0, dtype=np.int64)
+        self._form_counts = np.zeros(0, dtype=np.int64)
+        self._form_words = []  # word ids of each form
+        self._tf = np.zeros(0, dtype=np.int64)
+        self._df = np.zeros(0, dtype=np.int64)
+        self._postings = None
+        if documents is not None:
+            self.add_documents(documents, spans, doc_ids)
+
+    @property
+    def num_documents(self):
+        return len(self._doc_ids)
+
+    @property
+    def num_phrases(self):
+        return len(self.phrases)
+
+    @property
+    def num_forms(self):
+        return len(self.form_texts)
+
+    @property
+    def tf_counts(self):
+        """TF of each phrase id"""
+        return self._tf[: self.num_phrases]
+
+    @property
+    def df_counts(self):
+        """DF of each phrase id"""
+        return self._df[: self.num_phrases]
+
+    @property
+    def form_pids(self):
+        """Phrase id of each surface form"""
+        return self._form_pids[: self.num_forms]
+
+    @property
+    def form_counts(self):
+        """Number of occurrences of each surface form"""
+        return self._form_counts[: self.num_forms]
+
+    def form_words(self, fid):
+        """Word ids of a surface form"""
+        return self._form_words[fid]
+
+    def add_documents(self, documents: list, spans: list, doc_ids: list = None):
+        """
+        Add documents to the index.
+
+        Arguments:
+            documents(list): List of spaCy documents.
+            spans(list[list]): List of spaCy spans representing noun phrases of documents.
+            doc_ids(list, optional): Unique keys of the documents, documents already in the
+                index are skipped.
+
+        Returns:
+            int: the number of documents added
+        """
+        assert len(documents) == len(spans)
+        if doc_ids is None:
+            doc_ids = range(self.num_documents, self.num_documents + len(documents))
+        assert len(doc_ids) == len(documents)
+        occurrences = []  # pid of each phrase occurrence
+        doc_phrases = []  # pids of each document, once per document
+        form_occurrences = []
+        num_added = 0
+        for doc_id, phrases in zip(doc_ids, spans):
+            if doc_id in self._doc_ids:
+                continue
+            self._doc_ids[doc_id] = len(self._doc_ids)
+            num_added += 1
+            pids = [self._add_phrase(phrase, form_occurrences) for phrase in phrases]
+            occurrences.extend(pids)
+            doc_phrases.extend(set(pids))
+        self._tf = _grow(self._tf, self.num_phrases)
+        self._df = _grow(self._df, self.num_phrases)
+        self._form_counts = _grow(self._form_counts, self.num_forms)
+        self._tf[: self.num_phrases] += np.bincount(occurrences, minlength=self.num_phrases)
+        self._df[: self.num_phrases] += np.bincount(doc_phrases, minlength=self.num_phrases)
+        self._form_counts[: self.num_forms] += np.bincount(
+            form_occurrences, minlength=self.num_forms
+        )
+        self._postings = None
+        return num_added
+
+    def _add_phrase(self, phrase, form_occurrences):
+        lemma = phrase.lemma_
+        pid = self._phrase_ids.get(lemma)
+        if pid is None:
+            pid = self._phrase_ids[lemma] = len(self.phrases)
+            self.phrases.append(lemma)
+        fid = self._form_ids.get((pid, phrase.text))
+        if fid is None:
+            fid = self._form_ids[(pid, phrase.text)] = len(self.form_texts)
+            self.form_texts.append(phrase.text)
+            self._form_words.append(tuple(self._add_word(w.text) for w in phrase))
+            self._form_pids = _grow(self._form_pids, self.num_forms)
+            self._form_pids[fid] = pid
+        form_occurrences.append(fid)
+        return pid
+
+    def _add_word(self, word):
+        wid = self._word_ids.get(word)
+        if wid is None:
+            wid = self._word_ids[word] = len(self.words)
+            self.words.append(word)
+        return wid
+
+    def postings(self, wid):
+        """
+        Get the ids of the phrases containing a word
+
+        Arguments:
+            wid(int): word id
+
+        Returns:
+            numpy.ndarray: sorted phrase ids
+        """
+        offsets, pids = self.postings_csr()
+        return pids[offsets[wid] : offsets[wid + 1]]
+
+    def postings_csr(self):
+        """
+        Get the postings of all the words, the word x phrase incidence as CSR arrays
+
+        Returns:
+            tuple of numpy.ndarray: offsets of the words in the phrase ids, sorted phrase ids
+        """
+        if self._postings is None:
+            self._postings = self._build_postings()
+        return self._postings
+
+    def _build_postings(self):
+        """word id to phrase ids lists (CSR arrays), from the word ids of the surface forms"""
+        lengths = [len(words) for words in self._form_words]
+        words = np.fromiter(itertools.chain.from_iterable(self._form_words), dtype=np.int64)
+        pids = np.repeat(self.form_pids, lengths)
+        pairs = np.unique(words * max(self.num_phrases, 1) + pids)
+        offsets = np.zeros(len(self.words) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(pairs // max(self.num_phrases, 1), minlength=len(self.words)),
+            out=offsets[1:],
+        )
+        return offsets, pairs % max(self.num_phrases, 1)
 
     def get_phrase(self, pid):
-        return self.pid_to_spans.get(pid)
+        """
+        get the surface forms of a phrase id
+        """
+        return [self.form_texts[f] for f in np.flatnonzero(self.form_pids == pid)]
 
     def get_subphrases_of_word(self, w):
         wid = self.get_wid(w)
-        return self.word_to_phrase_index.get(wid)
+        if wid is None:
+            return None
+        return set(self.postings(wid).tolist())
 
-    @staticmethod
-    def get_wid(w: Token):
+    def get_wid(self, w: Token):
         """
         get word id
         """
-        return CorpusIndex.hash_func(w.text)
+        return self._word_ids.get(w.text)
 
-    @staticmethod
-    def get_pid(p: Span):
+    def get_pid(self, p: Span):
         """
         get phrase id
         """
-        return CorpusIndex.hash_func(p.lemma_)
+        return self._phrase_ids.get(p.lemma_)
 
-    @staticmethod
-    def get_docid(d: Doc):
+    def get_docid(self, doc_key):
         """
         get doc id
         """
-        return CorpusIndex.hash_func(d)
-
-    @staticmethod
-    def hash_func(x):
-        return hash(x)
+        return self._doc_ids.get(doc_key)
 
     def tf(self, phrase):
         """
         Get TF of phrase in doc
         """
-        pid = CorpusIndex.get_pid(phrase)
-        if self.tf_index.get(pid, None) is not None:
-            return self.tf_index.get(pid)
+        pid = self.get_pid(phrase)
+        if pid is not None:
+            return int(self._tf[pid])
         return 0
 
     def df(self, phrase):
         """
         Get DF of phrase in corpus
         """
-        pid = CorpusIndex.get_pid(phrase)
-        if self.df_index.get(pid, None) is not None:
-            return len(self.df_index[pid])
+        pid = self.get_pid(phrase)
+        if pid is not None:
+            return int(self._df[pid])
         return 0
+
+    def save(self, index_dir):
+        """
+        Save the index to a directory
+
+        Arguments:
+            index_dir(str): the directory
+        """
+        if not path.exists(index_dir):
+            makedirs(index_dir)
+        meta = {
+            "phrases": self.phrases,
+            "words": self.words,
+            "doc_ids": list(self._doc_ids),
+            "form_texts": self.form_texts,
+        }
+        with open(path.join(index_dir, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        np.savez(
+            path.join(index_dir, self.ARRAYS_FILE),
+            tf=self.tf_counts,
+            df=self.df_counts,
+            form_pids=self.form_pids,
+            form_counts=self.form_counts,
+            form_word_lengths=np.array([len(w) for w in self._form_words], dtype=np.int64),
+            form_words=np.fromiter(itertools.chain.from_iterable(self._form_words), dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, index_dir):
+        """
+        Load an index saved with save
+
+        Arguments:
+            index_dir(str): the directory
+
+        Returns:
+            CorpusIndex: the index
+        """
+        with open(path.join(index_dir, cls.META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = np.load(path.join(index_dir, cls.ARRAYS_FILE))
+        index = cls()
+        index.phrases = meta["phrases"]
+        index.words = meta["words"]
+        index.form_texts = meta["form_texts"]
+        index._phrase_ids = {p: i for i, p in enumerate(index.phrases)}
+        index._word_ids = {w: i for i, w in enumerate(index.words)}
+        index._doc_ids = {d: i for i, d in enumerate(meta["doc_ids"])}
+        index._tf = arrays["tf"]
+        index._df = arrays["df"]
+        index._form_pids = arrays["form_pids"]
+        index._form_counts = arrays["form_counts"]
+        offsets = np.concatenate([[0], np.cumsum(arrays["form_word_lengths"])])
+        form_words = arrays["form_words"].tolist()
+        index._form_words = [
+            tuple(form_words[start:end]) for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+        index._form_ids = {
+            (pid, text): fid
+            for fid, (pid, text) in enumerate(zip(index.form_pids.tolist(), index.form_texts))
+        }
+        return index
+
+
+def _sort_by_score(items, scores):
+    """items in descending order of their scores, ties in their original order"""
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    return [items[i] for i in order]
+
+
+def _concat_ranges(starts, lengths):
+    """concatenation of the ranges [start, start + length) as one array"""
+    ends = np.cumsum(lengths)
+    return np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def _grow(array, size):
+    """Grow a counters array to at least size entries (doubling), new entries are zero"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
@@ -0,0 +1,188 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import random
+
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+from .scoring_utils import CorpusIndex, TextSpanScoring
+
+WORDS = ["deep", "learning", "Learning", "model", "models", "neural", "network", "networks"]
+LEMMAS = {"Learning": "learning", "models": "model", "networks": "network"}
+
+
+def _corpus(num_docs, seed=0):
+    """Random documents with lemmas and noun phrases of 1-3 tokens"""
+    rng = random.Random(seed)
+    vocab = Vocab()
+    documents, spans = [], []
+    for _ in range(num_docs):
+        doc = Doc(vocab, words=[rng.choice(WORDS) for _ in range(rng.randint(3, 20))])
+        for token in doc:
+            token.lemma_ = LEMMAS.get(token.text, token.text)
+        phrases = []
+        start = 0
+        while start < len(doc) - 1:
+            length = rng.randint(1, 3)
+            if start + length <= len(doc):
+                phrases.append(doc[start : start + length])
+            start += length + rng.randint(0, 2)
+        documents.append(doc)
+        spans.append(phrases)
+    return documents, spans
+
+
+def test_corpus_index():
+    documents, spans = _corpus(50)
+    index = CorpusIndex(documents, spans)
+    assert index.num_documents == 50
+    phrases = [p for doc_spans in spans for p in doc_spans]
+    for phrase in phrases:
+        pid = index.get_pid(phrase)
+        same = [p for p in phrases if p.lemma_ == phrase.lemma_]
+        assert index.tf(phrase) == len(same)
+        assert index.df(phrase) == sum(any(p.lemma_ == phrase.lemma_ for p in s) for s in spans)
+        assert phrase.text in index.get_phrase(pid)
+        for token in phrase:
+            assert pid in index.get_subphrases_of_word(token)
+    assert index.form_counts.sum() == len(phrases)
+
+    # documents with known keys are indexed once
+    assert index.add_documents(documents[:2], spans[:2], doc_ids=["a", "b"]) == 2
+    assert index.add_documents(documents[:3], spans[:3], doc_ids=["a", "b", "c"]) == 1
+    assert index.num_documents == 53
+
+
+def test_incremental_index(tmpdir):
+    documents, spans = _corpus(120)
+    full = TextSpanScoring(documents, spans, min_tf=3)
+
+    index_dir = str(tmpdir.join("index"))
+    CorpusIndex(documents[:80], spans[:80]).save(index_dir)
+    index = CorpusIndex.load(index_dir)
+    incremental = TextSpanScoring(documents[80:], spans[80:], min_tf=3, index=index)
+    assert incremental.index.num_documents == 120
+    assert incremental.get_tfidf_scores() == full.get_tfidf_scores()
+    assert incremental.get_cvalue_scores() == full.get_cvalue_scores()
+    assert incremental.get_tfidf_scores(group_similar_spans=False) == full.get_tfidf_scores(
+        group_similar_spans=False
+    )
+
+
+def test_min_tf():
+    documents, spans = _corpus(100)
+    scorer = TextSpanScoring(documents, spans, min_tf=5)
+    filtered = [[p for p in s if scorer.index.tf(p) >= 5] for s in spans]
+    assert scorer.doc_text_spans == filtered
+    # scores of an index of the frequent phrases only
+    reference = TextSpanScoring(documents, filtered)
+    assert scorer.get_tfidf_scores() == reference.get_tfidf_scores()
+    assert sorted(scorer.get_cvalue_scores()) == sorted(reference.get_cvalue_scores())
+
+
+def test_subphrase_stats():
+    documents, spans = _corpus(200)
+    scorer = TextSpanScoring(documents, spans, min_tf=2)
+    index = scorer.index
+    active = scorer._active_phrases()
+    fids = scorer._active_forms()
+    num_sub, sum_sub_tf = scorer._subphrase_stats(fids)
+    for i, fid in enumerate(fids):
+        pid = index.form_pids[fid]
+        containing = set.intersection(
+            *[set(index.postings(wid).tolist()) for wid in index.form_words(fid)]
+        )
+        expected = [p for p in containing if active[p] and p != pid]
+        assert num_sub[i] == len(expected)
+        assert sum_sub_tf[i] == sum(index.tf_counts[p] for p in expected)
+    # processing the forms in small chunks gives the same counts
+    chunked = scorer._subphrase_stats(fids, chunk_size=5)
+    assert (chunked[0] == num_sub).all() and (chunked[1] == sum_sub_tf).all()
+
+
+def _reference_normalize_minmax(phrases_list, invert=False):
+    _, scores = list(zip(*phrases_list))
+    max_score = max(scores)
+    min_score = min(scores)
+    norm_list = []
+    for p, s in phrases_list:
+        if max_score - min_score > 0:
+            new_score = (s - min_score) / (max_score - min_score)
+        else:
+            new_score = 0
+        norm_list.append([p, new_score])
+    if invert:
+        for e in norm_list:
+            e[1] = 1.0 - e[1]
+    return norm_list
+
+
+def _reference_interpolate_scores(phrase_lists, weights=None):
+    if weights is None:
+        weights = [1.0 / len(phrase_lists)]
+    phrase_list_dicts = [{tuple(k): v for k, v in lst} for lst in phrase_lists]
+    interp_scores = {}
+    for p in phrase_list_dicts[0].keys():
+        interp_scores[p] = 0.0
+        for ref, w in zip(phrase_list_dicts, weights):
+            interp_scores[p] += ref[p] * w
+    return sorted(interp_scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def _reference_multiply_scores(phrase_lists):
+    phrase_list_dicts = [{tuple(k): v for k, v in lst} for lst in phrase_lists]
+    interp_scores = {}
+    for p in phrase_list_dicts[0].keys():
+        interp_scores[p] = 1.0
+        for ref in phrase_list_dicts:
+            interp_scores[p] *= ref[p]
+    return sorted(interp_scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def _score_lists(seed=0):
+    """Lists of scores of the same grouped phrases in different orders, with tied scores and
+    a duplicate phrase"""
+    rng = random.Random(seed)
+    phrases = [["p{}".format(i), "q{}".format(i)] for i in range(200)]
+    lists = []
+    for _ in range(3):
+        lst = [(p, rng.choice([0.0, 0.25, 0.5, 1.0, rng.random() * 10])) for p in phrases]
+        rng.shuffle(lst)
+        lst.append((phrases[5], rng.random()))
+        lists.append(lst)
+    return lists
+
+
+def test_normalize_minmax():
+    for lst in _score_lists() + [[(["a"], 2.0), (["b"], 2.0), (["c"], 2.0)]]:
+        for invert in (False, True):
+            result = TextSpanScoring.normalize_minmax(lst, invert=invert)
+            assert result == _reference_normalize_minmax(lst, invert=invert)
+    constant = TextSpanScoring.normalize_minmax([(["a"], 3.0), (["b"], 3.0)], invert=True)
+    assert constant == [[["a"], 1.0], [["b"], 1.0]]
+
+
+def test_interpolate_and_multiply_scores():
+    lists = [TextSpanScoring.normalize_minmax(lst) for lst in _score_lists()]
+    for weights in ([0.2, 0.3, 0.5], [1.0, 0.0, 1.0], None):
+        # default weights interpolate the first list only, with weight 1 / number of lists
+        result = TextSpanScoring.interpolate_scores(lists, weights)
+        assert result == _reference_interpolate_scores(lists, weights)
+    assert TextSpanScoring.interpolate_scores(lists)[0][1] <= 1.0 / len(lists)
+    assert TextSpanScoring.multiply_scores(lists) == _reference_multiply_scores(lists)
+    assert TextSpanScoring.multiply_scores(lists[:1]) == _reference_multiply_scores(lists[:1])
+    # duplicate phrases: the last score of a phrase is used, at its first position
+    assert len(TextSpanScoring.multiply_scores(lists)) == 200
@@ -0,0 +1,159 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import os
+
+from nlp_architect.common.cdc.mention_data import MentionDataLight
+from nlp_architect.common.cdc.topics import Topic
+from nlp_architect.data.cdc_resources.relations.computed_relation_extraction import (
+    ComputedRelationExtraction,
+)
+from nlp_architect.data.cdc_resources.relations.relation_cache import RelationCache
+from nlp_architect.data.cdc_resources.relations.relation_extraction import resource_fingerprint
+from nlp_architect.data.cdc_resources.relations.relation_types_enums import RelationType
+from nlp_architect.models.cross_doc_coref.system.sieves.run_sieve_system import RunSystemsSuper
+from nlp_architect.models.cross_doc_coref.system.sieves.sieves import SieveClusterMerger
+from tests.cdc.test_sieve_blocking import _cluster_strings, _mentions
+
+
+class CountingRelationExtraction(ComputedRelationExtraction):
+    def __init__(self):
+        self.calls = 0
+
+    def extract_sub_relations(self, mention_x, mention_y, relation):
+        self.calls += 1
+        return super(CountingRelationExtraction, self).extract_sub_relations(
+            mention_x, mention_y, relation
+        )
+
+
+def _mention(tokens_str, head):
+    return MentionDataLight(tokens_str, mention_head=head, mention_head_lemma=head.lower())
+
+
+def test_extract_relation_cached():
+    extractor = CountingRelationExtraction()
+    cache = RelationCache()
+    extractor.set_relation_cache(cache)
+    x, y = _mention("the Bank", "Bank"), _mention("bank", "bank")
+    for _ in range(3):
+        assert (
+            extractor.extract_relation(x, y, RelationType.EXACT_STRING)
+            == RelationType.NO_RELATION_FOUND
+        )
+        assert (
+            extractor.extract_relation(
+                _mention("the Bank", "Bank"), y, RelationType.SAME_HEAD_LEMMA
+            )
+            == RelationType.SAME_HEAD_LEMMA
+        )
+    assert extractor.calls == 2
+    stats = cache.stats()
+    assert stats["hits"] == 4 and stats["misses"] == 2 and stats["size"] == 2
+    assert stats["hit_rate"] == 4 / 6
+    # unsupported relations are not cached
+    extractor.extract_relation(x, y, RelationType.WIKIPEDIA_REDIRECT_LINK)
+    assert len(cache) == 2
+
+
+def test_cache_bounded():
+    cache = RelationCache(max_size=2)
+    for i in range(3):
+        cache.put(("e", "r", str(i), "y"), RelationType.EXACT_STRING)
+    assert cache.get(("e", "r", "1", "y")) == RelationType.EXACT_STRING
+    cache.put(("e", "r", "3", "y"), RelationType.NO_RELATION_FOUND)
+    # least recently used entries are evicted
+    assert cache.get(("e", "r", "0", "y")) is None
+    assert cache.get(("e", "r", "2", "y")) is None
+    assert cache.get(("e", "r", "1", "y")) == RelationType.EXACT_STRING
+    assert cache.stats()["evictions"] == 2
+    assert len(cache) == 2
+
+
+def test_cache_persistence(tmpdir):
+    cache_file = os.path.join(str(tmpdir), "relations.json")
+    cache = RelationCache(cache_file=cache_file)
+    cache.put(("e", "EXACT_STRING", "a", "b"), RelationType.EXACT_STRING)
+    cache.put(("e", "EXACT_STRING", "a", "c"), RelationType.NO_RELATION_FOUND)
+    cache.save()
+
+    loaded = RelationCache(cache_file=cache_file)
+    assert len(loaded) == 2
+    assert loaded.get(("e", "EXACT_STRING", "a", "b")) == RelationType.EXACT_STRING
+    assert loaded.get(("e", "EXACT_STRING", "a", "c")) == RelationType.NO_RELATION_FOUND
+    assert RelationCache(max_size=1, cache_file=cache_file).stats()["size"] == 1
+
+
+def test_cache_fingerprints(tmpdir):
+    resource_file = tmpdir.join("resource.json")
+    resource_file.write("{}")
+    cache_file = str(tmpdir.join("relations.json"))
+    x, y = _mention("the Bank", "Bank"), _mention("bank", "bank")
+
+    def extractor_with(resource, threshold):
+        extractor = CountingRelationExtraction()
+        extractor.cache_config = {"file": resource_fingerprint(resource), "threshold": threshold}
+        return extractor
+
+    cache = RelationCache(cache_file=cache_file)
+    extractor_with(str(resource_file), 0.5).set_relation_cache(cache)
+    cache.put(("CountingRelationExtraction", "EXACT_STRING", "a", "b"), RelationType.EXACT_STRING)
+    cache.put(("other", "EXACT_STRING", "a", "b"), RelationType.EXACT_STRING)
+    cache.save()
+
+    # same resource and configuration
+    loaded = RelationCache(cache_file=cache_file)
+    extractor_with(str(resource_file), 0.5).set_relation_cache(loaded)
+    assert len(loaded) == 2
+
+    # a different configuration, or a modified resource file
+    loaded = RelationCache(cache_file=cache_file)
+    extractor = extractor_with(str(resource_file), 0.7)
+    extractor.set_relation_cache(loaded)
+    assert len(loaded) == 1
+    assert loaded.get(("CountingRelationExtraction", "EXACT_STRING", "a", "b")) is None
+    extractor.extract_relation(x, y, RelationType.SAME_HEAD_LEMMA)
+    assert extractor.calls == 1
+
+    resource_file.write('{"bank": []}')
+    loaded = RelationCache()
+    extractor_with(str(resource_file), 0.5).set_relation_cache(loaded)
+    loaded.load(cache_file)
+    assert len(loaded) == 1
+
+    # files saved without fingerprints are discarded
+    with open(cache_file, "w") as out:
+        out.write('[["e", "EXACT_STRING", "a", "b", "EXACT_STRING"]]')
+    assert len(RelationCache(cache_file=cache_file)) == 0
+
+
+def test_sieves_with_relation_cache():
+    sieves_order = [(RelationType.FUZZY_FIT, 0.5), (RelationType.FUZZY_HEAD_FIT, 0.2)]
+    topic = Topic("t")
+    topic.mentions = _mentions(100, 2)
+
+    def run(relation_cache):
+        extractor = CountingRelationExtraction()
+        extractor.set_relation_cache(relation_cache)
+        system = RunSystemsSuper(topic)
+        system.sieves = [SieveClusterMerger(rel, extractor) for rel in sieves_order]
+        return _cluster_strings(system.run_deterministic()), extractor.calls
+
+    expected, uncached_calls = run(None)
+    cache = RelationCache()
+    clusters, cached_calls = run(cache)
+    assert clusters == expected
+    assert cached_calls < uncached_calls
+    assert cache.stats()["hits"] > 0
@@ -0,0 +1,133 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import random
+
+import pytest
+
+from nlp_architect.common.cdc.cluster import Clusters
+from nlp_architect.common.cdc.mention_data import MentionData
+from nlp_architect.common.cdc.topics import Topic
+from nlp_architect.data.cdc_resources.relations.computed_relation_extraction import (
+    ComputedRelationExtraction,
+)
+from nlp_architect.data.cdc_resources.relations.relation_extraction import RelationExtraction
+from nlp_architect.data.cdc_resources.relations.relation_types_enums import RelationType
+from nlp_architect.models.cross_doc_coref.system.sieves.run_sieve_system import RunSystemsSuper
+from nlp_architect.models.cross_doc_coref.system.sieves.sieves import SieveClusterMerger
+
+WORDS = ["apple", "bank", "river", "stock", "market", "tree", "fruit", "house", "price", "trade"]
+
+
+class SameLengthRelation(RelationExtraction):
+    """a relation that cannot be blocked"""
+
+    def extract_sub_relations(self, mention_x, mention_y, relation):
+        if len(mention_x.tokens_str) == len(mention_y.tokens_str):
+            return relation
+        return RelationType.NO_RELATION_FOUND
+
+    @staticmethod
+    def get_supported_relations():
+        return [RelationType.OTHER]
+
+
+def _mentions(num_mentions, seed):
+    random.seed(seed)
+    mentions = []
+    for i in range(num_mentions):
+        tokens = [random.choice(WORDS) for _ in range(random.randint(1, 3))]
+        if random.random() < 0.3:
+            tokens[0] = tokens[0].title()
+        head = tokens[-1]
+        mention_json = {
+            "tokens_str": " ".join(tokens),
+            "mention_head": head,
+            "mention_head_lemma": head.lower(),
+            "doc_id": str(i % 7),
+            "sent_id": i,
+            "tokens_number": list(range(len(tokens))),
+            "coref_chain": str(i),
+        }
+        mentions.append(MentionData.read_json_mention_data_line(mention_json))
+    return mentions
+
+
+def _reference_run(clusters, sieves):
+    """the exhaustive pairwise sieve loop"""
+    for sieve in sieves:
+        clusters_changed = True
+        while clusters_changed:
+            clusters_changed = False
+            clusters_size = len(clusters.clusters_list)
+            for i in range(0, clusters_size):
+                cluster_i = clusters.clusters_list[i]
+                if cluster_i.merged:
+                    continue
+                for j in range(i + 1, clusters_size):
+                    cluster_j = clusters.clusters_list[j]
+                    if cluster_j.merged:
+                        continue
+                    matches = 0
+                    for mention_i in cluster_i.mentions:
+                        for mention_j in cluster_j.mentions:
+                            match_result = sieve.relation_extractor.extract_sub_relations(
+                                mention_i, mention_j, sieve.excepted_relation
+                            )
+                            if match_result == sieve.excepted_relation:
+                                matches += 1
+                    possible = float(len(cluster_i.mentions) * len(cluster_j.mentions))
+                    if matches / possible >= sieve.threshold:
+                        clusters_changed = True
+                        cluster_i.merge_clusters(cluster_j)
+                        cluster_j.merged = True
+            if clusters_changed:
+                clusters.clean_clusters()
+    return clusters
+
+
+def _cluster_strings(clusters):
+    return [[m.tokens_str for m in c.mentions] for c in clusters.clusters_list]
+
+
+SIEVES = [
+    [(RelationType.SAME_HEAD_LEMMA, 1.0), (RelationType.EXACT_STRING, 1.0)],
+    [(RelationType.FUZZY_HEAD_FIT, 0.5), (RelationType.EXACT_STRING, 0.3)],
+    [(RelationType.FUZZY_FIT, 1.0), (RelationType.FUZZY_HEAD_FIT, 0.2)],
+    [(RelationType.OTHER, 0.6), (RelationType.SAME_HEAD_LEMMA, 0.1)],
+    [(RelationType.EXACT_STRING, 0.0)],
+]
+
+
+@pytest.mark.parametrize("sieves_order", SIEVES)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_identical_to_exhaustive_sieves(sieves_order, seed):
+    extractors = {RelationType.OTHER: SameLengthRelation()}
+    computed = ComputedRelationExtraction()
+    topic = Topic("t")
+    topic.mentions = _mentions(150, seed)
+
+    system = RunSystemsSuper(topic)
+    system.sieves = [
+        SieveClusterMerger(rel, extractors.get(rel[0], computed)) for rel in sieves_order
+    ]
+    clusters = system.run_deterministic()
+
+    expected = _reference_run(
+        Clusters("t", topic.mentions),
+        [SieveClusterMerger(rel, extractors.get(rel[0], computed)) for rel in sieves_order],
+    )
+    assert _cluster_strings(clusters) == _cluster_strings(expected)
+    assert len(clusters.clusters_list) < len(topic.mentions)
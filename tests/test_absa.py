@@ -13,13 +13,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ******************************************************************************
+import copy
+import csv
 import json
+import random
+import re
+import time
 from pathlib import Path
 
+import pytest
+
 from nlp_architect import LIBRARY_ROOT
 from nlp_architect.common.core_nlp_doc import CoreNLPDoc
-from nlp_architect.models.absa.inference.data_types import SentimentDoc
-from nlp_architect.models.absa.inference.inference import SentimentInference
+from nlp_architect.models.absa.inference.data_types import (
+    Polarity,
+    SentimentDoc,
+    SentimentSentence,
+    Term,
+    TermType,
+)
+from nlp_architect.models.absa.inference.inference import SentimentInference, _consolidate_aspects
+from nlp_architect.models.absa.utils import (
+    _load_parsed_docs_from_dir,
+    _TermMatcher,
+    _write_aspect_lex,
+    _write_opinion_lex,
+    iter_ndjson,
+    iter_raw_docs,
+    run_pipeline_ndjson,
+)
 
 
 def test_inference():
@@ -34,3 +56,433 @@ def test_inference():
         with open(data_dir / "sentiment_doc_{}.json".format(i)) as f:
             expected_doc = json.load(f, object_hook=SentimentDoc.decoder)
         assert expected_doc == predicted_doc
+
+
+def _load_parsed_docs():
+    data_dir = Path(LIBRARY_ROOT) / "tests" / "fixtures" / "data" / "absa"
+    docs = []
+    for i in range(1, 4):
+        with open(data_dir / "core_nlp_doc_{}.json".format(i)) as f:
+            docs.append(json.load(f, object_hook=CoreNLPDoc.decoder))
+    return docs
+
+
+def _write_aspect_lexicon(path, num_rows):
+    """aspect lexicon of fixture words and phrases, and random words"""
+    random.seed(0)
+    vocab = sorted(
+        {
+            tok[field]
+            for doc in _load_parsed_docs()
+            for sentence in doc.sentences
+            for tok in sentence
+            for field in ("text", "lemma")
+        }
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Term,Alias1,Alias2,Alias3\n")
+        for row_i in range(num_rows):
+            row = []
+            for _ in range(random.randint(1, 4)):
+                if random.random() < 0.1:
+                    words = random.sample(vocab, random.randint(1, 3))
+                    row.append(" ".join(w.upper() if random.random() < 0.2 else w for w in words))
+                else:
+                    row.append("term{}x{}".format(row_i, len(row)))
+            f.write(",".join(row + [""] * (4 - len(row))) + "\n")
+
+
+def _run_per_row(inference, parsed_doc):
+    """SentimentInference.run matching every aspect row separately"""
+    sentiment_doc = None
+    for sentence in parsed_doc.sentences:
+        events = []
+        for aspect_row in inference.aspect_lex:
+            events += inference._extract_event(aspect_row, sentence)[1]
+        if events:
+            if not sentiment_doc:
+                sentiment_doc = SentimentDoc(parsed_doc.doc_text)
+            sentiment_doc.sentences.append(
+                SentimentSentence(
+                    sentence[0]["start"], sentence[-1]["start"] + sentence[-1]["len"] - 1, events
+                )
+            )
+    return sentiment_doc
+
+
+def test_aspect_matcher(tmpdir):
+    aspects = Path(str(tmpdir)) / "aspects.csv"
+    _write_aspect_lexicon(aspects, 500)
+    lexicons_dir = Path(LIBRARY_ROOT) / "examples" / "absa"
+    for aspect_lex in (lexicons_dir / "aspects.csv", aspects):
+        inference = SentimentInference(aspect_lex, lexicons_dir / "opinions.csv", parse=False)
+        for doc in _load_parsed_docs():
+            for sentence in doc.sentences:
+                expected = [
+                    (row_i, indices)
+                    for row_i, indices in (
+                        (row_i, _consolidate_aspects(row.term, sentence))
+                        for row_i, row in enumerate(inference.aspect_lex)
+                    )
+                    if indices
+                ]
+                assert inference.aspect_matcher.match(sentence) == expected
+        for expected_doc, predicted_doc in zip(
+            (_run_per_row(inference, doc) for doc in _load_parsed_docs()),
+            (inference.run(parsed_doc=doc) for doc in _load_parsed_docs()),
+        ):
+            assert expected_doc == predicted_doc
+
+
+@pytest.mark.benchmark
+def test_aspect_matcher_throughput(tmpdir):
+    aspects = Path(str(tmpdir)) / "aspects.csv"
+    _write_aspect_lexicon(aspects, 20000)
+    lexicons_dir = Path(LIBRARY_ROOT) / "examples" / "absa"
+    inference = SentimentInference(aspects, lexicons_dir / "opinions.csv", parse=False)
+    docs = _load_parsed_docs()
+    num_sentences = sum(len(doc.sentences) for doc in docs)
+
+    start = time.time()
+    expected = [_run_per_row(inference, doc) for doc in _load_parsed_docs()]
+    per_row_time = time.time() - start
+    start = time.time()
+    predicted = [inference.run(parsed_doc=doc) for doc in docs]
+    matcher_time = time.time() - start
+
+    print(
+        "\n20k aspect rows: per row matching {:.1f} sentences/sec, "
+        "aspect matcher {:.1f} sentences/sec".format(
+            num_sentences / per_row_time, num_sentences / matcher_time
+        )
+    )
+    assert expected == predicted
+
+
+class _ReferenceRulesInference(SentimentInference):
+    """SentimentInference evaluating the opinion and negation rules on the raw sentence"""
+
+    def _extract_event(self, aspect_row, parsed_sentence, aspect_indices=None, sent_index=None):
+        event = []
+        sent_aspect_pair = None
+        aspect_key = aspect_row.term[0]
+        for aspect_index_range in _consolidate_aspects(aspect_row.term, parsed_sentence):
+            for word_index in aspect_index_range:
+                sent_aspect_pair, event = self._reference_events(
+                    word_index, parsed_sentence, aspect_key, aspect_index_range
+                )
+                if sent_aspect_pair:
+                    break
+        return sent_aspect_pair, event
+
+    def _reference_neg_terms(self, toks, op_i, sentence):
+        sign = 1
+        terms = []
+        gov_op_i = sentence[op_i]["gov"]
+        dep_op_indices = [sentence.index(x) for x in sentence if x["gov"] == op_i]
+        for neg_i, negation in [(i, x) for i, x in enumerate(toks) if x in self.negation_lex]:
+            position = self.negation_lex[negation].position
+            dist = op_i - neg_i
+            before = position == "before" and (dist == 1 or neg_i in dep_op_indices)
+            after = position == "after" and (dist == -1 or neg_i == gov_op_i)
+            both = position == "both" and dist in (1, -1)
+            if before or after or both:
+                terms.append(
+                    Term(
+                        negation,
+                        TermType.NEGATION,
+                        Polarity.NEG,
+                        self.negation_lex[negation].score,
+                        sentence[toks.index(negation)]["start"],
+                        sentence[toks.index(negation)]["len"],
+                    )
+                )
+                sign *= self.negation_lex[negation].score
+        return terms, sign
+
+    def _reference_intensifier_terms(self, toks, sentiment_index, polarity, sentence):
+        count = 0
+        terms = []
+        for intens_i, intens in [(i, x) for i, x in enumerate(toks) if x in self.intensifier_lex]:
+            if abs(sentiment_index - intens_i) == 1:
+                score = self.intensifier_lex[intens].score
+                terms.append(
+                    Term(
+                        intens,
+                        TermType.INTENSIFIER,
+                        polarity,
+                        score,
+                        sentence[intens_i]["start"],
+                        sentence[intens_i]["len"],
+                    )
+                )
+                count += abs(score + 0.3)
+        return count if count != 0 else 1, terms
+
+    def _reference_events(self, aspect_index, parsed_sent, aspect_key, index_range):
+        all_pairs, events = [], []
+        sentence_text_list = [x["text"] for x in parsed_sent]
+        sentence_text = " ".join(sentence_text_list)
+        modify = self._modify_for_multiple_word
+        for tok_i, tok in enumerate(parsed_sent):
+            aspect_op_pair = []
+            terms = []
+            gov_i = tok["gov"]
+            gov = parsed_sent[gov_i]
+            if tok_i == aspect_index and gov["text"].lower() in self.opinion_lex:
+                aspect_op_pair.append((modify(tok, parsed_sent, index_range), gov))
+            if gov_i == aspect_index and tok["text"].lower() in self.opinion_lex:
+                aspect_op_pair.append((modify(gov, parsed_sent, index_range), tok))
+            if not aspect_op_pair and tok_i == aspect_index:
+                for op_t in parsed_sent:
+                    if op_t["gov"] == gov_i and op_t["text"].lower() in self.opinion_lex:
+                        aspect_op_pair.append((modify(tok, parsed_sent, index_range), op_t))
+                gov_gov = parsed_sent[parsed_sent[gov_i]["gov"]]
+                if gov_gov["text"].lower() in self.opinion_lex:
+                    aspect_op_pair.append((modify(tok, parsed_sent, index_range), gov_gov))
+            for aspect, opinion in aspect_op_pair:
+                op_tok_i = parsed_sent.index(opinion)
+                score = self.opinion_lex[opinion["text"].lower()].score
+                neg_terms, sign = self._reference_neg_terms(
+                    sentence_text_list, op_tok_i, parsed_sent
+                )
+                polarity = Polarity.POS if score * sign > 0 else Polarity.NEG
+                intensifier_score, intensifier_terms = self._reference_intensifier_terms(
+                    sentence_text_list, op_tok_i, polarity, parsed_sent
+                )
+                over_all_score = score * sign * intensifier_score
+                terms.append(
+                    Term(
+                        aspect_key,
+                        TermType.ASPECT,
+                        polarity,
+                        over_all_score,
+                        aspect["start"],
+                        aspect["len"],
+                    )
+                )
+                terms.append(
+                    Term(
+                        opinion["text"],
+                        TermType.OPINION,
+                        polarity,
+                        over_all_score,
+                        opinion["start"],
+                        opinion["len"],
+                    )
+                )
+                if len(neg_terms) > 0:
+                    terms = terms + neg_terms
+                if len(intensifier_terms) > 0:
+                    terms = terms + intensifier_terms
+                all_pairs.append(
+                    [aspect_key, opinion["text"], over_all_score, polarity, sentence_text]
+                )
+                events.append(terms)
+        return all_pairs, events
+
+
+def _random_parsed_doc(inference, num_sentences, sentence_len):
+    """parsed document of random trees over aspect, opinion, negation and intensifier words"""
+    words = [row.term[0] for row in inference.aspect_lex]
+    words += [row.term[1] for row in inference.aspect_lex if row.term[1]]
+    words += random.sample(sorted(inference.opinion_lex), 20)
+    words += sorted(inference.negation_lex) + sorted(inference.intensifier_lex)
+    words += ["the", "a", "was", "and", "of", "it"] * 10
+    sentences = []
+    start = 0
+    for _ in range(num_sentences):
+        sentence = []
+        for tok_i in range(sentence_len):
+            text = random.choice(words)
+            if random.random() < 0.2:
+                text = text.title()
+            gov = random.randrange(tok_i) if tok_i else -1
+            sentence.append(
+                {
+                    "start": start,
+                    "len": len(text),
+                    "pos": "NN",
+                    "ner": "",
+                    "lemma": text.lower(),
+                    "gov": gov,
+                    "rel": "dep",
+                    "text": text,
+                }
+            )
+            start += len(text) + 1
+        sentences.append(sentence)
+    return CoreNLPDoc(sentences=sentences)
+
+
+def _opinion_rules_inferences():
+    lexicons_dir = Path(LIBRARY_ROOT) / "examples" / "absa"
+    inference = SentimentInference(
+        lexicons_dir / "aspects.csv", lexicons_dir / "opinions.csv", parse=False
+    )
+    reference = _ReferenceRulesInference(
+        lexicons_dir / "aspects.csv", lexicons_dir / "opinions.csv", parse=False
+    )
+    return inference, reference
+
+
+def test_opinion_rules_sentence_index():
+    random.seed(1)
+    inference, reference = _opinion_rules_inferences()
+    for sentence_len in (5, 20, 150):
+        doc = _random_parsed_doc(inference, 20, sentence_len)
+        expected_doc = reference.run(parsed_doc=copy.deepcopy(doc))
+        predicted_doc = inference.run(parsed_doc=copy.deepcopy(doc))
+        assert expected_doc is not None
+        assert expected_doc == predicted_doc
+
+
+@pytest.mark.benchmark
+def test_opinion_rules_benchmark():
+    random.seed(1)
+    inference, reference = _opinion_rules_inferences()
+    for sentence_len in (5, 20, 150):
+        doc = _random_parsed_doc(inference, 20, sentence_len)
+        start = time.time()
+        reference.run(parsed_doc=copy.deepcopy(doc))
+        reference_time = time.time() - start
+        start = time.time()
+        inference.run(parsed_doc=copy.deepcopy(doc))
+        index_time = time.time() - start
+        print(
+            "\nsentence length {}: {:.4f} sec per document, {:.4f} sec without index".format(
+                sentence_len, index_time, reference_time
+            )
+        )
+
+
+def test_pipeline_ndjson(tmpdir):
+    lexicons_dir = Path(LIBRARY_ROOT) / "examples" / "absa"
+    data_dir = Path(LIBRARY_ROOT) / "tests" / "fixtures" / "data" / "absa"
+    parsed_docs = [
+        ("core_nlp_doc_{}".format(i), (data_dir / "core_nlp_doc_{}.json".format(i)).read_text())
+        for i in range(1, 4)
+    ] * 5
+    inference = SentimentInference(
+        lexicons_dir / "aspects.csv", lexicons_dir / "opinions.csv", parse=False
+    )
+    expected = [
+        (doc_id, inference.run(parsed_doc=json.loads(text, object_hook=CoreNLPDoc.decoder)))
+        for doc_id, text in parsed_docs
+    ]
+
+    for num_workers in (1, 2):
+        out_file = Path(str(tmpdir)) / "sentiment_{}.ndjson".format(num_workers)
+        num_docs, num_sents = run_pipeline_ndjson(
+            iter(parsed_docs),
+            out_file,
+            parse=False,
+            aspect_lex=lexicons_dir / "aspects.csv",
+            opinion_lex=lexicons_dir / "opinions.csv",
+            batch_size=2,
+            num_workers=num_workers,
+        )
+        assert num_docs == len(parsed_docs)
+        assert num_sents == sum(len(json.loads(text)["_sentences"]) for _, text in parsed_docs)
+        predicted = [
+            (record["id"], record["sentiment"])
+            for record in iter_ndjson(out_file, SentimentDoc.decoder)
+        ]
+        assert predicted == [(doc_id, doc) for doc_id, doc in expected if doc]
+
+
+def test_parsed_docs_ndjson(tmpdir):
+    data_dir = Path(LIBRARY_ROOT) / "tests" / "fixtures" / "data" / "absa"
+    parsed_docs = [
+        (str(i), (data_dir / "core_nlp_doc_{}.json".format(i)).read_text()) for i in range(1, 4)
+    ]
+    run_pipeline_ndjson(
+        iter(parsed_docs), Path(str(tmpdir)) / "parsed_docs.ndjson", parse=False, batch_size=2
+    )
+    loaded = _load_parsed_docs_from_dir(str(tmpdir))
+    assert sorted(loaded) == ["1", "2", "3"]
+    for doc_id, text in parsed_docs:
+        expected = json.loads(text, object_hook=CoreNLPDoc.decoder)
+        assert loaded[doc_id].json() == expected.json()
+
+    raw_file = Path(str(tmpdir)) / "raw.txt"
+    raw_file.write_text("first doc\nsecond doc\n")
+    assert list(iter_raw_docs(raw_file)) == [("1", "first doc"), ("2", "second doc")]
+
+
+def test_term_matcher():
+    matcher = _TermMatcher(["price", "low price", "wi-fi", "fast", "price"])
+    text = "price is low price, fast wi-fi and wi - fi, pricey breakfast"
+    found = matcher.find(text)
+    assert found == {0: (0, 5), 1: (9, 18), 2: (25, 30), 3: (20, 24), 4: (0, 5)}
+    assert matcher.find("pricey breakfast") == {}
+
+
+def _reference_examples(sentences, term, label, max_examples):
+    """html examples of the first whole word occurrences of term, searched one by one"""
+    pattern = re.compile(r"(?<!\w)" + re.escape(term) + r"(?!\w)")
+    examples = []
+    for sent_i, sent_text in enumerate(sentences):
+        match = pattern.search(sent_text.lower())
+        if match and len(examples) < max_examples:
+            start, end = match.span()
+            examples.append(
+                (
+                    sent_i,
+                    sent_text[:start]
+                    + '<span class="{}">'.format(label)
+                    + sent_text[start:end]
+                    + "</span>"
+                    + sent_text[end:],
+                )
+            )
+    return examples
+
+
+def test_write_lexicon_examples(tmpdir):
+    parsed_dir = Path(str(tmpdir)) / "parsed"
+    parsed_dir.mkdir()
+    with open(parsed_dir / "parsed_docs.ndjson", "w") as f:
+        for i, doc in enumerate(_load_parsed_docs() * 10):
+            f.write(json.dumps({"id": str(i), "doc": vars(doc)}) + "\n")
+    sentences = [
+        sent_text
+        for doc in _load_parsed_docs_from_dir(parsed_dir).values()
+        for sent_text, _ in doc.sent_iter()
+    ]
+    random.seed(1)
+    vocab = sorted({w for sent in sentences for w in re.findall(r"\w+", sent.lower())})
+    terms = random.sample(vocab, 40) + [
+        " ".join(sentences[0].lower().split()[1:3]),
+        sentences[1].lower().split()[0],
+        "absent term",
+    ]
+    aspect_lex = {term: random.choice(["", random.choice(vocab)]) for term in terms}
+    opinion_lex = {term: (0.5, "POS", random.choice("YN")) for term in terms[:20]}
+
+    expected_aspects = []
+    for term, lemma in aspect_lex.items():
+        # term examples before lemma examples of the same sentence
+        found = [(i, 0, e) for i, e in _reference_examples(sentences, term, "AS", 20)]
+        if lemma:
+            found += [(i, 1, e) for i, e in _reference_examples(sentences, lemma, "AS", 20)]
+        if found:
+            found.sort()
+            expected_aspects.append((found[0][0], [term, lemma, "", ""] + [e for _, _, e in found]))
+    expected_aspects = [row[:24] for _, row in sorted(expected_aspects, key=lambda e: e[0])]
+    expected_opinions = []
+    for term, (score, polarity, acquired) in opinion_lex.items():
+        found = _reference_examples(sentences, term, "OP", 20) if acquired == "Y" else [(0, None)]
+        if found:
+            row = [term, str(score), polarity, acquired] + [e for _, e in found if e]
+            expected_opinions.append((found[0][0], row))
+    expected_opinions = [row for _, row in sorted(expected_opinions, key=lambda e: e[0])]
+
+    for num_workers in (1, 2):
+        out_dir = Path(str(tmpdir)) / "lexicons_{}".format(num_workers)
+        _write_aspect_lex(parsed_dir, aspect_lex, out_dir, num_workers)
+        _write_opinion_lex(parsed_dir, opinion_lex, out_dir, num_workers)
+        with open(out_dir / "generated_aspect_lex.csv", encoding="utf-8") as f:
+            assert list(csv.reader(f))[1:] == expected_aspects
+        with open(out_dir / "generated_opinion_lex_reranked.csv", encoding="utf-8") as f:
+            assert list(csv.reader(f))[1:] == expected_opinions
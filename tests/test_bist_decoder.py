@@ -0,0 +1,112 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import time
+
+import numpy as np
+import pytest
+
+from nlp_architect.models.bist.decoder import _backtrack_eisner, parse_proj, parse_proj_batch
+
+
+def _reference_parse_proj(scores, gold=None):
+    """Eisner's algorithm looping over spans, as parse_proj was first implemented"""
+    N = np.shape(scores)[0] - 1
+    complete = np.zeros([N + 1, N + 1, 2])
+    incomplete = np.zeros([N + 1, N + 1, 2])
+    complete_backtrack = -np.ones([N + 1, N + 1, 2], dtype=int)
+    incomplete_backtrack = -np.ones([N + 1, N + 1, 2], dtype=int)
+    incomplete[0, :, 0] -= np.inf
+    for k in range(1, N + 1):
+        for s in range(N - k + 1):
+            t = s + k
+            incomplete_vals0 = (
+                complete[s, s:t, 1]
+                + complete[(s + 1) : (t + 1), t, 0]
+                + scores[t, s]
+                + (0.0 if gold is not None and gold[s] == t else 1.0)
+            )
+            incomplete[s, t, 0] = np.max(incomplete_vals0)
+            incomplete_backtrack[s, t, 0] = s + np.argmax(incomplete_vals0)
+            incomplete_vals1 = (
+                complete[s, s:t, 1]
+                + complete[(s + 1) : (t + 1), t, 0]
+                + scores[s, t]
+                + (0.0 if gold is not None and gold[t] == s else 1.0)
+            )
+            incomplete[s, t, 1] = np.max(incomplete_vals1)
+            incomplete_backtrack[s, t, 1] = s + np.argmax(incomplete_vals1)
+            complete_vals0 = complete[s, s:t, 0] + incomplete[s:t, t, 0]
+            complete[s, t, 0] = np.max(complete_vals0)
+            complete_backtrack[s, t, 0] = s + np.argmax(complete_vals0)
+            complete_vals1 = incomplete[s, (s + 1) : (t + 1), 1] + complete[(s + 1) : (t + 1), t, 1]
+            complete[s, t, 1] = np.max(complete_vals1)
+            complete_backtrack[s, t, 1] = s + 1 + np.argmax(complete_vals1)
+    heads = [-1 for _ in range(N + 1)]
+    _backtrack_eisner(incomplete_backtrack, complete_backtrack, 0, N, 1, 1, heads)
+    return heads
+
+
+def _random_scores(length, rng, ties=False):
+    if ties:
+        return rng.randint(-2, 3, size=(length, length)).astype(float)
+    return rng.randn(length, length).astype(np.float32)
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_parse_proj(ties):
+    rng = np.random.RandomState(0)
+    for length in list(range(1, 12)) + [25, 40]:
+        scores = _random_scores(length, rng, ties)
+        gold = [-1] + [int(rng.randint(0, length)) for _ in range(length - 1)]
+        assert parse_proj(scores) == _reference_parse_proj(scores)
+        assert parse_proj(scores, gold) == _reference_parse_proj(scores, gold)
+
+
+def test_parse_proj_batch():
+    rng = np.random.RandomState(1)
+    scores_list = [_random_scores(length, rng, length % 2 == 0) for length in (7, 1, 15, 2, 9)]
+    golds = [[-1] + [0] * (len(scores) - 1) for scores in scores_list]
+    assert parse_proj_batch(scores_list) == [_reference_parse_proj(s) for s in scores_list]
+    assert parse_proj_batch(scores_list, golds) == [
+        _reference_parse_proj(s, g) for s, g in zip(scores_list, golds)
+    ]
+    assert parse_proj_batch([]) == []
+    with pytest.raises(ValueError):
+        parse_proj(np.zeros((3, 4)))
+
+
+@pytest.mark.benchmark
+def test_parse_proj_benchmark():
+    rng = np.random.RandomState(2)
+    print("\nlength  loop decoder (ms)  vectorized (ms)  batched (ms per sentence)")
+    for length in (10, 25, 50, 100, 150):
+        scores_list = [_random_scores(length + 1, rng) for _ in range(3)]
+        start = time.time()
+        expected = [_reference_parse_proj(scores) for scores in scores_list]
+        loop_time = (time.time() - start) / len(scores_list)
+        start = time.time()
+        predicted = [parse_proj(scores) for scores in scores_list]
+        vectorized_time = (time.time() - start) / len(scores_list)
+        start = time.time()
+        batched = parse_proj_batch(scores_list)
+        batched_time = (time.time() - start) / len(scores_list)
+        print(
+            "{:6d}  {:17.1f}  {:15.1f}  {:25.1f}".format(
+                length, 1000 * loop_time, 1000 * vectorized_time, 1000 * batched_time
+            )
+        )
+        assert predicted == expected
+        assert batched == expected
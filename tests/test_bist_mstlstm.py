@@ -0,0 +1,132 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from nlp_architect.data.conll import ConllEntry
+from nlp_architect.models.bist.utils import get_options_dict
+
+try:
+    import dynet
+except ImportError:
+    pytest.skip(
+        "Skipping test_bist_mstlstm.py. Reason: dynet not installed.", allow_module_level=True
+    )
+
+from nlp_architect.models.bist.mstlstm import MSTParserLSTM  # noqa: E402
+
+WORDS = ["the", "cat", "sat", "on", "mat", "a", "dog", "ran"]
+POS = ["DT", "NN", "VBD", "IN"]
+RELS = ["det", "nsubj", "root", "prep", "pobj"]
+
+
+def _model(hidden2_units=0):
+    options = get_options_dict("tanh", 20, 2, 10)
+    options["wembedding_dims"] = 15
+    options["hidden_units"] = 12
+    options["hidden2_units"] = hidden2_units
+    w2i = {word: i for i, word in enumerate(WORDS)}
+    return MSTParserLSTM({word: 1 for word in WORDS}, w2i, POS, RELS, options)
+
+
+def _sentences(num, seed=0):
+    random.seed(seed)
+    sentences = []
+    for _ in range(num):
+        sentence = [ConllEntry(0, "*root*", "*root*", "ROOT-POS", "ROOT-CPOS", "_", -1, "rroot")]
+        for i in range(random.randint(1, 12)):
+            sentence.append(
+                ConllEntry(
+                    i + 1,
+                    random.choice(WORDS),
+                    "_",
+                    random.choice(POS),
+                    "_",
+                    "_",
+                    random.randint(0, i),
+                    random.choice(RELS),
+                )
+            )
+        sentences.append(sentence)
+    return sentences
+
+
+def _mlp(model, hidden, layer2, bias2, out, out_bias=None):
+    hidden = np.tanh(hidden)
+    if model.hidden2_units > 0:
+        hidden = np.tanh(layer2.as_array().dot(hidden) + bias2.as_array())
+    output = out.as_array().dot(hidden)
+    return output if out_bias is None else output + out_bias.as_array()
+
+
+@pytest.mark.parametrize("hidden2_units", [0, 8])
+def test_batched_scores(hidden2_units):
+    """Vectorized arc and label scores equal scoring each arc separately"""
+    model = _model(hidden2_units)
+    sentence = _sentences(1)[0]
+    dynet.renew_cg()
+    for entry in sentence:
+        entry.vec = dynet.concatenate(
+            [model.wlookup[model.vocab.get(entry.norm, 0)], model.plookup[model.pos[entry.pos]]]
+        )
+    lstms = model._encode(sentence)
+    vectors = lstms.npvalue()
+    size = len(sentence)
+    arc_scores = model._evaluate(lstms, size).npvalue().reshape(size, size)
+    heads = [-1] + [entry.parent_id for entry in sentence[1:]]
+    label_scores = model._evaluate_labels(lstms, heads).npvalue().reshape(len(RELS), -1)
+
+    foh, fom = model.hid_layer_foh.as_array(), model.hid_layer_fom.as_array()
+    rfoh, rfom = model.rhid_layer_foh.as_array(), model.rhid_layer_fom.as_array()
+    for head in range(size):
+        for modifier in range(size):
+            hidden = (
+                foh.dot(vectors[:, head])
+                + fom.dot(vectors[:, modifier])
+                + model.hid_bias.as_array()
+            )
+            expected = _mlp(model, hidden, model.hid2_layer, model.hid2_bias, model.out_layer)
+            assert np.allclose(arc_scores[head, modifier], expected[0], atol=1e-5)
+    for modifier in range(1, size):
+        hidden = (
+            rfoh.dot(vectors[:, heads[modifier]])
+            + rfom.dot(vectors[:, modifier])
+            + model.rhid_bias.as_array()
+        )
+        expected = _mlp(
+            model, hidden, model.rhid2_layer, model.rhid2_bias, model.rout_layer, model.rout_bias
+        )
+        assert np.allclose(label_scores[:, modifier - 1], expected, atol=1e-5)
+
+
+def test_predict_batches():
+    model = _model()
+    sentences = _sentences(10)
+
+    def predict(batch_size):
+        parsed = model.predict(conll=copy.deepcopy(sentences), batch_size=batch_size)
+        return [
+            [(entry.pred_parent_id, entry.pred_relation) for entry in sentence]
+            for sentence in parsed
+        ]
+
+    expected = predict(1)
+    assert len(expected) == len(sentences)
+    assert predict(4) == expected
+    assert predict(32) == expected
@@ -0,0 +1,97 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import random
+
+import torch
+from torch.utils.data import DataLoader, SequentialSampler, TensorDataset
+
+from nlp_architect.nn.torch.data.bucketing import (
+    DynamicPaddingCollator,
+    LengthBucketSampler,
+    bucketed_data_loader,
+)
+from nlp_architect.nn.torch.data.buffers import collect_outputs
+
+MAX_SEQ_LENGTH = 16
+
+
+def _padded_dataset(num_examples, pad_on_left=False, with_labels=True):
+    random.seed(0)
+    input_ids = torch.zeros(num_examples, MAX_SEQ_LENGTH, dtype=torch.long)
+    input_mask = torch.zeros(num_examples, MAX_SEQ_LENGTH, dtype=torch.long)
+    for i in range(num_examples):
+        length = random.randint(2, MAX_SEQ_LENGTH)
+        span = slice(MAX_SEQ_LENGTH - length, None) if pad_on_left else slice(0, length)
+        input_ids[i, span] = torch.randint(1, 100, (length,))
+        input_mask[i, span] = 1
+    tensors = [input_ids, input_mask, torch.zeros_like(input_ids)]
+    if with_labels:
+        tensors.append(torch.randint(0, 3, (num_examples,)))
+    return TensorDataset(*tensors)
+
+
+def _token_outputs(data_loader):
+    # a position independent "model": token logits are a function of the token id
+    for batch in data_loader:
+        logits = (batch[0].unsqueeze(-1) * torch.tensor([1.0, -1.0])) * batch[1].unsqueeze(-1)
+        if isinstance(data_loader.collate_fn, DynamicPaddingCollator):
+            logits = data_loader.collate_fn.restore_length(logits)
+        yield logits, batch[3]
+
+
+def test_sampler_covers_all_examples():
+    lengths = [random.randint(1, 50) for _ in range(1003)]
+    for shuffle in (False, True):
+        sampler = LengthBucketSampler(lengths, 32, shuffle=shuffle, bucket_size_multiplier=4)
+        batches = list(sampler)
+        assert len(batches) == len(sampler)
+        assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    # without shuffling batches are sorted by decreasing length
+    batches = list(LengthBucketSampler(lengths, 32))
+    flat = [lengths[i] for b in batches for i in b]
+    assert flat == sorted(lengths, reverse=True)
+
+
+def test_sampler_drop_last():
+    sampler = LengthBucketSampler(list(range(100)), 32, shuffle=True, drop_last=True)
+    batches = list(sampler)
+    assert len(batches) == len(sampler) == 3
+    assert all(len(b) == 32 for b in batches)
+
+
+def test_collator_trims_to_longest():
+    for pad_on_left in (False, True):
+        data_set = _padded_dataset(50, pad_on_left=pad_on_left)
+        loader = bucketed_data_loader(data_set, 8, pad_on_left=pad_on_left)
+        for idx, batch in zip(loader.batch_sampler, loader):
+            lengths = data_set.tensors[1][idx].sum(1)
+            assert batch[0].size(1) == int(lengths.max())
+            assert torch.equal(batch[1].sum(1), lengths)
+            assert batch[3].shape == (len(idx),)
+
+
+def test_dynamic_padding_outputs_in_input_order():
+    for pad_on_left in (False, True):
+        data_set = _padded_dataset(100, pad_on_left=pad_on_left)
+        static = DataLoader(data_set, sampler=SequentialSampler(data_set), batch_size=8)
+        exp_logits, exp_labels = collect_outputs(_token_outputs(static), len(data_set))
+
+        dynamic = bucketed_data_loader(data_set, 8, pad_on_left=pad_on_left)
+        logits, labels = collect_outputs(
+            _token_outputs(dynamic), len(data_set), indices=iter(dynamic.batch_sampler)
+        )
+        assert torch.equal(logits, exp_logits)
+        assert torch.equal(labels, exp_labels)
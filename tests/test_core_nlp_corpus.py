@@ -0,0 +1,119 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from nlp_architect import LIBRARY_ROOT
+from nlp_architect.common.core_nlp_corpus import CoreNLPCorpus
+from nlp_architect.common.core_nlp_doc import CoreNLPDoc
+
+DATA_DIR = Path(LIBRARY_ROOT) / "tests" / "fixtures" / "data" / "absa"
+
+
+def _fixture_docs():
+    docs = []
+    for i in range(1, 4):
+        with open(DATA_DIR / "core_nlp_doc_{}.json".format(i)) as f:
+            docs.append(
+                ("core_nlp_doc_{}.json".format(i), json.load(f, object_hook=CoreNLPDoc.decoder))
+            )
+    return docs
+
+
+def test_corpus_from_json_dir(tmpdir):
+    json_dir = Path(str(tmpdir)) / "parsed"
+    json_dir.mkdir()
+    for i in range(1, 4):
+        shutil.copy(str(DATA_DIR / "core_nlp_doc_{}.json".format(i)), str(json_dir))
+    with open(json_dir / "more.ndjson", "w") as f:
+        for doc_id, doc in _fixture_docs():
+            f.write(json.dumps({"id": "line_" + doc_id, "doc": vars(doc)}) + "\n")
+
+    corpus = CoreNLPCorpus.from_json_dir(json_dir, Path(str(tmpdir)) / "corpus")
+    expected = dict(_fixture_docs())
+    expected.update({"line_" + doc_id: doc for doc_id, doc in _fixture_docs()})
+    assert len(corpus) == 6
+    assert sorted(corpus) == sorted(expected)
+    for doc_id, doc in expected.items():
+        assert doc_id in corpus
+        assert corpus[doc_id].pretty_json() == doc.pretty_json()
+    assert corpus.num_sentences == sum(len(doc) for doc in expected.values())
+
+    # converted back to the json layout
+    json_out = Path(str(tmpdir)) / "json_out"
+    corpus.to_json_dir(json_out)
+    for doc_id, doc in _fixture_docs():
+        assert (json_out / doc_id).read_text() == doc.pretty_json()
+        assert (json_out / ("line_" + doc_id)).read_text() == doc.pretty_json()
+
+
+def test_corpus_to_json_dir_round_trip(tmpdir):
+    from nlp_architect.models.absa.utils import _load_parsed_docs_from_dir
+
+    docs = [(str(i), doc) for i, (_, doc) in enumerate(_fixture_docs(), 1)]
+    docs += [("doc.txt", docs[0][1]), ("doc.json", docs[1][1])]
+    corpus = CoreNLPCorpus.write(Path(str(tmpdir)) / "corpus", docs)
+    json_dir = Path(str(tmpdir)) / "json"
+    corpus.to_json_dir(json_dir)
+    loaded = _load_parsed_docs_from_dir(json_dir)
+    assert sorted(loaded) == ["1.json", "2.json", "3.json", "doc.json", "doc.txt"]
+    for doc_id, doc in docs:
+        file_name = doc_id if doc_id.startswith("doc") else doc_id + ".json"
+        assert loaded[file_name].json() == doc.json()
+
+
+def test_corpus_optional_fields(tmpdir):
+    docs = [
+        ("empty", CoreNLPDoc("", [])),
+        ("no_text", CoreNLPDoc("a b", [[{"start": 0, "len": 1, "gov": -1, "pos": "DT"}]])),
+        (
+            "partial",
+            CoreNLPDoc(
+                "b c. d",
+                [
+                    [
+                        {"start": 0, "len": 1, "gov": 1, "pos": "NN", "text": "b"},
+                        {"start": 2, "len": 1, "gov": -1, "pos": "NN", "text": "c"},
+                    ],
+                    [{"start": 5, "len": 1, "gov": -1, "pos": "NN", "text": "d", "lemma": "d"}],
+                ],
+            ),
+        ),
+    ]
+    corpus = CoreNLPCorpus.write(Path(str(tmpdir)) / "corpus", docs)
+    assert [doc_id for doc_id, _ in corpus.docs()] == ["empty", "no_text", "partial"]
+    for (doc_id, doc), (corpus_id, corpus_doc) in zip(docs, corpus.docs()):
+        assert doc_id == corpus_id
+        assert corpus_doc.doc_text == doc.doc_text
+        assert corpus_doc.sentences == doc.sentences
+
+    with pytest.raises(ValueError):
+        CoreNLPCorpus.write(
+            Path(str(tmpdir)) / "bad", [("bad", CoreNLPDoc("a", [[{"start": 0, "x": 1}]]))]
+        )
+
+
+def test_absa_loads_corpus(tmpdir):
+    from nlp_architect.models.absa.utils import _load_parsed_docs_from_dir
+
+    corpus_dir = Path(str(tmpdir)) / "corpus"
+    CoreNLPCorpus.write(corpus_dir, _fixture_docs())
+    loaded = _load_parsed_docs_from_dir(corpus_dir)
+    assert isinstance(loaded, CoreNLPCorpus)
+    assert [doc.json() for doc in loaded.values()] == [doc.json() for _, doc in _fixture_docs()]
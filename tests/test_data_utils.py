@@ -16,8 +16,10 @@
 
 import math
 import os
+import numpy as np
 import torch
 from nlp_architect.data.utils import split_column_dataset
+from nlp_architect.utils.generic import pad_sentences, words_to_char_ids
 from tests.utils import count_examples
 from nlp_architect.nn.torch.data.dataset import CombinedTensorDataset
 from torch.utils.data import TensorDataset
@@ -62,3 +64,16 @@ def test_split_dataset():
         assert check_unlabeled_count == math.ceil(num_of_examples * unlabeled_precentage)
         os.remove(data_dir + os.sep + "labeled.txt")
         os.remove(data_dir + os.sep + "unlabeled.txt")
+
+
+def test_words_to_char_ids():
+    char_vocab = {c: i for i, c in enumerate("abcdefgh", 2)}
+    words = ["abc", "hgfedcbaab", "", "axz", "abc", "a"]
+    char_ids = words_to_char_ids(words, char_vocab, 5)
+    assert char_ids.shape == (len(words), 5)
+    for word, row in zip(words, char_ids):
+        ids = [char_vocab[c] if c in char_vocab else 1 for c in word]
+        if ids:
+            assert np.array_equal(row, pad_sentences([ids], 5)[0])
+        else:
+            assert not row.any()
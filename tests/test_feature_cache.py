@@ -0,0 +1,59 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import os
+
+import torch
+from torch.utils.data import TensorDataset
+
+from nlp_architect.nn.torch.data.feature_cache import FeatureCache, hash_files
+
+
+def test_hash_files(tmpdir):
+    data_dir = str(tmpdir.mkdir("data"))
+    train_file = os.path.join(data_dir, "train.txt")
+    with open(train_file, "w") as fp:
+        fp.write("EU B-ORG\nrejects O\n")
+    dir_hash = hash_files(data_dir)
+    file_hash = hash_files(train_file)
+    # sub directories (e.g., a features cache) are not hashed
+    os.makedirs(os.path.join(data_dir, "cache"))
+    assert hash_files(data_dir) == dir_hash
+    with open(train_file, "a") as fp:
+        fp.write("German B-MISC\n")
+    assert hash_files(train_file) != file_hash
+    assert hash_files(data_dir) != dir_hash
+
+
+def test_feature_cache_save_load(tmpdir):
+    cache = FeatureCache(str(tmpdir))
+    key = FeatureCache.key(data="abc", model_type="bert", max_seq_length=128)
+    assert key == FeatureCache.key(max_seq_length=128, model_type="bert", data="abc")
+    assert key != FeatureCache.key(data="abc", model_type="bert", max_seq_length=64)
+    assert cache.load(key) is None
+
+    data_set = TensorDataset(
+        torch.randint(0, 100, (10, 16)), torch.ones(10, 16, dtype=torch.long), torch.rand(10)
+    )
+    cache.save(key, data_set, set_type="train")
+    assert key in cache
+    loaded = cache.load(key)
+    assert len(loaded) == 10
+    for tensor, exp_tensor in zip(loaded.tensors, data_set.tensors):
+        assert tensor.dtype == exp_tensor.dtype
+        assert torch.equal(tensor, exp_tensor)
+    # overwrite an existing entry
+    cache.save(key, TensorDataset(torch.zeros(3, 2)))
+    assert len(cache.load(key)) == 3
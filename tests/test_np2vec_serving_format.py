@@ -0,0 +1,138 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import os
+import time
+
+import gensim
+import numpy as np
+import pytest
+from gensim.models import KeyedVectors
+
+from nlp_architect.models.np2vec import (
+    SERVING_NORMS,
+    NP2vec,
+    is_serving_format,
+    load_normalized_vectors,
+    load_vector_norms,
+    save_normalized_vectors,
+)
+
+
+def _vectors(num_words, dim=50, seed=0):
+    rng = np.random.RandomState(seed)
+    words = ["term_{}_".format(i) for i in range(num_words)] + ["über_café_"]
+    vectors = rng.randn(num_words + 1, dim).astype(np.float32)
+    vectors[3] = 0
+    return words, vectors
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_save_load(tmpdir, dtype):
+    words, vectors = _vectors(100)
+    model_dir = str(tmpdir.join("model"))
+    assert not is_serving_format(model_dir)
+    save_normalized_vectors(words, vectors, model_dir, dtype=dtype)
+    assert is_serving_format(model_dir)
+    for mmap in (True, False):
+        loaded_words, loaded_vectors = load_normalized_vectors(model_dir, mmap=mmap)
+        assert loaded_words == words
+        assert loaded_vectors.dtype == np.dtype(dtype)
+        assert type(loaded_vectors) is np.ndarray
+        expected = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-30)
+        assert np.allclose(loaded_vectors, expected, atol=1e-3 if dtype == "float16" else 1e-6)
+        assert not loaded_vectors[3].any()
+    norms = load_vector_norms(model_dir)
+    assert norms.dtype == np.float32
+    assert np.allclose(norms, np.linalg.norm(vectors, axis=1))
+    os.remove(os.path.join(model_dir, SERVING_NORMS))
+    assert load_vector_norms(model_dir) is None
+    with pytest.raises(ValueError):
+        save_normalized_vectors(words, vectors, model_dir, dtype="float64")
+
+
+def _save_word2vec_text(words, vectors, text_file):
+    with open(text_file, "w", encoding="utf8") as f:
+        f.write("{} {}\n".format(len(words), vectors.shape[1]))
+        for word, vec in zip(words, vectors):
+            f.write("{} {}\n".format(word, " ".join("%f" % val for val in vec)))
+
+
+@pytest.mark.skipif(
+    int(gensim.__version__.split(".")[0]) >= 4,
+    reason="NP2vec models are gensim 3 KeyedVectors",
+)
+def test_load_serving_format_keyed_vectors(tmpdir):
+    words, vectors = _vectors(500)
+    vectors[3] = 1.0
+    # norms far apart, raw and normalized vector averages differ
+    vectors *= np.random.RandomState(1).uniform(0.1, 10.0, (len(words), 1)).astype(np.float32)
+    text_file = str(tmpdir.join("model.txt"))
+    _save_word2vec_text(words, vectors, text_file)
+    model_dir = str(tmpdir.join("model"))
+    save_normalized_vectors(words, vectors, model_dir)
+
+    assert is_serving_format(model_dir) and not is_serving_format(text_file)
+    text_model = NP2vec.load(text_file)
+    for mmap in (True, False):
+        model = NP2vec.load(model_dir, mmap=mmap)
+        assert isinstance(model, KeyedVectors)
+        assert model.index2word == words
+        for word in (words[0], words[42], words[-1]):
+            assert model.vocab[word].index == text_model.vocab[word].index
+            assert model.vocab[word].count == text_model.vocab[word].count
+        assert model.vectors_norm is model.vectors
+        assert model.vectors.flags.writeable != mmap
+        vectors_norm = model.vectors_norm
+        model.init_sims()
+        assert model.vectors_norm is vectors_norm
+
+        text_model.init_sims()
+        for positive in ([words[0]], [words[7], words[-1]], [words[3], words[100], words[250]]):
+            results = model.most_similar(positive, topn=10)
+            expected = text_model.most_similar(positive, topn=10)
+            assert [w for w, _ in results] == [w for w, _ in expected]
+            assert np.allclose([s for _, s in results], [s for _, s in expected], atol=1e-5)
+        assert np.isclose(
+            model.similarity(words[1], words[2]), text_model.similarity(words[1], words[2])
+        )
+        assert np.allclose(model[words[5]], text_model[words[5]], atol=1e-4)
+        for ws1, ws2 in (([words[0], words[1]], [words[2]]), (words[10:15], words[20:40])):
+            assert np.isclose(
+                model.n_similarity(ws1, ws2), text_model.n_similarity(ws1, ws2), atol=1e-5
+            )
+
+
+@pytest.mark.benchmark
+def test_load_benchmark(tmpdir):
+    words, vectors = _vectors(50000, dim=100)
+    text_file = str(tmpdir.join("model.txt"))
+    _save_word2vec_text(words, vectors, text_file)
+    model_dir = str(tmpdir.join("model"))
+    start = time.time()
+    save_normalized_vectors(words, vectors, model_dir)
+    save_time = time.time() - start
+
+    start = time.time()
+    KeyedVectors.load_word2vec_format(text_file)
+    text_time = time.time() - start
+    start = time.time()
+    loaded_words, loaded_vectors = load_normalized_vectors(model_dir)
+    serving_time = time.time() - start
+    print(
+        "\n{} x {} vectors: save {:.2f}s, load word2vec text {:.2f}s, load serving format "
+        "{:.3f}s".format(len(words), vectors.shape[1], save_time, text_time, serving_time)
+    )
+    assert len(loaded_words) == len(words) and loaded_vectors.shape == vectors.shape
@@ -0,0 +1,115 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import os
+import time
+
+import pytest
+import torch
+
+from nlp_architect.nn.torch.data.buffers import OutputBuffer, collect_outputs
+
+
+def _synthetic_batches(num_examples, batch_size, item_shape, with_labels=True):
+    torch.manual_seed(0)
+    for start in range(0, num_examples, batch_size):
+        size = min(batch_size, num_examples - start)
+        logits = torch.rand((size,) + item_shape)
+        labels = torch.randint(0, 5, (size,)) if with_labels else None
+        yield logits, labels
+
+
+def _concat_outputs(batches):
+    """the previous collection path (torch.cat on every batch)"""
+    preds = None
+    out_label_ids = None
+    for logits, labels in batches:
+        if preds is None:
+            preds = logits
+            out_label_ids = labels
+        else:
+            preds = torch.cat((preds, logits), dim=0)
+            out_label_ids = (
+                torch.cat((out_label_ids, labels), dim=0) if out_label_ids is not None else None
+            )
+    return preds, out_label_ids
+
+
+def test_collect_outputs_matches_concat():
+    batches = list(_synthetic_batches(1000, 64, (7, 3)))
+    preds, labels = collect_outputs(iter(batches), 1000)
+    exp_preds, exp_labels = _concat_outputs(batches)
+    assert torch.equal(preds, exp_preds)
+    assert torch.equal(labels, exp_labels)
+
+
+def test_collect_outputs_no_labels():
+    preds, labels = collect_outputs(_synthetic_batches(100, 8, (4,), with_labels=False), 100)
+    assert preds.shape == (100, 4)
+    assert labels is None
+
+
+def test_collect_outputs_partial():
+    # e.g., a dataloader with drop_last=True
+    preds, _ = collect_outputs(_synthetic_batches(96, 32, (2,)), 100)
+    assert preds.shape == (96, 2)
+
+
+def test_collect_outputs_memmap(tmpdir):
+    files = [os.path.join(str(tmpdir), "logits.bin"), os.path.join(str(tmpdir), "labels.bin")]
+    batches = list(_synthetic_batches(300, 64, (5,)))
+    preds, labels = collect_outputs(iter(batches), 300, filenames=files)
+    exp_preds, exp_labels = _concat_outputs(batches)
+    assert torch.equal(preds, exp_preds)
+    assert torch.equal(labels, exp_labels)
+    assert os.path.getsize(files[0]) == 300 * 5 * 4
+
+
+def test_output_buffer_variable_length_and_scatter():
+    buf = OutputBuffer(4, item_shape=(5,))
+    buf.put(torch.tensor([3, 0]), torch.ones(2, 2))
+    buf.put(torch.tensor([1, 2]), torch.full((2, 5), 2.0))
+    out = buf.tensor
+    assert out.shape == (4, 5)
+    assert out[0].tolist() == [1.0, 1.0, 0.0, 0.0, 0.0]
+    assert out[3].tolist() == [1.0, 1.0, 0.0, 0.0, 0.0]
+    assert out[1].tolist() == [2.0] * 5
+    with pytest.raises(ValueError):
+        buf.append(torch.ones(1, 6))
+
+
+@pytest.mark.benchmark
+def test_collect_outputs_benchmark():
+    num_examples, batch_size, item_shape = 100000, 64, (8,)
+
+    start = time.time()
+    exp_preds, exp_labels = _concat_outputs(
+        _synthetic_batches(num_examples, batch_size, item_shape)
+    )
+    concat_time = time.time() - start
+
+    start = time.time()
+    preds, labels = collect_outputs(
+        _synthetic_batches(num_examples, batch_size, item_shape), num_examples
+    )
+    buffer_time = time.time() - start
+
+    print(
+        "\n{} examples: torch.cat={:.3f}s preallocated={:.3f}s".format(
+            num_examples, concat_time, buffer_time
+        )
+    )
+    assert torch.equal(preds, exp_preds)
+    assert torch.equal(labels, exp_labels)
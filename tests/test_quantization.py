@@ -13,16 +13,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ******************************************************************************
+import time
 import unittest
 
 import numpy as np
+import pytest
 import torch
 from torch import nn
 from torch.nn import functional as F
 
 from nlp_architect.nn.torch.quantization import (
     FakeLinearQuantizationWithSTE,
+    Int8Linear,
     QuantizedLinear,
+    convert_to_int8,
     get_dynamic_scale,
     get_scale,
     QuantizedEmbedding,
@@ -428,3 +432,103 @@ class QuantizedEmbeddingTest(unittest.TestCase):
         importer.load_state_dict(state_dict, strict=False)
         indices = torch.tensor(np.arange(10))
         self.assertTrue((exporter(indices) == importer(indices)).all())
+
+
+class Int8LinearTest(unittest.TestCase):
+    def _trained_qlinear(self, mode, requantize_output=True, bias=True):
+        qlinear = QuantizedLinear(64, 32, mode=mode, requantize_output=requantize_output, bias=bias)
+        qlinear.input_thresh = torch.tensor(3.0)
+        if requantize_output:
+            qlinear.output_thresh = torch.tensor(2.0)
+        qlinear.eval()
+        return qlinear
+
+    def test_static_int8_inference(self):
+        """int8 execution matches simulated quantized inference up to one output
+        quantization step (rounding)"""
+        x = (torch.rand(5, 7, 64) * 2 - 1) * 3.0
+        for bias in (True, False):
+            qlinear = self._trained_qlinear("ema", bias=bias)
+            int8_linear = Int8Linear.from_quantized_linear(qlinear)
+            out = int8_linear(x)
+            self.assertEqual(out.shape, (5, 7, 32))
+            self.assertTrue((out - qlinear(x)).abs().max() <= 2.0 / 127 + 1e-6)
+
+    def test_dynamic_int8_inference(self):
+        x = torch.randn(4, 64)
+        for mode, requantize_output in (("dynamic", True), ("dynamic", False), ("ema", False)):
+            qlinear = self._trained_qlinear(mode, requantize_output=requantize_output)
+            expected = qlinear(x)
+            out = Int8Linear.from_quantized_linear(qlinear)(x)
+            self.assertTrue((out - expected).abs().max() < 0.05 * expected.abs().max())
+
+    def test_from_quantized_linear_errors(self):
+        with self.assertRaises(RuntimeError):
+            Int8Linear.from_quantized_linear(QuantizedLinear(10, 5, mode="ema"))
+        qlinear = QuantizedLinear(10, 5, mode="ema", activation_bits=4)
+        qlinear.eval()
+        with self.assertRaises(ValueError):
+            Int8Linear.from_quantized_linear(qlinear)
+
+    def test_convert_to_int8(self):
+        model = nn.Sequential(
+            self._trained_qlinear("ema"), nn.ReLU(), nn.Sequential(nn.Linear(32, 4))
+        )
+        model.add_module("none", QuantizedLinear(4, 4, mode="none"))
+        x = (torch.rand(3, 64) * 2 - 1) * 3.0
+        expected = model(x)
+        convert_to_int8(model)
+        self.assertIsInstance(model[0], Int8Linear)
+        self.assertIsInstance(model[2][0], nn.Linear)
+        self.assertIsInstance(model.none, QuantizedLinear)
+        self.assertTrue((model(x) - expected).abs().max() < 0.05)
+
+    @staticmethod
+    def _feed_forward(batch_size):
+        """a BERT-base feed forward block in FP32 and with simulated quantization"""
+        torch.manual_seed(0)
+        x = torch.randn(batch_size, 128, 768)
+        fp32 = nn.Sequential(nn.Linear(768, 3072), nn.ReLU(), nn.Linear(3072, 768))
+        quantized = nn.Sequential(
+            QuantizedLinear(768, 3072, mode="ema"),
+            nn.ReLU(),
+            QuantizedLinear(3072, 768, mode="ema"),
+        )
+        quantized.load_state_dict(fp32.state_dict(), strict=False)
+        with torch.no_grad():
+            hidden = fp32[1](fp32[0](x))
+            quantized[0].input_thresh.fill_(x.abs().max())
+            quantized[0].output_thresh.fill_(fp32[0](x).abs().max())
+            quantized[2].input_thresh.fill_(hidden.abs().max())
+            quantized[2].output_thresh.fill_(fp32(x).abs().max())
+        quantized.eval()
+        return x, fp32, quantized
+
+    def test_int8_feed_forward(self):
+        x, fp32, quantized = self._feed_forward(batch_size=2)
+        with torch.no_grad():
+            ref = fp32(x)
+            simulated = quantized(x)
+            convert_to_int8(quantized)
+            int8 = quantized(x)
+        self.assertTrue((int8 - simulated).abs().max() < 0.05 * ref.abs().max())
+
+    @pytest.mark.benchmark
+    def test_int8_benchmark(self):
+        """latency of a BERT-base feed forward block in FP32, simulated quantization
+        and int8 execution"""
+        x, fp32, quantized = self._feed_forward(batch_size=8)
+        with torch.no_grad():
+            for name, model in (("fp32", fp32), ("simulated", quantized), ("int8", quantized)):
+                if name == "int8":
+                    convert_to_int8(model)
+                model(x)
+                start = time.time()
+                for _ in range(5):
+                    model(x)
+                t = (time.time() - start) / 5
+                print(
+                    "\n{}: {:.2f} ms/batch, {:.0f} sequences/sec".format(
+                        name, t * 1000, x.size(0) / t
+                    )
+                )
@@ -0,0 +1,130 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from server import batching
+from server.batching import MicroBatcher
+
+
+class RecordingModel(object):
+    """batch "model" recording the size of every call"""
+
+    def __init__(self, call_time=0.0):
+        self.call_time = call_time
+        self.batch_sizes = []
+
+    def __call__(self, docs):
+        self.batch_sizes.append(len(docs))
+        time.sleep(self.call_time)
+        return [doc.upper() for doc in docs]
+
+
+def test_results_in_request_order():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait=0.01)
+    docs = ["doc {}".format(i) for i in range(50)]
+    assert batcher.submit(docs) == [d.upper() for d in docs]
+    assert max(model.batch_sizes) <= 8
+    assert sum(model.batch_sizes) == 50
+    # a single request is split into full batches
+    assert len(model.batch_sizes) < 50
+
+
+def test_concurrent_requests_are_batched_together():
+    model = RecordingModel(call_time=0.02)
+    batcher = MicroBatcher(model, max_batch_size=64, max_wait=0.05)
+    results = {}
+
+    def request(i):
+        results[i] = batcher.submit(["r{} d{}".format(i, j) for j in range(3)])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for i in range(10):
+        assert results[i] == ["R{} D{}".format(i, j) for j in range(3)]
+    assert sum(model.batch_sizes) == 30
+    assert len(model.batch_sizes) < 10
+    metrics = batcher.metrics()
+    assert metrics["documents"] == 30
+    assert metrics["batches"] == len(model.batch_sizes)
+    assert metrics["largest_batch"] == max(model.batch_sizes)
+    assert metrics["queue_depth"] == 0
+    assert sum(metrics["batch_size_histogram"].values()) == metrics["batches"]
+
+
+def test_errors_are_raised_to_callers():
+    def failing(docs):
+        raise ValueError("bad doc")
+
+    batcher = MicroBatcher(failing, max_batch_size=4, max_wait=0.0)
+    with pytest.raises(ValueError):
+        batcher.submit(["a", "b"])
+    # the worker keeps serving after a failure
+    batcher.batch_fn = RecordingModel()
+    assert batcher.submit(["a"]) == ["A"]
+
+
+def test_close_processes_pending_documents():
+    model = RecordingModel(call_time=0.02)
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait=0.0)
+    results = []
+    request = threading.Thread(target=lambda: results.extend(batcher.submit(list("abcdef"))))
+    request.start()
+    time.sleep(0.01)
+    batcher.close()
+    request.join()
+    assert results == list("ABCDEF")
+    assert batcher.closed
+    with pytest.raises(RuntimeError):
+        batcher.submit(["a"])
+
+
+def test_expired_deadline_takes_queued_documents(monkeypatch):
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait=0.5)
+    clock = itertools.count(0.0, 0.3)
+    # the deadline expires between two readings of the clock
+    monkeypatch.setattr(batching, "time", SimpleNamespace(time=lambda: next(clock)))
+    assert batcher.submit(list("abcdef")) == list("ABCDEF")
+    assert sum(model.batch_sizes) == 6
+
+
+def test_collect_errors_fail_pending_documents(monkeypatch):
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait=0.0)
+    get_nowait = batcher._queue.get_nowait
+    calls = []
+
+    def failing_get_nowait():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("broken queue")
+        return get_nowait()
+
+    monkeypatch.setattr(batcher._queue, "get_nowait", failing_get_nowait)
+    with pytest.raises(RuntimeError):
+        batcher.submit(["a", "b"])
+    # the worker survives and serves the next requests
+    assert batcher.submit(["c", "d"]) == ["C", "D"]
+    batcher.close()
@@ -0,0 +1,123 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import threading
+import time
+
+import pytest
+
+from server.registry import ModelRegistry
+
+
+class FakeService(object):
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFactory(object):
+    def __init__(self, load_time=0.0):
+        self.load_time = load_time
+        self.loads = []
+
+    def __call__(self, name):
+        if name == "missing":
+            raise Exception("'missing' is not an existing service")
+        time.sleep(self.load_time)
+        self.loads.append(name)
+        return FakeService(name)
+
+
+def test_lazy_loading():
+    factory = FakeFactory()
+    registry = ModelRegistry(factory, names=["ner", "bist"])
+    assert factory.loads == []
+    health = registry.health()
+    assert not health["models"]["ner"]["resident"]
+    service = registry.get("ner")
+    assert registry.get("ner") is service
+    assert factory.loads == ["ner"]
+    health = registry.health()
+    assert health["models"]["ner"]["resident"]
+    assert health["models"]["ner"]["loads"] == 1
+    assert health["models"]["ner"]["load_time"] is not None
+    assert not health["models"]["bist"]["resident"]
+
+
+def test_lru_eviction_by_memory_budget():
+    factory = FakeFactory()
+    registry = ModelRegistry(
+        factory, memory_budget_mb=250, memory_mb={"a": 100, "b": 100, "c": 100}
+    )
+    a = registry.get("a")
+    b = registry.get("b")
+    registry.get("a")  # b is now least recently used
+    registry.get("c")
+    assert list(registry.resident()) == ["a", "c"]
+    assert b.closed and not a.closed
+    assert registry.health()["resident_memory_mb"] == 200
+    # an evicted model is reloaded on use
+    assert registry.get("b") is not b
+    assert factory.loads == ["a", "b", "c", "b"]
+    assert registry.health()["models"]["b"]["loads"] == 2
+
+
+def test_concurrent_gets_load_once():
+    factory = FakeFactory(load_time=0.05)
+    registry = ModelRegistry(factory)
+    services = []
+    threads = [
+        threading.Thread(target=lambda: services.append(registry.get("ner"))) for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert factory.loads == ["ner"]
+    assert all(s is services[0] for s in services)
+
+
+def test_warm_up_and_errors():
+    factory = FakeFactory(load_time=0.01)
+    registry = ModelRegistry(factory, names=["ner", "bist", "missing"])
+    registry.warm_up(["ner", "missing", "bist"]).join()
+    assert factory.loads == ["ner", "bist"]
+    health = registry.health()
+    assert health["models"]["bist"]["resident"]
+    assert not health["models"]["missing"]["resident"]
+    assert "not an existing service" in health["models"]["missing"]["error"]
+    with pytest.raises(Exception):
+        registry.get("missing")
+    registry.evict("ner")
+    assert list(registry.resident()) == ["bist"]
+
+
+def test_unknown_models_not_reported():
+    factory = FakeFactory()
+    registry = ModelRegistry(factory, names=["ner"])
+    with pytest.raises(ValueError):
+        registry.get("no_such_model")
+    assert list(registry.health()["models"]) == ["ner"]
+    assert factory.loads == []
+
+    # without a list of names, names failing on their first load are not kept
+    registry = ModelRegistry(factory)
+    with pytest.raises(Exception):
+        registry.get("missing")
+    registry.get("ner")
+    assert list(registry.health()["models"]) == ["ner"]
@@ -0,0 +1,118 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import sys
+import time
+from os import path
+
+import numpy as np
+import pytest
+
+from nlp_architect import LIBRARY_ROOT
+
+sys.path.append(path.join(LIBRARY_ROOT, "solutions", "set_expansion"))
+from ann_index import IVFIndex, _normalize  # noqa: E402
+
+
+def _clustered_vectors(num_vectors, dim=64, num_topics=200, seed=0):
+    """Normalized vectors around random topic directions, like term embeddings"""
+    rng = np.random.RandomState(seed)
+    topics = rng.randn(num_topics, dim)
+    vectors = topics[rng.randint(0, num_topics, num_vectors)] + rng.randn(num_vectors, dim)
+    return _normalize(vectors).astype(np.float32)
+
+
+def _exact_search(vectors, query, topn, exclude):
+    scores = vectors.dot(query)
+    order = [i for i in np.argsort(-scores, kind="stable") if i not in exclude]
+    return [(int(i), float(scores[i])) for i in order[:topn]]
+
+
+def _queries(vectors, num_queries, seed_size=3, seed=1):
+    rng = np.random.RandomState(seed)
+    queries = []
+    for _ in range(num_queries):
+        seed_indices = set(rng.choice(len(vectors), seed_size, replace=False).tolist())
+        query = _normalize(vectors[sorted(seed_indices)].mean(axis=0))
+        queries.append((query, seed_indices))
+    return queries
+
+
+def test_search_all_clusters_is_exact():
+    vectors = _clustered_vectors(2000)
+    index = IVFIndex.build(vectors, nlist=20)
+    assert len(index) == 2000 and index.nlist == 20
+    assert sorted(index.ids.tolist()) == list(range(2000))
+    for query, exclude in _queries(vectors, 10):
+        results = index.search(query, topn=15, nprobe=index.nlist, exclude=exclude)
+        expected = _exact_search(vectors, query, 15, exclude)
+        assert [i for i, _ in results] == [i for i, _ in expected]
+        assert np.allclose([s for _, s in results], [s for _, s in expected], atol=1e-5)
+        assert not exclude.intersection(i for i, _ in results)
+
+
+def test_save_load(tmpdir):
+    vectors = _clustered_vectors(500)
+    index = IVFIndex.build(vectors, nlist=10)
+    index_dir = str(tmpdir.join("model.ivf"))
+    index.save(index_dir)
+    loaded = IVFIndex.load(index_dir)
+    assert isinstance(loaded.vectors, np.memmap)
+    query, exclude = _queries(vectors, 1)[0]
+    assert loaded.search(query, 10, 3, exclude) == index.search(query, 10, 3, exclude)
+    assert IVFIndex.load(index_dir, mmap=False).search(query, 10, 3) == index.search(query, 10, 3)
+
+
+def _recall(results, expected, topn):
+    hits = sum(
+        len({i for i, _ in res}.intersection(i for i, _ in exp))
+        for res, exp in zip(results, expected)
+    )
+    return hits / float(topn * len(expected))
+
+
+def test_recall():
+    vectors = _clustered_vectors(5000)
+    index = IVFIndex.build(vectors)
+    queries = _queries(vectors, 30)
+    topn = 10
+    expected = [_exact_search(vectors, query, topn, exclude) for query, exclude in queries]
+    recalls = {}
+    for nprobe in (1, 4, 16, 32):
+        results = [index.search(query, topn, nprobe, exclude) for query, exclude in queries]
+        recalls[nprobe] = _recall(results, expected, topn)
+    assert recalls[32] >= recalls[16] >= recalls[4] >= recalls[1]
+    assert recalls[32] >= 0.9
+
+
+@pytest.mark.benchmark
+def test_recall_latency_benchmark():
+    vectors = _clustered_vectors(100000)
+    start = time.time()
+    index = IVFIndex.build(vectors)
+    print("\nbuilt index of {} clusters in {:.1f}s".format(index.nlist, time.time() - start))
+    queries = _queries(vectors, 50)
+    topn = 10
+    start = time.time()
+    expected = [_exact_search(vectors, query, topn, exclude) for query, exclude in queries]
+    exact_time = (time.time() - start) / len(queries)
+    print("exact search: {:.2f} ms per query".format(1000 * exact_time))
+    print("nprobe  recall@{}  latency (ms)".format(topn))
+    for nprobe in (1, 4, 16, 32, 64):
+        start = time.time()
+        results = [index.search(query, topn, nprobe, exclude) for query, exclude in queries]
+        latency = (time.time() - start) / len(queries)
+        recall = _recall(results, expected, topn)
+        print("{:6d}  {:9.3f}  {:12.2f}".format(nprobe, recall, 1000 * latency))
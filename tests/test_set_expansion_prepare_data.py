@@ -0,0 +1,82 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import sys
+from os import path
+
+import pytest
+
+from nlp_architect import LIBRARY_ROOT
+
+sys.path.append(path.join(LIBRARY_ROOT, "solutions", "set_expansion"))
+from prepare_data import merge_group_maps, read_shard, shard_ranges  # noqa: E402
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_read_shards(tmpdir, trailing_newline):
+    lines = ["first line\n", "\n", "über café\n", "x\n", "a much longer line " * 20 + "\n"] * 7
+    if not trailing_newline:
+        lines[-1] = lines[-1].rstrip("\n")
+    corpus = tmpdir.join("corpus.txt")
+    corpus.write_binary("".join(lines).encode("utf8"))
+    size = path.getsize(str(corpus))
+    for num_shards in (1, 2, 3, 7, 50, size + 3):
+        ranges = shard_ranges(size, num_shards)
+        assert ranges[0][0] == 0 and ranges[-1][1] == size
+        read = [line for start, end in ranges for line in read_shard(str(corpus), start, end)]
+        assert read == lines
+
+
+def test_merge_group_maps():
+    shard1 = (
+        {"Apple": "apple", "apples": "apple", "Pear": "pear"},
+        {"apple": ["Apple", "apples"], "pear": ["Pear"]},
+        {"Apple": 2, "apples": 1, "Pear": 1},
+    )
+    # "Apples" links the apple group to a new "apples" group, "Pear" is more frequent here
+    shard2 = (
+        {"Apples": "apples", "apples": "apples", "pears": "pear", "Pear": "pear", "fig": "fig"},
+        {"apples": ["Apples", "apples"], "pear": ["pears", "Pear"], "fig": ["fig"]},
+        {"Apples": 4, "apples": 1, "pears": 3, "Pear": 1, "fig": 1},
+    )
+    np2id, id2group, id2rep, np2count = merge_group_maps([shard1, shard2])
+    assert id2group == {
+        "apple": ["Apple", "apples", "Apples"],
+        "pear": ["Pear", "pears"],
+        "fig": ["fig"],
+    }
+    assert np2id == {
+        "Apple": "apple",
+        "apples": "apple",
+        "Apples": "apple",
+        "Pear": "pear",
+        "pears": "pear",
+        "fig": "fig",
+    }
+    assert id2rep == {"apple": "Apples", "pear": "pears", "fig": "fig"}
+    assert np2count["apples"] == 2 and np2count["Pear"] == 2
+
+    # groups of a later shard are merged into the earlier group
+    shard3 = ({"fig": "figs"}, {"figs": ["fig"]}, {"fig": 1})
+    shard4 = (
+        {"figs": "figs", "fig": "fig"},
+        {"figs": ["figs"], "fig": ["fig"]},
+        {"figs": 5, "fig": 1},
+    )
+    _, id2group, id2rep, _ = merge_group_maps([shard1, shard3, shard4])
+    assert id2group["figs"] == ["fig", "figs"] and "fig" not in id2group
+    assert id2rep["figs"] == "figs"
+    # a single shard keeps its groups
+    assert merge_group_maps([shard1])[:2] == (shard1[0], shard1[1])
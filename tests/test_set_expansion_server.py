@@ -0,0 +1,139 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+# pylint: disable=redefined-outer-name
+import socket
+import sys
+import threading
+from os import path
+
+import pytest
+
+from nlp_architect import LIBRARY_ROOT
+
+sys.path.append(path.join(LIBRARY_ROOT, "solutions", "set_expansion"))
+from expand_protocol import (  # noqa: E402
+    HEADER,
+    ExpandServerError,
+    recv_message,
+    request,
+    send_message,
+)
+from expand_server import ExpandServer, ExpandService, VocabIndex  # noqa: E402
+
+
+class StaticSetExpand(object):
+    """Set expansion over a fixed vocabulary, expanding to the terms sharing a first letter"""
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+
+    def get_vocab(self):
+        return list(self.vocab)
+
+    def in_vocab(self, term):
+        return term in self.vocab
+
+    def get_group(self, term):
+        return [term, term.upper()]
+
+    def expand(self, seed, topn=500):
+        initials = {term[0] for term in seed}
+        res = [(term, 1.0 / (i + 1)) for i, term in enumerate(self.vocab) if term[0] in initials]
+        return res[:topn]
+
+
+VOCAB = ["banana", "Apple", "apricot", "cherry", "apple pie", "Blueberry", "avocado"]
+
+
+@pytest.fixture
+def server():
+    expand_server = ExpandServer(("localhost", 0), ExpandService(StaticSetExpand(VOCAB)))
+    thread = threading.Thread(target=expand_server.serve_forever, daemon=True)
+    thread.start()
+    yield expand_server.server_address
+    expand_server.shutdown()
+    expand_server.server_close()
+
+
+def test_vocab_index():
+    index = VocabIndex(VOCAB)
+    assert index.page() == {"terms": VOCAB, "total": 7}
+    assert index.page(offset=2, limit=3) == {"terms": VOCAB[2:5], "total": 7}
+    assert index.page(prefix="AP") == {"terms": ["Apple", "apple pie", "apricot"], "total": 3}
+    assert index.page(prefix="ap", offset=1, limit=1) == {"terms": ["apple pie"], "total": 3}
+    assert index.page(prefix="x") == {"terms": [], "total": 0}
+
+
+def test_requests(server):
+    host, port = server
+    assert request(host, port, "in_vocab", term="cherry") is True
+    assert request(host, port, "get_group", term="cherry") == ["cherry", "CHERRY"]
+    assert request(host, port, "get_vocab", limit=2, prefix="b") == {
+        "terms": ["banana", "Blueberry"],
+        "total": 2,
+    }
+    # a request much larger than a single recv
+    seed = ", ".join(["apple"] * 10000 + ["banana"])
+    assert request(host, port, "expand", seed=seed, topn=3) == [
+        ["banana", 1.0],
+        ["apricot", 1.0 / 3],
+        ["apple pie", 0.2],
+    ]
+    with pytest.raises(ExpandServerError):
+        request(host, port, "no_such_request")
+    with pytest.raises(ExpandServerError):
+        request(host, port, "in_vocab", bad_param=1)
+
+    stats = request(host, port, "stats")
+    assert stats["in_vocab"]["count"] == 2 and stats["in_vocab"]["errors"] == 1
+    assert stats["no_such_request"]["errors"] == 1
+    assert stats["expand"]["max_ms"] >= stats["expand"]["mean_ms"] >= 0
+
+
+def test_concurrent_connections(server):
+    host, port = server
+    errors = []
+
+    def client(i):
+        try:
+            # several requests over one connection
+            with socket.create_connection((host, port), timeout=10) as sock:
+                for j in range(20):
+                    send_message(sock, {"type": "get_vocab", "offset": (i + j) % 7, "limit": 1})
+                    response = recv_message(sock)
+                    assert response["status"] == "ok"
+                    assert response["result"]["terms"] == [VOCAB[(i + j) % 7]]
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(8)]
+    # an idle connection does not block the others
+    with socket.create_connection((host, port), timeout=10):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert not errors
+    assert request(host, port, "stats")["get_vocab"]["count"] == 8 * 20
+
+
+def test_truncated_message(server):
+    host, port = server
+    with socket.create_connection((host, port), timeout=10) as sock:
+        sock.sendall(HEADER.pack(100) + b'{"type": ')
+        sock.shutdown(socket.SHUT_WR)
+        assert sock.recv(1) == b""
+    assert request(host, port, "in_vocab", term="kiwi") is False
@@ -0,0 +1,145 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import sys
+from os import path
+from types import SimpleNamespace
+
+import gensim
+import numpy as np
+import pytest
+
+from nlp_architect import LIBRARY_ROOT
+from nlp_architect.models.np2vec import NP2vec, save_normalized_vectors
+
+sys.path.append(path.join(LIBRARY_ROOT, "solutions", "set_expansion"))
+from set_expand import SetExpand  # noqa: E402
+
+
+def _unitvec(vector):
+    return vector / np.linalg.norm(vector)
+
+
+class StubKeyedVectors(object):
+    """The parts of the gensim 3 KeyedVectors API used by SetExpand"""
+
+    def __init__(self, words, vectors):
+        self.index2word = list(words)
+        self.vocab = {w: SimpleNamespace(index=i) for i, w in enumerate(words)}
+        self.vectors = vectors
+        self.vectors_norm = None
+
+    def init_sims(self):
+        self.vectors_norm = (
+            self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        ).astype(np.float32)
+
+    def __getitem__(self, words):
+        return np.vstack([self.vectors[self.vocab[w].index] for w in words])
+
+    def n_similarity(self, ws1, ws2):
+        v1 = [self.vectors[self.vocab[w].index] for w in ws1]
+        v2 = [self.vectors[self.vocab[w].index] for w in ws2]
+        return np.dot(_unitvec(np.array(v1).mean(axis=0)), _unitvec(np.array(v2).mean(axis=0)))
+
+
+TERMS = ["apple", "orange", "banana", "red car", "blue car", "train", "pear", "apple pie"]
+
+
+def _set_expand(seed=0):
+    rng = np.random.RandomState(seed)
+    words = [t.replace(" ", "_") + "_" for t in TERMS]
+    model = StubKeyedVectors(words, rng.randn(len(words), 16).astype(np.float32))
+    model.init_sims()
+    set_expand = SetExpand.__new__(SetExpand)
+    set_expand.grouping = False
+    set_expand.mark_char = "_"
+    set_expand.np2vec_model = model
+    return set_expand
+
+
+def test_batched_scores_match_n_similarity():
+    se = _set_expand()
+    seed_id = se.get_seed_id(["apple", "orange", "pear"])
+    term_ids = [se.term2id(t) for t in TERMS]
+    scores = se.seed2terms_similarity(seed_id, term_ids)
+    expected = [se.seed2term_similarity(seed_id, [term_id]) for term_id in term_ids]
+    assert np.allclose(scores, expected, atol=1e-6)
+
+
+def test_similarity_order_and_threshold():
+    se = _set_expand()
+    seed = ["apple", "orange"]
+    candidates = ["train", "kiwi", "pear", "banana", "apple pie", "red car", "blue car"]
+    seed_id = se.get_seed_id(seed)
+    for threshold in (-1.0, -0.2, 0.0, 0.2, 0.5):
+        expected = [
+            t
+            for t in candidates
+            if se.term2id(t) is not None
+            and se.seed2term_similarity(seed_id, [se.term2id(t)]) > threshold
+        ]
+        assert se.similarity(candidates, seed, threshold) == expected
+    assert se.similarity(candidates, seed, -1.0) == [t for t in candidates if t != "kiwi"]
+
+
+def test_similarity_out_of_vocabulary():
+    se = _set_expand()
+    assert se.similarity(["kiwi", "plum"], ["apple"], -1.0) == []
+    assert se.similarity(["apple", "pear"], [], -1.0) == []
+    assert se.similarity(["apple", "pear"], ["kiwi"], -1.0) == []
+
+
+@pytest.mark.skipif(
+    int(gensim.__version__.split(".")[0]) >= 4,
+    reason="NP2vec models are gensim 3 KeyedVectors",
+)
+def test_serving_format_similarity(tmpdir):
+    rng = np.random.RandomState(0)
+    words = [t.replace(" ", "_") + "_" for t in TERMS]
+    vectors = rng.randn(len(words), 16).astype(np.float32)
+    vectors *= rng.uniform(0.1, 10.0, (len(words), 1)).astype(np.float32)
+    text_file = str(tmpdir.join("model.txt"))
+    with open(text_file, "w", encoding="utf8") as f:
+        f.write("{} {}\n".format(len(words), vectors.shape[1]))
+        for word, vec in zip(words, vectors):
+            f.write("{} {}\n".format(word, " ".join("%f" % val for val in vec)))
+    model_dir = str(tmpdir.join("model"))
+    save_normalized_vectors(words, vectors, model_dir)
+
+    text_se, serving_se = _set_expand(), _set_expand()
+    text_se.np2vec_model = NP2vec.load(text_file)
+    serving_se.np2vec_model = NP2vec.load(model_dir)
+    for se in (text_se, serving_se):
+        se.np2vec_model.init_sims()
+    seed = ["apple", "orange", "pear"]
+    candidates = ["train", "banana", "apple pie", "red car", "blue car"]
+    seed_id = text_se.get_seed_id(seed)
+    term_ids = [text_se.term2id(t) for t in candidates]
+    assert np.allclose(
+        serving_se.seed2terms_similarity(seed_id, term_ids),
+        text_se.seed2terms_similarity(seed_id, term_ids),
+        atol=1e-5,
+    )
+    for term_id in term_ids:
+        assert np.isclose(
+            serving_se.seed2term_similarity(seed_id, [term_id]),
+            text_se.seed2term_similarity(seed_id, [term_id]),
+            atol=1e-5,
+        )
+    for threshold in (-1.0, 0.0, 0.2):
+        assert serving_se.similarity(candidates, seed, threshold) == text_se.similarity(
+            candidates, seed, threshold
+        )
@@ -16,6 +16,7 @@
 # pylint: disable=redefined-outer-name
 import errno
 import os
+import time
 from os import path
 
 import pytest
@@ -102,3 +103,44 @@ def test_spacy_np_annotator(model_path, settings_path, text, phrases):
     spans = annotator(text)
     for p in phrases:
         assert p in spans
+
+
+def _pipe_docs(num_repeats):
+    nlp = SpacyInstance(model="en", disable=["textcat", "ner", "parser"]).parser
+    nlp.add_pipe(nlp.create_pipe("sentencizer"), first=True)
+    lines = [
+        "The quick brown fox jumped over the lazy dog.",
+        "",
+        "Intel is a semiconductor company. It designs microprocessors for personal computers.",
+        "The quick fox jumped.",
+        "Natural language processing models run on the new server cluster.",
+    ] * num_repeats
+    return list(nlp.pipe(lines))
+
+
+def test_np_annotator_pipe(model_path, settings_path):
+    annotator = NPAnnotator.load(model_path, settings_path)
+    docs = _pipe_docs(20)
+    expected = [[p.text for p in get_noun_phrases(annotator(doc))] for doc in docs]
+    piped = [[p.text for p in get_noun_phrases(doc)] for doc in annotator.pipe(docs)]
+    assert piped == expected
+    assert "lazy dog" in piped[0] and piped[1] == []
+
+
+@pytest.mark.benchmark
+def test_np_annotator_pipe_benchmark(model_path, settings_path):
+    annotator = NPAnnotator.load(model_path, settings_path)
+    docs = _pipe_docs(200)
+    start = time.time()
+    for doc in docs:
+        get_noun_phrases(annotator(doc))
+    doc_time = time.time() - start
+    start = time.time()
+    for doc in annotator.pipe(docs):
+        get_noun_phrases(doc)
+    pipe_time = time.time() - start
+    print(
+        "\nper document: {:.0f} lines/sec, pipe: {:.0f} lines/sec".format(
+            len(docs) / doc_time, len(docs) / pipe_time
+        )
+    )
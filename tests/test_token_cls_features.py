@@ -0,0 +1,188 @@
+# ******************************************************************************
+# Copyright 2017-2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ******************************************************************************
+import random
+import time
+import zlib
+
+import numpy as np
+import pytest
+
+from nlp_architect.data.sequential_tagging import TokenClsInputExample
+from nlp_architect.data.token_cls_features import convert_token_cls_examples
+
+LABELS = ["O", "B-PER", "I-PER", "B-LOC", "I-LOC"]
+
+CONFIGS = [
+    # bert
+    dict(cls_token_segment_id=0),
+    # xlnet
+    dict(cls_token_at_end=True, pad_on_left=True, cls_token_segment_id=2, pad_token_segment_id=4),
+    # roberta
+    dict(sep_token_extra=True, cls_token_segment_id=0),
+    dict(mask_padding_with_zero=False, pad_token=1),
+]
+
+
+class WordPieceTokenizer(object):
+    """a deterministic word piece tokenizer (pieces of 3 characters)"""
+
+    cls_token = "[CLS]"
+    sep_token = "[SEP]"
+    pad_token = "[PAD]"
+
+    def tokenize(self, word):
+        return [word[:3]] + ["##" + word[i : i + 3] for i in range(3, len(word), 3)]
+
+    def convert_tokens_to_ids(self, tokens):
+        return [zlib.crc32(t.encode()) % 30000 for t in tokens]
+
+
+def _examples(num_examples, max_words=60):
+    random.seed(0)
+    vocab = [
+        "".join(random.choice("abcdefghij") for _ in range(random.randint(1, 12)))
+        for _ in range(5000)
+    ]
+    examples = []
+    for i in range(num_examples):
+        n = random.randint(0, max_words)
+        tokens = [random.choice(vocab) for _ in range(n)]
+        examples.append(
+            TokenClsInputExample(
+                str(i), " ".join(tokens), tokens, label=[random.choice(LABELS) for _ in range(n)]
+            )
+        )
+    return examples
+
+
+def _reference_features(
+    examples,
+    max_seq_length,
+    include_labels,
+    cls_token_at_end=False,
+    pad_on_left=False,
+    cls_token="[CLS]",
+    sep_token="[SEP]",
+    pad_token=0,
+    sequence_segment_id=0,
+    sep_token_extra=False,
+    cls_token_segment_id=1,
+    pad_token_segment_id=0,
+    mask_padding_with_zero=True,
+):
+    """per-example, per-word conversion the batched conversion is checked against"""
+    tokenizer = WordPieceTokenizer()
+    label_map = {l: i for i, l in enumerate(LABELS, 1)}
+    features = []
+    for example in examples:
+        tokens, labels, valid_ids = [], [], []
+        for i, word in enumerate(example.tokens):
+            pieces = tokenizer.tokenize(word)
+            tokens.extend(pieces)
+            valid_ids.extend([1] + [0] * (len(pieces) - 1))
+            if include_labels:
+                labels.extend([label_map[example.label[i]]] + [0] * (len(pieces) - 1))
+        special_tokens_count = 3 if sep_token_extra else 2
+        num_sep = special_tokens_count - 1
+        tokens = tokens[: max_seq_length - special_tokens_count] + [sep_token] * num_sep
+        valid_ids = valid_ids[: max_seq_length - special_tokens_count] + [0] * num_sep
+        labels = labels[: max_seq_length - special_tokens_count] + [0] * num_sep
+        segment_ids = [sequence_segment_id] * len(tokens)
+        if cls_token_at_end:
+            tokens, segment_ids = tokens + [cls_token], segment_ids + [cls_token_segment_id]
+            valid_ids, labels = valid_ids + [0], labels + [0]
+        else:
+            tokens, segment_ids = [cls_token] + tokens, [cls_token_segment_id] + segment_ids
+            valid_ids, labels = [0] + valid_ids, [0] + labels
+        input_ids = tokenizer.convert_tokens_to_ids(tokens)
+        input_mask = [1 if mask_padding_with_zero else 0] * len(input_ids)
+
+        def pad(values, value):
+            padding = [value] * (max_seq_length - len(values))
+            return padding + values if pad_on_left else values + padding
+
+        features.append(
+            (
+                pad(input_ids, pad_token),
+                pad(input_mask, 0 if mask_padding_with_zero else 1),
+                pad(segment_ids, pad_token_segment_id),
+                pad(valid_ids, 0),
+                pad(labels, 0),
+            )
+        )
+    arrays = [np.array([f[i] for f in features], dtype=np.int64) for i in range(4)]
+    if include_labels:
+        arrays.append(np.array([f[4] for f in features], dtype=np.int64))
+    return arrays
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("max_seq_length", [16, 64])
+@pytest.mark.parametrize("include_labels", [True, False])
+def test_identical_to_reference(config, max_seq_length, include_labels):
+    examples = _examples(500)
+    label_map = {l: i for i, l in enumerate(LABELS, 1)} if include_labels else None
+    arrays = convert_token_cls_examples(
+        examples, WordPieceTokenizer(), max_seq_length, label_map, chunk_size=128, **config
+    )
+    expected = _reference_features(examples, max_seq_length, include_labels, **config)
+    for array, exp_array in zip(arrays, expected):
+        assert array.tobytes() == exp_array.tobytes()
+    if not include_labels:
+        assert arrays[4] is None
+
+
+def test_label_count_mismatch():
+    examples = _examples(10)
+    examples[3].label = examples[3].label[:-1]
+    label_map = {l: i for i, l in enumerate(LABELS, 1)}
+    with pytest.raises(ValueError):
+        convert_token_cls_examples(examples, WordPieceTokenizer(), 32, label_map)
+    # labels are not checked when not converted
+    convert_token_cls_examples(examples, WordPieceTokenizer(), 32)
+
+
+def test_process_pool():
+    examples = _examples(1000)
+    label_map = {l: i for i, l in enumerate(LABELS, 1)}
+    serial = convert_token_cls_examples(examples, WordPieceTokenizer(), 32, label_map)
+    parallel = convert_token_cls_examples(
+        examples, WordPieceTokenizer(), 32, label_map, num_workers=2, chunk_size=200
+    )
+    for a, b in zip(serial, parallel):
+        assert np.array_equal(a, b)
+
+
+@pytest.mark.benchmark
+def test_conversion_benchmark():
+    examples = _examples(20000, max_words=40)
+    label_map = {l: i for i, l in enumerate(LABELS, 1)}
+
+    start = time.time()
+    expected = _reference_features(examples, 64, True)
+    reference_time = time.time() - start
+
+    start = time.time()
+    arrays = convert_token_cls_examples(examples, WordPieceTokenizer(), 64, label_map)
+    batched_time = time.time() - start
+
+    print(
+        "\n{} examples: per-word conversion={:.3f}s batched={:.3f}s".format(
+            len(examples), reference_time, batched_time
+        )
+    )
+    for array, exp_array in zip(arrays, expected):
+        assert np.array_equal(array, exp_array)